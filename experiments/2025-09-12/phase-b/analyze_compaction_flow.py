@@ -5,7 +5,7 @@ Compaction Flow 분석
 """
 
 import os
-import re
+import sys
 import json
 import pandas as pd
 import numpy as np
@@ -14,91 +14,84 @@ from pathlib import Path
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+# 저장소 루트의 model 패키지 사용
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from model.log_cache import load_parsed_log
+
 # Liberation Serif 폰트 설정 (Times 스타일)
 plt.rcParams['font.family'] = 'Liberation Serif'
 plt.rcParams['axes.unicode_minus'] = False
 
 def parse_log_file(log_file):
-    """LOG 파일 파싱"""
+    """LOG 파일 파싱 (EVENT_LOG_v1 JSON 우선, 없으면 텍스트 라인 사용)"""
     print(f"📖 LOG 파일 파싱 중: {log_file}")
     
+    parsed = load_parsed_log(log_file)
     compaction_data = []
-    current_timestamp = None
     
-    with open(log_file, 'r') as f:
-        for line in f:
-            line = line.strip()
-            
-            # 시간 정보 추출
-            time_match = re.search(r'(\d{4}/\d{2}/\d{2}-\d{2}:\d{2}:\d{2}\.\d+)', line)
-            if time_match:
-                current_timestamp = time_match.group(1)
-            
-            # Compaction start 로그 파싱
-            if "Compaction start" in line:
-                compaction_data.append(parse_compaction_start_line(line, current_timestamp))
-            
-            # Compaction finish 로그 파싱 (compacted to 패턴)
-            elif "compacted to:" in line:
-                compaction_data.append(parse_compaction_finish_line(line, current_timestamp))
+    if parsed.has_event_log():
+        # EVENT_LOG_v1: 정확한 바이트 수와 소요 시간 포함
+        for event in parsed.compactions_started:
+            compaction_data.append(make_compaction_start(
+                event.timestamp, event.input_level,
+                ' '.join(f'{count}@{level}' for level, count in event.input_files),
+                input_bytes=event.input_data_size
+            ))
+        for event in parsed.compactions_finished:
+            compaction_data.append(make_compaction_finish(
+                event.timestamp, event.output_level, list(event.lsm_state),
+                output_bytes=event.total_output_size,
+                duration_s=event.compaction_time_micros / 1e6
+            ))
+    else:
+        # 텍스트 라인 (Compacting ... / compacted to: ...)
+        for event in parsed.compaction_starts:
+            compaction_data.append(make_compaction_start(
+                event.timestamp, event.input_level, f"{event.input_files} files"
+            ))
+        for event in parsed.compaction_finishes:
+            compaction_data.append(make_compaction_finish(
+                event.timestamp, event.output_level, list(event.files_per_level),
+                output_bytes=int(event.output_mb * 1024 * 1024)
+            ))
+    
+    compaction_data.sort(key=lambda d: d['timestamp'] or '')
     
     print(f"✅ 파싱 완료: Compaction {len(compaction_data)}개")
     return compaction_data
 
-def parse_compaction_start_line(line, timestamp):
-    """Compaction start 라인 파싱"""
-    try:
-        # Base level 추출
-        base_level_match = re.search(r'Base level (\d+)', line)
-        base_level = int(base_level_match.group(1)) if base_level_match else -1
-        
-        # Input files 추출
-        inputs_match = re.search(r'inputs: \[([^\]]+)\]', line)
-        input_files = inputs_match.group(1) if inputs_match else ""
-        
-        return {
-            'timestamp': timestamp,
-            'type': 'start',
-            'base_level': base_level,
-            'input_files': input_files,
-            'output_files': "",
-            'compaction_type': f"Level-{base_level}"
-        }
-    except Exception as e:
-        return None
+def make_compaction_start(timestamp, base_level, input_files, input_bytes=0):
+    """Compaction start 레코드 생성"""
+    return {
+        'timestamp': timestamp,
+        'type': 'start',
+        'base_level': base_level,
+        'input_files': input_files,
+        'output_files': "",
+        'compaction_type': f"Level-{base_level}",
+        'input_bytes': input_bytes
+    }
 
-def parse_compaction_finish_line(line, timestamp):
-    """Compaction finish 라인 파싱 (compacted to 패턴)"""
-    try:
-        # files[6 3 0 0 0 0 0] 패턴에서 레벨별 파일 수 추출
-        files_match = re.search(r'files\[([^\]]+)\]', line)
-        if files_match:
-            files_str = files_match.group(1)
-            files_per_level = [int(x) for x in files_str.split()]
-            
-            # 레벨별 파일 수 분석
-            level_analysis = {}
-            for level, file_count in enumerate(files_per_level):
-                if file_count > 0:
-                    level_analysis[f'level_{level}'] = file_count
-            
-            # Base level 추출 (level 정보에서)
-            level_match = re.search(r'level (\d+)', line)
-            base_level = int(level_match.group(1)) if level_match else -1
-            
-            return {
-                'timestamp': timestamp,
-                'type': 'finished',
-                'base_level': base_level,
-                'input_files': "",
-                'output_files': files_str,
-                'compaction_type': f"Level-{base_level}",
-                'files_per_level': files_per_level,
-                'level_analysis': level_analysis
-            }
-        return None
-    except Exception as e:
-        return None
+def make_compaction_finish(timestamp, base_level, files_per_level, output_bytes=0, duration_s=0.0):
+    """Compaction finish 레코드 생성 (files_per_level: 레벨별 파일 수)"""
+    # 레벨별 파일 수 분석
+    level_analysis = {}
+    for level, file_count in enumerate(files_per_level):
+        if file_count > 0:
+            level_analysis[f'level_{level}'] = file_count
+    
+    return {
+        'timestamp': timestamp,
+        'type': 'finished',
+        'base_level': base_level,
+        'input_files': "",
+        'output_files': ' '.join(str(x) for x in files_per_level),
+        'compaction_type': f"Level-{base_level}",
+        'files_per_level': files_per_level,
+        'level_analysis': level_analysis,
+        'output_bytes': output_bytes,
+        'duration_s': duration_s
+    }
 
 def analyze_compaction_flow(compaction_data):
     """Compaction Flow 분석"""
@@ -5,6 +5,7 @@ Compaction 패턴 상세 분석
 """
 
 import os
+import sys
 import re
 import json
 import pandas as pd
@@ -14,6 +15,10 @@ from pathlib import Path
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+# 저장소 루트의 model 패키지 사용 (회전/압축된 LOG 읽기)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from model.log_source import open_log
+
 # Liberation Serif 폰트 설정 (Times 스타일)
 plt.rcParams['font.family'] = 'Liberation Serif'
 plt.rcParams['axes.unicode_minus'] = False
@@ -25,7 +30,7 @@ def parse_log_file(log_file):
     compaction_data = []
     current_timestamp = None
     
-    with open(log_file, 'r') as f:
+    with open_log(log_file) as f:
         for line in f:
             line = line.strip()
             
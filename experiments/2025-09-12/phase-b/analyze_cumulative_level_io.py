@@ -5,6 +5,7 @@ Flush부터 각 레벨까지의 I/O 처리량을 시간대별로 누적 분석
 """
 
 import os
+import sys
 import re
 import json
 import pandas as pd
@@ -14,114 +15,51 @@ from pathlib import Path
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+# 저장소 루트의 model 패키지 사용 (파싱 결과 캐시 공유)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from model.log_cache import load_parsed_log
+
 # Liberation Serif 폰트 설정 (Times 스타일)
 plt.rcParams['font.family'] = 'Liberation Serif'
 plt.rcParams['axes.unicode_minus'] = False
 
 def parse_log_file(log_file):
-    """LOG 파일 파싱"""
+    """LOG 파일 파싱 (캐시된 파싱 결과 사용)"""
     print(f"📖 LOG 파일 파싱 중: {log_file}")
     
-    stats_data = []
-    compaction_data = []
-    flush_data = []
-    current_timestamp = None
-    
-    with open(log_file, 'r') as f:
-        for line in f:
-            line = line.strip()
-            
-            # 시간 정보 추출
-            time_match = re.search(r'(\d{4}/\d{2}/\d{2}-\d{2}:\d{2}:\d{2}\.\d+)', line)
-            if time_match:
-                current_timestamp = time_match.group(1)
-            
-            # Stats 로그 파싱
-            if "Cumulative writes:" in line:
-                stats_data.append(parse_stats_line(line, current_timestamp))
-            
-            # Compaction 로그 파싱
-            elif "Compaction start" in line or "Compaction finished" in line:
-                compaction_data.append(parse_compaction_line(line))
-            
-            # Flush 로그 파싱
-            elif "Flushing memtable" in line or "Flush lasted" in line:
-                flush_data.append(parse_flush_line(line))
+    parsed = load_parsed_log(log_file)
     
-    print(f"✅ 파싱 완료: Stats {len(stats_data)}개, Compaction {len(compaction_data)}개, Flush {len(flush_data)}개")
-    return stats_data, compaction_data, flush_data
-
-def parse_stats_line(line, timestamp):
-    """Stats 라인 파싱"""
-    try:
-        # cumulative_writes 추출 (K 단위 처리)
-        cum_writes_match = re.search(r'Cumulative writes: (\d+)K writes', line)
-        if cum_writes_match:
-            cum_writes = int(cum_writes_match.group(1)) * 1000
-        else:
-            cum_writes_match = re.search(r'Cumulative writes: (\d+) writes', line)
-            cum_writes = int(cum_writes_match.group(1)) if cum_writes_match else 0
-        
-        # MB/s에서 write_rate 계산
-        mbps_match = re.search(r'ingest: [\d.]+ GB, ([\d.]+) MB/s', line)
-        if mbps_match:
-            mbps = float(mbps_match.group(1))
-            write_rate = mbps * 1024  # MB/s * 1024 = ops/sec (1KB per op)
-        else:
-            write_rate = 0
-        
-        return {
-            'timestamp': timestamp,
-            'write_rate': write_rate,
-            'cumulative_writes': cum_writes
+    # Stats 로그 (DUMPING STATS의 Cumulative writes 라인)
+    stats_data = [
+        {
+            'timestamp': dump.timestamp,
+            'write_rate': dump.ingest_mb_s * 1024,  # MB/s * 1024 = ops/sec (1KB per op)
+            'cumulative_writes': dump.cumulative_writes
         }
-    except Exception as e:
-        return None
-
-def parse_compaction_line(line):
-    """Compaction 라인 파싱"""
-    try:
-        timestamp_match = re.search(r'(\d{4}/\d{2}/\d{2}-\d{2}:\d{2}:\d{2}\.\d+)', line)
-        timestamp = timestamp_match.group(1) if timestamp_match else None
-        
-        # level 추출 (Base level 정보에서)
-        level_match = re.search(r'Base level (\d+)', line)
-        level = int(level_match.group(1)) if level_match else -1
-        
-        # Compaction 타입 추출
-        compaction_type = "unknown"
-        if "start" in line:
-            compaction_type = "start"
-        elif "finished" in line:
-            compaction_type = "finished"
-        
-        return {
-            'timestamp': timestamp,
-            'level': level,
-            'type': compaction_type
+        for dump in parsed.stats_dumps
+    ]
+    
+    # Compaction 로그 (Compacting ... files to Lx; 시작 레벨 = Base level)
+    compaction_data = [
+        {
+            'timestamp': event.timestamp,
+            'level': event.input_level,
+            'type': 'start'
         }
-    except Exception as e:
-        return None
-
-def parse_flush_line(line):
-    """Flush 라인 파싱"""
-    try:
-        timestamp_match = re.search(r'(\d{4}/\d{2}/\d{2}-\d{2}:\d{2}:\d{2}\.\d+)', line)
-        timestamp = timestamp_match.group(1) if timestamp_match else None
-        
-        # Flush 타입 추출
-        flush_type = "unknown"
-        if "Flushing memtable" in line:
-            flush_type = "start"
-        elif "Flush lasted" in line:
-            flush_type = "finished"
-        
-        return {
-            'timestamp': timestamp,
-            'type': flush_type
+        for event in parsed.compaction_starts
+    ]
+    
+    # Flush 로그 (Level-0 flush table #N: ... bytes)
+    flush_data = [
+        {
+            'timestamp': event.timestamp,
+            'type': 'start'
         }
-    except Exception as e:
-        return None
+        for event in parsed.flushes
+    ]
+    
+    print(f"✅ 파싱 완료: Stats {len(stats_data)}개, Compaction {len(compaction_data)}개, Flush {len(flush_data)}개")
+    return stats_data, compaction_data, flush_data
 
 def analyze_cumulative_level_io(stats_data, compaction_data, flush_data):
     """시간대별 누적 레벨별 I/O 처리량 분석"""
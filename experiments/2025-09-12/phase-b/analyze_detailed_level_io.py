@@ -5,6 +5,7 @@ RocksDB LOG 파일에서 레벨별 I/O 패턴의 세부 분석
 """
 
 import os
+import sys
 import re
 import json
 import pandas as pd
@@ -14,113 +15,44 @@ from pathlib import Path
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+# 저장소 루트의 model 패키지 사용 (캐시된 파싱 결과 + 컬럼형 이벤트 저장소)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from model.log_cache import load_parsed_log
+from model.compaction_store import CompactionStore, FLUSH_LEVEL, KIND_INTRA_L0, MB, UNKNOWN_LEVEL
+
 # Liberation Serif 폰트 설정 (Times 스타일)
 plt.rcParams['font.family'] = 'Liberation Serif'
 plt.rcParams['axes.unicode_minus'] = False
 
 def parse_log_file(log_file):
-    """LOG 파일 파싱"""
+    """LOG 파일 파싱 (캐시된 파싱 결과 사용)"""
     print(f"📖 LOG 파일 파싱 중: {log_file}")
     
-    stats_data = []
-    compaction_data = []
-    flush_data = []
-    current_timestamp = None
+    parsed = load_parsed_log(log_file)
     
-    with open(log_file, 'r') as f:
-        for line in f:
-            line = line.strip()
-            
-            # 시간 정보 추출
-            time_match = re.search(r'(\d{4}/\d{2}/\d{2}-\d{2}:\d{2}:\d{2}\.\d+)', line)
-            if time_match:
-                current_timestamp = time_match.group(1)
-            
-            # Stats 로그 파싱
-            if "Cumulative writes:" in line:
-                stats_data.append(parse_stats_line(line, current_timestamp))
-            
-            # Compaction 로그 파싱
-            elif "Compaction start" in line or "Compaction finished" in line:
-                compaction_data.append(parse_compaction_line(line))
-            
-            # Flush 로그 파싱
-            elif "Flush start" in line or "Flush finished" in line:
-                flush_data.append(parse_flush_line(line))
-    
-    print(f"✅ 파싱 완료: Stats {len(stats_data)}개, Compaction {len(compaction_data)}개, Flush {len(flush_data)}개")
-    return stats_data, compaction_data, flush_data
-
-def parse_stats_line(line, timestamp):
-    """Stats 라인 파싱"""
-    try:
-        write_rate_match = re.search(r'write_rate:(\d+(?:\.\d+)?)', line)
-        write_rate = float(write_rate_match.group(1)) if write_rate_match else 0
-        
-        cum_writes_match = re.search(r'Cumulative writes:(\d+)', line)
-        cum_writes = int(cum_writes_match.group(1)) if cum_writes_match else 0
-        
-        return {
-            'timestamp': timestamp,
-            'write_rate': write_rate,
-            'cumulative_writes': cum_writes
+    # Stats 로그 (DUMPING STATS의 Cumulative writes 라인)
+    stats_data = [
+        {
+            'timestamp': dump.timestamp,
+            'write_rate': dump.ingest_mb_s * 1024,  # MB/s * 1024 = ops/sec (1KB per op)
+            'cumulative_writes': dump.cumulative_writes
         }
-    except Exception as e:
-        return None
-
-def parse_compaction_line(line):
-    """Compaction 라인 파싱"""
-    try:
-        level_match = re.search(r'level:(\d+)', line)
-        level = int(level_match.group(1)) if level_match else -1
-        
-        timestamp_match = re.search(r'(\d{4}/\d{2}/\d{2}-\d{2}:\d{2}:\d{2}\.\d+)', line)
-        timestamp = timestamp_match.group(1) if timestamp_match else None
-        
-        # Compaction 타입 추출
-        compaction_type = "unknown"
-        if "start" in line:
-            compaction_type = "start"
-        elif "finished" in line:
-            compaction_type = "finished"
-        
-        return {
-            'timestamp': timestamp,
-            'level': level,
-            'type': compaction_type
-        }
-    except Exception as e:
-        return None
-
-def parse_flush_line(line):
-    """Flush 라인 파싱"""
-    try:
-        timestamp_match = re.search(r'(\d{4}/\d{2}/\d{2}-\d{2}:\d{2}:\d{2}\.\d+)', line)
-        timestamp = timestamp_match.group(1) if timestamp_match else None
-        
-        # Flush 타입 추출
-        flush_type = "unknown"
-        if "start" in line:
-            flush_type = "start"
-        elif "finished" in line:
-            flush_type = "finished"
-        
-        return {
-            'timestamp': timestamp,
-            'type': flush_type
-        }
-    except Exception as e:
-        return None
+        for dump in parsed.stats_dumps
+    ]
+    
+    # Flush/Compaction 작업 (flush = 시작 레벨 -1)
+    store = CompactionStore.from_parsed(parsed)
+    
+    print(f"✅ 파싱 완료: Stats {len(stats_data)}개, Flush/Compaction {len(store)}개")
+    return stats_data, store
 
-def analyze_detailed_level_io(stats_data, compaction_data, flush_data):
+def analyze_detailed_level_io(stats_data, store):
     """상세 레벨별 I/O 분석"""
     print("📊 상세 레벨별 I/O 분석 중...")
     
     try:
         # 데이터프레임 생성
         stats_df = pd.DataFrame([d for d in stats_data if d is not None])
-        compaction_df = pd.DataFrame([d for d in compaction_data if d is not None])
-        flush_df = pd.DataFrame([d for d in flush_data if d is not None])
         
         if stats_df.empty:
             print("❌ 데이터가 없습니다!")
@@ -128,10 +60,6 @@ def analyze_detailed_level_io(stats_data, compaction_data, flush_data):
         
         # 시간 변환
         stats_df['datetime'] = pd.to_datetime(stats_df['timestamp'], format='%Y/%m/%d-%H:%M:%S.%f')
-        if not compaction_df.empty:
-            compaction_df['datetime'] = pd.to_datetime(compaction_df['timestamp'], format='%Y/%m/%d-%H:%M:%S.%f')
-        if not flush_df.empty:
-            flush_df['datetime'] = pd.to_datetime(flush_df['timestamp'], format='%Y/%m/%d-%H:%M:%S.%f')
         
         # 시간별 그룹화
         stats_df['hour'] = stats_df['datetime'].dt.floor('h')
@@ -247,22 +175,33 @@ def analyze_detailed_level_io(stats_data, compaction_data, flush_data):
         print(f"  최대 성능: {stats_df['write_rate'].max():.1f} ops/sec")
         print(f"  최소 성능: {stats_df['write_rate'].min():.1f} ops/sec")
         
-        # Compaction 분석 (있는 경우)
-        if not compaction_df.empty:
+        # Compaction 분석 (있는 경우, 시작 레벨별 횟수와 읽기/쓰기 바이트)
+        counts = store.totals('count', by='input_level')
+        read_bytes = store.totals('bytes_in', by='input_level')
+        write_bytes = store.totals('bytes_out', by='input_level')
+        compaction_levels = [level for level in counts if level != FLUSH_LEVEL and counts[level]]
+        if compaction_levels:
             print(f"\n  Compaction 분석:")
-            print(f"    총 Compaction: {len(compaction_df)}회")
-            level_counts = compaction_df['level'].value_counts().sort_index()
-            for level, count in level_counts.items():
-                level_name = f'Level {level}' if level != -1 else 'Memtable'
-                print(f"    {level_name}: {count}회")
+            print(f"    총 Compaction: {int(sum(counts[l] for l in compaction_levels))}회")
+            for level in compaction_levels:
+                name = '입력 레벨 미상' if level == UNKNOWN_LEVEL else f'Level {level}'
+                print(f"    {name}: {int(counts[level])}회 "
+                      f"(읽기 {read_bytes[level] / MB:.1f} MB, 쓰기 {write_bytes[level] / MB:.1f} MB)")
+            
+            # Trivial move(I/O 없는 파일 이동)와 intra-L0는 따로 표시
+            kinds = store.totals('count', by='kind')
+            if kinds.get(KIND_INTRA_L0):
+                print(f"    (Level 0 중 intra-L0: {int(kinds[KIND_INTRA_L0])}회)")
+            moves = store.totals('moves', by='output_level')
+            moved_bytes = store.totals('bytes_moved', by='output_level')
+            for level, count in moves.items():
+                if count:
+                    print(f"    Trivial move → L{level}: {int(count)}회 ({moved_bytes[level] / MB:.1f} MB, I/O 없음)")
         
         # Flush 분석 (있는 경우)
-        if not flush_df.empty:
+        if FLUSH_LEVEL in counts:
             print(f"\n  Flush 분석:")
-            print(f"    총 Flush: {len(flush_df)}회")
-            flush_type_counts = flush_df['type'].value_counts()
-            for flush_type, count in flush_type_counts.items():
-                print(f"    {flush_type}: {count}회")
+            print(f"    총 Flush: {int(counts[FLUSH_LEVEL])}회 (쓰기 {write_bytes[FLUSH_LEVEL] / MB:.1f} MB)")
         
     except Exception as e:
         print(f"❌ 분석 실패: {e}")
@@ -286,14 +225,14 @@ def main():
     print(f"📖 메인 LOG 파일: {main_log}")
     
     # LOG 파일 분석
-    stats_data, compaction_data, flush_data = parse_log_file(main_log)
+    stats_data, store = parse_log_file(main_log)
     
     if not stats_data:
         print("❌ 분석할 데이터가 없습니다!")
         return
     
     # 상세 레벨별 I/O 분석
-    analyze_detailed_level_io(stats_data, compaction_data, flush_data)
+    analyze_detailed_level_io(stats_data, store)
     
     print("\n✅ 상세 레벨별 I/O 분석 완료!")
 
@@ -3,6 +3,7 @@
 Phase-B 시간별 Flush 및 Flush+Compaction 처리량 분석
 """
 
+import sys
 import re
 import json
 import numpy as np
@@ -12,212 +13,98 @@ from pathlib import Path
 from datetime import datetime
 import seaborn as sns
 
+# 저장소 루트의 model 패키지 사용 (캐시된 파싱 결과 + 컬럼형 이벤트 저장소)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from model.log_cache import load_parsed_log
+from model.compaction_store import CompactionStore, FLUSH_LEVEL, KIND_FLUSH, MB
+
 # Liberation Serif 폰트 설정 (Times 스타일)
 plt.rcParams['font.family'] = 'Liberation Serif'
 plt.rcParams['axes.unicode_minus'] = False
 
 class HourlyFlushCompactionAnalyzer:
     def __init__(self):
-        self.flush_events = []
-        self.compaction_events = []
+        self.store = None
         self.stats_events = []
         
     def parse_log_file(self, log_file):
-        """LOG 파일 파싱"""
+        """LOG 파일 파싱 (EVENT_LOG_v1 flush/compaction → 컬럼형 이벤트 저장소)"""
         print(f"📖 LOG 파일 파싱: {log_file}")
         
-        with open(log_file, 'r') as f:
-            for line_num, line in enumerate(f, 1):
-                try:
-                    # Flush 이벤트 파싱
-                    flush_data = self.parse_flush_line(line)
-                    if flush_data:
-                        self.flush_events.append(flush_data)
-                    
-                    # Compaction 이벤트 파싱
-                    compaction_data = self.parse_compaction_line(line)
-                    if compaction_data:
-                        self.compaction_events.append(compaction_data)
-                    
-                    # Stats 이벤트 파싱
-                    stats_data = self.parse_stats_line(line)
-                    if stats_data:
-                        self.stats_events.append(stats_data)
-                        
-                except Exception as e:
-                    if line_num % 10000 == 0:
-                        print(f"  처리 중... 라인 {line_num}")
-                    continue
-        
-        print(f"✅ 파싱 완료: Flush {len(self.flush_events)}, Compaction {len(self.compaction_events)}, Stats {len(self.stats_events)}")
-    
-    def parse_flush_line(self, line):
-        """Flush 라인 파싱"""
-        try:
-            # Flush 시작/완료 이벤트 (EVENT_LOG_v1 형식)
-            if "flush_started" in line or "flush_finished" in line:
-                timestamp_match = re.search(r'(\d{4}/\d{2}/\d{2}-\d{2}:\d{2}:\d{2}\.\d+)', line)
-                timestamp = timestamp_match.group(1) if timestamp_match else None
-                
-                # Flush 크기 추출 (flush_started에서만 total_data_size가 있음)
-                size_mb = 0.0
-                if "flush_started" in line:
-                    size_match = re.search(r'"total_data_size": (\d+)', line)
-                    if size_match:
-                        size_bytes = int(size_match.group(1))
-                        size_mb = size_bytes / (1024 * 1024)  # bytes to MB
-                
-                # Flush 타입
-                flush_type = "start" if "flush_started" in line else "finish"
-                
-                return {
-                    'timestamp': timestamp,
-                    'type': flush_type,
-                    'size_mb': size_mb,
-                    'line': line.strip()
-                }
-        except Exception:
-            return None
+        parsed = load_parsed_log(log_file)
+        self.store = CompactionStore.from_parsed(parsed)
+        
+        # Stats 이벤트 (DUMPING STATS의 Cumulative writes 라인)
+        self.stats_events = [
+            {
+                'timestamp': dump.timestamp,
+                'ops_per_sec': dump.ingest_mb_s * 1024,  # MB/s * 1024 = ops/sec (1KB per op)
+                'cumulative_writes': dump.cumulative_writes
+            }
+            for dump in parsed.stats_dumps
+        ]
+        
+        n_flush = int((self.store.events['input_level'] == FLUSH_LEVEL).sum())
+        print(f"✅ 파싱 완료: Flush {n_flush}, Compaction {len(self.store) - n_flush}, Stats {len(self.stats_events)}")
     
-    def parse_compaction_line(self, line):
-        """Compaction 라인 파싱"""
-        try:
-            # Compaction 시작/완료 이벤트 (EVENT_LOG_v1 형식)
-            if "compaction_started" in line or "compaction_finished" in line:
-                timestamp_match = re.search(r'(\d{4}/\d{2}/\d{2}-\d{2}:\d{2}:\d{2}\.\d+)', line)
-                timestamp = timestamp_match.group(1) if timestamp_match else None
-                
-                # Compaction 크기 추출
-                if "compaction_started" in line:
-                    # input_data_size에서 크기 추출
-                    size_match = re.search(r'"input_data_size": (\d+)', line)
-                    if size_match:
-                        size_bytes = int(size_match.group(1))
-                        size_mb = size_bytes / (1024 * 1024)  # bytes to MB
-                    else:
-                        size_mb = 0.0
-                else:  # compaction_finished
-                    # total_output_size에서 크기 추출
-                    size_match = re.search(r'"total_output_size": (\d+)', line)
-                    if size_match:
-                        size_bytes = int(size_match.group(1))
-                        size_mb = size_bytes / (1024 * 1024)  # bytes to MB
-                    else:
-                        size_mb = 0.0
-                
-                # Level 정보 추출
-                level_match = re.search(r'"output_level": (\d+)', line)
-                if level_match:
-                    level = int(level_match.group(1))
-                else:
-                    level = -1
-                
-                # Compaction 타입
-                compaction_type = "start" if "compaction_started" in line else "finish"
-                
-                return {
-                    'timestamp': timestamp,
-                    'type': compaction_type,
-                    'size_mb': size_mb,
-                    'level': level,
-                    'line': line.strip()
-                }
-        except Exception:
-            return None
-    
-    def parse_stats_line(self, line):
-        """Stats 라인 파싱"""
-        try:
-            # Stats 라인에서 처리량 정보 추출
-            if "Cumulative writes" in line and "ingest:" in line:
-                timestamp_match = re.search(r'(\d{4}/\d{2}/\d{2}-\d{2}:\d{2}:\d{2}\.\d+)', line)
-                timestamp = timestamp_match.group(1) if timestamp_match else None
-                
-                # MB/s에서 처리량 계산
-                mbps_match = re.search(r'ingest: [\d.]+ GB, ([\d.]+) MB/s', line)
-                if mbps_match:
-                    mbps = float(mbps_match.group(1))
-                    # MB/s를 ops/sec로 변환 (1KB 키+값 가정)
-                    ops_per_sec = mbps * 1024  # MB/s * 1024 = ops/sec (1KB per op)
-                else:
-                    ops_per_sec = 0
-                
-                # Cumulative writes 추출
-                cum_writes_match = re.search(r'Cumulative writes: (\d+)K writes', line)
-                if cum_writes_match:
-                    cum_writes = int(cum_writes_match.group(1)) * 1000
-                else:
-                    cum_writes_match = re.search(r'Cumulative writes: (\d+) writes', line)
-                    cum_writes = int(cum_writes_match.group(1)) if cum_writes_match else 0
-                
-                return {
-                    'timestamp': timestamp,
-                    'ops_per_sec': ops_per_sec,
-                    'cumulative_writes': cum_writes,
-                    'line': line.strip()
-                }
-        except Exception:
-            return None
-    
-    def analyze_hourly_throughput(self):
-        """시간별 처리량 분석"""
+    def analyze_hourly_throughput(self, bucket_s=3600):
+        """시간별 처리량 분석 (버킷 크기 변경 가능, 레벨별 prefix sum 범위 질의)"""
         print("📊 시간별 처리량 분석 중...")
         
-        # 시간별 데이터 정리
         hourly_data = {}
         
-        # Flush 이벤트 처리
-        for event in self.flush_events:
-            if event['timestamp']:
-                hour = event['timestamp'][:13]  # YYYY/MM/DD-HH
-                if hour not in hourly_data:
-                    hourly_data[hour] = {
-                        'flush_count': 0,
-                        'flush_size_mb': 0.0,
-                        'compaction_count': 0,
-                        'compaction_size_mb': 0.0,
-                        'total_ops_per_sec': 0.0,
-                        'stats_count': 0
-                    }
-                
-                if event['type'] == 'start':  # 시작된 flush의 크기 계산
-                    hourly_data[hour]['flush_count'] += 1
-                    hourly_data[hour]['flush_size_mb'] += event['size_mb']
-        
-        # Compaction 이벤트 처리
-        for event in self.compaction_events:
-            if event['timestamp']:
-                hour = event['timestamp'][:13]  # YYYY/MM/DD-HH
-                if hour not in hourly_data:
-                    hourly_data[hour] = {
-                        'flush_count': 0,
-                        'flush_size_mb': 0.0,
-                        'compaction_count': 0,
-                        'compaction_size_mb': 0.0,
-                        'total_ops_per_sec': 0.0,
-                        'stats_count': 0
-                    }
-                
-                if event['type'] == 'finish':  # 완료된 compaction만 계산
-                    hourly_data[hour]['compaction_count'] += 1
-                    hourly_data[hour]['compaction_size_mb'] += event['size_mb']
+        def empty_hour():
+            return {
+                'flush_count': 0,
+                'flush_size_mb': 0.0,
+                'compaction_count': 0,
+                'compaction_size_mb': 0.0,
+                'total_ops_per_sec': 0.0,
+                'stats_count': 0
+            }
+        
+        if len(self.store):
+            store = self.store
+            edges = store.bucket_edges(bucket_s)
+            
+            # Flush는 시작 시각 기준으로 집계 (flush_started 기준, 저장소 질의는 완료 시각 기준)
+            flushes = store.events[store.events['kind'] == KIND_FLUSH]
+            order = np.argsort(flushes['start_us'], kind='stable')
+            flush_start = flushes['start_us'][order]
+            flush_prefix = np.zeros(len(flushes) + 1)
+            np.cumsum(flushes['bytes_in'][order], out=flush_prefix[1:])
+            step = int(bucket_s * 1e6)
+            while len(flush_start) and flush_start[0] < edges[0]:
+                edges = np.insert(edges, 0, edges[0] - step)
+            starts, ends = edges[:-1], edges[1:]
+            
+            # Flush: memtable 데이터 크기 (flush_started의 total_data_size)
+            lo, hi = np.searchsorted(flush_start, starts), np.searchsorted(flush_start, ends)
+            flush_count = hi - lo
+            flush_bytes = flush_prefix[hi] - flush_prefix[lo]
+            # Compaction: 완료된 compaction의 출력 크기 (전체 - flush, 완료 시각 기준)
+            compaction_count = (store.window(starts, ends, 'count')
+                                - store.window(starts, ends, 'count', FLUSH_LEVEL, 'input_level'))
+            compaction_bytes = (store.window(starts, ends, 'bytes_out')
+                                - store.window(starts, ends, 'bytes_out', FLUSH_LEVEL, 'input_level'))
+            
+            labels = store.bucket_index(edges).strftime('%Y/%m/%d-%H')
+            for k, hour in enumerate(labels):
+                if flush_count[k] == 0 and compaction_count[k] == 0:
+                    continue
+                data = hourly_data.setdefault(hour, empty_hour())
+                data['flush_count'] = int(flush_count[k])
+                data['flush_size_mb'] = float(flush_bytes[k] / MB)
+                data['compaction_count'] = int(compaction_count[k])
+                data['compaction_size_mb'] = float(compaction_bytes[k] / MB)
         
         # Stats 이벤트 처리
         for event in self.stats_events:
             if event['timestamp']:
                 hour = event['timestamp'][:13]  # YYYY/MM/DD-HH
-                if hour not in hourly_data:
-                    hourly_data[hour] = {
-                        'flush_count': 0,
-                        'flush_size_mb': 0.0,
-                        'compaction_count': 0,
-                        'compaction_size_mb': 0.0,
-                        'total_ops_per_sec': 0.0,
-                        'stats_count': 0
-                    }
-                
-                hourly_data[hour]['total_ops_per_sec'] += event['ops_per_sec']
-                hourly_data[hour]['stats_count'] += 1
+                data = hourly_data.setdefault(hour, empty_hour())
+                data['total_ops_per_sec'] += event['ops_per_sec']
+                data['stats_count'] += 1
         
         # 평균 처리량 계산
         for hour in hourly_data:
@@ -430,7 +317,7 @@ def main():
     # LOG 파일 파싱
     analyzer.parse_log_file(main_log)
     
-    if not analyzer.flush_events and not analyzer.compaction_events:
+    if not len(analyzer.store):
         print("❌ 분석할 데이터가 없습니다!")
         print("LOG 파일에 Flush 또는 Compaction 이벤트가 없습니다.")
         return
@@ -5,6 +5,7 @@ RocksDB LOG 파일에서 시간별, 레벨별 I/O 패턴 분석
 """
 
 import os
+import sys
 import re
 import json
 import pandas as pd
@@ -14,120 +15,66 @@ from pathlib import Path
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+# 저장소 루트의 model 패키지 사용 (파싱 결과 캐시 공유)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from model.log_cache import load_parsed_log
+from model.compaction_store import CompactionStore, FLUSH_LEVEL, UNKNOWN_LEVEL
+
 # Liberation Serif 폰트 설정 (Times 스타일)
 plt.rcParams['font.family'] = 'Liberation Serif'
 plt.rcParams['axes.unicode_minus'] = False
 
+def level_label(level):
+    """레벨 표시 이름 (flush 입력은 Memtable, 로그에 없는 입력 레벨은 Unknown)"""
+    if level == FLUSH_LEVEL:
+        return 'Memtable'
+    if level == UNKNOWN_LEVEL:
+        return 'Unknown'
+    return f'Level {level}'
+
 def parse_log_file(log_file):
-    """LOG 파일 파싱"""
+    """LOG 파일 파싱 (캐시된 파싱 결과 사용)"""
     print(f"📖 LOG 파일 파싱 중: {log_file}")
     
-    stats_data = []
-    compaction_data = []
-    current_timestamp = None
+    parsed = load_parsed_log(log_file)
     
-    with open(log_file, 'r') as f:
-        for line in f:
-            line = line.strip()
-            
-            # 시간 정보 추출 (DUMPING STATS 라인 바로 위)
-            if "------- DUMPING STATS -------" in line:
-                # 이전 라인에서 시간 정보 추출
-                continue
-            
-            # 시간 정보가 있는 라인에서 timestamp 추출
-            time_match = re.search(r'(\d{4}/\d{2}/\d{2}-\d{2}:\d{2}:\d{2}\.\d+)', line)
-            if time_match:
-                current_timestamp = time_match.group(1)
-            
-            # Stats 로그 파싱 (시간 정보와 함께)
-            if "Cumulative writes:" in line:
-                stats_data.append(parse_stats_line(line, current_timestamp))
-            
-            # Compaction 로그 파싱
-            elif "Compaction start" in line or "Compaction finished" in line:
-                compaction_data.append(parse_compaction_line(line))
-    
-    print(f"✅ 파싱 완료: Stats {len(stats_data)}개, Compaction {len(compaction_data)}개")
-    return stats_data, compaction_data
-
-def parse_stats_line(line, timestamp):
-    """Stats 라인 파싱"""
-    try:
-        # cumulative_writes 추출 (K 단위 처리)
-        cum_writes_match = re.search(r'Cumulative writes: (\d+)K writes', line)
-        if cum_writes_match:
-            cum_writes = int(cum_writes_match.group(1)) * 1000
-        else:
-            cum_writes_match = re.search(r'Cumulative writes: (\d+) writes', line)
-            cum_writes = int(cum_writes_match.group(1)) if cum_writes_match else 0
-        
-        # MB/s에서 write_rate 계산 (MB/s를 ops/sec로 변환)
-        mbps_match = re.search(r'ingest: [\d.]+ GB, ([\d.]+) MB/s', line)
-        if mbps_match:
-            mbps = float(mbps_match.group(1))
-            # MB/s를 ops/sec로 변환 (1KB 키+값 가정)
-            write_rate = mbps * 1024  # MB/s * 1024 = ops/sec (1KB per op)
-        else:
-            write_rate = 0
-        
-        return {
-            'timestamp': timestamp,
-            'write_rate': write_rate,
-            'cumulative_writes': cum_writes
+    # Stats 로그 (DUMPING STATS의 Cumulative writes 라인)
+    stats_data = [
+        {
+            'timestamp': dump.timestamp,
+            'write_rate': dump.ingest_mb_s * 1024,  # MB/s * 1024 = ops/sec (1KB per op)
+            'cumulative_writes': dump.cumulative_writes
         }
-    except Exception as e:
-        return None
-
-def parse_compaction_line(line):
-    """Compaction 라인 파싱"""
-    try:
-        # timestamp 추출
-        timestamp_match = re.search(r'(\d{4}/\d{2}/\d{2}-\d{2}:\d{2}:\d{2}\.\d+)', line)
-        timestamp = timestamp_match.group(1) if timestamp_match else None
-        
-        # level 추출 (Base level 정보에서)
-        level_match = re.search(r'Base level (\d+)', line)
-        level = int(level_match.group(1)) if level_match else -1
-        
-        # Compaction 타입 추출
-        compaction_type = "unknown"
-        if "start" in line:
-            compaction_type = "start"
-        elif "finished" in line:
-            compaction_type = "finished"
-        
-        return {
-            'timestamp': timestamp,
-            'level': level,
-            'type': compaction_type
-        }
-    except Exception as e:
-        return None
+        for dump in parsed.stats_dumps
+    ]
+    
+    # Flush/Compaction 작업 (시작 레벨 = Base level, flush = -1)
+    store = CompactionStore.from_parsed(parsed)
+    
+    print(f"✅ 파싱 완료: Stats {len(stats_data)}개, Flush/Compaction {len(store)}개")
+    return stats_data, store
 
-def analyze_hourly_level_io(stats_data, compaction_data):
+def analyze_hourly_level_io(stats_data, store):
     """시간별 레벨별 I/O 량 분석"""
     print("📊 시간별 레벨별 I/O 량 분석 중...")
     
     try:
         # 데이터프레임 생성
         stats_df = pd.DataFrame([d for d in stats_data if d is not None])
-        compaction_df = pd.DataFrame([d for d in compaction_data if d is not None])
         
-        if stats_df.empty or compaction_df.empty:
+        if stats_df.empty or not len(store):
             print("❌ 데이터가 없습니다!")
             return
         
         # 시간 변환
         stats_df['datetime'] = pd.to_datetime(stats_df['timestamp'], format='%Y/%m/%d-%H:%M:%S.%f')
-        compaction_df['datetime'] = pd.to_datetime(compaction_df['timestamp'], format='%Y/%m/%d-%H:%M:%S.%f')
         
         # 시간별 그룹화 (시간 단위)
-        compaction_df['hour'] = compaction_df['datetime'].dt.floor('h')
         stats_df['hour'] = stats_df['datetime'].dt.floor('h')
         
-        # 레벨별 시간별 I/O 량 계산
-        hourly_level_io = compaction_df.groupby(['hour', 'level']).size().unstack(fill_value=0)
+        # 레벨별 시간별 I/O 량 계산 (작업이 있는 시간만, 완료 시각 기준)
+        hourly_level_io = store.aggregate(3600, field='count', by='input_level').astype(int)
+        hourly_level_io = hourly_level_io[hourly_level_io.sum(axis=1) > 0]
         
         # 시각화 생성
         fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(20, 16))
@@ -146,7 +93,7 @@ def analyze_hourly_level_io(stats_data, compaction_data):
             ax1.set_xlabel('Time (Hours)')
             ax1.set_ylabel('Level')
             ax1.set_yticks(range(len(level_order)))
-            ax1.set_yticklabels([f'Level {l}' if l != -1 else 'Memtable' for l in level_order])
+            ax1.set_yticklabels([level_label(l) for l in level_order])
             
             # 시간 축 레이블 (24시간마다)
             time_labels = hourly_level_io_sorted.index[::24]
@@ -164,7 +111,7 @@ def analyze_hourly_level_io(stats_data, compaction_data):
             if level in hourly_level_io.columns:
                 ax2.plot(hourly_level_io.index, hourly_level_io[level], 
                         color=colors[i], linewidth=2, marker='o', markersize=4,
-                        label=f'Level {level}' if level != -1 else 'Memtable')
+                        label=level_label(level))
         
         ax2.set_title('I/O Volume Time Series by Level', fontsize=16, fontweight='bold')
         ax2.set_xlabel('Time')
@@ -179,7 +126,7 @@ def analyze_hourly_level_io(stats_data, compaction_data):
         for level in level_order:
             if level in hourly_level_io.columns:
                 level_data.append(hourly_level_io[level].values)
-                level_labels.append(f'Level {level}' if level != -1 else 'Memtable')
+                level_labels.append(level_label(level))
         
         if level_data:
             bp = ax3.boxplot(level_data, labels=level_labels, patch_artist=True)
@@ -195,8 +142,8 @@ def analyze_hourly_level_io(stats_data, compaction_data):
         ax3.tick_params(axis='x', rotation=45)
         
         # 4. 레벨별 I/O 량 비율 (파이 차트)
-        total_io_by_level = compaction_df['level'].value_counts().sort_index()
-        level_labels_pie = [f'Level {l}' if l != -1 else 'Memtable' for l in total_io_by_level.index]
+        total_io_by_level = hourly_level_io.sum().sort_index()
+        level_labels_pie = [level_label(l) for l in total_io_by_level.index]
         colors_pie = plt.cm.Set3(np.linspace(0, 1, len(total_io_by_level)))
         
         wedges, texts, autotexts = ax4.pie(total_io_by_level.values, labels=level_labels_pie, 
@@ -224,7 +171,7 @@ def analyze_hourly_level_io(stats_data, compaction_data):
         print(f"  총 I/O 작업: {total_io_by_level.sum():,}회")
         print(f"  레벨별 I/O 량:")
         for level, count in total_io_by_level.items():
-            level_name = f'Level {level}' if level != -1 else 'Memtable'
+            level_name = level_label(level)
             percentage = (count / total_io_by_level.sum()) * 100
             print(f"    {level_name}: {count:,}회 ({percentage:.1f}%)")
         
@@ -259,14 +206,14 @@ def main():
     print(f"📖 메인 LOG 파일: {main_log}")
     
     # LOG 파일 분석
-    stats_data, compaction_data = parse_log_file(main_log)
+    stats_data, store = parse_log_file(main_log)
     
-    if not stats_data or not compaction_data:
+    if not stats_data or not len(store):
         print("❌ 분석할 데이터가 없습니다!")
         return
     
     # 시간별 레벨별 I/O 량 분석
-    analyze_hourly_level_io(stats_data, compaction_data)
+    analyze_hourly_level_io(stats_data, store)
     
     print("\n✅ 시간별 레벨별 I/O 량 분석 완료!")
 
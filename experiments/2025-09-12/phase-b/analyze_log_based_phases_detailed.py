@@ -5,7 +5,7 @@ RocksDB LOG 파일을 기반으로 한 구간별 상세 특성 분석
 """
 
 import os
-import re
+import sys
 import json
 import pandas as pd
 import numpy as np
@@ -14,118 +14,89 @@ from pathlib import Path
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+# 저장소 루트의 model 패키지 사용
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from model.log_cache import load_parsed_log
+from model.log_parser import timestamps_to_datetime64
+
 # Liberation Serif 폰트 설정 (Times 스타일)
 plt.rcParams['font.family'] = 'Liberation Serif'
 plt.rcParams['axes.unicode_minus'] = False
 
 def parse_log_file(log_file):
-    """LOG 파일 파싱"""
+    """LOG 파일 파싱 (EVENT_LOG_v1 JSON 우선, 없으면 텍스트 라인 사용)"""
     print(f"📖 LOG 파일 파싱 중: {log_file}")
     
-    stats_data = []
+    parsed = load_parsed_log(log_file)
+    
+    # Stats 로그 (DUMPING STATS의 Cumulative writes 라인)
+    stats_data = [
+        {
+            'timestamp': dump.timestamp,
+            'cumulative_writes': dump.cumulative_writes,
+            'write_rate': dump.ingest_mb_s
+        }
+        for dump in parsed.stats_dumps
+    ]
+    
     compaction_data = []
     flush_data = []
-    current_timestamp = None
-    
-    with open(log_file, 'r') as f:
-        for line in f:
-            line = line.strip()
-            
-            # 시간 정보 추출
-            time_match = re.search(r'(\d{4}/\d{2}/\d{2}-\d{2}:\d{2}:\d{2}\.\d+)', line)
-            if time_match:
-                current_timestamp = time_match.group(1)
-            
-            # Stats 로그 파싱
-            if "Cumulative writes:" in line:
-                stats_data.append(parse_stats_line(line, current_timestamp))
-            
-            # Compaction 로그 파싱
-            elif "Compaction start" in line:
-                compaction_data.append(parse_compaction_start_line(line, current_timestamp))
-            elif "compacted to:" in line:
-                compaction_data.append(parse_compaction_finish_line(line, current_timestamp))
-            
-            # Flush 로그 파싱
-            elif "Flushing memtable" in line or "Flush lasted" in line:
-                flush_data.append(parse_flush_line(line, current_timestamp))
     
-    print(f"✅ 파싱 완료: Stats {len(stats_data)}개, Compaction {len(compaction_data)}개, Flush {len(flush_data)}개")
-    return stats_data, compaction_data, flush_data
-
-def parse_stats_line(line, timestamp):
-    """Stats 라인 파싱"""
-    try:
-        # Cumulative writes: 1130K writes, 1130K keys, 72K commit groups, 15.5 writes per commit group, ingest: 1.10 GB, 280.18 MB/s
-        write_match = re.search(r'Cumulative writes: (\d+[KM]?) writes', line)
-        mbps_match = re.search(r'(\d+\.\d+) MB/s', line)
-        
-        if write_match and mbps_match:
-            # K, M 단위 처리
-            writes_str = write_match.group(1)
-            if writes_str.endswith('K'):
-                cumulative_writes = int(writes_str[:-1]) * 1000
-            elif writes_str.endswith('M'):
-                cumulative_writes = int(writes_str[:-1]) * 1000000
-            else:
-                cumulative_writes = int(writes_str)
-            
-            return {
-                'timestamp': timestamp,
-                'cumulative_writes': cumulative_writes,
-                'write_rate': float(mbps_match.group(1))
-            }
-    except Exception as e:
-        pass
-    return None
-
-def parse_compaction_start_line(line, timestamp):
-    """Compaction 시작 라인 파싱"""
-    try:
-        # Compaction start: Level 0 -> Level 1
-        level_match = re.search(r'Level (\d+) -> Level (\d+)', line)
-        if level_match:
-            return {
-                'timestamp': timestamp,
+    if parsed.has_event_log():
+        # EVENT_LOG_v1: 정확한 바이트 수, 레벨, 소요 시간
+        output_levels = {event.job: event.output_level for event in parsed.compactions_finished}
+        for event in parsed.compactions_started:
+            compaction_data.append({
+                'timestamp': event.timestamp,
                 'type': 'start',
-                'base_level': int(level_match.group(1)),
-                'target_level': int(level_match.group(2))
-            }
-    except Exception:
-        pass
-    return None
-
-def parse_compaction_finish_line(line, timestamp):
-    """Compaction 완료 라인 파싱"""
-    try:
-        # compacted to: Level 1
-        level_match = re.search(r'compacted to: Level (\d+)', line)
-        if level_match:
-            return {
-                'timestamp': timestamp,
+                'base_level': event.input_level,
+                'target_level': output_levels.get(event.job, -1),
+                'input_bytes': event.input_data_size
+            })
+        for event in parsed.compactions_finished:
+            compaction_data.append({
+                'timestamp': event.timestamp,
                 'type': 'finish',
-                'target_level': int(level_match.group(1))
-            }
-    except Exception:
-        pass
-    return None
-
-def parse_flush_line(line, timestamp):
-    """Flush 라인 파싱"""
-    try:
-        if "Flushing memtable" in line:
-            return {
-                'timestamp': timestamp,
-                'type': 'start'
-            }
-        elif "Flush lasted" in line:
-            return {
-                'timestamp': timestamp,
+                'target_level': event.output_level,
+                'output_bytes': event.total_output_size,
+                'duration_s': event.compaction_time_micros / 1e6
+            })
+        for event in parsed.flushes_started:
+            flush_data.append({
+                'timestamp': event.timestamp,
+                'type': 'start',
+                'bytes': event.total_data_size
+            })
+        for event in parsed.flushes_finished:
+            flush_data.append({
+                'timestamp': event.timestamp,
                 'type': 'finish'
-            }
-    except Exception:
-        pass
-    return None
+            })
+    else:
+        # 텍스트 라인 (Compacting ... / compacted to: ... / flush table #N)
+        for event in parsed.compaction_starts:
+            compaction_data.append({
+                'timestamp': event.timestamp,
+                'type': 'start',
+                'base_level': event.input_level,
+                'target_level': event.output_level
+            })
+        for event in parsed.compaction_finishes:
+            compaction_data.append({
+                'timestamp': event.timestamp,
+                'type': 'finish',
+                'target_level': event.output_level,
+                'output_bytes': int(event.output_mb * 1024 * 1024)
+            })
+        for event in parsed.flushes:
+            flush_data.append({
+                'timestamp': event.timestamp,
+                'type': 'finish',
+                'bytes': event.bytes
+            })
+    
+    print(f"✅ 파싱 완료: Stats {len(stats_data)}개, Compaction {len(compaction_data)}개, Flush {len(flush_data)}개")
+    return stats_data, compaction_data, flush_data
 
 def analyze_log_based_phases_detailed(stats_data, compaction_data, flush_data):
     """LOG 기반 구간 상세 분석"""
@@ -140,9 +111,15 @@ def analyze_log_based_phases_detailed(stats_data, compaction_data, flush_data):
         print("❌ Stats 데이터가 없습니다.")
         return None
     
-    # 시간 변환
-    stats_df['datetime'] = pd.to_datetime(stats_df['timestamp'])
+    # 시간 변환 (고정 폭 LOG 타임스탬프를 한 번에 datetime64로 변환)
+    stats_df['datetime'] = timestamps_to_datetime64(stats_df['timestamp'].tolist())
     stats_df = stats_df.sort_values('datetime')
+    if not compaction_df.empty:
+        compaction_df['datetime'] = timestamps_to_datetime64(compaction_df['timestamp'].tolist())
+        compaction_df = compaction_df.sort_values('datetime')
+    if not flush_df.empty:
+        flush_df['datetime'] = timestamps_to_datetime64(flush_df['timestamp'].tolist())
+        flush_df = flush_df.sort_values('datetime')
     
     # 3구간 분할 (시간 기반)
     total_duration = (stats_df['datetime'].iloc[-1] - stats_df['datetime'].iloc[0]).total_seconds()
@@ -201,9 +178,6 @@ def analyze_log_based_phases_detailed(stats_data, compaction_data, flush_data):
             # Compaction 분석
             compaction_stats = {}
             if not compaction_df.empty:
-                compaction_df['datetime'] = pd.to_datetime(compaction_df['timestamp'])
-                compaction_df = compaction_df.sort_values('datetime')
-                
                 start_time = phase_data['datetime'].iloc[0]
                 end_time = phase_data['datetime'].iloc[-1]
                 
@@ -223,9 +197,6 @@ def analyze_log_based_phases_detailed(stats_data, compaction_data, flush_data):
             # Flush 분석
             flush_stats = {}
             if not flush_df.empty:
-                flush_df['datetime'] = pd.to_datetime(flush_df['timestamp'])
-                flush_df = flush_df.sort_values('datetime')
-                
                 start_time = phase_data['datetime'].iloc[0]
                 end_time = phase_data['datetime'].iloc[-1]
                 
@@ -5,6 +5,7 @@ LOG 데이터에서 성능 변화율을 분석하여 의미있는 구간으로 
 """
 
 import os
+import sys
 import re
 import json
 import pandas as pd
@@ -13,63 +14,39 @@ from datetime import datetime, timedelta
 from pathlib import Path
 import matplotlib.pyplot as plt
 import seaborn as sns
-from scipy import signal
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
+
+# 저장소 루트의 model 패키지 사용 (파싱 결과 캐시 공유)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from model.log_cache import load_parsed_log
+from model.downsample import downsample, plot_downsampled
+from model.changepoint import OnlineChangePointDetector, pelt, phase_boundaries, summarize_segments
 
 # Liberation Serif 폰트 설정 (Times 스타일)
 plt.rcParams['font.family'] = 'Liberation Serif'
 plt.rcParams['axes.unicode_minus'] = False
 
 def parse_log_file(log_file):
-    """LOG 파일 파싱"""
+    """LOG 파일 파싱 (캐시된 파싱 결과 사용)"""
     print(f"📖 LOG 파일 파싱 중: {log_file}")
     
-    stats_data = []
-    current_timestamp = None
-    
-    with open(log_file, 'r') as f:
-        for line in f:
-            line = line.strip()
-            
-            # 시간 정보 추출
-            time_match = re.search(r'(\d{4}/\d{2}/\d{2}-\d{2}:\d{2}:\d{2}\.\d+)', line)
-            if time_match:
-                current_timestamp = time_match.group(1)
-            
-            # Stats 로그 파싱
-            if "Cumulative writes:" in line:
-                stats_data.append(parse_stats_line(line, current_timestamp))
+    parsed = load_parsed_log(log_file)
+    
+    # Stats 로그 (DUMPING STATS의 Cumulative writes 라인)
+    stats_data = [
+        {
+            'timestamp': dump.timestamp,
+            'write_rate': dump.ingest_mb_s,
+            'cumulative_writes': dump.cumulative_writes,
+            'ingest_gb': dump.ingest_gb,
+            'flush_gb': dump.flush_cumulative_gb,
+            'compaction_write_gb': dump.compaction_write_gb
+        }
+        for dump in parsed.stats_dumps
+    ]
     
     print(f"✅ 파싱 완료: Stats {len(stats_data)}개")
     return stats_data
 
-def parse_stats_line(line, timestamp):
-    """Stats 라인 파싱"""
-    try:
-        # Cumulative writes: 1130K writes, 1130K keys, 72K commit groups, 15.5 writes per commit group, ingest: 1.10 GB, 280.18 MB/s
-        write_match = re.search(r'Cumulative writes: (\d+[KM]?) writes', line)
-        mbps_match = re.search(r'(\d+\.\d+) MB/s', line)
-        
-        if write_match and mbps_match:
-            # K, M 단위 처리
-            writes_str = write_match.group(1)
-            if writes_str.endswith('K'):
-                cumulative_writes = int(writes_str[:-1]) * 1000
-            elif writes_str.endswith('M'):
-                cumulative_writes = int(writes_str[:-1]) * 1000000
-            else:
-                cumulative_writes = int(writes_str)
-            
-            return {
-                'timestamp': timestamp,
-                'cumulative_writes': cumulative_writes,
-                'write_rate': float(mbps_match.group(1))
-            }
-    except Exception:
-        pass
-    return None
-
 def calculate_performance_metrics(stats_df):
     """성능 메트릭 계산"""
     print("📊 성능 메트릭 계산 중...")
@@ -95,163 +72,58 @@ def calculate_performance_metrics(stats_df):
     stats_df['performance_stability'] = stats_df['write_rate_smooth'].rolling(window=rolling_window).std() / stats_df['write_rate_smooth'].rolling(window=rolling_window).mean()
     stats_df['performance_stability'] = stats_df['performance_stability'].fillna(1.0)
     
+    # 구간 WA: (flush + compaction 쓰기 증가분) / ingest 증가분 (카운터 리셋 구간은 NaN)
+    written = (stats_df['flush_gb'] + stats_df['compaction_write_gb']).diff()
+    ingested = stats_df['ingest_gb'].diff()
+    stats_df['wa'] = (written / ingested).where((ingested > 0) & (written >= 0))
+    
     print("✅ 성능 메트릭 계산 완료")
     return stats_df
 
 def detect_performance_transitions(stats_df):
-    """성능 전환점 탐지"""
+    """성능 전환점 탐지 (put rate + WA 변화점: PELT, 온라인 BOCPD)"""
     print("📊 성능 전환점 탐지 중...")
     
-    # 1. 성능 변화율 기반 전환점 탐지
-    change_threshold = 0.02  # 2% 변화율 임계값
-    significant_changes = stats_df[np.abs(stats_df['performance_change_rate']) > change_threshold].copy()
+    signal_columns = ['write_rate', 'wa'] if stats_df['wa'].notna().any() else ['write_rate']
+    series = stats_df[signal_columns].to_numpy()
+    min_size = max(2, len(stats_df) // 100)
     
-    # 2. 성능 수준 변화 탐지 (큰 폭 변화)
-    performance_levels = []
-    current_level = stats_df['write_rate_smooth'].iloc[0]
-    level_threshold = 5.0  # 5 MB/s 차이
+    # 1. PELT: 전체 변화점 (변화점당 BIC 페널티)
+    changepoints = pelt(series, min_size=min_size)
     
-    for i, row in stats_df.iterrows():
-        if abs(row['write_rate_smooth'] - current_level) > level_threshold:
-            performance_levels.append(i)
-            current_level = row['write_rate_smooth']
+    # 2. 3구간 경계 (binary segmentation, 구간 최소 길이 5%)
+    boundaries = phase_boundaries(series, n_phases=3, method='binseg')
     
-    # 3. 안정성 변화 탐지
-    stability_threshold = 0.5  # 안정성 변화 임계값
-    stability_changes = []
-    
-    for i in range(1, len(stats_df)):
-        if i < len(stats_df) - 1:
-            prev_stability = stats_df.iloc[i-1]['performance_stability']
-            curr_stability = stats_df.iloc[i]['performance_stability']
-            
-            if not np.isnan(prev_stability) and not np.isnan(curr_stability):
-                if abs(curr_stability - prev_stability) > stability_threshold:
-                    stability_changes.append(i)
-    
-    # 4. 시계열 클러스터링을 통한 구간 분할
-    # 성능 특성 벡터 생성
-    features = ['write_rate_smooth', 'performance_change_abs', 'performance_stability']
-    feature_data = stats_df[features].fillna(stats_df[features].mean())
-    
-    # 표준화
-    scaler = StandardScaler()
-    feature_data_scaled = scaler.fit_transform(feature_data)
-    
-    # K-means 클러스터링 (3개 클러스터)
-    kmeans = KMeans(n_clusters=3, random_state=42, n_init=10)
-    stats_df['cluster'] = kmeans.fit_predict(feature_data_scaled)
-    
-    # 클러스터 경계 찾기
-    cluster_boundaries = []
-    current_cluster = stats_df['cluster'].iloc[0]
-    
-    for i, cluster in enumerate(stats_df['cluster']):
-        if cluster != current_cluster:
-            cluster_boundaries.append(i)
-            current_cluster = cluster
+    # 3. 온라인 변화점 (라이브 데이터와 같은 방식으로 샘플 순서대로 처리)
+    write_rate = stats_df['write_rate'].to_numpy(dtype=float)
+    warmup = write_rate[:max(2, min(len(write_rate), 30))]
+    online = OnlineChangePointDetector.from_warmup(warmup, expected_run_length=max(10.0, len(stats_df) / 10))
+    stats_df['change_probability'] = online.run(write_rate)
     
     print(f"✅ 성능 전환점 탐지 완료:")
-    print(f"   - 큰 변화율 지점: {len(significant_changes)}개")
-    print(f"   - 성능 수준 변화: {len(performance_levels)}개")
-    print(f"   - 안정성 변화: {len(stability_changes)}개")
-    print(f"   - 클러스터 경계: {len(cluster_boundaries)}개")
+    print(f"   - PELT 변화점 ({'+'.join(signal_columns)}): {len(changepoints)}개")
+    print(f"   - 3구간 경계: {boundaries}")
+    print(f"   - 온라인 변화점: {len(online.changepoints)}개")
     
     return {
-        'significant_changes': significant_changes,
-        'performance_levels': performance_levels,
-        'stability_changes': stability_changes,
-        'cluster_boundaries': cluster_boundaries,
-        'kmeans_model': kmeans,
-        'scaler': scaler
+        'signal_columns': signal_columns,
+        'changepoints': changepoints,
+        'phase_boundaries': boundaries,
+        'online_changepoints': online.changepoints,
+        'segment_stats': summarize_segments(write_rate, changepoints)
     }
 
 def determine_optimal_segmentation(stats_df, transitions):
-    """최적 구간 분할 결정"""
+    """최적 구간 분할 결정 (변화점 기반 3구간)"""
     print("📊 최적 구간 분할 결정 중...")
     
     total_length = len(stats_df)
+    boundaries = list(transitions['phase_boundaries'])
     
-    # 방법 1: 성능 변화율 기반 분할
-    method1_boundaries = []
-    
-    # 초기 구간: 빠른 성능 변화 구간 (높은 변화율)
-    high_change_period = stats_df[stats_df['performance_change_abs'] > 0.01]  # 1% 이상 변화
-    if len(high_change_period) > 0:
-        initial_end = high_change_period.index[-1]
-        method1_boundaries.append(initial_end)
-    
-    # 중기 구간: 안정화 진행 구간 (중간 안정성)
-    remaining_data = stats_df.iloc[method1_boundaries[0]:] if method1_boundaries else stats_df
-    stable_threshold = remaining_data['performance_stability'].quantile(0.3)  # 하위 30% 안정성
-    stable_period = remaining_data[remaining_data['performance_stability'] < stable_threshold]
-    
-    if len(stable_period) > 0:
-        middle_end = stable_period.index[-1]
-        method1_boundaries.append(middle_end)
-    
-    # 방법 2: 클러스터 기반 분할
-    method2_boundaries = transitions['cluster_boundaries'][:2]  # 처음 2개 경계만 사용
-    
-    # 방법 3: 성능 수준 기반 분할
-    method3_boundaries = []
-    
-    # 성능 수준별 분할
-    performance_quantiles = stats_df['write_rate_smooth'].quantile([0.33, 0.67])
-    
-    # 첫 번째 경계: 성능이 67% 분위수 아래로 떨어지는 지점
-    high_to_mid = stats_df[stats_df['write_rate_smooth'] < performance_quantiles[0.67]].index
-    if len(high_to_mid) > 0:
-        method3_boundaries.append(high_to_mid[0])
-    
-    # 두 번째 경계: 성능이 33% 분위수 아래로 떨어지는 지점
-    mid_to_low = stats_df[stats_df['write_rate_smooth'] < performance_quantiles[0.33]].index
-    if len(mid_to_low) > 0:
-        method3_boundaries.append(mid_to_low[0])
-    
-    # 최적 분할 선택 (여러 방법의 결과를 종합)
-    all_boundaries = []
-    if method1_boundaries:
-        all_boundaries.extend(method1_boundaries)
-    if method2_boundaries:
-        all_boundaries.extend(method2_boundaries)
-    if method3_boundaries:
-        all_boundaries.extend(method3_boundaries)
-    
-    # 경계점들을 정렬하고 중복 제거
-    all_boundaries = sorted(list(set(all_boundaries)))
-    
-    # 너무 가까운 경계점들 제거 (전체 길이의 10% 이내)
-    min_distance = total_length * 0.1
-    filtered_boundaries = []
-    
-    for boundary in all_boundaries:
-        if not filtered_boundaries or boundary - filtered_boundaries[-1] > min_distance:
-            filtered_boundaries.append(boundary)
-    
-    # 최대 2개의 경계점만 선택 (3구간)
-    if len(filtered_boundaries) > 2:
-        # 성능 변화가 가장 큰 지점들 선택
-        boundary_scores = []
-        for boundary in filtered_boundaries:
-            if boundary > 0 and boundary < total_length - 1:
-                before_perf = stats_df.iloc[max(0, boundary-50):boundary]['write_rate_smooth'].mean()
-                after_perf = stats_df.iloc[boundary:min(total_length, boundary+50)]['write_rate_smooth'].mean()
-                score = abs(before_perf - after_perf)
-                boundary_scores.append((boundary, score))
-        
-        # 점수가 높은 상위 2개 선택
-        boundary_scores.sort(key=lambda x: x[1], reverse=True)
-        filtered_boundaries = sorted([bs[0] for bs in boundary_scores[:2]])
-    
-    # 최종 구간 정의
-    if len(filtered_boundaries) >= 2:
-        boundaries = filtered_boundaries[:2]
-    elif len(filtered_boundaries) == 1:
-        # 하나만 있으면 중간 지점에 하나 더 추가
-        boundaries = [filtered_boundaries[0], int(total_length * 0.75)]
-    else:
-        # 경계를 찾지 못하면 기본 분할
+    # 경계를 찾지 못하면 기본 분할
+    if len(boundaries) == 1:
+        boundaries.append(max(boundaries[0] + 1, int(total_length * 0.75)))
+    elif not boundaries:
         boundaries = [int(total_length * 0.4), int(total_length * 0.75)]
     
     # 구간 정의
@@ -403,8 +275,9 @@ def create_performance_segmentation_visualization(stats_df, segments, segment_an
     colors = {'initial': '#FF6B6B', 'middle': '#4ECDC4', 'final': '#45B7D1'}
     
     # 1. 성능 추이와 구간 분할
-    ax1.plot(time_hours, stats_df['write_rate'], alpha=0.3, color='gray', label='Raw Performance')
-    ax1.plot(time_hours, stats_df['write_rate_smooth'], color='black', linewidth=2, label='Smoothed Performance')
+    # 긴 실행은 LTTB + min/max 밴드로 다운샘플링 (피크/스톨 유지)
+    plot_downsampled(ax1, time_hours, stats_df['write_rate'], alpha=0.3, color='gray', label='Raw Performance')
+    plot_downsampled(ax1, time_hours, stats_df['write_rate_smooth'], color='black', linewidth=2, label='Smoothed Performance', band=False)
     
     # 구간별 색칠
     for segment_name, segment_info in segments.items():
@@ -412,8 +285,9 @@ def create_performance_segmentation_visualization(stats_df, segments, segment_an
         end_idx = segment_info['end_idx']
         segment_time = time_hours.iloc[start_idx:end_idx+1]
         segment_perf = stats_df['write_rate_smooth'].iloc[start_idx:end_idx+1]
+        reduced = downsample(segment_time, segment_perf)
         
-        ax1.fill_between(segment_time, 0, segment_perf, alpha=0.3, color=colors[segment_name], 
+        ax1.fill_between(reduced['x'], 0, reduced['y'], alpha=0.3, color=colors[segment_name], 
                         label=f'{segment_name.title()} Phase')
     
     # 구간 경계선
@@ -429,8 +303,8 @@ def create_performance_segmentation_visualization(stats_df, segments, segment_an
     ax1.grid(True, alpha=0.3)
     
     # 2. 성능 변화율
-    ax2.plot(time_hours, stats_df['performance_change_rate'], alpha=0.5, color='blue', label='Change Rate')
-    ax2.plot(time_hours, stats_df['change_rate_trend'], color='darkblue', linewidth=2, label='Change Rate Trend')
+    plot_downsampled(ax2, time_hours, stats_df['performance_change_rate'], alpha=0.5, color='blue', label='Change Rate')
+    plot_downsampled(ax2, time_hours, stats_df['change_rate_trend'], color='darkblue', linewidth=2, label='Change Rate Trend', band=False)
     ax2.axhline(y=0, color='black', linestyle='-', alpha=0.5)
     ax2.axhline(y=0.02, color='red', linestyle='--', alpha=0.5, label='Change Threshold')
     ax2.axhline(y=-0.02, color='red', linestyle='--', alpha=0.5)
@@ -511,9 +385,10 @@ def save_results(stats_df, segments, segment_analysis, transitions):
         'segments': segments,
         'segment_analysis': segment_analysis,
         'transition_points': {
-            'cluster_boundaries': transitions['cluster_boundaries'],
-            'performance_levels': transitions['performance_levels'],
-            'stability_changes': transitions['stability_changes']
+            'signal_columns': transitions['signal_columns'],
+            'changepoints': transitions['changepoints'],
+            'phase_boundaries': transitions['phase_boundaries'],
+            'online_changepoints': transitions['online_changepoints']
         },
         'analysis_time': datetime.now().isoformat()
     }
@@ -531,11 +406,10 @@ def save_results(stats_df, segments, segment_analysis, transitions):
         f.write("Unlike time-based segmentation, this approach identifies phases based on actual performance change patterns.\n\n")
         
         f.write("## Segmentation Method\n")
-        f.write("The segmentation is based on:\n")
-        f.write("1. **Performance Change Rate Analysis**: Detecting significant performance transitions\n")
-        f.write("2. **Performance Level Changes**: Identifying major performance drops\n")
-        f.write("3. **Stability Analysis**: Detecting changes in performance variability\n")
-        f.write("4. **Clustering Analysis**: Using K-means clustering on performance characteristics\n\n")
+        f.write("The segmentation is based on change points of the put rate and interval WA:\n")
+        f.write("1. **PELT**: Exact penalized change points (Gaussian mean-shift cost, BIC penalty)\n")
+        f.write("2. **Binary Segmentation**: The two splits that lower the segment cost most define the three phases\n")
+        f.write("3. **Bayesian Online Change-Point Detection**: The same series processed sample by sample, as on live data\n\n")
         
         f.write("## Phase Definitions\n")
         for segment_name, analysis in segment_analysis.items():
@@ -4,6 +4,7 @@ Phase-B 분석 스크립트
 FillRandom LOG 파일 분석 및 시간별 성능 변화 시각화
 """
 
+import sys
 import json
 import re
 import matplotlib.pyplot as plt
@@ -12,6 +13,10 @@ from pathlib import Path
 from datetime import datetime
 import numpy as np
 
+# 저장소 루트의 model 패키지 사용 (회전/압축된 LOG 읽기)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from model.log_source import open_log
+
 # Liberation Serif 폰트 설정 (Times 스타일)
 plt.rcParams['font.family'] = 'Liberation Serif'
 plt.rcParams['axes.unicode_minus'] = False
@@ -24,7 +29,7 @@ def parse_log_file(log_file):
     compaction_data = []
     current_timestamp = None
     
-    with open(log_file, 'r') as f:
+    with open_log(log_file) as f:
         for line in f:
             line = line.strip()
             
@@ -10,9 +10,17 @@ import json
 import time
 import threading
 from datetime import datetime
+from pathlib import Path
 import pandas as pd
 import numpy as np
 
+# 저장소 루트의 model 패키지 사용 (라이브 Phase 분류, 구간별 V5 예측)
+sys.path.append(str(Path(__file__).resolve().parents[4]))
+from model.phase_classifier import PhaseClassifier
+
+# Phase 기반 라우팅에 필요한 최소 신뢰도
+PHASE_CONFIDENCE_THRESHOLD = 0.7
+
 class ProductionModelManager:
     def __init__(self):
         self.models = {}
@@ -22,8 +30,13 @@ class ProductionModelManager:
         self.monitoring_active = False
         self.auto_tuning_enabled = True
         
+        # 라이브 Phase 분류기 (샘플당 O(1), 이미 실행 중인 DB에 붙으므로 시작 Phase 미지정)
+        self.phase_classifier = PhaseClassifier(start_phase=None)
+        self.current_phase = None
+        
         # Enhanced 모델들 로드
         self.load_enhanced_models()
+        self.load_phase_models()
         
     def load_enhanced_models(self):
         """Enhanced 모델들 로드"""
@@ -53,6 +66,29 @@ class ProductionModelManager:
             print(f"❌ Enhanced 모델 로드 오류: {e}")
             self.models = {}
     
+    def load_phase_models(self):
+        """구간별(initial/middle/final) V5 모델 로드"""
+        try:
+            from model.v5_independence_optimized_model import V5IndependenceOptimizedModel
+            
+            v5_model = V5IndependenceOptimizedModel()
+            v5_model.create_independence_optimized_models()
+            self.models['v5_independence'] = v5_model
+            
+            print("✅ 구간별 V5 모델 로드 완료")
+            
+        except Exception as e:
+            print(f"❌ 구간별 V5 모델 로드 오류: {e}")
+    
+    def observe_phase(self, metrics):
+        """새 메트릭 샘플로 현재 Phase 갱신 (과거 이력 재분석 없음)"""
+        self.current_phase = self.phase_classifier.update(
+            metrics.get('qps'),
+            wa=metrics.get('wa'),
+            l0_files=metrics.get('l0_files')
+        )
+        return self.current_phase
+    
     def select_optimal_model(self, system_conditions):
         """시스템 조건에 따른 최적 모델 선택"""
         print("🔍 최적 모델 선택 중...")
@@ -61,9 +97,12 @@ class ProductionModelManager:
         workload_type = system_conditions.get('workload_type', 'mixed')
         io_intensity = system_conditions.get('io_intensity', 'medium')
         compaction_pressure = system_conditions.get('compaction_pressure', 'medium')
+        phase_confidence = system_conditions.get('phase_confidence', 0.0)
         
-        # 모델 선택 로직
-        if workload_type == 'write_intensive' and io_intensity == 'high':
+        # 모델 선택 로직 (Phase가 확실하면 해당 구간 모델로 라우팅)
+        if phase_confidence >= PHASE_CONFIDENCE_THRESHOLD and 'v5_independence' in self.models:
+            selected_model = 'v5_independence'  # 구간별 V5 모델
+        elif workload_type == 'write_intensive' and io_intensity == 'high':
             selected_model = 'v4_enhanced'  # Device Envelope 모델
         elif compaction_pressure == 'high':
             selected_model = 'v3_enhanced'  # Dynamic Compaction-Aware 모델
@@ -89,7 +128,18 @@ class ProductionModelManager:
             model = self.models[self.active_model]
             
             # 현재 메트릭을 모델에 전달하여 예측
-            if hasattr(model, 'analyze_v1_model_enhanced'):
+            phase = None
+            if self.active_model == 'v5_independence':
+                phase = self.current_phase.phase
+                performance_data = {
+                    'device_write_bw': current_metrics.get('device_write_bw'),
+                    'wa': current_metrics.get('wa'),
+                    'ra': current_metrics.get('ra'),
+                    'cv': self.current_phase.features.get('cv')
+                }
+                performance_data = {k: v for k, v in performance_data.items() if v is not None}
+                prediction = model.predict_s_max(performance_data, phase)['predicted_s_max']
+            elif hasattr(model, 'analyze_v1_model_enhanced'):
                 prediction = model.analyze_v1_model_enhanced()
             elif hasattr(model, 'analyze_v21_model_enhanced'):
                 prediction = model.analyze_v21_model_enhanced()
@@ -107,13 +157,15 @@ class ProductionModelManager:
             prediction_record = {
                 'timestamp': datetime.now().isoformat(),
                 'model': self.active_model,
+                'phase': phase,
                 'predicted_smax': prediction,
                 'current_metrics': current_metrics
             }
             
             self.performance_history.append(prediction_record)
             
-            print(f"✅ {self.active_model} 모델 예측: {prediction:.2f} ops/sec")
+            phase_label = f" [{phase}]" if phase else ""
+            print(f"✅ {self.active_model}{phase_label} 모델 예측: {prediction:.2f} ops/sec")
             return prediction
             
         except Exception as e:
@@ -132,6 +184,9 @@ class ProductionModelManager:
                     # 현재 시스템 메트릭 수집
                     current_metrics = self.collect_system_metrics()
                     
+                    # Phase 갱신
+                    self.observe_phase(current_metrics)
+                    
                     # 시스템 조건 업데이트
                     self.update_system_conditions(current_metrics)
                     
@@ -171,7 +226,11 @@ class ProductionModelManager:
             'cpu_usage': np.random.normal(50, 10),
             'memory_usage': np.random.normal(60, 5),
             'io_utilization': np.random.normal(40, 8),
-            'compaction_activity': np.random.normal(30, 5)
+            'compaction_activity': np.random.normal(30, 5),
+            'wa': np.random.normal(2.5, 0.1),
+            'ra': np.random.normal(0.8, 0.05),
+            'l0_files': np.random.poisson(4),
+            'device_write_bw': 1074.8
         }
         
         return metrics
@@ -183,7 +242,9 @@ class ProductionModelManager:
             'io_intensity': 'high' if metrics['io_utilization'] > 50 else 'medium',
             'compaction_pressure': 'high' if metrics['compaction_activity'] > 40 else 'medium',
             'real_time_adaptation': True,
-            'system_load': metrics['cpu_usage']
+            'system_load': metrics['cpu_usage'],
+            'phase': self.current_phase.phase if self.current_phase else None,
+            'phase_confidence': self.current_phase.confidence if self.current_phase else 0.0
         }
     
     def save_performance_record(self, metrics, prediction):
@@ -227,6 +288,8 @@ class ProductionModelManager:
         summary = {
             'total_records': len(self.performance_history),
             'active_model': self.active_model,
+            'current_phase': self.current_phase.phase if self.current_phase else None,
+            'phase_confidence': self.current_phase.confidence if self.current_phase else None,
             'recent_predictions': {
                 'mean': np.mean(recent_predictions),
                 'std': np.std(recent_predictions),
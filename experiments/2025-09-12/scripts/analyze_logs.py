@@ -6,6 +6,7 @@ RocksDB LOG 파일 분석 스크립트
 
 import os
 import re
+import sys
 import json
 import pandas as pd
 import numpy as np
@@ -14,6 +15,36 @@ from pathlib import Path
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+# 저장소 루트의 model 패키지 사용
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from model.log_parser import NO_TIMESTAMP, LogParser, timestamps_to_datetime64
+from model.log_source import line_timestamp, open_log
+from model.downsample import plot_downsampled
+
+# 초 단위 타임스탬프 (LOG 접두어가 아닌 위치에 있는 경우용)
+TIME_RE = re.compile(r'(\d{4}/\d{2}/\d{2}-\d{2}:\d{2}:\d{2})')
+
+
+def line_time_text(line):
+    """라인의 초 단위 타임스탬프 텍스트 (고정 폭 접두어는 슬라이스, 없으면 None)"""
+    prefix = line_timestamp(line)
+    if prefix is not None:
+        return prefix[:19]
+    time_match = TIME_RE.search(line)
+    return time_match.group(1) if time_match else None
+
+
+def resolve_timestamps(records):
+    """레코드의 타임스탬프 문자열을 datetime64로 한 번에 변환 (날짜로 읽을 수 없는 레코드는 제외)"""
+    times = timestamps_to_datetime64([r["timestamp"] for r in records])
+    valid = times.view(np.int64) != NO_TIMESTAMP
+    resolved = []
+    for record, timestamp, ok in zip(records, times, valid):
+        if ok:
+            record["timestamp"] = timestamp
+            resolved.append(record)
+    return resolved
+
 class RocksDBLogAnalyzer:
     def __init__(self, logs_dir="/home/sslab/rocksdb-put-model/experiments/2025-09-12/logs"):
         self.logs_dir = Path(logs_dir)
@@ -37,19 +68,18 @@ class RocksDBLogAnalyzer:
         print(f"LOG 파일 파싱 중: {log_file}")
         
         # 로그 데이터 저장용 리스트
-        compaction_logs = []
+        compaction_lines = []
         performance_logs = []
         level_logs = []
         
-        with open(log_file, 'r') as f:
-            for line in f:
-                line = line.strip()
+        def scan_lines(f):
+            """성능/레벨 라인을 수집하면서 LogParser에 라인 전달 (단일 패스)"""
+            for raw_line in f:
+                line = raw_line.strip()
                 
-                # 컴팩션 로그 파싱
+                # 컴팩션 로그 (EVENT_LOG_v1이 없을 때만 텍스트 파싱)
                 if "Compaction" in line:
-                    compaction_data = self.parse_compaction_line(line)
-                    if compaction_data:
-                        compaction_logs.append(compaction_data)
+                    compaction_lines.append(line)
                 
                 # 성능 로그 파싱
                 if "fillrandom" in line.lower() or "ops/sec" in line:
@@ -62,23 +92,69 @@ class RocksDBLogAnalyzer:
                     level_data = self.parse_level_line(line)
                     if level_data:
                         level_logs.append(level_data)
+                
+                yield raw_line
+        
+        with open_log(log_file) as f:
+            parsed = LogParser().parse_lines(scan_lines(f))
         
+        if parsed.has_event_log():
+            compaction_logs = self.compaction_records_from_event_log(parsed)
+        else:
+            compaction_logs = []
+            for line in compaction_lines:
+                compaction_data = self.parse_compaction_line(line)
+                if compaction_data:
+                    compaction_logs.append(compaction_data)
+        
+        # 타임스탬프는 파일 단위로 일괄 변환
         return {
-            "compaction": compaction_logs,
-            "performance": performance_logs,
-            "levels": level_logs
+            "compaction": resolve_timestamps(compaction_logs),
+            "performance": resolve_timestamps(performance_logs),
+            "levels": resolve_timestamps(level_logs)
         }
     
+    def compaction_records_from_event_log(self, parsed):
+        """EVENT_LOG_v1 레코드에서 컴팩션/플러시 로그 생성 (정확한 바이트 수)"""
+        records = []
+        
+        for event in parsed.compactions_finished:
+            records.append({
+                "timestamp": event.timestamp,
+                "level": event.output_level,
+                "files": event.num_output_files,
+                "size_mb": event.total_output_size / (1024 * 1024),
+                "type": "compaction",
+                "duration_s": event.compaction_time_micros / 1e6,
+                "raw_line": ""
+            })
+        
+        # 플러시가 만든 L0 파일
+        flush_jobs = {event.job for event in parsed.flushes_finished}
+        for event in parsed.table_files:
+            if event.job in flush_jobs:
+                records.append({
+                    "timestamp": event.timestamp,
+                    "level": 0,
+                    "files": 1,
+                    "size_mb": event.file_size / (1024 * 1024),
+                    "type": "flush",
+                    "duration_s": 0.0,
+                    "raw_line": ""
+                })
+        
+        # 고정 폭 타임스탬프는 문자열 순서가 시간 순서
+        records.sort(key=lambda r: r["timestamp"])
+        return records
+    
     def parse_compaction_line(self, line):
         """컴팩션 로그 라인 파싱"""
         try:
             # 시간 추출
-            time_match = re.search(r'(\d{4}/\d{2}/\d{2}-\d{2}:\d{2}:\d{2})', line)
-            if not time_match:
+            timestamp = line_time_text(line)
+            if timestamp is None:
                 return None
             
-            timestamp = datetime.strptime(time_match.group(1), '%Y/%m/%d-%H:%M:%S')
-            
             # 레벨 정보 추출
             level_match = re.search(r'Level-(\d+)', line)
             level = int(level_match.group(1)) if level_match else None
@@ -124,12 +200,10 @@ class RocksDBLogAnalyzer:
         """성능 로그 라인 파싱"""
         try:
             # 시간 추출
-            time_match = re.search(r'(\d{4}/\d{2}/\d{2}-\d{2}:\d{2}:\d{2})', line)
-            if not time_match:
+            timestamp = line_time_text(line)
+            if timestamp is None:
                 return None
             
-            timestamp = datetime.strptime(time_match.group(1), '%Y/%m/%d-%H:%M:%S')
-            
             # ops/sec 추출
             ops_match = re.search(r'(\d+(?:\.\d+)?)\s*ops/sec', line)
             ops_per_sec = float(ops_match.group(1)) if ops_match else 0
@@ -166,12 +240,10 @@ class RocksDBLogAnalyzer:
         """레벨 통계 로그 라인 파싱"""
         try:
             # 시간 추출
-            time_match = re.search(r'(\d{4}/\d{2}/\d{2}-\d{2}:\d{2}:\d{2})', line)
-            if not time_match:
+            timestamp = line_time_text(line)
+            if timestamp is None:
                 return None
             
-            timestamp = datetime.strptime(time_match.group(1), '%Y/%m/%d-%H:%M:%S')
-            
             # 레벨 추출
             level_match = re.search(r'Level-(\d+)', line)
             level = int(level_match.group(1)) if level_match else None
@@ -425,34 +497,34 @@ class RocksDBLogAnalyzer:
         plt.close()
     
     def plot_performance_trends(self, performance_data):
-        """성능 트렌드 시각화"""
+        """성능 트렌드 시각화 (긴 실행은 LTTB + min/max 밴드로 다운샘플링)"""
         df = pd.DataFrame(performance_data)
         
         fig, axes = plt.subplots(2, 2, figsize=(15, 10))
         
         # 시간별 ops/sec
-        axes[0, 0].plot(df['timestamp'], df['ops_per_sec'], alpha=0.7)
+        plot_downsampled(axes[0, 0], df['timestamp'], df['ops_per_sec'], alpha=0.7)
         axes[0, 0].set_title('시간별 처리량 (ops/sec)')
         axes[0, 0].set_xlabel('시간')
         axes[0, 0].set_ylabel('ops/sec')
         axes[0, 0].tick_params(axis='x', rotation=45)
         
         # 시간별 MiB/s
-        axes[0, 1].plot(df['timestamp'], df['mbps'], alpha=0.7)
+        plot_downsampled(axes[0, 1], df['timestamp'], df['mbps'], alpha=0.7)
         axes[0, 1].set_title('시간별 처리량 (MiB/s)')
         axes[0, 1].set_xlabel('시간')
         axes[0, 1].set_ylabel('MiB/s')
         axes[0, 1].tick_params(axis='x', rotation=45)
         
         # 시간별 평균 지연시간
-        axes[1, 0].plot(df['timestamp'], df['latency_avg'], alpha=0.7)
+        plot_downsampled(axes[1, 0], df['timestamp'], df['latency_avg'], alpha=0.7)
         axes[1, 0].set_title('시간별 평균 지연시간')
         axes[1, 0].set_xlabel('시간')
         axes[1, 0].set_ylabel('지연시간 (ms)')
         axes[1, 0].tick_params(axis='x', rotation=45)
         
         # 95% 지연시간
-        axes[1, 1].plot(df['timestamp'], df['latency_95'], alpha=0.7)
+        plot_downsampled(axes[1, 1], df['timestamp'], df['latency_95'], alpha=0.7)
         axes[1, 1].set_title('시간별 95% 지연시간')
         axes[1, 1].set_xlabel('시간')
         axes[1, 1].set_ylabel('지연시간 (ms)')
@@ -18,6 +18,42 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+# 저장소 루트의 model 패키지 사용 (타임스탬프 일괄 변환)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from model.log_parser import NO_TIMESTAMP, timestamps_to_datetime64
+from model.downsample import plot_downsampled
+
+
+def bracket_timestamp(line):
+    """db_bench 라인의 [YYYY/MM/DD-HH:MM:SS] 텍스트 (없으면 None)"""
+    start = line.find("[")
+    end = line.find("]", start + 1)
+    if start < 0 or end < 0:
+        return None
+    return line[start + 1:end]
+
+
+def resolve_timestamps(records):
+    """
+    레코드의 원본 타임스탬프 문자열을 한 번에 변환
+    (대괄호가 없던 레코드는 현재 시각, 날짜로 읽을 수 없는 레코드는 제외)
+    변환은 datetime64로 일괄 처리하고, 레코드에는 이전과 같이 datetime 객체를 저장
+    (결과 JSON의 시각 형식 유지)
+    """
+    raw = [r["timestamp"] for r in records]
+    times = timestamps_to_datetime64(raw)
+    invalid = times.view(np.int64) == NO_TIMESTAMP
+    now = datetime.now()
+    
+    resolved = []
+    for record, text, timestamp, bad in zip(records, raw, times.astype(object), invalid):
+        if bad and text is not None:
+            continue
+        record["timestamp"] = now if bad else timestamp
+        resolved.append(record)
+    return resolved
+
+
 class PhaseBRunner:
     def __init__(self, base_dir="/home/sslab/rocksdb-put-model/experiments/2025-09-12"):
         self.base_dir = Path(base_dir)
@@ -255,12 +291,8 @@ class PhaseBRunner:
                 # 성능 통계 라인 파싱
                 if "fillrandom" in line and "ops/sec" in line:
                     try:
-                        # 시간 추출
-                        if "[" in line and "]" in line:
-                            time_part = line[line.find("[")+1:line.find("]")]
-                            timestamp = datetime.strptime(time_part, "%Y/%m/%d-%H:%M:%S")
-                        else:
-                            timestamp = datetime.now()
+                        # 시간 추출 (변환은 파일을 다 읽은 뒤 일괄 처리)
+                        timestamp = bracket_timestamp(line)
                         
                         # ops/sec 추출
                         ops_match = line.split("ops/sec")[0].split()[-1]
@@ -306,6 +338,8 @@ class PhaseBRunner:
                         self.logger.warning(f"성능 데이터 파싱 실패: {line} - {e}")
                         continue
         
+        performance_data = resolve_timestamps(performance_data)
+        
         return {
             "raw_data": performance_data,
             "total_measurements": len(performance_data),
@@ -410,6 +444,10 @@ class PhaseBRunner:
                                 level_stats[level_key] = []
                             level_stats[level_key].append(level_info)
         
+        compaction_data = resolve_timestamps(compaction_data)
+        level_stats = {key: resolve_timestamps(records) for key, records in level_stats.items()}
+        level_stats = {key: records for key, records in level_stats.items() if records}
+        
         # 컴팩션 통계 계산
         compaction_stats = self.calculate_compaction_stats(compaction_data)
         
@@ -425,12 +463,8 @@ class PhaseBRunner:
     def parse_compaction_line(self, line):
         """컴팩션 로그 라인 파싱"""
         try:
-            # 시간 추출
-            if "[" in line and "]" in line:
-                time_part = line[line.find("[")+1:line.find("]")]
-                timestamp = datetime.strptime(time_part, "%Y/%m/%d-%H:%M:%S")
-            else:
-                timestamp = datetime.now()
+            # 시간 추출 (변환은 analyze_compaction_stats에서 일괄 처리)
+            timestamp = bracket_timestamp(line)
             
             # 레벨 정보 추출
             level_match = None
@@ -472,12 +506,8 @@ class PhaseBRunner:
     def parse_level_line(self, line):
         """레벨 통계 로그 라인 파싱"""
         try:
-            # 시간 추출
-            if "[" in line and "]" in line:
-                time_part = line[line.find("[")+1:line.find("]")]
-                timestamp = datetime.strptime(time_part, "%Y/%m/%d-%H:%M:%S")
-            else:
-                timestamp = datetime.now()
+            # 시간 추출 (변환은 analyze_compaction_stats에서 일괄 처리)
+            timestamp = bracket_timestamp(line)
             
             # 레벨 추출
             level_match = None
@@ -556,7 +586,7 @@ class PhaseBRunner:
         self.logger.info("=== 시각화 생성 완료 ===")
     
     def plot_performance_trends(self):
-        """성능 트렌드 시각화"""
+        """성능 트렌드 시각화 (긴 실행은 LTTB + min/max 밴드로 다운샘플링)"""
         fig, axes = plt.subplots(2, 2, figsize=(15, 10))
         
         # Uniform 분포 성능
@@ -564,12 +594,12 @@ class PhaseBRunner:
         if uniform_data and "raw_data" in uniform_data:
             uniform_df = pd.DataFrame(uniform_data["raw_data"])
             
-            axes[0, 0].plot(uniform_df['timestamp'], uniform_df['ops_per_sec'], alpha=0.7)
+            plot_downsampled(axes[0, 0], uniform_df['timestamp'], uniform_df['ops_per_sec'], alpha=0.7)
             axes[0, 0].set_title('Uniform 분포 - 처리량 (ops/sec)')
             axes[0, 0].set_ylabel('ops/sec')
             axes[0, 0].tick_params(axis='x', rotation=45)
             
-            axes[0, 1].plot(uniform_df['timestamp'], uniform_df['mbps'], alpha=0.7)
+            plot_downsampled(axes[0, 1], uniform_df['timestamp'], uniform_df['mbps'], alpha=0.7)
             axes[0, 1].set_title('Uniform 분포 - 대역폭 (MiB/s)')
             axes[0, 1].set_ylabel('MiB/s')
             axes[0, 1].tick_params(axis='x', rotation=45)
@@ -579,12 +609,12 @@ class PhaseBRunner:
         if zipfian_data and "raw_data" in zipfian_data:
             zipfian_df = pd.DataFrame(zipfian_data["raw_data"])
             
-            axes[1, 0].plot(zipfian_df['timestamp'], zipfian_df['ops_per_sec'], alpha=0.7, color='orange')
+            plot_downsampled(axes[1, 0], zipfian_df['timestamp'], zipfian_df['ops_per_sec'], alpha=0.7, color='orange')
             axes[1, 0].set_title('Zipfian 분포 - 처리량 (ops/sec)')
             axes[1, 0].set_ylabel('ops/sec')
             axes[1, 0].tick_params(axis='x', rotation=45)
             
-            axes[1, 1].plot(zipfian_df['timestamp'], zipfian_df['mbps'], alpha=0.7, color='orange')
+            plot_downsampled(axes[1, 1], zipfian_df['timestamp'], zipfian_df['mbps'], alpha=0.7, color='orange')
             axes[1, 1].set_title('Zipfian 분포 - 대역폭 (MiB/s)')
             axes[1, 1].set_ylabel('MiB/s')
             axes[1, 1].tick_params(axis='x', rotation=45)
@@ -0,0 +1,408 @@
+"""
+PutModel v4: Capacity Planning (Inverse Solver)
+
+This module answers the inverse of the forward models: given a target put
+rate, workload shape and stall budget, what is the minimum device
+bandwidth and how many background jobs are needed. Scenarios are arrays
+and are solved together.
+
+Key Features:
+- Exact inversion of the steady-state S_max bounds (model/smax.py)
+- Cheapest (B_w, B_r) pair and feasible frontier under the v2.1 mixed constraint
+- Envelope-based v4 steady state (per-level capacity, L0 file balance, stall curve)
+- Vectorized bisection over device scale for every scenario x numjobs candidate
+- Cheapest feasible (numjobs, bandwidth) point under a linear cost
+"""
+
+import argparse
+import time
+import numpy as np
+from typing import Callable, Dict, Optional, Sequence
+
+try:
+    from .smax import ArrayLike, device_requirements, grid, leveled_wa
+    from .envelope import EnvelopeModel
+    from .v4_simulator import V4Simulator, load_config
+    from .stall_series import SIMULATOR_STALL_CAP
+except ImportError:
+    # Fallback for direct execution
+    import sys
+    import os
+    sys.path.append(os.path.dirname(__file__))
+    from smax import ArrayLike, device_requirements, grid, leveled_wa
+    from envelope import EnvelopeModel
+    from v4_simulator import V4Simulator, load_config
+    from stall_series import SIMULATOR_STALL_CAP
+
+
+def bisect_min(feasible: Callable[[np.ndarray], np.ndarray], lo: ArrayLike, hi: ArrayLike,
+               iterations: int = 60) -> np.ndarray:
+    """
+    Smallest x in [lo, hi] for which a monotone predicate becomes true.
+
+    All elements are bisected together; `feasible` is called once per
+    iteration with the whole array of midpoints.
+
+    Args:
+        feasible: Vectorized predicate, False below and True above the root
+        lo: Lower bracket (broadcast)
+        hi: Upper bracket (broadcast)
+        iterations: Number of halvings
+
+    Returns:
+        Array of x (upper end of the final bracket); NaN where the
+        predicate is false at hi
+    """
+    lo, hi = np.broadcast_arrays(np.asarray(lo, dtype=np.float64), np.asarray(hi, dtype=np.float64))
+    lo, hi = lo.copy(), hi.copy()
+    ok_hi = np.broadcast_to(feasible(hi), hi.shape)
+    ok_lo = np.broadcast_to(feasible(lo), lo.shape)
+    hi[ok_lo] = lo[ok_lo]
+    for _ in range(iterations):
+        mid = 0.5 * (lo + hi)
+        ok = np.broadcast_to(feasible(mid), mid.shape)
+        hi = np.where(ok, mid, hi)
+        lo = np.where(ok, lo, mid)
+    return np.where(ok_hi, hi, np.nan)
+
+
+def plan_bandwidth(target: ArrayLike, CR: ArrayLike, WA: Optional[ArrayLike] = None, *,
+                   eta: ArrayLike = 1.0, wal_factor: ArrayLike = 0.0,
+                   T: Optional[ArrayLike] = None, depth: Optional[ArrayLike] = None,
+                   p_stall_max: ArrayLike = 0.0, cost_w: ArrayLike = 1.0,
+                   cost_r: ArrayLike = 1.0) -> Dict[str, np.ndarray]:
+    """
+    Minimum device bandwidth for a target put rate under the S_max bounds.
+
+    The bounds are steady-state rates at which compaction keeps up, so a
+    device on them sustains the target without stalls (p_stall = 0) and
+    every stall budget is met; the budget only has to be valid. Each bound
+    inverts exactly:
+
+        B_w >= S w_req,  B_r >= S r_req,  B_eff >= S (w_req + eta r_req)
+
+    With the v2.1 harmonic B_eff at the workload read share the mixed
+    constraint becomes S w_req / B_w + S r_req / B_r <= 1; the cheapest
+    pair on that frontier for cost c_w B_w + c_r B_r is
+
+        B_w = S (sqrt(w c_w) + sqrt(r c_r)) sqrt(w / c_w)
+        B_r = S (sqrt(w c_w) + sqrt(r c_r)) sqrt(r / c_r)
+
+    Args:
+        target: Target put rate (MiB/s user)
+        CR: Compression ratio
+        WA: Write amplification (or T and depth)
+        eta: Read weight of the mixed bound
+        wal_factor: WAL bytes per user byte
+        T: Level size ratio, used with depth
+        depth: Active LSM depth
+        p_stall_max: Stall probability budget (0 <= p < 1)
+        cost_w: Cost per MiB/s of write bandwidth
+        cost_r: Cost per MiB/s of read bandwidth
+
+    Returns:
+        Dictionary of broadcast arrays: required_rate, w_req, r_req,
+        B_w_min, B_r_min, B_eff_min (each bound alone), and B_w, B_r, cost
+        of the cheapest pair
+    """
+    if depth is not None:
+        if WA is not None:
+            raise ValueError("Give either WA or (T, depth), not both")
+        if T is None:
+            raise ValueError("T is required when depth is given")
+        WA = leveled_wa(T, depth)
+    elif WA is None:
+        raise ValueError("Either WA or (T, depth) is required")
+
+    p_stall_max = np.asarray(p_stall_max, dtype=np.float64)
+    if np.any((p_stall_max < 0) | (p_stall_max >= 1)):
+        raise ValueError("p_stall_max must be in [0, 1)")
+    cost_w = np.asarray(cost_w, dtype=np.float64)
+    cost_r = np.asarray(cost_r, dtype=np.float64)
+    if np.any(cost_w <= 0) or np.any(cost_r <= 0):
+        raise ValueError("Bandwidth costs must be positive")
+
+    required = np.asarray(target, dtype=np.float64)
+    req = device_requirements(CR, WA, wal_factor)
+    w_req, r_req = req['w_req'], req['r_req']
+
+    root = np.sqrt(w_req * cost_w) + np.sqrt(r_req * cost_r)
+    B_w = required * root * np.sqrt(w_req / cost_w)
+    B_r = required * root * np.sqrt(r_req / cost_r)
+
+    return {
+        'required_rate': required,
+        'w_req': w_req,
+        'r_req': r_req,
+        'B_w_min': required * w_req,
+        'B_r_min': required * r_req,
+        'B_eff_min': required * (w_req + np.asarray(eta, dtype=np.float64) * r_req),
+        'B_w': B_w,
+        'B_r': B_r,
+        'cost': cost_w * B_w + cost_r * B_r,
+    }
+
+
+def read_bandwidth_frontier(B_w: ArrayLike, required_rate: ArrayLike,
+                            w_req: ArrayLike, r_req: ArrayLike) -> np.ndarray:
+    """
+    Minimum B_r for a given B_w on the v2.1 mixed-constraint frontier.
+
+    Everything above the frontier is feasible; B_w at or below
+    required_rate * w_req is infeasible for any B_r (inf).
+
+    Args:
+        B_w: Write bandwidth (MiB/s)
+        required_rate: Rate the bounds must hold at (plan_bandwidth 'required_rate')
+        w_req: Device write bytes per user byte
+        r_req: Device read bytes per user byte
+
+    Returns:
+        Broadcast array of minimum B_r
+    """
+    B_w = np.asarray(B_w, dtype=np.float64)
+    required_rate = np.asarray(required_rate, dtype=np.float64)
+    slack = 1.0 - required_rate * np.asarray(w_req, dtype=np.float64) / B_w
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(slack > 0, required_rate * np.asarray(r_req, dtype=np.float64) / slack, np.inf)
+
+
+class V4CapacityPlanner:
+    """
+    Inverse solver over the envelope-based v4 steady state.
+
+    Parameters come from a V4Simulator (levels, level_params with any LOG
+    calibration, compression ratio, device iodepth/bs/Br/Bw, stall curve).
+    A candidate device is the configured one scaled by a factor s: every
+    envelope bandwidth and the physical Br/Bw are multiplied by s.
+
+    Steady state of the simulator for an offered rate X: level capacities
+    C_l = s * mu k eta capacity_factor * min(Beff, Br, Bw); the L0 file
+    count settles where X (1 - p) = C_0 (or at 0 files if X (1 - p0) <= C_0),
+    so p = max(p0, 1 - C_0 / X) with p0 the stall probability at no L0
+    files. The point is feasible when p <= p_stall_max (and the simulator
+    cap) and every level keeps up: X (1 - p) CR demand_ratio_l <= C_l.
+
+    As in plan_bandwidth, every level must keep up with the target itself
+    (X CR demand_ratio_l <= C_l), and the stall budget is only a limit on
+    the steady p at that rate, so a looser budget never needs a larger device.
+    """
+
+    def __init__(self, simulator: V4Simulator):
+        """
+        Initialize the planner.
+
+        Args:
+            simulator: V4Simulator holding the envelope and configuration
+        """
+        self.simulator = simulator
+        self.envelope = simulator.envelope
+        self.levels = list(simulator.levels)
+
+        params = [simulator.level_params[level] for level in self.levels]
+        self.efficiency = np.array([p['mu'] * p['k'] * p['eta'] * p['capacity_factor'] for p in params])
+        self.demand_ratio = np.array([simulator.demand_ratio(level) for level in self.levels])
+        # Calibrated read share per level (NaN: use the scenario's rho_r)
+        self.level_rho_r = np.array([p.get('rho_r', np.nan) for p in params], dtype=np.float64)
+
+        self.stall_threshold = simulator.config.get('stall_threshold', 8)
+        self.stall_steepness = simulator.config.get('stall_steepness', 0.5)
+        self.p0 = min(1.0 / (1.0 + np.exp(self.stall_steepness * self.stall_threshold)), SIMULATOR_STALL_CAP)
+
+    @classmethod
+    def from_config(cls, envelope: EnvelopeModel, config: Dict) -> "V4CapacityPlanner":
+        """Create a planner from an envelope and a v4 simulator configuration."""
+        return cls(V4Simulator(envelope, config))
+
+    def budget_rho_r(self, p_stall_max: ArrayLike) -> np.ndarray:
+        """
+        Simulator read-share estimate at the L0 file count where p_stall
+        reaches the budget (the worst case the budget allows).
+        """
+        p = np.clip(np.asarray(p_stall_max, dtype=np.float64), 1e-9, 1 - 1e-9)
+        n_l0 = self.stall_threshold + np.log(p / (1.0 - p)) / self.stall_steepness
+        return np.vectorize(self.simulator._estimate_rho_r, otypes=[np.float64])(n_l0)
+    
+    def _unit_capacity(self, numjobs: np.ndarray, rho_r: np.ndarray) -> np.ndarray:
+        """Per-level capacity of the configured device (s = 1), shape (..., n_jobs, n_levels)."""
+        sim = self.simulator
+        level_rho_r = np.where(np.isnan(self.level_rho_r), rho_r[..., None, None], self.level_rho_r)
+        Beff = self.envelope.query_batch(level_rho_r, sim.qd, numjobs[:, None], sim.bs_k)
+        return self.efficiency * np.minimum(Beff, min(sim.Br, sim.Bw))
+
+    def plan(self, target: ArrayLike, p_stall_max: ArrayLike = 0.1, rho_r: Optional[ArrayLike] = None,
+             compression_ratio: Optional[ArrayLike] = None, numjobs: Optional[Sequence[int]] = None,
+             cost_w: float = 1.0, cost_r: float = 1.0, cost_job: float = 0.0,
+             max_scale: float = 64.0, iterations: int = 60) -> Dict[str, np.ndarray]:
+        """
+        Minimum device scale per numjobs candidate and the cheapest point.
+
+        Args:
+            target: Put rate X to sustain (MiB/s user), scenario array
+            p_stall_max: Stall probability budget, broadcast with target
+            rho_r: Read share for levels without a calibrated rho_r
+                (default: budget_rho_r of p_stall_max)
+            compression_ratio: Override of the configured compression ratio
+            numjobs: Candidate background job counts (default: envelope axis)
+            cost_w: Cost per MiB/s of write bandwidth
+            cost_r: Cost per MiB/s of read bandwidth
+            cost_job: Cost per background job
+            max_scale: Largest device scale searched
+            iterations: Bisection iterations
+
+        Returns:
+            Dictionary with the candidate axis 'numjobs', per scenario x
+            candidate arrays 'scale', 'B_w', 'B_r', 'cost', 'feasible', and
+            per scenario 'best_numjobs', 'best_scale', 'best_B_w',
+            'best_B_r', 'best_cost', 'p_stall' (NaN where infeasible)
+        """
+        sim = self.simulator
+        CR = sim.compression_ratio if compression_ratio is None else compression_ratio
+        if rho_r is None:
+            rho_r = self.budget_rho_r(p_stall_max)
+        X, Z, CR, rho_r = np.broadcast_arrays(*[np.asarray(v, dtype=np.float64)
+                                                for v in (target, p_stall_max, CR, rho_r)])
+        if numjobs is None:
+            numjobs = self.envelope.numjobs_axis
+        numjobs = np.asarray(numjobs, dtype=np.float64)
+
+        unit = self._unit_capacity(numjobs, rho_r)               # (..., n_jobs, n_levels)
+        X_c, Z_c = X[..., None], np.minimum(Z, SIMULATOR_STALL_CAP)[..., None]
+        level_demand = (CR[..., None] * self.demand_ratio)[..., None, :]
+
+        def steady_p(scale):
+            C0 = scale * unit[..., 0]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return np.maximum(self.p0, 1.0 - C0 / X_c)
+
+        def feasible(scale):
+            # Every level keeps up with the target; the stall budget is a limit
+            keeps_up = np.all(X_c[..., None] * level_demand <= scale[..., None] * unit, axis=-1)
+            return (steady_p(scale) <= Z_c) & keeps_up
+
+        shape = unit.shape[:-1]
+        scale = bisect_min(feasible, np.zeros(shape), np.full(shape, max_scale), iterations)
+        ok = np.isfinite(scale)
+
+        B_w, B_r = scale * sim.Bw, scale * sim.Br
+        cost = cost_w * B_w + cost_r * B_r + cost_job * numjobs
+        best = np.argmin(np.where(ok, cost, np.inf), axis=-1)
+        
+        def pick(values):
+            return np.take_along_axis(values, best[..., None], axis=-1)[..., 0]
+        
+        any_ok = ok.any(axis=-1)
+        best_scale = np.where(any_ok, pick(scale), np.nan)
+
+        return {
+            'numjobs': numjobs,
+            'scale': scale,
+            'B_w': B_w,
+            'B_r': B_r,
+            'cost': np.where(ok, cost, np.nan),
+            'feasible': ok,
+            'best_numjobs': np.where(any_ok, numjobs[best], np.nan),
+            'best_scale': best_scale,
+            'best_B_w': best_scale * sim.Bw,
+            'best_B_r': best_scale * sim.Br,
+            'best_cost': np.where(any_ok, pick(cost), np.nan),
+            'p_stall': np.where(any_ok, pick(steady_p(np.where(ok, scale, max_scale))), np.nan),
+        }
+
+
+def _parse_values(text: str) -> np.ndarray:
+    """Parse a comma-separated list of numbers."""
+    return np.array([float(v) for v in text.split(',')])
+
+
+def main():
+    """Command-line interface for capacity planning."""
+    parser = argparse.ArgumentParser(description='Capacity planning: minimum bandwidth and jobs for a target put rate')
+    parser.add_argument('--target', required=True, help='Target put rates (MiB/s, comma-separated)')
+    parser.add_argument('--p_stall_max', default='0.1', help='Stall budgets (comma-separated)')
+    parser.add_argument('--cr', default='0.54', help='Compression ratios (comma-separated)')
+    parser.add_argument('--wa', help='Write amplifications for the bounds path (comma-separated)')
+    parser.add_argument('--depth', help='Active depths for the bounds path (exclusive with --wa)')
+    parser.add_argument('--T', dest='T', type=float, default=10.0, help='Level size ratio (with --depth)')
+    parser.add_argument('--eta', type=float, default=1.0, help='Read weight of the mixed bound')
+    parser.add_argument('--wal_factor', type=float, default=1.0, help='WAL factor')
+    parser.add_argument('--cost_w', type=float, default=1.0, help='Cost per MiB/s of write bandwidth')
+    parser.add_argument('--cost_r', type=float, default=1.0, help='Cost per MiB/s of read bandwidth')
+    parser.add_argument('--cost_job', type=float, default=0.0, help='Cost per background job (v4 path)')
+    parser.add_argument('--config_yaml', help='v4 simulator configuration (enables the envelope path)')
+    parser.add_argument('--envelope_json', help='Envelope model JSON (default: sample envelope)')
+    parser.add_argument('--envelope_backend', choices=EnvelopeModel.BACKENDS, default='grid',
+                        help='Envelope evaluation backend')
+    parser.add_argument('--rho_r', type=float, help='Read share for uncalibrated levels (v4 path; default: simulator estimate at the stall budget)')
+    parser.add_argument('--output', help='Output CSV file (one row per scenario)')
+
+    args = parser.parse_args()
+
+    axes = {
+        'target': _parse_values(args.target),
+        'p_stall_max': _parse_values(args.p_stall_max),
+        'CR': _parse_values(args.cr),
+    }
+    if args.depth is not None:
+        axes['depth'] = _parse_values(args.depth)
+    elif args.wa is not None:
+        axes['WA'] = _parse_values(args.wa)
+    elif not args.config_yaml:
+        parser.error('give --wa/--depth (bounds path) and/or --config_yaml (envelope path)')
+
+    scenarios = grid(**axes)
+    shape = np.broadcast_shapes(*[v.shape for v in scenarios.values()])
+    columns = {name: np.broadcast_to(values, shape).ravel() for name, values in scenarios.items()}
+    print(f"Scenarios: {' x '.join(f'{n}[{len(v)}]' for n, v in axes.items())} = {len(columns['target'])}")
+
+    if 'WA' in scenarios or 'depth' in scenarios:
+        start = time.perf_counter()
+        bounds = plan_bandwidth(scenarios['target'], scenarios['CR'], scenarios.get('WA'),
+                                eta=args.eta, wal_factor=args.wal_factor, T=args.T,
+                                depth=scenarios.get('depth'), p_stall_max=scenarios['p_stall_max'],
+                                cost_w=args.cost_w, cost_r=args.cost_r)
+        elapsed = time.perf_counter() - start
+        print(f"\nS_max bounds path ({elapsed * 1000:.2f} ms):")
+        for key in ('B_w_min', 'B_r_min', 'B_eff_min', 'B_w', 'B_r', 'cost'):
+            columns[f'bounds_{key}'] = np.broadcast_to(bounds[key], shape).ravel()
+        for i in range(min(len(columns['target']), 20)):
+            print(f"  X={columns['target'][i]:.0f} p<={columns['p_stall_max'][i]:.2f} CR={columns['CR'][i]:.2f}: "
+                  f"B_w>={columns['bounds_B_w_min'][i]:.0f}, B_r>={columns['bounds_B_r_min'][i]:.0f}, "
+                  f"cheapest B_w={columns['bounds_B_w'][i]:.0f}/B_r={columns['bounds_B_r'][i]:.0f} MiB/s")
+
+    if args.config_yaml:
+        if args.envelope_json:
+            envelope = EnvelopeModel.from_json_path(args.envelope_json, backend=args.envelope_backend)
+        else:
+            try:
+                from .envelope import create_sample_envelope_model
+            except ImportError:
+                from envelope import create_sample_envelope_model
+            envelope = create_sample_envelope_model()
+        planner = V4CapacityPlanner.from_config(envelope, load_config(args.config_yaml))
+
+        start = time.perf_counter()
+        plan = planner.plan(scenarios['target'], scenarios['p_stall_max'], rho_r=args.rho_r,
+                            compression_ratio=scenarios['CR'], cost_w=args.cost_w,
+                            cost_r=args.cost_r, cost_job=args.cost_job)
+        elapsed = time.perf_counter() - start
+        print(f"\nEnvelope v4 path ({elapsed * 1000:.2f} ms, numjobs candidates {plan['numjobs'].astype(int).tolist()}):")
+        for key in ('best_numjobs', 'best_B_w', 'best_B_r', 'best_cost', 'p_stall'):
+            columns[f'v4_{key}'] = np.broadcast_to(plan[key], shape).ravel()
+        for i in range(min(len(columns['target']), 20)):
+            if np.isnan(columns['v4_best_numjobs'][i]):
+                print(f"  X={columns['target'][i]:.0f} p<={columns['p_stall_max'][i]:.2f} "
+                      f"CR={columns['CR'][i]:.2f}: infeasible")
+                continue
+            print(f"  X={columns['target'][i]:.0f} p<={columns['p_stall_max'][i]:.2f} CR={columns['CR'][i]:.2f}: "
+                  f"numjobs={int(columns['v4_best_numjobs'][i])}, B_w>={columns['v4_best_B_w'][i]:.0f}, "
+                  f"B_r>={columns['v4_best_B_r'][i]:.0f} MiB/s (p_stall={columns['v4_p_stall'][i]:.3f})")
+
+    if args.output:
+        import pandas as pd
+        pd.DataFrame(columns).to_csv(args.output, index=False)
+        print(f"Saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,456 @@
+"""
+PutModel v4: Change-Point Segmentation
+
+This module splits put-rate, WA and other run series into regimes (e.g.
+the initial/middle/final phases of a fill run). Segment costs come from
+prefix sums, so the cost of every candidate segment is one vectorized
+expression; the offline solvers are binary segmentation and PELT, and a
+Bayesian online change-point detector handles live data one sample at a
+time. By default PELT searches change points on a grid of at most
+PELT_GRID_POINTS positions and then moves each to the best position within
++-jump, so the penalized optimum is exact only with jump=1.
+
+Key Features:
+- Gaussian segment costs (mean shift 'l2', mean and variance 'normal') for
+  one or several series at once, robust per-series scaling
+- Binary segmentation: best split of every segment over all positions at once
+- PELT: minimum of cost + penalty per change point on a grid of positions,
+  with pruning and +-jump refinement (exact over all positions with jump=1)
+- Phase boundaries for a fixed number of phases
+- Bayesian online change-point detection (Normal-Gamma model, constant
+  hazard, truncated run lengths) with O(max_run_length) work per sample
+"""
+
+import math
+import numpy as np
+from typing import Dict, List, Optional, Sequence
+
+COSTS = ('l2', 'normal')
+
+# Default PELT grid: change points on at most this many positions
+PELT_GRID_POINTS = 2000
+
+# Variance floor of the 'normal' cost (in scaled units)
+_MIN_VARIANCE = 1e-6
+
+
+def scale_signal(signal, robust: bool = True) -> np.ndarray:
+    """
+    Center each series and scale it to unit noise.
+
+    The noise level is estimated from first differences (MAD / 0.6745 /
+    sqrt 2), which ignores level shifts, so that the default penalties hold
+    whatever the units of the series (MB/s, WA, ...).
+
+    Args:
+        signal: (n,) or (n, d) array; NaNs are filled with the series median
+        robust: Use the difference-based noise estimate (False: standard deviation)
+
+    Returns:
+        (n, d) float64 array
+    """
+    x = np.asarray(signal, dtype=np.float64)
+    if x.ndim == 1:
+        x = x[:, None]
+    x = np.where(np.isnan(x), np.nanmedian(x, axis=0), x)
+    if robust and len(x) > 2:
+        diffs = np.diff(x, axis=0)
+        noise = np.median(np.abs(diffs - np.median(diffs, axis=0)), axis=0) / 0.6745 / math.sqrt(2.0)
+        noise = np.where(noise > 0, noise, x.std(axis=0))
+    else:
+        noise = x.std(axis=0)
+    noise = np.where(noise > 0, noise, 1.0)
+    return (x - x.mean(axis=0)) / noise
+
+
+class SegmentCost:
+    """
+    Vectorized Gaussian cost of segments [start, end) of a signal.
+
+    'l2': sum of squared deviations from the segment mean (mean changes).
+    'normal': n * sum(log variance) (mean and/or variance changes).
+    """
+
+    def __init__(self, signal, cost: str = 'l2'):
+        """
+        Initialize the prefix sums.
+
+        Args:
+            signal: (n,) or (n, d) array (already scaled, see scale_signal)
+            cost: One of COSTS
+        """
+        if cost not in COSTS:
+            raise ValueError(f"cost must be one of {COSTS}, got {cost!r}")
+        x = np.asarray(signal, dtype=np.float64)
+        if x.ndim == 1:
+            x = x[:, None]
+        self.n, self.dims = x.shape
+        self.cost = cost
+        zero = np.zeros((1, self.dims))
+        self._sum = np.concatenate([zero, np.cumsum(x, axis=0)])
+        self._sum_sq = np.concatenate([zero, np.cumsum(x * x, axis=0)])
+
+    def __call__(self, start, end) -> np.ndarray:
+        """
+        Cost of segments [start, end) (broadcast; end > start).
+
+        Args:
+            start: Segment starts
+            end: Segment ends (exclusive)
+
+        Returns:
+            Cost array
+        """
+        start, end = np.asarray(start), np.asarray(end)
+        length = (end - start)[..., None].astype(np.float64)
+        total = self._sum[end] - self._sum[start]
+        squared = self._sum_sq[end] - self._sum_sq[start]
+        deviation = np.maximum(squared - total * total / length, 0.0)
+        if self.cost == 'l2':
+            return deviation.sum(axis=-1)
+        variance = np.maximum(deviation / length, _MIN_VARIANCE)
+        return (length * np.log(variance)).sum(axis=-1)
+
+    def default_penalty(self) -> float:
+        """BIC-style penalty per change point for a unit-noise signal."""
+        params = self.dims * (1 if self.cost == 'l2' else 2)
+        return 2.0 * params * math.log(max(self.n, 2))
+
+
+def _best_split(cost: SegmentCost, start: int, end: int, min_size: int):
+    """Best single split of [start, end): (gain, position) or (0, None)."""
+    splits = np.arange(start + min_size, end - min_size + 1)
+    if len(splits) == 0:
+        return 0.0, None
+    total = cost(start, end)
+    split_cost = cost(start, splits) + cost(splits, end)
+    best = int(np.argmin(split_cost))
+    return float(total - split_cost[best]), int(splits[best])
+
+
+def binary_segmentation(signal, n_bkps: Optional[int] = None, penalty: Optional[float] = None,
+                        cost: str = 'l2', min_size: int = 2, scale: bool = True) -> List[int]:
+    """
+    Change points by binary segmentation.
+
+    Every step splits the segment whose best split lowers the total cost
+    most; each best split is found exactly over all positions at once.
+
+    Args:
+        signal: (n,) or (n, d) series
+        n_bkps: Number of change points (stops earlier if no split is possible)
+        penalty: Stop when the best gain is below this (used when n_bkps is None;
+            default: SegmentCost.default_penalty)
+        cost: One of COSTS
+        min_size: Minimum segment length
+        scale: Scale the signal with scale_signal first
+
+    Returns:
+        Sorted change-point positions (start index of each new segment)
+    """
+    segment_cost = SegmentCost(scale_signal(signal) if scale else signal, cost)
+    if n_bkps is None and penalty is None:
+        penalty = segment_cost.default_penalty()
+
+    # Candidate split of every current segment: start -> (gain, position, end)
+    candidates = {0: _best_split(segment_cost, 0, segment_cost.n, min_size) + (segment_cost.n,)}
+    bkps = []
+    while n_bkps is None or len(bkps) < n_bkps:
+        start = max(candidates, key=lambda s: candidates[s][0])
+        gain, position, end = candidates[start]
+        if position is None or (n_bkps is None and gain < penalty):
+            break
+        bkps.append(position)
+        candidates[start] = _best_split(segment_cost, start, position, min_size) + (position,)
+        candidates[position] = _best_split(segment_cost, position, end, min_size) + (end,)
+    return sorted(bkps)
+
+
+def pelt(signal, penalty: Optional[float] = None, cost: str = 'l2', min_size: int = 2,
+         jump: Optional[int] = None, scale: bool = True) -> List[int]:
+    """
+    Change points minimizing total segment cost + penalty per change point (PELT).
+
+    Exact over change points on multiples of jump (each is then moved to
+    the best position within +-jump, which need not be the joint optimum;
+    pass jump=1 for the exact solution over all positions). Candidates that can no
+    longer start the optimal last segment are pruned, so the work per step
+    stays small on series with regular changes; a few long regimes keep
+    many candidates alive, hence the default grid for long series.
+
+    Args:
+        signal: (n,) or (n, d) series
+        penalty: Penalty per change point (default: SegmentCost.default_penalty)
+        cost: One of COSTS
+        min_size: Minimum segment length
+        jump: Grid of admissible change points (1 = every sample; default:
+            n / PELT_GRID_POINTS, rounded up)
+        scale: Scale the signal with scale_signal first
+
+    Returns:
+        Sorted change-point positions
+    """
+    segment_cost = SegmentCost(scale_signal(signal) if scale else signal, cost)
+    n = segment_cost.n
+    if penalty is None:
+        penalty = segment_cost.default_penalty()
+    min_size = max(min_size, 1)
+    jump = max(int(jump if jump is not None else math.ceil(n / PELT_GRID_POINTS)), 1)
+
+    ends = np.append(np.arange(jump * math.ceil(min_size / jump), n, jump), n)
+    best = np.full(n + 1, np.inf)
+    best[0] = -penalty
+    previous = np.zeros(n + 1, dtype=np.int64)
+    candidates = np.array([0], dtype=np.int64)
+
+    for end in ends.tolist():
+        admissible = candidates[end - candidates >= min_size]
+        if len(admissible) == 0:
+            continue
+        total = best[admissible] + segment_cost(admissible, end)
+        i = int(np.argmin(total))
+        best[end] = total[i] + penalty
+        previous[end] = admissible[i]
+        # Prune: a start that is already worse than the optimum stays worse
+        keep = np.ones(len(candidates), dtype=bool)
+        keep[end - candidates >= min_size] = total <= best[end]
+        candidates = np.append(candidates[keep], end)
+
+    bkps = []
+    end = n
+    while end > 0:
+        end = int(previous[end])
+        if end > 0:
+            bkps.append(end)
+    bkps.sort()
+    if jump > 1:
+        bkps = _refine(segment_cost, bkps, jump, min_size)
+    return bkps
+
+
+def _refine(cost: SegmentCost, bkps: List[int], radius: int, min_size: int) -> List[int]:
+    """Move grid change points to the best position within +-radius (merging duplicates)."""
+    refined = []
+    edges = [0] + bkps + [cost.n]
+    for i, bkp in enumerate(bkps):
+        start = refined[-1] if refined else 0
+        end = edges[i + 2]
+        lo, hi = max(bkp - radius, start + min_size), min(bkp + radius, end - min_size)
+        if hi < lo:
+            refined.append(bkp)
+            continue
+        splits = np.arange(lo, hi + 1)
+        best = int(splits[np.argmin(cost(start, splits) + cost(splits, end))])
+        if not refined or best - refined[-1] >= min_size:
+            refined.append(best)
+    return refined
+
+
+def phase_boundaries(signal, n_phases: int = 3, method: str = 'binseg', cost: str = 'l2',
+                     min_fraction: float = 0.05, **kwargs) -> List[int]:
+    """
+    Boundaries of a fixed number of phases.
+
+    Args:
+        signal: (n,) or (n, d) series
+        n_phases: Number of phases (boundaries = n_phases - 1)
+        method: 'binseg' (exactly n_phases - 1 splits) or 'pelt' (the
+            n_phases - 1 change points with the largest cost gain)
+        cost: One of COSTS
+        min_fraction: Minimum phase length as a fraction of the series
+        **kwargs: Passed to pelt() (penalty, jump)
+
+    Returns:
+        Sorted boundary positions (may be fewer for very short series)
+    """
+    x = scale_signal(signal)
+    min_size = max(2, int(len(x) * min_fraction))
+    if method == 'binseg':
+        return binary_segmentation(x, n_bkps=n_phases - 1, cost=cost, min_size=min_size, scale=False)
+    if method != 'pelt':
+        raise ValueError(f"method must be 'binseg' or 'pelt', got {method!r}")
+
+    bkps = pelt(x, cost=cost, min_size=min_size, scale=False, **kwargs)
+    if len(bkps) <= n_phases - 1:
+        return bkps
+    # Keep the change points whose removal would raise the cost most
+    segment_cost = SegmentCost(x, cost)
+    edges = np.array([0] + bkps + [len(x)])
+    merge_gain = (segment_cost(edges[:-2], edges[2:])
+                  - segment_cost(edges[:-2], edges[1:-1]) - segment_cost(edges[1:-1], edges[2:]))
+    keep = np.sort(np.argsort(merge_gain)[::-1][:n_phases - 1])
+    return [bkps[i] for i in keep]
+
+
+def segment_labels(n: int, bkps: Sequence[int]) -> np.ndarray:
+    """Segment number of every sample for change points bkps."""
+    labels = np.zeros(n, dtype=np.int64)
+    labels[np.asarray(bkps, dtype=np.int64)] = 1
+    labels[0] = 0
+    return np.cumsum(labels)
+
+
+class OnlineChangePointDetector:
+    """
+    Bayesian online change-point detection (Adams & MacKay) for one series.
+
+    Samples are Gaussian with unknown mean and variance (Normal-Gamma
+    prior); a change happens with constant hazard 1 / expected_run_length.
+    The run-length posterior is truncated to max_run_length hypotheses, so
+    each update is O(max_run_length) no matter how long the stream runs.
+    """
+
+    def __init__(self, expected_run_length: float = 250.0, mu0: float = 0.0, kappa0: float = 1.0,
+                 alpha0: float = 1.0, beta0: float = 1.0, max_run_length: int = 500,
+                 threshold: float = 0.5, lag: int = 5):
+        """
+        Initialize the detector.
+
+        Args:
+            expected_run_length: Mean segment length in samples (hazard = 1 / this)
+            mu0: Prior mean
+            kappa0: Prior pseudo-count of the mean
+            alpha0: Prior shape of the precision
+            beta0: Prior rate of the precision (alpha0 / beta0 ~ 1 / variance)
+            max_run_length: Run-length hypotheses kept
+            threshold: Change probability that reports a change point
+            lag: Run lengths below this count as "changed recently"
+        """
+        if expected_run_length <= 1:
+            raise ValueError("expected_run_length must be greater than 1")
+        self.hazard = 1.0 / expected_run_length
+        self.prior = (mu0, kappa0, alpha0, beta0)
+        self.max_run_length = int(max_run_length)
+        self.threshold = threshold
+        self.lag = lag
+        # lgamma((nu + 1) / 2) - lgamma(nu / 2) for nu = 2 alpha0 + r
+        nu = 2.0 * alpha0 + np.arange(self.max_run_length + 1)
+        self._log_gamma_ratio = np.array([math.lgamma((v + 1) / 2) - math.lgamma(v / 2) for v in nu])
+        self.reset()
+
+    @classmethod
+    def from_warmup(cls, samples, **kwargs) -> "OnlineChangePointDetector":
+        """
+        Detector with a prior centered on warm-up samples.
+
+        Args:
+            samples: Initial samples (e.g. the first minutes of a run)
+            **kwargs: Other __init__ arguments
+
+        Returns:
+            OnlineChangePointDetector
+        """
+        samples = np.asarray(samples, dtype=np.float64)
+        samples = samples[np.isfinite(samples)]
+        if len(samples) < 2:
+            raise ValueError("Need at least two warm-up samples")
+        variance = max(float(samples.var()), 1e-12)
+        alpha0 = kwargs.pop('alpha0', 1.0)
+        return cls(mu0=float(samples.mean()), alpha0=alpha0, beta0=alpha0 * variance, **kwargs)
+
+    def reset(self):
+        """Forget the stream."""
+        mu0, kappa0, alpha0, beta0 = self.prior
+        self.t = 0
+        self.run_probs = np.array([1.0])
+        self.mu = np.array([mu0])
+        self.kappa = np.array([kappa0])
+        self.alpha = np.array([alpha0])
+        self.beta = np.array([beta0])
+        self.changepoints: List[int] = []
+        self._in_change = False
+
+    def _predictive_logpdf(self, x: float) -> np.ndarray:
+        """Student-t log predictive of every run-length hypothesis."""
+        nu = 2.0 * self.alpha
+        scale2 = self.beta * (self.kappa + 1.0) / (self.alpha * self.kappa)
+        z = (x - self.mu) ** 2 / (nu * scale2)
+        return (self._log_gamma_ratio[:len(nu)] - 0.5 * np.log(np.pi * nu * scale2)
+                - (nu + 1.0) / 2.0 * np.log1p(z))
+
+    def update(self, x: float) -> float:
+        """
+        Absorb one sample.
+
+        Args:
+            x: Sample (NaN samples are skipped)
+
+        Returns:
+            Probability that the current run started within the last lag samples
+        """
+        if not math.isfinite(x):
+            return self.change_probability
+        predictive = np.exp(self._predictive_logpdf(x))
+        growth = self.run_probs * predictive * (1.0 - self.hazard)
+        change = float((self.run_probs * predictive).sum() * self.hazard)
+        probs = np.concatenate([[change], growth])
+        total = probs.sum()
+        probs = probs / total if total > 0 else np.concatenate([[1.0], np.zeros(len(growth))])
+
+        # Posterior parameters: the new run restarts from the prior
+        mu0, kappa0, alpha0, beta0 = self.prior
+        beta = self.beta + self.kappa * (x - self.mu) ** 2 / (2.0 * (self.kappa + 1.0))
+        self.mu = np.concatenate([[mu0], (self.kappa * self.mu + x) / (self.kappa + 1.0)])
+        self.kappa = np.concatenate([[kappa0], self.kappa + 1.0])
+        self.alpha = np.concatenate([[alpha0], self.alpha + 0.5])
+        self.beta = np.concatenate([[beta0], beta])
+
+        if len(probs) > self.max_run_length:
+            # Fold the oldest hypothesis into the one before it
+            probs[-2] += probs[-1]
+            probs, self.mu, self.kappa, self.alpha, self.beta = (
+                probs[:-1], self.mu[:-1], self.kappa[:-1], self.alpha[:-1], self.beta[:-1])
+        self.run_probs = probs
+        self.t += 1
+
+        p_change = self.change_probability
+        if p_change >= self.threshold and not self._in_change and self.t > self.lag:
+            self.changepoints.append(self.t - self.map_run_length)
+        self._in_change = p_change >= self.threshold
+        return p_change
+
+    @property
+    def change_probability(self) -> float:
+        """Posterior probability that the run length is below lag."""
+        return float(self.run_probs[:self.lag].sum())
+
+    @property
+    def map_run_length(self) -> int:
+        """Most probable current run length."""
+        return int(np.argmax(self.run_probs))
+
+    def run(self, samples) -> np.ndarray:
+        """
+        Feed a batch of samples in order.
+
+        Args:
+            samples: 1-D samples
+
+        Returns:
+            Change probability after each sample
+        """
+        return np.array([self.update(float(x)) for x in np.asarray(samples, dtype=np.float64)])
+
+
+def summarize_segments(signal, bkps: Sequence[int]) -> Dict[str, np.ndarray]:
+    """
+    Per-segment statistics of a 1-D series.
+
+    Args:
+        signal: 1-D series
+        bkps: Change points
+
+    Returns:
+        Dictionary with 'start', 'end' (exclusive), 'mean', 'std' arrays
+    """
+    x = np.asarray(signal, dtype=np.float64)
+    edges = np.array([0] + list(bkps) + [len(x)])
+    labels = segment_labels(len(x), bkps)
+    valid = ~np.isnan(x)
+    count = np.bincount(labels[valid], minlength=len(edges) - 1)
+    total = np.bincount(labels[valid], weights=x[valid], minlength=len(edges) - 1)
+    squared = np.bincount(labels[valid], weights=x[valid] ** 2, minlength=len(edges) - 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = total / count
+        std = np.sqrt(np.maximum(squared / count - mean ** 2, 0.0))
+    return {'start': edges[:-1], 'end': edges[1:], 'mean': mean, 'std': std}
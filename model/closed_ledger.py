@@ -9,15 +9,43 @@ Key Features:
 - Physical verification of ledger closure
 - Per-level I/O breakdown
 - Support for multiple data sources (LOG, statistics, iostat)
+- Per-interval ledger series with vectorized rolling WA/RA and closure error
 """
 
 import json
 import re
+import numpy as np
 import pandas as pd
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 from pathlib import Path
 import warnings
 
+try:
+    from .log_parser import LEDGER_COUNTERS, NO_TIMESTAMP, LogFollower, ParsedLog, parse_log_file
+    from .diskstats import DeviceSeries, load_device_series
+except ImportError:
+    # Fallback for direct execution
+    import sys
+    import os
+    sys.path.append(os.path.dirname(__file__))
+    from log_parser import LEDGER_COUNTERS, NO_TIMESTAMP, LogFollower, ParsedLog, parse_log_file
+    from diskstats import DeviceSeries, load_device_series
+
+
+GB = 1024 ** 3
+MB = 1024 ** 2
+
+# Per-interval byte columns of the windowed ledger
+INTERVAL_COLUMNS = (
+    'user_bytes',
+    'wal_bytes',
+    'flush_bytes',
+    'compaction_read_bytes',
+    'compaction_write_bytes',
+    'device_read_bytes',
+    'device_write_bytes',
+)
+
 
 class ClosedLedger:
     """
@@ -32,60 +60,19 @@ class ClosedLedger:
         self.ledger_data = {}
         self.verification_results = {}
         
-    def parse_rocksdb_log(self, log_path: str) -> Dict:
+    def parse_rocksdb_log(self, log_path: str, workers: int = 1) -> Dict:
         """
         Parse RocksDB LOG file to extract I/O statistics.
         
         Args:
             log_path: Path to RocksDB LOG file
+            workers: Worker processes for chunked parsing (1 = serial, None = CPU count)
             
         Returns:
             Dictionary with parsed I/O statistics
         """
-        log_data = {
-            'wal_bytes': 0,
-            'flush_bytes': 0,
-            'compaction_read_bytes': 0,
-            'compaction_write_bytes': 0,
-            'user_write_bytes': 0,
-            'device_read_bytes': 0,
-            'device_write_bytes': 0,
-            'per_level_stats': {}
-        }
-        
-        with open(log_path, 'r') as f:
-            for line in f:
-                # Parse WAL writes
-                if 'WAL write' in line:
-                    match = re.search(r'(\d+) bytes', line)
-                    if match:
-                        log_data['wal_bytes'] += int(match.group(1))
-                
-                # Parse flush operations
-                elif 'flush' in line.lower() and 'bytes' in line:
-                    match = re.search(r'(\d+) bytes', line)
-                    if match:
-                        log_data['flush_bytes'] += int(match.group(1))
-                
-                # Parse compaction operations
-                elif 'compaction' in line.lower() and 'bytes' in line:
-                    # Extract read bytes
-                    read_match = re.search(r'(\d+) bytes read', line)
-                    if read_match:
-                        log_data['compaction_read_bytes'] += int(read_match.group(1))
-                    
-                    # Extract write bytes
-                    write_match = re.search(r'(\d+) bytes written', line)
-                    if write_match:
-                        log_data['compaction_write_bytes'] += int(write_match.group(1))
-                
-                # Parse user writes
-                elif 'user write' in line.lower() and 'bytes' in line:
-                    match = re.search(r'(\d+) bytes', line)
-                    if match:
-                        log_data['user_write_bytes'] += int(match.group(1))
-        
-        return log_data
+        # Single pass over the LOG; the byte-accounting rules live in LogParser
+        return parse_log_file(log_path, workers=workers).ledger_data()
     
     def parse_statistics_json(self, stats_path: str) -> Dict:
         """
@@ -250,10 +237,15 @@ class ClosedLedger:
             ]
         }
         
+        # Device utilization is only known with sampled device counters
+        if 'device_utilization' in data:
+            summary_data['Metric'].insert(7, 'Device Utilization (%)')
+            summary_data['Value'].insert(7, data['device_utilization'] * 100)
+        
         return pd.DataFrame(summary_data)
     
     def process_rocksdb_data(self, log_path: str, stats_path: Optional[str] = None, 
-                           iostat_path: Optional[str] = None) -> Dict:
+                           iostat_path: Optional[str] = None, workers: int = 1) -> Dict:
         """
         Process RocksDB data from multiple sources and create ledger.
         
@@ -261,13 +253,94 @@ class ClosedLedger:
             log_path: Path to RocksDB LOG file
             stats_path: Path to statistics JSON file (optional)
             iostat_path: Path to iostat data file (optional)
+            workers: Worker processes for LOG parsing (1 = serial, None = CPU count)
             
         Returns:
             Dictionary with complete ledger analysis
         """
         # Parse LOG file
-        log_data = self.parse_rocksdb_log(log_path)
+        parsed = parse_log_file(log_path, workers=workers)
+        return self._build_ledger(parsed.ledger_data(), stats_path, iostat_path,
+                                  parsed.time_span(), parsed.utc_offset_us())
+    
+    def process_incremental(self, log_path: str, state_path: str, stats_path: Optional[str] = None,
+                            iostat_path: Optional[str] = None) -> Dict:
+        """
+        Update the ledger from the LOG lines appended since the previous run.
+        
+        The byte offset and inode of the LOG and the accumulated counters are
+        persisted in a JSON state file, so the cost of a refresh depends on
+        the new data only. Rotation to LOG.old.* is followed.
+        
+        Args:
+            log_path: Path to RocksDB LOG file
+            state_path: Path to the incremental state JSON file (created if missing)
+            stats_path: Path to statistics JSON file (optional)
+            iostat_path: Path to iostat data file (optional)
+            
+        Returns:
+            Dictionary with complete ledger analysis of everything read so far
+        """
+        state = None
+        if Path(state_path).exists():
+            with open(state_path, 'r') as f:
+                state = json.load(f)
+            if state['follower']['log_path'] != str(log_path):
+                warnings.warn(
+                    f"State file {state_path} belongs to {state['follower']['log_path']}; "
+                    f"starting over for {log_path}"
+                )
+                state = None
         
+        if state is None:
+            follower = LogFollower(log_path)
+            counters = {key: 0 for key in LEDGER_COUNTERS}
+            span_us, utc_offset_us = None, None
+        else:
+            follower = LogFollower.from_state(state['follower'])
+            counters = state['counters']
+            span_us, utc_offset_us = state.get('span_us'), state.get('utc_offset_us')
+        
+        # Parse new lines only
+        new_data = follower.read_new()
+        for key in LEDGER_COUNTERS:
+            counters[key] += new_data.counters[key]
+        if utc_offset_us is None:
+            utc_offset_us = new_data.utc_offset_us()
+        new_span = new_data.time_span()
+        if new_span is not None:
+            span_us = list(new_span) if span_us is None else [min(span_us[0], new_span[0]),
+                                                               max(span_us[1], new_span[1])]
+        
+        with open(state_path, 'w') as f:
+            json.dump({'follower': follower.state(), 'counters': counters,
+                       'span_us': span_us, 'utc_offset_us': utc_offset_us}, f, indent=2)
+        
+        log_data = dict(counters)
+        log_data.update({
+            'device_read_bytes': 0,
+            'device_write_bytes': 0,
+            'per_level_stats': {}
+        })
+        return self._build_ledger(log_data, stats_path, iostat_path, span_us, utc_offset_us)
+    
+    def _build_ledger(self, log_data: Dict, stats_path: Optional[str] = None,
+                      iostat_path: Optional[str] = None, span_us: Optional[Sequence[int]] = None,
+                      utc_offset_us: Optional[int] = None) -> Dict:
+        """
+        Merge optional sources into parsed LOG counters and close the ledger.
+        
+        Args:
+            log_data: Counters in parse_rocksdb_log format
+            stats_path: Path to statistics JSON file (optional)
+            iostat_path: Path to iostat data file (optional)
+            span_us: (first, last) event time of the LOG; device bytes are
+                counted over this span only (ParsedLog.time_span)
+            utc_offset_us: UTC offset of the LOG's clock (ParsedLog.utc_offset_us)
+            
+        Returns:
+            Dictionary with complete ledger analysis
+        """
         # Parse statistics if available
         if stats_path and Path(stats_path).exists():
             stats_data = self.parse_statistics_json(stats_path)
@@ -278,7 +351,7 @@ class ClosedLedger:
         
         # Parse iostat data if available
         if iostat_path and Path(iostat_path).exists():
-            iostat_data = self.parse_iostat_data(iostat_path)
+            iostat_data = self.parse_iostat_data(iostat_path, span_us=span_us, utc_offset_us=utc_offset_us)
             log_data.update(iostat_data)
         
         # Calculate WA/RA
@@ -297,21 +370,235 @@ class ClosedLedger:
             'summary': summary_df
         }
     
-    def parse_iostat_data(self, iostat_path: str) -> Dict:
+    def build_interval_table(self, parsed: ParsedLog, interval_s: Optional[float] = None,
+                             device_series: Optional[DeviceSeries] = None) -> pd.DataFrame:
         """
-        Parse iostat data file.
+        Build per-interval ledger byte series from a parsed LOG.
+        
+        User and WAL bytes come from the cumulative stats dump counters,
+        which start at 0 when the DB opened (first dump time minus uptime).
+        Flush and compaction bytes come from EVENT_LOG_v1 records (exact
+        bytes) when present, else from the text events, else from the stats
+        dumps. Interval i covers (start_us, end_us].
         
         Args:
-            iostat_path: Path to iostat data file
+            parsed: Parsed LOG (see log_parser.parse_log_file)
+            interval_s: Interval length in seconds (None = one interval per stats dump)
+            device_series: Sampled device I/O to align with the intervals (optional)
+            
+        Returns:
+            DataFrame with start_us, end_us, duration_s and INTERVAL_COLUMNS
+        """
+        dump_us = parsed.event_times('stats_dumps')
+        dumps = [d for d, t in zip(parsed.stats_dumps, dump_us) if t != NO_TIMESTAMP]
+        dump_us = dump_us[dump_us != NO_TIMESTAMP]
+        
+        if interval_s is None:
+            if len(dumps) < 2:
+                raise ValueError("Per-dump intervals need at least two stats dumps; set interval_s")
+            edges = dump_us
+        else:
+            if interval_s <= 0:
+                raise ValueError(f"interval_s must be positive, got {interval_s}")
+            span = np.concatenate([dump_us, self._event_times(parsed)])
+            span = span[span != NO_TIMESTAMP]
+            if len(span) == 0:
+                raise ValueError("LOG has no timestamped events")
+            step = int(interval_s * 1e6)
+            # Intervals are open on the left: start one tick before the first event
+            first = span.min() - 1
+            edges = np.arange(first, span.max() + step, step, dtype=np.int64)
+            if len(edges) < 2:
+                edges = np.array([first, first + step], dtype=np.int64)
+        
+        # The cumulative counters are 0 when the DB opened (first dump time
+        # minus its uptime), so bytes written before the first dump are kept
+        counter_us = dump_us
+        anchored = len(dumps) > 0 and dumps[0].uptime_s > 0
+        if anchored:
+            counter_us = np.concatenate([[dump_us[0] - round(dumps[0].uptime_s * 1e6)], dump_us])
+        elif len(dumps) and edges[0] < dump_us[0]:
+            warnings.warn("First stats dump has no uptime; user/WAL bytes before it are not counted",
+                          UserWarning)
+        
+        def from_dumps(field):
+            # Cumulative counter sampled at the edges
+            if len(dumps) == 0:
+                return np.zeros(len(edges) - 1)
+            cumulative = np.array([getattr(d, field) for d in dumps]) * GB
+            if anchored:
+                cumulative = np.concatenate([[0.0], cumulative])
+            return np.diff(np.interp(edges, counter_us, cumulative))
+        
+        def from_events(times_us, values):
+            index = np.searchsorted(edges, np.asarray(times_us, dtype=np.int64), side='left') - 1
+            valid = (index >= 0) & (index < len(edges) - 1)
+            return np.bincount(index[valid], weights=np.asarray(values, dtype=np.float64)[valid],
+                               minlength=len(edges) - 1)
+        
+        table = {
+            'start_us': edges[:-1],
+            'end_us': edges[1:],
+            'duration_s': np.diff(edges) / 1e6,
+            'user_bytes': from_dumps('ingest_gb'),
+            'wal_bytes': from_dumps('wal_written_gb')
+        }
+        
+        # Flush bytes
+        if parsed.table_files and parsed.flushes_finished:
+            flush_jobs = {e.job for e in parsed.flushes_finished}
+            files = [e for e in parsed.table_files if e.job in flush_jobs]
+            table['flush_bytes'] = from_events([e.time_micros for e in files], [e.file_size for e in files])
+        elif parsed.flushes:
+            table['flush_bytes'] = from_events(parsed.event_times('flushes'),
+                                               [e.bytes for e in parsed.flushes])
+        else:
+            table['flush_bytes'] = from_dumps('flush_cumulative_gb')
+        
+        # Compaction bytes
+        if parsed.compactions_finished:
+            finished = parsed.compactions_finished
+            table['compaction_write_bytes'] = from_events([e.time_micros for e in finished],
+                                                          [e.total_output_size for e in finished])
+        elif parsed.compaction_finishes:
+            finishes = parsed.compaction_finishes
+            table['compaction_write_bytes'] = from_events(
+                parsed.event_times('compaction_finishes'), [e.output_mb * MB for e in finishes])
+        else:
+            table['compaction_write_bytes'] = from_dumps('compaction_write_gb')
+        
+        if parsed.compactions_started:
+            started = parsed.compactions_started
+            table['compaction_read_bytes'] = from_events([e.time_micros for e in started],
+                                                         [e.input_data_size for e in started])
+        elif parsed.compaction_finishes:
+            finishes = parsed.compaction_finishes
+            table['compaction_read_bytes'] = from_events(
+                parsed.event_times('compaction_finishes'),
+                [(e.input_mb + e.input_next_mb) * MB for e in finishes])
+        else:
+            table['compaction_read_bytes'] = from_dumps('compaction_read_gb')
+        
+        # Device bytes
+        if device_series is not None and len(device_series):
+            cumulative = device_series.cumulative_at(edges / 1e6)
+            table['device_read_bytes'] = np.diff(cumulative['read_bytes'])
+            table['device_write_bytes'] = np.diff(cumulative['write_bytes'])
+        else:
+            table['device_read_bytes'] = np.zeros(len(edges) - 1)
+            table['device_write_bytes'] = np.zeros(len(edges) - 1)
+        
+        df = pd.DataFrame(table)[['start_us', 'end_us', 'duration_s', *INTERVAL_COLUMNS]]
+        df[list(INTERVAL_COLUMNS)] = df[list(INTERVAL_COLUMNS)].round().astype(np.int64)
+        return df
+    
+    @staticmethod
+    def _event_times(parsed: ParsedLog) -> np.ndarray:
+        """Get the epoch microseconds of all flush/compaction events."""
+        exact = [e.time_micros for events in (parsed.table_files, parsed.compactions_started,
+                                              parsed.compactions_finished) for e in events]
+        return np.concatenate([np.array(exact, dtype=np.int64), parsed.event_times('flushes'),
+                               parsed.event_times('compaction_finishes')])
+    
+    def rolling_ledger(self, table: pd.DataFrame, window: int = 1, tolerance: float = 0.1) -> pd.DataFrame:
+        """
+        Compute WA/RA and ledger closure over rolling windows of intervals.
+        
+        Uses the same definitions as calculate_wa_ra and verify_ledger_closure,
+        evaluated for every window at once from prefix sums.
+        
+        Args:
+            table: Interval table from build_interval_table
+            window: Number of intervals per window (1 = per interval)
+            tolerance: Acceptable closure error
+            
+        Returns:
+            Copy of the table with wa_stat, wa_device, ra_comp, ra_runtime,
+            closure_error and is_closed columns
+        """
+        if window < 1:
+            raise ValueError(f"window must be at least 1, got {window}")
+        
+        values = table[list(INTERVAL_COLUMNS)].to_numpy(dtype=np.float64)
+        prefix = np.vstack([np.zeros(values.shape[1]), np.cumsum(values, axis=0)])
+        end = np.arange(1, len(values) + 1)
+        sums = prefix[end] - prefix[np.maximum(end - window, 0)]
+        user, wal, flush, comp_read, comp_write, dev_read, dev_write = sums.T
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            has_user = user > 0
+            wa_stat = np.where(has_user, (wal + flush + comp_write) / user, 0.0)
+            wa_device = np.where(has_user, dev_write / user, 0.0)
+            ra_comp = np.where(has_user, comp_read / user, 0.0)
+            ra_runtime = np.where(has_user, dev_read / user, 0.0)
+            wa_max = np.maximum(wa_stat, wa_device)
+            closure_error = np.where(wa_max > 0, np.abs(wa_stat - wa_device) / wa_max, 0.0)
+        
+        result = table.copy()
+        result['wa_stat'] = wa_stat
+        result['wa_device'] = wa_device
+        result['ra_comp'] = ra_comp
+        result['ra_runtime'] = ra_runtime
+        result['closure_error'] = closure_error
+        result['is_closed'] = closure_error <= tolerance
+        return result
+    
+    def process_windowed(self, log_path: str, interval_s: Optional[float] = None, window: int = 1,
+                         iostat_path: Optional[str] = None, tolerance: float = 0.1,
+                         workers: int = 1) -> pd.DataFrame:
+        """
+        Build the time-windowed ledger of a LOG.
+        
+        Args:
+            log_path: Path to RocksDB LOG file
+            interval_s: Interval length in seconds (None = one interval per stats dump)
+            window: Number of intervals per rolling window
+            iostat_path: Path to iostat -x output or diskstats sampler .npz (optional)
+            tolerance: Acceptable closure error
+            workers: Worker processes for LOG parsing (1 = serial, None = CPU count)
+            
+        Returns:
+            Interval table with rolling WA/RA and closure columns
+        """
+        parsed = parse_log_file(log_path, workers=workers)
+        device_series = None
+        if iostat_path and Path(iostat_path).exists():
+            device_series = load_device_series(iostat_path, utc_offset_us=parsed.utc_offset_us())
+        table = self.build_interval_table(parsed, interval_s, device_series)
+        return self.rolling_ledger(table, window, tolerance)
+    
+    def parse_iostat_data(self, iostat_path: str, devices: Optional[List[str]] = None,
+                          span_us: Optional[Sequence[int]] = None,
+                          utc_offset_us: Optional[int] = None) -> Dict:
+        """
+        Parse device I/O data.
+        
+        Accepts a DiskstatsSampler .npz file or saved `iostat -x` output.
+        
+        Args:
+            iostat_path: Path to device I/O data file
+            devices: Device names to include (default: all whole disks)
+            span_us: (first, last) epoch microseconds to count device bytes
+                over, e.g. the LOG's time span (default: the whole series)
+            utc_offset_us: UTC offset of iostat -t timestamps (the LOG's clock)
             
         Returns:
             Dictionary with device I/O statistics
         """
-        # This is a placeholder implementation
-        # In practice, you would parse iostat output to extract device read/write bytes
+        series = load_device_series(iostat_path, devices, utc_offset_us=utc_offset_us)
+        if span_us is not None:
+            start, end = span_us[0] / 1e6, span_us[1] / 1e6
+            totals = series.totals(start, end)
+            utilization = series.window(start, end).utilization()
+        else:
+            totals = series.totals()
+            utilization = series.utilization()
+        
         return {
-            'device_read_bytes': 0,
-            'device_write_bytes': 0
+            'device_read_bytes': totals['read_bytes'],
+            'device_write_bytes': totals['write_bytes'],
+            'device_utilization': float(utilization.mean()) if len(utilization) else 0.0,
+            'device_series': series
         }
     
     def save_ledger_csv(self, ledger_data: Dict, output_path: str):
@@ -333,22 +620,60 @@ def main():
     parser = argparse.ArgumentParser(description='Process RocksDB data for closed ledger accounting')
     parser.add_argument('log_path', help='Path to RocksDB LOG file')
     parser.add_argument('--stats', help='Path to statistics JSON file')
-    parser.add_argument('--iostat', help='Path to iostat data file')
+    parser.add_argument('--iostat', help='Path to iostat -x output or diskstats sampler .npz file')
     parser.add_argument('--output', '-o', default='ledger_summary.csv', 
                        help='Output CSV file path')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Worker processes for LOG parsing (0 = CPU count)')
+    parser.add_argument('--state', help='Incremental state JSON file (parse new LOG lines only)')
+    parser.add_argument('--interval', type=float, default=0,
+                       help='With --state, refresh every INTERVAL seconds (0 = once)')
+    parser.add_argument('--series-output', help='Write the per-interval ledger series to this CSV file')
+    parser.add_argument('--window-seconds', type=float,
+                       help='Interval length of the series (default: one interval per stats dump)')
+    parser.add_argument('--rolling', type=int, default=1,
+                       help='Number of intervals per rolling WA/RA window')
     
     args = parser.parse_args()
     
     # Create ledger instance
     ledger = ClosedLedger()
     
+    if args.state and args.interval > 0:
+        import time
+        
+        # Follow the LOG; each refresh reads only the appended lines
+        while True:
+            ledger_data = ledger.process_incremental(
+                log_path=args.log_path,
+                state_path=args.state,
+                stats_path=args.stats,
+                iostat_path=args.iostat
+            )
+            wa_ra = ledger_data['wa_ra_data']
+            verification = ledger_data['verification']
+            print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] WA(stat)={wa_ra['wa_stat']:.3f} "
+                  f"WA(device)={wa_ra['wa_device']:.3f} RA(comp)={wa_ra['ra_comp']:.3f} "
+                  f"closure error={verification['relative_difference']:.2f}%")
+            ledger.save_ledger_csv(ledger_data, args.output)
+            time.sleep(args.interval)
+    
     # Process data
     print("Processing RocksDB data...")
-    ledger_data = ledger.process_rocksdb_data(
-        log_path=args.log_path,
-        stats_path=args.stats,
-        iostat_path=args.iostat
-    )
+    if args.state:
+        ledger_data = ledger.process_incremental(
+            log_path=args.log_path,
+            state_path=args.state,
+            stats_path=args.stats,
+            iostat_path=args.iostat
+        )
+    else:
+        ledger_data = ledger.process_rocksdb_data(
+            log_path=args.log_path,
+            stats_path=args.stats,
+            iostat_path=args.iostat,
+            workers=args.workers or None
+        )
     
     # Print summary
     print("\nLedger Summary:")
@@ -363,6 +688,18 @@ def main():
     
     # Save to CSV
     ledger.save_ledger_csv(ledger_data, args.output)
+    
+    # Per-interval series
+    if args.series_output:
+        series = ledger.process_windowed(
+            log_path=args.log_path,
+            interval_s=args.window_seconds,
+            window=args.rolling,
+            iostat_path=args.iostat,
+            workers=args.workers or None
+        )
+        series.to_csv(args.series_output, index=False)
+        print(f"Ledger series ({len(series)} intervals) saved to: {args.series_output}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,545 @@
+"""
+PutModel v4: Compaction Stats Tables
+
+This module implements a parser for the "** Compaction Stats [cf] **" tables
+that RocksDB writes with every "DUMPING STATS" block, and turns a run into a
+time x level x metric array. The table rows are cumulative since DB open, so
+interval values (per-level WAF, throughput, stall counts) come from one
+vectorized difference over the time axis.
+
+Key Features:
+- Column layout read from the table header (works across RocksDB versions)
+- Every per-level column: files, size, score, read/write GB, W-Amp, MB/s, comp time/count, keys
+- Sum / Int rows, uptime, ingest and Stalls(count) per dump
+- Interval deltas with counter-reset handling (DB reopen) and recomputed rate columns
+- Per-level WAF and write throughput per interval
+"""
+
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .log_parser import EVENT_LOG_MARKER, timestamps_to_datetime64, timestamps_to_micros, utc_offset_micros
+    from .log_source import line_timestamp, open_log
+except ImportError:
+    # Fallback for direct execution
+    import sys
+    import os
+    sys.path.append(os.path.dirname(__file__))
+    from log_parser import EVENT_LOG_MARKER, timestamps_to_datetime64, timestamps_to_micros, utc_offset_micros
+    from log_source import line_timestamp, open_log
+
+
+# Metric axis of the series (order of the last array dimension)
+METRICS = (
+    'files',                # Files in the level
+    'compacting_files',     # Files being compacted ("4/1" -> 1)
+    'size_bytes',
+    'score',
+    'read_gb',              # Read(GB) = Rn + Rnp1
+    'rn_gb',                # Read from level n
+    'rnp1_gb',              # Read from level n+1
+    'write_gb',
+    'wnew_gb',              # Write(GB) - Rnp1(GB)
+    'moved_gb',             # Trivial moves into the level
+    'w_amp',                # Write(GB) / Rn(GB)
+    'rd_mb_s',
+    'wr_mb_s',
+    'comp_sec',
+    'comp_merge_cpu_sec',
+    'comp_count',
+    'avg_sec',
+    'key_in',
+    'key_drop',
+    'rblob_gb',
+    'wblob_gb',
+)
+
+# Header column -> metric ('Files' fills files and compacting_files)
+HEADER_METRICS = {
+    'Size': 'size_bytes',
+    'Score': 'score',
+    'Read(GB)': 'read_gb',
+    'Rn(GB)': 'rn_gb',
+    'Rnp1(GB)': 'rnp1_gb',
+    'Write(GB)': 'write_gb',
+    'Wnew(GB)': 'wnew_gb',
+    'Moved(GB)': 'moved_gb',
+    'W-Amp': 'w_amp',
+    'Rd(MB/s)': 'rd_mb_s',
+    'Wr(MB/s)': 'wr_mb_s',
+    'Comp(sec)': 'comp_sec',
+    'CompMergeCPU(sec)': 'comp_merge_cpu_sec',
+    'Comp(cnt)': 'comp_count',
+    'Avg(sec)': 'avg_sec',
+    'KeyIn': 'key_in',
+    'KeyDrop': 'key_drop',
+    'Rblob(GB)': 'rblob_gb',
+    'Wblob(GB)': 'wblob_gb',
+}
+
+# Point-in-time values (kept as-is in interval deltas)
+GAUGE_METRICS = ('files', 'compacting_files', 'size_bytes', 'score')
+
+# Ratios of cumulative columns (recomputed from the deltas)
+DERIVED_METRICS = ('w_amp', 'rd_mb_s', 'wr_mb_s', 'avg_sec')
+
+# Counters since DB open (differenced)
+CUMULATIVE_METRICS = tuple(m for m in METRICS if m not in GAUGE_METRICS + DERIVED_METRICS)
+
+_METRIC_INDEX = {name: i for i, name in enumerate(METRICS)}
+
+_SIZE_UNITS = {'B': 1, 'KB': 1024, 'MB': 1024**2, 'GB': 1024**3, 'TB': 1024**4}
+_COUNT_SUFFIX = {'K': 1e3, 'M': 1e6, 'G': 1e9, 'T': 1e12}
+
+_TABLE_RE = re.compile(r'\*\* Compaction Stats \[(.*)\] \*\*')
+_UPTIME_RE = re.compile(r'Uptime\(secs\): ([\d.]+) total, ([\d.]+) interval')
+_INGEST_RE = re.compile(r'ingest: ([\d.]+) GB')
+_STALL_ITEM_RE = re.compile(r'(\d+) (.+)')
+_STALL_INTERVAL_RE = re.compile(r'interval (\d+) total count')
+_TIME_MICROS_RE = re.compile(r'"time_micros": (\d+)')
+
+# Name of the interval total of the Stalls(count) line
+STALL_INTERVAL_TOTAL = 'interval_total_count'
+
+
+def _number(token: str) -> float:
+    """Parse a table cell ("1.5", "123K"); unknown text is NaN."""
+    scale = _COUNT_SUFFIX.get(token[-1])
+    try:
+        return float(token[:-1]) * scale if scale else float(token)
+    except ValueError:
+        return np.nan
+
+
+def parse_table_row(header: Sequence[str], line: str) -> Tuple[str, np.ndarray]:
+    """
+    Parse one row of a level table.
+
+    Args:
+        header: Header tokens of the table ("Level", "Files", "Size", ...)
+        line: Row text ("  L1      3/0   192.00 MB   0.8 ...")
+
+    Returns:
+        (row name such as 'L1', 'Sum' or 'Int', values in METRICS order;
+        NaN for columns the header does not have)
+    """
+    tokens = line.split()
+    values = np.full(len(METRICS), np.nan)
+    position = 1
+    for column in header[1:]:
+        if position >= len(tokens):
+            break
+        token = tokens[position]
+        position += 1
+        if column == 'Files':
+            files, _, compacting = token.partition('/')
+            values[_METRIC_INDEX['files']] = _number(files)
+            values[_METRIC_INDEX['compacting_files']] = _number(compacting) if compacting else 0.0
+        elif column == 'Size':
+            unit = _SIZE_UNITS.get(tokens[position]) if position < len(tokens) else None
+            if unit is not None:
+                position += 1
+            values[_METRIC_INDEX['size_bytes']] = _number(token) * (unit or 1)
+        elif column in HEADER_METRICS:
+            values[_METRIC_INDEX[HEADER_METRICS[column]]] = _number(token)
+    return tokens[0], values
+
+
+def parse_stall_counts(line: str) -> Dict[str, float]:
+    """
+    Parse a "Stalls(count): 0 level0_slowdown, ..., interval 2 total count" line.
+
+    Returns:
+        Counter name (spaces as underscores) -> count; the interval total
+        is stored under STALL_INTERVAL_TOTAL
+    """
+    counts = {}
+    for item in line.split(':', 1)[1].split(','):
+        item = item.strip()
+        interval = _STALL_INTERVAL_RE.match(item)
+        if interval:
+            counts[STALL_INTERVAL_TOTAL] = float(interval.group(1))
+            continue
+        match = _STALL_ITEM_RE.match(item)
+        if match:
+            counts[match.group(2).replace(' ', '_')] = float(match.group(1))
+    return counts
+
+
+class _Dump:
+    """Values collected from one "DUMPING STATS" block."""
+
+    def __init__(self, timestamp: Optional[str]):
+        self.timestamp = timestamp
+        self.uptime_s = np.nan
+        self.interval_s = np.nan
+        self.ingest_gb = np.nan
+        self.rows: Dict[str, np.ndarray] = {}
+        self.stalls: Dict[str, float] = {}
+
+
+class CompactionStatsSeries:
+    """
+    Per-level compaction stats of one column family over the dumps of a run.
+
+    values[t, l, m] is metric METRICS[m] of level levels[l] at dump t, as
+    printed (cumulative since DB open). Levels without a row in a dump are 0.
+    """
+
+    def __init__(self, timestamps: Sequence[Optional[str]], levels: Sequence[int], values: np.ndarray,
+                 sums: np.ndarray, intervals: np.ndarray, uptime_s: np.ndarray, interval_s: np.ndarray,
+                 ingest_gb: np.ndarray, stall_names: Sequence[str], stalls: np.ndarray, cf: str = 'default',
+                 utc_offset_us: Optional[int] = None):
+        """
+        Initialize the series.
+
+        Args:
+            timestamps: LOG timestamp of each dump
+            levels: Level numbers of the level axis
+            values: (dumps, levels, metrics) array
+            sums: (dumps, metrics) "Sum" rows
+            intervals: (dumps, metrics) "Int" rows (RocksDB's own interval sums)
+            uptime_s: DB uptime at each dump
+            interval_s: Seconds since the previous dump as printed by RocksDB
+            ingest_gb: Cumulative user ingest at each dump
+            stall_names: Counter names of the stall axis
+            stalls: (dumps, counters) Stalls(count) values
+            cf: Column family name
+            utc_offset_us: UTC offset of the LOG's clock (analysis host's
+                time zone if None); times_us uses it
+        """
+        self.timestamps = list(timestamps)
+        self.utc_offset_us = utc_offset_us
+        self.times_us = timestamps_to_micros(self.timestamps, utc_offset_us)
+        self.levels = list(levels)
+        self.values = values
+        self.sums = sums
+        self.intervals = intervals
+        self.uptime_s = uptime_s
+        self.interval_s = interval_s
+        self.ingest_gb = ingest_gb
+        self.stall_names = list(stall_names)
+        self.stalls = stalls
+        self.cf = cf
+        self._deltas = None
+
+    @classmethod
+    def from_lines(cls, lines: Iterable[str], cf: str = 'default') -> "CompactionStatsSeries":
+        """
+        Build the series from LOG lines.
+
+        The UTC offset of the LOG's clock is taken from the first
+        EVENT_LOG_v1 line, so that times_us matches the event times of a
+        CompactionStore of the same LOG.
+
+        Args:
+            lines: LOG lines in time order
+            cf: Column family whose level table is collected
+
+        Returns:
+            CompactionStatsSeries (empty if the LOG has no table for cf)
+        """
+        dumps: List[_Dump] = []
+        dump = None
+        header = None       # Header tokens while inside a level table of cf
+        expect_header = False
+        in_cf = False       # Between the cf table and the next table/dump
+        utc_offset_us = None
+
+        for line in lines:
+            first = line[:1]
+            if first.isdigit():
+                if 'DUMPING STATS' in line:
+                    dump = _Dump(line_timestamp(line))
+                    dumps.append(dump)
+                    header, expect_header, in_cf = None, False, False
+                elif utc_offset_us is None and EVENT_LOG_MARKER in line:
+                    match = _TIME_MICROS_RE.search(line)
+                    if match:
+                        utc_offset_us = utc_offset_micros([line_timestamp(line)], [int(match.group(1))])
+                continue
+            if dump is None:
+                continue
+
+            if header is not None:
+                if not line.strip() or first == '*':
+                    header = None
+                elif not line.startswith('-'):
+                    name, row = parse_table_row(header, line)
+                    dump.rows[name] = row
+                    continue
+            if first == '*':
+                match = _TABLE_RE.match(line)
+                if match:
+                    in_cf = expect_header = match.group(1) == cf
+            elif expect_header:
+                # Level tables start with "Level"; the "Priority" table is skipped
+                header = line.split() if line.startswith('Level') else None
+                expect_header = False
+            elif line.startswith('Uptime(secs):'):
+                match = _UPTIME_RE.match(line)
+                if match and np.isnan(dump.uptime_s):
+                    dump.uptime_s, dump.interval_s = float(match.group(1)), float(match.group(2))
+            elif line.startswith('Cumulative writes:'):
+                match = _INGEST_RE.search(line)
+                if match:
+                    dump.ingest_gb = float(match.group(1))
+            elif in_cf and line.startswith('Stalls(count):'):
+                dump.stalls = parse_stall_counts(line)
+
+        return cls._from_dumps([d for d in dumps if any(k.startswith('L') for k in d.rows)], cf, utc_offset_us)
+
+    @classmethod
+    def from_log(cls, log_path: Union[str, Path, Sequence[Union[str, Path]]],
+                 cf: str = 'default') -> "CompactionStatsSeries":
+        """
+        Build the series from a LOG file, directory or glob (see open_log).
+
+        Args:
+            log_path: RocksDB LOG source
+            cf: Column family
+
+        Returns:
+            CompactionStatsSeries
+        """
+        with open_log(log_path) as source:
+            return cls.from_lines(source, cf)
+
+    @classmethod
+    def _from_dumps(cls, dumps: List[_Dump], cf: str,
+                    utc_offset_us: Optional[int] = None) -> "CompactionStatsSeries":
+        """Stack the per-dump rows into arrays."""
+        levels = sorted({int(name[1:]) for d in dumps for name in d.rows
+                         if name[:1] == 'L' and name[1:].isdigit()})
+        level_position = {level: i for i, level in enumerate(levels)}
+        stall_names = sorted({name for d in dumps for name in d.stalls})
+
+        count, width = len(dumps), len(METRICS)
+        values = np.zeros((count, len(levels), width))
+        sums = np.full((count, width), np.nan)
+        intervals = np.full((count, width), np.nan)
+        stalls = np.full((count, len(stall_names)), np.nan)
+
+        for t, dump in enumerate(dumps):
+            for name, row in dump.rows.items():
+                if name == 'Sum':
+                    sums[t] = row
+                elif name == 'Int':
+                    intervals[t] = row
+                elif name[:1] == 'L' and name[1:].isdigit():
+                    values[t, level_position[int(name[1:])]] = np.nan_to_num(row)
+            for s, name in enumerate(stall_names):
+                stalls[t, s] = dump.stalls.get(name, np.nan)
+
+        return cls(
+            timestamps=[d.timestamp for d in dumps],
+            levels=levels,
+            values=values,
+            sums=sums,
+            intervals=intervals,
+            uptime_s=np.array([d.uptime_s for d in dumps]),
+            interval_s=np.array([d.interval_s for d in dumps]),
+            ingest_gb=np.array([d.ingest_gb for d in dumps]),
+            stall_names=stall_names,
+            stalls=stalls,
+            cf=cf,
+            utc_offset_us=utc_offset_us,
+        )
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @staticmethod
+    def metric_index(metric: str) -> int:
+        """Position of a metric on the last axis."""
+        if metric not in _METRIC_INDEX:
+            raise ValueError(f"Unknown metric: {metric} (expected one of {', '.join(METRICS)})")
+        return _METRIC_INDEX[metric]
+
+    @property
+    def resets(self) -> np.ndarray:
+        """Dumps whose counters restarted (first dump, or uptime went backwards after a reopen)."""
+        restarted = np.ones(len(self), dtype=bool)
+        restarted[1:] = self.uptime_s[1:] < self.uptime_s[:-1]
+        return restarted
+
+    def _difference(self, cumulative: np.ndarray) -> np.ndarray:
+        """Interval differences along the time axis (a reset keeps the printed value)."""
+        previous = np.zeros_like(cumulative)
+        previous[1:] = cumulative[:-1]
+        resets = self.resets.reshape((-1,) + (1,) * (cumulative.ndim - 1))
+        return np.where(resets, cumulative, cumulative - previous)
+
+    @property
+    def elapsed_s(self) -> np.ndarray:
+        """Length of each interval in seconds (uptime for the first dump after a reset)."""
+        elapsed = self._difference(self.uptime_s)
+        missing = np.isnan(elapsed)
+        elapsed[missing] = self.interval_s[missing]
+        return elapsed
+
+    def deltas(self) -> np.ndarray:
+        """
+        Interval values of every level and metric in one pass.
+
+        Cumulative columns are differenced between consecutive dumps, gauge
+        columns (files, size, score) are kept, and the ratio columns (W-Amp,
+        Rd/Wr MB/s, Avg(sec)) are recomputed from the interval values the
+        same way RocksDB computes them.
+
+        Returns:
+            (dumps, levels, metrics) array
+        """
+        if self._deltas is None:
+            deltas = self.values.copy()
+            cumulative = [_METRIC_INDEX[m] for m in CUMULATIVE_METRICS]
+            deltas[..., cumulative] = self._difference(self.values[..., cumulative])
+            _recompute_ratios(deltas)
+            self._deltas = deltas
+        return self._deltas
+
+    def sum_deltas(self) -> np.ndarray:
+        """Interval values of the "Sum" row ((dumps, metrics); W-Amp is write / ingest)."""
+        deltas = self.sums.copy()
+        cumulative = [_METRIC_INDEX[m] for m in CUMULATIVE_METRICS]
+        deltas[:, cumulative] = self._difference(self.sums[:, cumulative])
+        _recompute_ratios(deltas)
+        ingest = self.ingest_deltas()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            deltas[:, _METRIC_INDEX['w_amp']] = np.where(
+                ingest > 0, deltas[:, _METRIC_INDEX['write_gb']] / ingest, 0.0)
+        return deltas
+
+    def ingest_deltas(self) -> np.ndarray:
+        """User bytes ingested per interval (GB)."""
+        return self._difference(self.ingest_gb)
+
+    def stall_deltas(self) -> np.ndarray:
+        """Stall counts per interval ((dumps, counters); the interval total is kept as printed)."""
+        deltas = self._difference(self.stalls)
+        if STALL_INTERVAL_TOTAL in self.stall_names:
+            column = self.stall_names.index(STALL_INTERVAL_TOTAL)
+            deltas[:, column] = self.stalls[:, column]
+        return deltas
+
+    def metric(self, metric: str, interval: bool = False) -> np.ndarray:
+        """
+        Get one metric for all dumps and levels.
+
+        Args:
+            metric: One of METRICS
+            interval: Interval values (deltas) instead of the printed values
+
+        Returns:
+            (dumps, levels) array
+        """
+        source = self.deltas() if interval else self.values
+        return source[..., self.metric_index(metric)]
+
+    def level_waf(self, interval: bool = True) -> np.ndarray:
+        """
+        Per-level write amplification: bytes written into each level per user byte ingested.
+
+        The levels add up to the total WAF of the column family (WAL excluded).
+
+        Args:
+            interval: Per interval (True) or cumulative since DB open (False)
+
+        Returns:
+            (dumps, levels) array (NaN where nothing was ingested)
+        """
+        written = self.metric('write_gb', interval)
+        ingest = self.ingest_deltas() if interval else self.ingest_gb
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(ingest[:, None] > 0, written / ingest[:, None], np.nan)
+
+    def throughput(self, metric: str = 'write_gb') -> np.ndarray:
+        """
+        Per-level throughput of a GB column over each interval of wall-clock time.
+
+        Args:
+            metric: A GB column of CUMULATIVE_METRICS
+
+        Returns:
+            (dumps, levels) array in MB/s
+        """
+        if not metric.endswith('_gb'):
+            raise ValueError(f"throughput needs a GB metric, got {metric}")
+        elapsed = self.elapsed_s[:, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(elapsed > 0, self.metric(metric, interval=True) * 1024 / elapsed, np.nan)
+
+    def latest(self) -> Dict[int, Dict[str, float]]:
+        """Printed values of the last dump: level -> metric -> value."""
+        if not len(self):
+            return {}
+        return {level: dict(zip(METRICS, self.values[-1, i].tolist()))
+                for i, level in enumerate(self.levels)}
+
+    def to_frame(self, table: np.ndarray) -> pd.DataFrame:
+        """
+        Label a (dumps, levels) array.
+
+        Args:
+            table: Result of metric(), level_waf() or throughput()
+
+        Returns:
+            DataFrame indexed by dump time (local) with columns L0, L1, ...
+        """
+        index = pd.DatetimeIndex(timestamps_to_datetime64(self.timestamps), name='dump_time')
+        return pd.DataFrame(table, index=index, columns=[f'L{level}' for level in self.levels])
+
+
+def _recompute_ratios(deltas: np.ndarray):
+    """Recompute the ratio columns of interval values in place (last axis = METRICS)."""
+    column = _METRIC_INDEX
+    rn = deltas[..., column['rn_gb']] + np.nan_to_num(deltas[..., column['rblob_gb']])
+    written = deltas[..., column['write_gb']] + np.nan_to_num(deltas[..., column['wblob_gb']])
+    seconds = deltas[..., column['comp_sec']]
+    count = deltas[..., column['comp_count']]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Flush-only intervals (L0) read nothing from the LSM; they write what they ingest
+        deltas[..., column['w_amp']] = np.where(rn > 0, written / rn, np.where(written > 0, 1.0, 0.0))
+        deltas[..., column['rd_mb_s']] = np.where(seconds > 0, deltas[..., column['read_gb']] * 1024 / seconds, 0.0)
+        deltas[..., column['wr_mb_s']] = np.where(seconds > 0, deltas[..., column['write_gb']] * 1024 / seconds, 0.0)
+        deltas[..., column['avg_sec']] = np.where(count > 0, seconds / count, 0.0)
+
+
+def main():
+    """Print per-level compaction stats of a LOG."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Per-level compaction stats from RocksDB stats dumps')
+    parser.add_argument('log_path', help='RocksDB LOG file, directory or glob')
+    parser.add_argument('--cf', default='default', help='Column family')
+    parser.add_argument('--metric', choices=METRICS, default='write_gb', help='Metric to print per dump')
+    parser.add_argument('--interval', action='store_true', help='Print interval values instead of cumulative')
+    parser.add_argument('--output', help='CSV output path')
+
+    args = parser.parse_args()
+
+    series = CompactionStatsSeries.from_log(args.log_path, args.cf)
+    if not len(series):
+        print(f"No compaction stats table for column family '{args.cf}'")
+        return
+
+    print(f"Dumps: {len(series)}, levels: {series.levels}")
+    frame = series.to_frame(series.metric(args.metric, args.interval))
+    print(frame.round(3).to_string())
+
+    print("\nPer-level WAF (cumulative, last dump):")
+    for level, waf in zip(series.levels, series.level_waf(interval=False)[-1]):
+        print(f"  L{level}: {waf:.3f}")
+
+    if args.output:
+        frame.to_csv(args.output)
+        print(f"Saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,548 @@
+"""
+PutModel v4: Compaction Event Store
+
+This module implements a columnar store of flush and compaction jobs for
+time-windowed, per-level I/O queries. Jobs are kept in a NumPy structured
+array sorted by end time, with a per-level index and cumulative-sum prefix
+arrays so that any window aggregate is two binary searches.
+
+Key Features:
+- One row per job: start/end time, job id, input/output level, kind, bytes in/out, duration
+- Job kinds: flush, regular, intra-L0 and trivial move (re-parenting without device I/O)
+- Built from EVENT_LOG_v1 records (exact bytes) or text lines (MB, rounded)
+- Per-level indexes by input or output level with prefix sums
+- O(log n) window sums and counts, O(levels x buckets x log n) bucket tables
+"""
+
+import warnings
+from collections import defaultdict, deque
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .log_parser import NO_TIMESTAMP, ParsedLog
+except ImportError:
+    # Fallback for direct execution
+    import sys
+    import os
+    sys.path.append(os.path.dirname(__file__))
+    from log_parser import NO_TIMESTAMP, ParsedLog
+
+
+# Input level of flush jobs (memtable -> L0)
+FLUSH_LEVEL = -1
+
+# Input level of jobs whose source level is not in the LOG
+UNKNOWN_LEVEL = -2
+
+# Job kinds ('kind' column)
+KIND_FLUSH = 0
+KIND_REGULAR = 1
+KIND_INTRA_L0 = 2         # L0 -> L0 compaction
+KIND_TRIVIAL_MOVE = 3     # Files re-parented to another level; no bytes read or written
+
+KIND_NAMES = {
+    KIND_FLUSH: 'flush',
+    KIND_REGULAR: 'regular',
+    KIND_INTRA_L0: 'intra_l0',
+    KIND_TRIVIAL_MOVE: 'trivial_move',
+}
+
+EVENT_DTYPE = np.dtype([
+    ('start_us', np.int64),      # Job start (epoch microseconds)
+    ('end_us', np.int64),        # Job end (epoch microseconds); rows are sorted by it
+    ('job', np.int64),
+    ('input_level', np.int8),    # Lowest input level (FLUSH_LEVEL for flushes, UNKNOWN_LEVEL if not logged)
+    ('output_level', np.int8),
+    ('kind', np.int8),           # KIND_* constant
+    ('bytes_in', np.int64),      # Bytes read (memtable data size for flushes, 0 for trivial moves)
+    ('bytes_out', np.int64),     # Bytes written (0 for trivial moves)
+    ('duration_us', np.int64),
+    ('bytes_moved', np.int64),   # Bytes re-parented by a trivial move
+])
+
+# Fields with prefix sums ('count' is the number of jobs with device I/O,
+# 'moves' the number of trivial moves)
+VALUE_FIELDS = ('bytes_in', 'bytes_out', 'duration_us', 'bytes_moved', 'count', 'moves')
+
+# Row attributions for per-level indexes ('kind' groups by KIND_* instead of level)
+LEVEL_KEYS = ('input_level', 'output_level', 'kind')
+
+MB = 1024 * 1024
+
+
+def classify_jobs(input_level, output_level):
+    """
+    Classify flush/compaction jobs by their levels (vectorized).
+
+    Trivial moves are not recognizable from levels; they come from their own
+    LOG records and are tagged when the rows are built.
+
+    Args:
+        input_level: Lowest input level (FLUSH_LEVEL for flushes), scalar or array
+        output_level: Output level, scalar or array
+
+    Returns:
+        KIND_FLUSH, KIND_INTRA_L0 or KIND_REGULAR (int8 array for array arguments)
+    """
+    input_level = np.asarray(input_level)
+    output_level = np.asarray(output_level)
+    kind = np.where(input_level == FLUSH_LEVEL, KIND_FLUSH,
+                    np.where((input_level == 0) & (output_level == 0), KIND_INTRA_L0, KIND_REGULAR))
+    return kind.astype(np.int8)
+
+
+def _local_offset_us(time_us: int) -> int:
+    """UTC offset of the local time zone at an epoch time (microseconds)."""
+    offset = datetime.fromtimestamp(time_us / 1e6).astimezone().utcoffset()
+    return int(offset.total_seconds() * 1e6)
+
+
+class _LevelIndex:
+    """End times and prefix sums of the jobs of one level (or of all jobs)."""
+
+    def __init__(self, rows: np.ndarray):
+        self.end_us = rows['end_us']
+        self.prefix = {}
+        moves = rows['kind'] == KIND_TRIVIAL_MOVE
+        for field in VALUE_FIELDS:
+            if field == 'count':
+                values = (~moves).astype(np.float64)
+            elif field == 'moves':
+                values = moves.astype(np.float64)
+            else:
+                values = rows[field].astype(np.float64)
+            prefix = np.zeros(len(rows) + 1)
+            np.cumsum(values, out=prefix[1:])
+            self.prefix[field] = prefix
+
+    def positions(self, start_us, end_us) -> Tuple[np.ndarray, np.ndarray]:
+        return (np.searchsorted(self.end_us, start_us, side='left'),
+                np.searchsorted(self.end_us, end_us, side='left'))
+
+    def sum(self, start_us, end_us, field: str):
+        lo, hi = self.positions(start_us, end_us)
+        prefix = self.prefix[field]
+        return prefix[hi] - prefix[lo]
+
+
+def _move_rows(moves: Sequence, times_us: Sequence[int]) -> List[Tuple]:
+    """
+    Rows of trivial moves.
+
+    Neither the "Moved #"/"Moving #" lines nor the trivial_move record name
+    the source level, and with dynamic level bytes L0 -> base level moves
+    skip the levels in between, so the input level is UNKNOWN_LEVEL.
+    """
+    return [(t, t, e.job, UNKNOWN_LEVEL, e.output_level, KIND_TRIVIAL_MOVE, 0, 0, 0, e.bytes)
+            for e, t in zip(moves, times_us)]
+
+
+class CompactionStore:
+    """
+    Columnar store of flush and compaction jobs.
+
+    Jobs are attributed to the window that contains their end time (when
+    the output is written). Windows are half-open [start_us, end_us).
+    Flushes are rows with input_level FLUSH_LEVEL and output_level 0.
+    Trivial moves are zero-duration rows without bytes in/out, so byte and
+    time sums only contain I/O that reached the device.
+    """
+
+    def __init__(self, events: np.ndarray, utc_offset_us: Optional[int] = None):
+        """
+        Initialize the store.
+
+        Args:
+            events: Structured array with EVENT_DTYPE fields (any order)
+            utc_offset_us: UTC offset of the LOG's clock (see
+                ParsedLog.utc_offset_us); buckets are aligned to the LOG's
+                wall clock with it, or to the analysis host's time zone if None
+        """
+        events = np.asarray(events)
+        if events.dtype != EVENT_DTYPE:
+            raise ValueError(f"events must have dtype {EVENT_DTYPE}, got {events.dtype}")
+
+        # Jobs without a timestamp cannot be placed in a window
+        events = events[events['end_us'] != NO_TIMESTAMP]
+        self.utc_offset_us = utc_offset_us
+        self.events = events[np.argsort(events['end_us'], kind='stable')]
+
+        self._all = _LevelIndex(self.events)
+        self._levels = {}
+        for key in LEVEL_KEYS:
+            column = self.events[key]
+            self._levels[key] = {int(level): _LevelIndex(self.events[column == level])
+                                 for level in np.unique(column)}
+
+    @classmethod
+    def from_parsed(cls, parsed: ParsedLog) -> "CompactionStore":
+        """
+        Build the store from a parsed LOG.
+
+        EVENT_LOG_v1 records are used when present; otherwise the text
+        "flush table", "Compacting"/"compacted to:" and "Moved #" lines are used.
+
+        Args:
+            parsed: ParsedLog from log_parser/log_cache
+
+        Returns:
+            CompactionStore
+        """
+        if parsed.has_event_log():
+            rows = cls._rows_from_event_log(parsed)
+        else:
+            rows = cls._rows_from_text(parsed)
+        events = np.array(rows, dtype=EVENT_DTYPE)
+        jobs = events['kind'] != KIND_TRIVIAL_MOVE
+        events['kind'][jobs] = classify_jobs(events['input_level'][jobs], events['output_level'][jobs])
+        return cls(events, parsed.utc_offset_us())
+
+    @classmethod
+    def from_log(cls, log_path: Union[str, Path], workers: int = 1) -> "CompactionStore":
+        """
+        Build the store from a LOG file through the parsed-LOG cache.
+
+        Args:
+            log_path: LOG file, directory or glob
+            workers: Worker processes used when the LOG has to be parsed
+
+        Returns:
+            CompactionStore
+        """
+        try:
+            from .log_cache import load_parsed_log
+        except ImportError:
+            from log_cache import load_parsed_log
+        return cls.from_parsed(load_parsed_log(log_path, workers=workers))
+
+    @staticmethod
+    def _rows_from_event_log(parsed: ParsedLog) -> List[Tuple]:
+        rows = []
+
+        # Flushes: flush_started (memtable size) + table files of the job.
+        # Flush/compaction records carry no cf_name, so jobs are matched by id.
+        started = {e.job: e for e in parsed.flushes_started}
+        flush_jobs = {e.job for e in parsed.flushes_finished}
+        for e in parsed.table_files:
+            if e.job not in flush_jobs:
+                continue
+            start = started.pop(e.job, None)
+            start_us = start.time_micros if start else e.time_micros
+            rows.append((start_us, e.time_micros, e.job, FLUSH_LEVEL, 0, KIND_FLUSH,
+                         start.total_data_size if start else 0, e.file_size,
+                         e.time_micros - start_us, 0))
+
+        # Compactions: compaction_started joined with compaction_finished by job
+        started = {e.job: e for e in parsed.compactions_started}
+        for e in parsed.compactions_finished:
+            start = started.pop(e.job, None)
+            end_us = e.time_micros
+            rows.append((
+                start.time_micros if start else end_us - e.compaction_time_micros,
+                end_us, e.job,
+                start.input_level if start else UNKNOWN_LEVEL,
+                e.output_level,
+                KIND_REGULAR,
+                start.input_data_size if start else 0,
+                e.total_output_size,
+                e.compaction_time_micros,
+                0
+            ))
+
+        # Trivial moves have no compaction_started/finished records
+        rows.extend(_move_rows(parsed.trivial_moves, [e.time_micros for e in parsed.trivial_moves]))
+        return rows
+
+    @staticmethod
+    def _rows_from_text(parsed: ParsedLog) -> List[Tuple]:
+        rows = []
+
+        flush_us = parsed.event_times('flushes')
+        for e, end_us in zip(parsed.flushes, flush_us.tolist()):
+            rows.append((end_us, end_us, e.job, FLUSH_LEVEL, 0, KIND_FLUSH, 0, e.bytes, 0, 0))
+
+        # "compacted to:" lines carry no [JOB n]: each finish is paired with
+        # the oldest open "Compacting" start of its cf and output level
+        start_us = parsed.event_times('compaction_starts')
+        starts = list(zip(parsed.compaction_starts, start_us.tolist()))
+        end_us = parsed.event_times('compaction_finishes')
+        open_starts = defaultdict(deque)
+        next_start = 0
+        unpaired = 0
+        for e, end in zip(parsed.compaction_finishes, end_us.tolist()):
+            while next_start < len(starts) and starts[next_start][1] <= end:
+                start = starts[next_start][0]
+                open_starts[(start.cf, start.output_level)].append(starts[next_start])
+                next_start += 1
+            queue = open_starts.get((e.cf, e.output_level))
+            start, start_time = queue.popleft() if queue else (None, end)
+            if start is None:
+                unpaired += 1
+            read_mb = e.input_mb + e.input_next_mb
+            # "MB/sec: X rd" is read MB over the compaction time
+            duration_us = int(read_mb / e.read_mb_s * 1e6) if e.read_mb_s > 0 else 0
+            rows.append((
+                start_time if start else end - duration_us,
+                end, e.job,
+                start.input_level if start else UNKNOWN_LEVEL,
+                e.output_level,
+                KIND_REGULAR,
+                int(read_mb * MB),
+                int(e.output_mb * MB),
+                duration_us,
+                0
+            ))
+
+        if unpaired:
+            warnings.warn(f"{unpaired} of {len(parsed.compaction_finishes)} compaction summaries have no "
+                          f"matching \"Compacting\" line; their input level is stored as UNKNOWN_LEVEL",
+                          UserWarning)
+
+        move_us = parsed.event_times('moves')
+        rows.extend(_move_rows(parsed.moves, move_us.tolist()))
+        return rows
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    @property
+    def span(self) -> Tuple[int, int]:
+        """(first end time, last end time) in epoch microseconds."""
+        if len(self.events) == 0:
+            raise ValueError("Compaction store is empty")
+        return int(self.events['end_us'][0]), int(self.events['end_us'][-1])
+
+    def levels(self, by: str = 'output_level') -> List[int]:
+        """Levels that have jobs (by input or output level; KIND_* values for by='kind')."""
+        return sorted(self._index_for(by))
+
+    def _index_for(self, by: str) -> Dict[int, _LevelIndex]:
+        if by not in self._levels:
+            raise ValueError(f"by must be one of {LEVEL_KEYS}, got {by!r}")
+        return self._levels[by]
+
+    def _level_index(self, level: Optional[int], by: str) -> Optional[_LevelIndex]:
+        if level is None:
+            return self._all
+        return self._index_for(by).get(int(level))
+
+    def window(self, start_us, end_us, field: str = 'bytes_out',
+               level: Optional[int] = None, by: str = 'output_level'):
+        """
+        Sum a field over the jobs ending in [start_us, end_us).
+
+        Args:
+            start_us: Window start (epoch microseconds, scalar or array)
+            end_us: Window end (epoch microseconds, scalar or array)
+            field: One of VALUE_FIELDS
+            level: Level to restrict to (None = all jobs)
+            by: Level attribution ('input_level', 'output_level') or 'kind'
+
+        Returns:
+            Sum (float, or array for array arguments)
+        """
+        if field not in VALUE_FIELDS:
+            raise ValueError(f"field must be one of {VALUE_FIELDS}, got {field!r}")
+        index = self._level_index(level, by)
+        if index is None:
+            return 0.0 if np.ndim(start_us) == 0 else np.zeros(np.shape(start_us))
+        return index.sum(start_us, end_us, field)
+
+    def totals(self, field: str = 'bytes_out', by: str = 'output_level') -> Dict[int, float]:
+        """
+        Sum a field over all jobs of each level.
+
+        Args:
+            field: One of VALUE_FIELDS
+            by: Level attribution ('input_level', 'output_level') or 'kind'
+
+        Returns:
+            Dictionary of level -> total
+        """
+        if field not in VALUE_FIELDS:
+            raise ValueError(f"field must be one of {VALUE_FIELDS}, got {field!r}")
+        return {level: float(index.prefix[field][-1]) for level, index in sorted(self._index_for(by).items())}
+
+    def level_io(self, by: str = 'output_level') -> Dict[int, Dict[str, float]]:
+        """
+        Device I/O of each level.
+
+        Flush inputs come from memory and trivial moves only re-parent files,
+        so neither counts as bytes read; intra-L0 compactions count at L0.
+
+        Args:
+            by: Level attribution ('input_level' or 'output_level')
+
+        Returns:
+            Dictionary of level -> {'read_bytes', 'write_bytes', 'busy_us',
+            'jobs', 'moved_bytes', 'moves', 'intra_l0_jobs'}
+        """
+        if by not in LEVEL_KEYS[:2]:
+            raise ValueError(f"by must be 'input_level' or 'output_level', got {by!r}")
+        events = self.events
+        kind = events['kind']
+        read = np.where(kind == KIND_FLUSH, 0, events['bytes_in']).astype(np.float64)
+        moves = kind == KIND_TRIVIAL_MOVE
+
+        levels, position = np.unique(events[by], return_inverse=True)
+        columns = {
+            'read_bytes': read,
+            'write_bytes': events['bytes_out'].astype(np.float64),
+            'busy_us': events['duration_us'].astype(np.float64),
+            'jobs': (~moves).astype(np.float64),
+            'moved_bytes': events['bytes_moved'].astype(np.float64),
+            'moves': moves.astype(np.float64),
+            'intra_l0_jobs': (kind == KIND_INTRA_L0).astype(np.float64),
+        }
+        sums = {name: np.bincount(position, weights=values, minlength=len(levels))
+                for name, values in columns.items()}
+        return {int(level): {name: float(sums[name][i]) for name in columns}
+                for i, level in enumerate(levels)}
+
+    def select(self, start_us: int, end_us: int, level: Optional[int] = None,
+               by: str = 'output_level') -> np.ndarray:
+        """
+        Get the jobs ending in [start_us, end_us).
+
+        Args:
+            start_us: Window start (epoch microseconds)
+            end_us: Window end (epoch microseconds)
+            level: Level to restrict to (None = all jobs)
+            by: Level attribution ('input_level', 'output_level') or 'kind'
+
+        Returns:
+            Structured array of jobs (a view for level=None)
+        """
+        lo, hi = self._all.positions(start_us, end_us)
+        rows = self.events[lo:hi]
+        if level is not None:
+            self._index_for(by)
+            rows = rows[rows[by] == level]
+        return rows
+
+    def bucket_edges(self, bucket_s: float, origin_us: Optional[int] = None,
+                     end_us: Optional[int] = None) -> np.ndarray:
+        """
+        Get bucket edges covering the store.
+
+        Args:
+            bucket_s: Bucket width in seconds
+            origin_us: First edge (default: first job aligned to the bucket
+                width on the LOG's wall clock, e.g. to full hours)
+            end_us: Time that the last bucket must include (default: last job)
+
+        Returns:
+            int64 array of edges (epoch microseconds)
+        """
+        if bucket_s <= 0:
+            raise ValueError(f"bucket_s must be positive, got {bucket_s}")
+        first, last = self.span
+        step = int(bucket_s * 1e6)
+        if origin_us is None:
+            offset = self._offset_us(first)
+            origin_us = (first + offset) // step * step - offset
+        if end_us is None:
+            end_us = last
+        count = max(1, (end_us - origin_us) // step + 1)
+        return origin_us + step * np.arange(count + 1, dtype=np.int64)
+
+    def _offset_us(self, time_us: int) -> int:
+        """UTC offset of the LOG's wall clock (the analysis host's if unknown)."""
+        return self.utc_offset_us if self.utc_offset_us is not None else _local_offset_us(time_us)
+
+    def bucket_index(self, edges: np.ndarray) -> pd.DatetimeIndex:
+        """
+        Get the local-time start of each bucket (same clock as the LOG timestamps).
+
+        Args:
+            edges: Bucket edges from bucket_edges()
+
+        Returns:
+            DatetimeIndex of bucket starts
+        """
+        offset = self._offset_us(int(edges[0]))
+        index = pd.to_datetime(edges[:-1] + offset, unit='us')
+        index.name = 'bucket_start'
+        return index
+
+    def aggregate(self, bucket_s: float, field: str = 'bytes_out', by: str = 'output_level',
+                  levels: Optional[Sequence[int]] = None, origin_us: Optional[int] = None) -> pd.DataFrame:
+        """
+        Per-bucket, per-level sums of a field.
+
+        Args:
+            bucket_s: Bucket width in seconds
+            field: One of VALUE_FIELDS
+            by: Level attribution ('input_level', 'output_level') or 'kind'
+            levels: Levels to include (default: all levels with jobs)
+            origin_us: First bucket edge (see bucket_edges)
+
+        Returns:
+            DataFrame indexed by bucket start (local time) with one column per level
+        """
+        edges = self.bucket_edges(bucket_s, origin_us)
+        if levels is None:
+            levels = self.levels(by)
+        table = {level: self.window(edges[:-1], edges[1:], field, level, by) for level in levels}
+
+        frame = pd.DataFrame(table, index=self.bucket_index(edges))
+        frame.columns.name = by
+        return frame
+
+    def save(self, path: str):
+        """Save the job table to an .npz file."""
+        arrays = {'events': self.events}
+        if self.utc_offset_us is not None:
+            arrays['utc_offset_us'] = np.int64(self.utc_offset_us)
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "CompactionStore":
+        """Load a job table saved with save()."""
+        with np.load(path, allow_pickle=False) as data:
+            events = data['events']
+            utc_offset_us = int(data['utc_offset_us']) if 'utc_offset_us' in data else None
+        if events.dtype != EVENT_DTYPE:
+            # Saved before job kinds were recorded: no trivial moves in it
+            upgraded = np.zeros(len(events), dtype=EVENT_DTYPE)
+            for name in events.dtype.names:
+                upgraded[name] = events[name]
+            upgraded['kind'] = classify_jobs(events['input_level'], events['output_level'])
+            events = upgraded
+        return cls(events, utc_offset_us)
+
+
+def main():
+    """Print per-level bytes written per bucket for a LOG."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Per-level flush/compaction I/O per time bucket')
+    parser.add_argument('log_path', help='RocksDB LOG file, directory or glob')
+    parser.add_argument('--bucket-seconds', type=float, default=3600, help='Bucket width')
+    parser.add_argument('--field', choices=VALUE_FIELDS, default='bytes_out', help='Value to sum')
+    parser.add_argument('--by', choices=LEVEL_KEYS, default='output_level', help='Level attribution')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes for parsing')
+    parser.add_argument('--output', help='CSV output path')
+
+    args = parser.parse_args()
+
+    store = CompactionStore.from_log(args.log_path, workers=args.workers)
+    print(f"Jobs: {len(store)} (levels by {args.by}: {store.levels(args.by)})")
+
+    frame = store.aggregate(args.bucket_seconds, field=args.field, by=args.by)
+    if args.field.startswith('bytes'):
+        frame = frame / MB
+    print(frame.round(1).to_string())
+
+    if args.output:
+        frame.to_csv(args.output)
+        print(f"Saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,566 @@
+"""
+PutModel v4: Device I/O Sampler
+
+This module implements low-overhead sampling of block device counters for
+closing the ledger against real device traffic. Counters are read from
+/proc/diskstats (or /sys/block/<dev>/stat), stored as per-interval deltas in a
+fixed-size ring buffer and aligned with RocksDB LOG events by timestamp.
+
+Key Features:
+- /proc/diskstats and /sys/block/*/stat readers (512-byte sectors)
+- Ring buffer of per-interval deltas with compact .npz persistence
+- Parser for saved `iostat -x` output (-t timestamps, or a given start time)
+- Per-interval device utilization and LOG timestamp alignment
+"""
+
+import re
+import threading
+import time
+import warnings
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    from .log_parser import timestamps_to_micros
+except ImportError:
+    # Fallback for direct execution
+    import sys
+    import os
+    sys.path.append(os.path.dirname(__file__))
+    from log_parser import timestamps_to_micros
+
+
+# Kernel sector size used by diskstats, independent of the device's logical block size
+SECTOR_BYTES = 512
+
+# Columns of the stat fields (after major, minor, name in /proc/diskstats)
+_READS, _SECTORS_READ, _WRITES, _SECTORS_WRITTEN, _IO_MS = 0, 2, 4, 6, 9
+
+SERIES_FIELDS = ('read_bytes', 'write_bytes', 'reads', 'writes', 'busy_ms')
+
+_PARTITION_RE = re.compile(r'^(?:nvme\d+n\d+p\d+|mmcblk\d+p\d+|(?:sd|vd|xvd|hd)[a-z]+\d+)$')
+_VIRTUAL_RE = re.compile(r'^(?:loop|ram|zram|dm-|md|sr|fd|nbd)')
+
+
+def is_whole_disk(name: str) -> bool:
+    """Check whether a device name is a physical whole disk (not a partition or virtual device)."""
+    return not (_PARTITION_RE.match(name) or _VIRTUAL_RE.match(name))
+
+
+def _stat_counters(fields: Sequence[str]) -> np.ndarray:
+    """Convert stat fields to [read_bytes, write_bytes, reads, writes, busy_ms]."""
+    return np.array([
+        int(fields[_SECTORS_READ]) * SECTOR_BYTES,
+        int(fields[_SECTORS_WRITTEN]) * SECTOR_BYTES,
+        int(fields[_READS]),
+        int(fields[_WRITES]),
+        int(fields[_IO_MS])
+    ], dtype=np.int64)
+
+
+def read_diskstats(path: str = '/proc/diskstats',
+                   devices: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+    """
+    Read cumulative counters from /proc/diskstats.
+
+    Args:
+        path: Path to a diskstats file
+        devices: Device names to keep (default: all)
+
+    Returns:
+        Dictionary mapping device name to counters in SERIES_FIELDS order
+    """
+    counters = {}
+    with open(path, 'r') as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) < 14:
+                continue
+            name = fields[2]
+            if devices is None or name in devices:
+                counters[name] = _stat_counters(fields[3:])
+    return counters
+
+
+def read_sys_block_stat(device: str, sys_block: str = '/sys/block') -> np.ndarray:
+    """
+    Read cumulative counters of one device from /sys/block/<device>/stat.
+
+    Args:
+        device: Device name (e.g. nvme0n1)
+        sys_block: sysfs block directory
+
+    Returns:
+        Counters in SERIES_FIELDS order
+    """
+    with open(Path(sys_block) / device / 'stat', 'r') as f:
+        return _stat_counters(f.read().split())
+
+
+class DeviceSeries:
+    """
+    Per-interval device I/O deltas.
+
+    Rows are intervals ending at `timestamps` (epoch seconds); columns follow
+    SERIES_FIELDS and are summed over the sampled devices.
+    """
+
+    def __init__(self, timestamps: np.ndarray, deltas: np.ndarray, interval_s: np.ndarray,
+                 devices: Optional[List[str]] = None):
+        """
+        Initialize a device series.
+
+        Args:
+            timestamps: Interval end times (epoch seconds), shape (n,)
+            deltas: Counter deltas, shape (n, len(SERIES_FIELDS))
+            interval_s: Interval lengths in seconds, shape (n,)
+            devices: Names of the devices summed into the series
+        """
+        self.timestamps = np.asarray(timestamps, dtype=np.float64)
+        self.deltas = np.asarray(deltas, dtype=np.int64).reshape(-1, len(SERIES_FIELDS))
+        self.interval_s = np.asarray(interval_s, dtype=np.float64)
+        self.devices = list(devices or [])
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def column(self, field: str) -> np.ndarray:
+        """Get one column of SERIES_FIELDS."""
+        return self.deltas[:, SERIES_FIELDS.index(field)]
+
+    def totals(self, start: Optional[float] = None, end: Optional[float] = None) -> Dict[str, int]:
+        """
+        Get the total of every field over the series or a time range.
+
+        Args:
+            start: Range start (epoch seconds; default: start of the series)
+            end: Range end (epoch seconds; default: end of the series)
+
+        Returns:
+            Dictionary mapping SERIES_FIELDS to totals; intervals cut by the
+            range count in proportion (see cumulative_at)
+        """
+        if start is None and end is None:
+            return {field: int(total) for field, total in zip(SERIES_FIELDS, self.deltas.sum(axis=0))}
+        if len(self) == 0:
+            return {field: 0 for field in SERIES_FIELDS}
+        first = self.timestamps[0] - self.interval_s[0]
+        bounds = self.cumulative_at([first if start is None else start,
+                                     self.timestamps[-1] if end is None else end])
+        return {field: int(round(values[1] - values[0])) for field, values in bounds.items()}
+
+    def utilization(self) -> np.ndarray:
+        """
+        Get the per-interval device utilization (busy time / interval, 0-1 per device).
+
+        With several devices the value is the mean over devices.
+        """
+        elapsed_ms = self.interval_s * 1000.0 * max(len(self.devices), 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            util = np.where(elapsed_ms > 0, self.column('busy_ms') / elapsed_ms, 0.0)
+        return np.clip(util, 0.0, 1.0)
+
+    def bandwidth(self) -> Dict[str, np.ndarray]:
+        """Get per-interval read/write bandwidth in bytes/s."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return {
+                'read_bytes_s': np.where(self.interval_s > 0, self.column('read_bytes') / self.interval_s, 0.0),
+                'write_bytes_s': np.where(self.interval_s > 0, self.column('write_bytes') / self.interval_s, 0.0)
+            }
+
+    def window(self, start: float, end: float) -> "DeviceSeries":
+        """Get the intervals ending in (start, end] (epoch seconds)."""
+        lo, hi = np.searchsorted(self.timestamps, [start, end], side='right')
+        return DeviceSeries(self.timestamps[lo:hi], self.deltas[lo:hi], self.interval_s[lo:hi], self.devices)
+
+    def cumulative_at(self, timestamps: Sequence[float]) -> Dict[str, np.ndarray]:
+        """
+        Get cumulative device counters at arbitrary times.
+
+        Counters are linearly interpolated within an interval, so LOG events
+        between two samples get a proportional share of the interval.
+
+        Args:
+            timestamps: Query times (epoch seconds)
+
+        Returns:
+            Dictionary mapping SERIES_FIELDS to cumulative values at the query times
+        """
+        if len(self) == 0:
+            return {field: np.zeros(len(timestamps)) for field in SERIES_FIELDS}
+
+        times = np.concatenate([[self.timestamps[0] - self.interval_s[0]], self.timestamps])
+        cumulative = np.vstack([np.zeros(len(SERIES_FIELDS)), np.cumsum(self.deltas, axis=0)])
+        query = np.asarray(timestamps, dtype=np.float64)
+        return {field: np.interp(query, times, cumulative[:, i]) for i, field in enumerate(SERIES_FIELDS)}
+
+    def align_to_log(self, log_timestamps: Sequence[str],
+                     utc_offset_us: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Get device bytes between consecutive LOG timestamps.
+
+        Args:
+            log_timestamps: LOG timestamps ("2025/09/12-10:00:00.123456", local time)
+            utc_offset_us: UTC offset of the LOG's clock (see
+                ParsedLog.utc_offset_us; default: analysis host's time zone)
+
+        Returns:
+            Dictionary with 'read_bytes' and 'write_bytes' deltas, one per
+            LOG timestamp (the first entry counts from the start of the series)
+        """
+        cumulative = self.cumulative_at(timestamps_to_micros(log_timestamps, utc_offset_us) / 1e6)
+        return {field: np.diff(cumulative[field], prepend=0.0) for field in ('read_bytes', 'write_bytes')}
+
+    def save(self, path: str):
+        """Save the series as a compressed .npz file."""
+        np.savez_compressed(path, timestamps=self.timestamps, deltas=self.deltas,
+                            interval_s=self.interval_s, devices=np.array(self.devices))
+
+    @classmethod
+    def load(cls, path: str) -> "DeviceSeries":
+        """Load a series saved with save()."""
+        with np.load(path) as data:
+            return cls(data['timestamps'], data['deltas'], data['interval_s'], data['devices'].tolist())
+
+
+def log_timestamp_to_epoch(timestamp: str, utc_offset_us: Optional[int] = None) -> float:
+    """Convert a LOG timestamp (local time, see timestamps_to_micros) to epoch seconds."""
+    return float(timestamps_to_micros([timestamp], utc_offset_us)[0]) / 1e6
+
+
+class DiskstatsSampler:
+    """
+    Periodic sampler of block device counters.
+
+    Each sample stores the delta since the previous one in a ring buffer of
+    fixed capacity, so memory stays constant on long runs. Sampling can be
+    driven by sample() calls or by a background thread (start/stop).
+    """
+
+    def __init__(self, devices: Sequence[str], interval: float = 1.0, capacity: int = 86400,
+                 source: str = 'proc', diskstats_path: str = '/proc/diskstats',
+                 sys_block: str = '/sys/block'):
+        """
+        Initialize the sampler.
+
+        Args:
+            devices: Device names to sample (summed into one series)
+            interval: Sampling interval in seconds for the background thread
+            capacity: Number of intervals kept in the ring buffer
+            source: 'proc' (/proc/diskstats) or 'sys' (/sys/block/<dev>/stat)
+            diskstats_path: Path to diskstats (source='proc')
+            sys_block: sysfs block directory (source='sys')
+        """
+        if not devices:
+            raise ValueError("At least one device is required")
+        if source not in ('proc', 'sys'):
+            raise ValueError(f"Unknown source {source!r}, expected 'proc' or 'sys'")
+        if capacity <= 0:
+            raise ValueError(f"capacity must be positive, got {capacity}")
+
+        self.devices = list(devices)
+        self.interval = interval
+        self.capacity = capacity
+        self.source = source
+        self.diskstats_path = diskstats_path
+        self.sys_block = sys_block
+
+        self._timestamps = np.zeros(capacity, dtype=np.float64)
+        self._interval_s = np.zeros(capacity, dtype=np.float64)
+        self._deltas = np.zeros((capacity, len(SERIES_FIELDS)), dtype=np.int64)
+        self._count = 0
+        self._previous = None
+        self._previous_time = None
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def read_counters(self) -> np.ndarray:
+        """Read the current cumulative counters summed over the devices."""
+        if self.source == 'proc':
+            counters = read_diskstats(self.diskstats_path, self.devices)
+            missing = set(self.devices) - set(counters)
+            if missing:
+                raise KeyError(f"Devices not found in {self.diskstats_path}: {sorted(missing)}")
+            return sum(counters[device] for device in self.devices)
+        return sum(read_sys_block_stat(device, self.sys_block) for device in self.devices)
+
+    def sample(self, now: Optional[float] = None):
+        """
+        Take one sample and store the delta since the previous one.
+
+        Args:
+            now: Sample time in epoch seconds (default: current time)
+        """
+        now = time.time() if now is None else now
+        counters = self.read_counters()
+
+        with self._lock:
+            if self._previous is not None:
+                delta = counters - self._previous
+                if (delta < 0).any():
+                    # Counter reset (device re-attached); skip the interval
+                    warnings.warn("Device counters went backwards; interval skipped", UserWarning)
+                else:
+                    slot = self._count % self.capacity
+                    self._timestamps[slot] = now
+                    self._interval_s[slot] = now - self._previous_time
+                    self._deltas[slot] = delta
+                    self._count += 1
+            self._previous = counters
+            self._previous_time = now
+
+    def series(self) -> DeviceSeries:
+        """Get the buffered intervals in chronological order."""
+        with self._lock:
+            n = min(self._count, self.capacity)
+            order = np.arange(self._count - n, self._count) % self.capacity
+            return DeviceSeries(self._timestamps[order], self._deltas[order],
+                                self._interval_s[order], self.devices)
+
+    def start(self):
+        """Start sampling in a background thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='diskstats-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        """Background loop aligned to the sampling interval."""
+        next_time = time.time()
+        while not self._stop.is_set():
+            self.sample()
+            next_time += self.interval
+            self._stop.wait(max(0.0, next_time - time.time()))
+
+
+def parse_iostat_x(path: str, devices: Optional[Sequence[str]] = None,
+                   interval: Optional[float] = None, skip_first: bool = True,
+                   start_time: Optional[float] = None,
+                   utc_offset_us: Optional[int] = None) -> Dict[str, DeviceSeries]:
+    """
+    Parse saved `iostat -x [-t] [-k|-m] interval` output.
+
+    Supports the sysstat column layouts with r/s, w/s and rkB/s, rMB/s or
+    rsec/s (and the write equivalents). Reports are timestamped from `-t`
+    lines; output without them needs the time iostat was started, since
+    the series are aligned with LOG events by epoch time.
+
+    Args:
+        path: Path to the saved iostat output
+        devices: Device names to keep (default: all)
+        interval: Report interval in seconds (default: inferred from -t timestamps, else 1)
+        skip_first: Drop the first report (averages since boot)
+        start_time: Epoch seconds of the first report (when iostat was
+            started), for output without -t timestamps
+        utc_offset_us: UTC offset of the clock of the -t timestamps (the
+            LOG's, see ParsedLog.utc_offset_us; default: analysis host's
+            time zone)
+
+    Raises:
+        ValueError: If reports have no timestamps and start_time is not given
+
+    Returns:
+        Dictionary mapping device name to its DeviceSeries
+    """
+    units = {'kB/s': 1024.0, 'MB/s': 1024.0 ** 2, 'sec/s': float(SECTOR_BYTES)}
+
+    reports = []
+    report_time = None
+    columns = None
+    rows = None
+
+    with open(path, 'r') as f:
+        for line in f:
+            fields = line.split()
+            if not fields:
+                columns = None
+                continue
+
+            if fields[0].startswith('Device'):
+                columns = fields
+                rows = {}
+                reports.append((report_time, rows))
+                continue
+
+            if columns is None:
+                report_time = _parse_iostat_time(line.strip(), utc_offset_us) or report_time
+                continue
+
+            if len(fields) != len(columns) or (devices is not None and fields[0] not in devices):
+                continue
+
+            values = dict(zip(columns[1:], fields[1:]))
+            row = {'reads_s': float(values.get('r/s', 0.0)),
+                   'writes_s': float(values.get('w/s', 0.0)),
+                   'util': float(values.get('%util', 0.0)) / 100.0}
+            for prefix, key in (('r', 'read'), ('w', 'write')):
+                for unit, scale in units.items():
+                    if prefix + unit in values:
+                        row[f'{key}_bytes_s'] = float(values[prefix + unit]) * scale
+                        break
+                else:
+                    row[f'{key}_bytes_s'] = 0.0
+            rows[fields[0]] = row
+
+    skipped = 1 if skip_first and reports else 0
+    reports = reports[skipped:]
+    if not reports:
+        return {}
+
+    times = [t for t, _ in reports]
+    if interval is None:
+        known = [t for t in times if t is not None]
+        interval = float(np.median(np.diff(known))) if len(known) > 1 else 1.0
+    if any(t is None for t in times):
+        if start_time is None:
+            raise ValueError(f"{path} has no iostat -t timestamps; pass start_time "
+                             f"(epoch seconds when iostat was started)")
+        times = [start_time + interval * (i + skipped) for i in range(len(reports))]
+
+    series = {}
+    for name in sorted({name for _, rows in reports for name in rows}):
+        stamps, deltas = [], []
+        for t, (_, rows) in zip(times, reports):
+            row = rows.get(name)
+            if row is None:
+                continue
+            stamps.append(t)
+            deltas.append([
+                round(row['read_bytes_s'] * interval),
+                round(row['write_bytes_s'] * interval),
+                round(row['reads_s'] * interval),
+                round(row['writes_s'] * interval),
+                round(row['util'] * interval * 1000.0)
+            ])
+        series[name] = DeviceSeries(np.array(stamps), np.array(deltas), np.full(len(stamps), interval), [name])
+
+    return series
+
+
+def _parse_iostat_time(line: str, utc_offset_us: Optional[int] = None) -> Optional[float]:
+    """Parse an `iostat -t` timestamp line (locale dependent) to epoch seconds."""
+    for fmt in ('%m/%d/%Y %I:%M:%S %p', '%m/%d/%y %I:%M:%S %p', '%m/%d/%Y %H:%M:%S',
+                '%m/%d/%y %H:%M:%S', '%Y-%m-%dT%H:%M:%S%z', '%Y-%m-%d %H:%M:%S'):
+        try:
+            parsed = datetime.strptime(line, fmt)
+        except ValueError:
+            continue
+        if parsed.tzinfo is not None or utc_offset_us is None:
+            return parsed.timestamp()
+        # Local time of the LOG's host
+        return (parsed - datetime(1970, 1, 1)).total_seconds() - utc_offset_us / 1e6
+    return None
+
+
+def combine_series(series: Sequence[DeviceSeries]) -> DeviceSeries:
+    """
+    Sum device series that share the same sampling times.
+
+    Args:
+        series: Series of individual devices
+
+    Returns:
+        DeviceSeries summed over the devices (intervals present in all series)
+    """
+    if len(series) == 1:
+        return series[0]
+
+    common = series[0].timestamps
+    for s in series[1:]:
+        common = np.intersect1d(common, s.timestamps)
+
+    deltas = np.zeros((len(common), len(SERIES_FIELDS)), dtype=np.int64)
+    interval_s = np.zeros(len(common))
+    devices = []
+    for s in series:
+        index = np.searchsorted(s.timestamps, common)
+        deltas += s.deltas[index]
+        interval_s = s.interval_s[index]
+        devices.extend(s.devices)
+    return DeviceSeries(common, deltas, interval_s, devices)
+
+
+def load_device_series(path: str, devices: Optional[Sequence[str]] = None,
+                       start_time: Optional[float] = None,
+                       utc_offset_us: Optional[int] = None) -> DeviceSeries:
+    """
+    Load device traffic from a sampler .npz file or saved `iostat -x` output.
+
+    Without a device list, iostat files are summed over whole disks only so
+    that partitions and device-mapper volumes are not counted twice. A .npz
+    file holds one series already summed over the sampled devices, so a
+    device list must name exactly those devices.
+
+    Args:
+        path: Path to .npz (DiskstatsSampler) or iostat text file
+        devices: Device names to keep
+        start_time: Start of iostat output without -t timestamps (see parse_iostat_x)
+        utc_offset_us: UTC offset of the iostat -t timestamps (see parse_iostat_x)
+
+    Returns:
+        DeviceSeries summed over the selected devices
+    """
+    if str(path).endswith('.npz'):
+        series = DeviceSeries.load(path)
+        if devices is not None and set(devices) != set(series.devices):
+            raise ValueError(f"{path} is summed over {', '.join(series.devices) or 'unknown devices'}; "
+                             f"it cannot be narrowed to {', '.join(devices)}")
+        return series
+
+    per_device = parse_iostat_x(path, devices, start_time=start_time, utc_offset_us=utc_offset_us)
+    if devices is None:
+        per_device = {name: s for name, s in per_device.items() if is_whole_disk(name)}
+    if not per_device:
+        raise ValueError(f"No device statistics found in {path}")
+    return combine_series(list(per_device.values()))
+
+
+def main():
+    """Sample device counters to a .npz file."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Sample /proc/diskstats for ledger closure')
+    parser.add_argument('devices', nargs='+', help='Device names (e.g. nvme0n1)')
+    parser.add_argument('--interval', type=float, default=1.0, help='Sampling interval in seconds')
+    parser.add_argument('--duration', type=float, default=60.0, help='Sampling duration in seconds')
+    parser.add_argument('--source', choices=['proc', 'sys'], default='proc', help='Counter source')
+    parser.add_argument('--output', '-o', default='diskstats.npz', help='Output .npz file')
+
+    args = parser.parse_args()
+
+    capacity = int(args.duration / args.interval) + 1
+    sampler = DiskstatsSampler(args.devices, interval=args.interval, capacity=capacity, source=args.source)
+    sampler.start()
+    try:
+        time.sleep(args.duration)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sampler.stop()
+
+    series = sampler.series()
+    series.save(args.output)
+
+    totals = series.totals()
+    print(f"Sampled {len(series)} intervals of {', '.join(args.devices)}")
+    print(f"  Device read:  {totals['read_bytes'] / 1024**3:.3f} GB")
+    print(f"  Device write: {totals['write_bytes'] / 1024**3:.3f} GB")
+    print(f"  Mean utilization: {series.utilization().mean() * 100 if len(series) else 0.0:.1f}%")
+    print(f"Saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
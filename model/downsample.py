@@ -0,0 +1,201 @@
+"""
+PutModel v4: Time-Series Downsampling for Plots
+
+This module reduces long time series (per-second db_bench reports over
+days, LOG-derived rates) to a bounded number of points before they reach
+matplotlib. The line is downsampled with largest-triangle-three-buckets
+(LTTB), which keeps the points that shape the curve, and a min/max
+envelope per bucket is drawn as a band so short peaks and stalls stay
+visible at any zoom level.
+
+Key Features:
+- LTTB point selection computed for all buckets at once (NumPy reduceat)
+- Min/max envelope per bucket (values and source indices)
+- Datetime, timedelta and numeric x axes; NaN samples are skipped
+- plot_downsampled(): drop-in for ax.plot with the envelope band
+"""
+
+import numpy as np
+from typing import Dict, Optional
+
+# Default number of plotted points per series (roughly the pixel width of a figure)
+DEFAULT_MAX_POINTS = 2000
+
+# Refinement passes of the vectorized LTTB (see lttb_indices)
+LTTB_PASSES = 5
+
+
+def _numeric_x(x) -> np.ndarray:
+    """x as float64 (datetimes/timedeltas as nanoseconds)."""
+    x = np.asarray(x)
+    if x.dtype.kind in 'mM':
+        unit = 'datetime64[ns]' if x.dtype.kind == 'M' else 'timedelta64[ns]'
+        return x.astype(unit).view(np.int64).astype(np.float64)
+    if x.dtype.kind in 'OUS':
+        # datetime objects or ISO strings (e.g. timestamps read back from JSON)
+        return x.astype('datetime64[ns]').view(np.int64).astype(np.float64)
+    return x.astype(np.float64)
+
+
+def _bucket_starts(n: int, buckets: int, first: int = 0) -> np.ndarray:
+    """Start positions of `buckets` contiguous, near-equal buckets over [first, first + n)."""
+    return first + np.floor(np.arange(buckets) * (n / buckets)).astype(np.int64)
+
+
+def _first_argmax(values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """Position of the first maximum of every bucket (buckets are contiguous from starts)."""
+    peak = np.maximum.reduceat(values, starts)
+    bucket = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, len(values))))
+    candidates = np.flatnonzero(values == peak[bucket])
+    _, first = np.unique(bucket[candidates], return_index=True)
+    return candidates[first]
+
+
+def lttb_indices(x, y, max_points: int = DEFAULT_MAX_POINTS) -> np.ndarray:
+    """
+    Select points with largest-triangle-three-buckets.
+
+    The first and last points are kept and the others are split into
+    max_points - 2 buckets; each bucket keeps the point forming the largest
+    triangle with the point kept in the previous bucket and the mean of the
+    next bucket. Classic LTTB walks the buckets in order; here every bucket
+    is solved at once, anchored first on the previous bucket's mean and then
+    (LTTB_PASSES - 1 more times) on the point the previous pass selected.
+
+    Args:
+        x: Sample positions (sorted; numeric, datetime64 or timedelta64)
+        y: Sample values (finite)
+        max_points: Number of points to keep (>= 3)
+
+    Returns:
+        Sorted int64 indices into x/y
+    """
+    if max_points < 3:
+        raise ValueError("max_points must be at least 3")
+    xv, yv = _numeric_x(x), np.asarray(y, dtype=np.float64)
+    n = len(yv)
+    if n <= max_points:
+        return np.arange(n)
+
+    buckets = max_points - 2
+    starts = _bucket_starts(n - 2, buckets, first=1)
+    sizes = np.diff(np.append(starts, n - 1))
+    mean_x = np.add.reduceat(xv[:-1], starts)[:buckets] / sizes
+    mean_y = np.add.reduceat(yv[:-1], starts)[:buckets] / sizes
+
+    # Third vertex: mean of the next bucket (the last point for the last bucket)
+    next_x = np.append(mean_x[1:], xv[-1])
+    next_y = np.append(mean_y[1:], yv[-1])
+    # Anchor: previous bucket (the first point for the first bucket)
+    anchor_x = np.insert(mean_x[:-1], 0, xv[0])
+    anchor_y = np.insert(mean_y[:-1], 0, yv[0])
+
+    bucket = np.repeat(np.arange(buckets), sizes)
+    inner = slice(1, n - 1)
+    for _ in range(LTTB_PASSES):
+        ax, ay = anchor_x[bucket], anchor_y[bucket]
+        area = np.abs((ax - next_x[bucket]) * (yv[inner] - ay)
+                      - (ax - xv[inner]) * (next_y[bucket] - ay))
+        chosen = _first_argmax(area, starts - 1) + 1
+        anchor_x = np.insert(xv[chosen[:-1]], 0, xv[0])
+        anchor_y = np.insert(yv[chosen[:-1]], 0, yv[0])
+
+    return np.concatenate([[0], chosen, [n - 1]])
+
+
+def minmax_envelope(x, y, buckets: int = DEFAULT_MAX_POINTS) -> Dict[str, np.ndarray]:
+    """
+    Minimum and maximum of y in equal-count buckets.
+
+    Args:
+        x: Sample positions (sorted)
+        y: Sample values (finite)
+        buckets: Number of buckets (at most len(y))
+
+    Returns:
+        Dictionary with 'x' (x of each bucket's first sample, original
+        dtype), 'lower', 'upper' and the source indices 'lower_index',
+        'upper_index'
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n == 0:
+        empty = np.array([], dtype=np.int64)
+        return {'x': np.asarray(x)[empty], 'lower': y, 'upper': y, 'lower_index': empty, 'upper_index': empty}
+    starts = _bucket_starts(n, min(buckets, n))
+    lower_index = _first_argmax(-y, starts)
+    upper_index = _first_argmax(y, starts)
+    return {
+        'x': np.asarray(x)[starts],
+        'lower': y[lower_index],
+        'upper': y[upper_index],
+        'lower_index': lower_index,
+        'upper_index': upper_index,
+    }
+
+
+def downsample(x, y, max_points: int = DEFAULT_MAX_POINTS) -> Dict[str, np.ndarray]:
+    """
+    LTTB line plus min/max envelope of a series, skipping NaN samples.
+
+    Args:
+        x: Sample positions (sorted)
+        y: Sample values
+        max_points: Points of the line and buckets of the envelope
+
+    Returns:
+        Dictionary with 'x', 'y' (the line), 'index' (positions in the
+        input), 'band_x', 'lower', 'upper' and 'reduced' (whether any
+        samples were dropped)
+    """
+    x, y = np.asarray(x), np.asarray(y, dtype=np.float64)
+    if len(x) != len(y):
+        raise ValueError(f"x and y must have the same length ({len(x)} != {len(y)})")
+    valid = np.flatnonzero(np.isfinite(y))
+    xs, ys = x[valid], y[valid]
+    keep = lttb_indices(xs, ys, max_points) if len(ys) else valid[:0]
+    envelope = minmax_envelope(xs, ys, max_points)
+    return {
+        'x': xs[keep],
+        'y': ys[keep],
+        'index': valid[keep],
+        'band_x': envelope['x'],
+        'lower': envelope['lower'],
+        'upper': envelope['upper'],
+        'reduced': len(keep) < len(y),
+    }
+
+
+def plot_downsampled(ax, x, y, *args, max_points: int = DEFAULT_MAX_POINTS, band: bool = True,
+                     band_alpha: Optional[float] = None, **kwargs):
+    """
+    Plot a series through downsample(); a drop-in for ax.plot(x, y, ...).
+
+    Series no longer than max_points are plotted unchanged. Longer ones are
+    drawn as the LTTB line plus, when band is set, a min/max band in the
+    line's color so peaks and stalls between the kept points stay visible.
+
+    Args:
+        ax: Matplotlib axes
+        x: Sample positions (pandas Series/Index, arrays)
+        y: Sample values
+        *args: Format string and other positional ax.plot arguments
+        max_points: Plotted points per series
+        band: Draw the min/max envelope
+        band_alpha: Band opacity (default: a quarter of the line's alpha)
+        **kwargs: ax.plot keyword arguments
+
+    Returns:
+        List of Line2D from ax.plot
+    """
+    x, y = np.asarray(x), np.asarray(y, dtype=np.float64)
+    if len(y) <= max_points:
+        return ax.plot(x, y, *args, **kwargs)
+
+    reduced = downsample(x, y, max_points)
+    lines = ax.plot(reduced['x'], reduced['y'], *args, **kwargs)
+    if band and lines:
+        alpha = band_alpha if band_alpha is not None else 0.25 * (kwargs.get('alpha') or 1.0)
+        ax.fill_between(reduced['band_x'], reduced['lower'], reduced['upper'], step='post',
+                        color=lines[0].get_color(), alpha=alpha, linewidth=0)
+    return lines
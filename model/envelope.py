@@ -9,6 +9,7 @@ Key Features:
 - Linear interpolation with optional clamping
 - Support for multiple device types
 - Extrapolation warnings for out-of-grid queries
+- Optional parametric surface fit for closed-form (table-free) evaluation
 """
 
 import json
@@ -18,15 +19,133 @@ from typing import Dict, List, Optional, Tuple, Union
 import warnings
 
 
+class ParametricEnvelope:
+    """
+    Compact closed-form fit of a measured envelope grid.
+    
+    The bandwidth surface is modeled in log space as a separable quadratic in
+    the transformed coordinates (rho_r, log qd, log numjobs, log bs) plus the
+    pairwise products of the linear terms:
+    
+        log Beff = c0 + sum_i (a_i x_i + b_i x_i^2) + sum_{i<j} d_ij x_i x_j
+    
+    Evaluation is a handful of vectorized multiply-adds followed by one exp,
+    with no table lookup. Non-positive grid cells (failed fio runs) are
+    excluded from the fit.
+    """
+    
+    # Indices of the pairwise interaction terms
+    _PAIRS = [(i, j) for i in range(4) for j in range(i + 1, 4)]
+    
+    def __init__(self, coefficients: np.ndarray):
+        """
+        Initialize the parametric envelope.
+        
+        Args:
+            coefficients: Fitted coefficient vector (see _design_matrix for layout)
+        """
+        self.coefficients = np.asarray(coefficients, dtype=float)
+        self.point_errors = None
+    
+    @staticmethod
+    def _transform(rho_r, qd, numjobs, bs_k) -> List[np.ndarray]:
+        """Map raw query coordinates to the fit coordinates."""
+        return [np.asarray(rho_r, dtype=float),
+                np.log(np.asarray(qd, dtype=float)),
+                np.log(np.asarray(numjobs, dtype=float)),
+                np.log(np.asarray(bs_k, dtype=float))]
+    
+    @classmethod
+    def _design_matrix(cls, x: List[np.ndarray]) -> np.ndarray:
+        """Build the design matrix [1, x_i, x_i^2, x_i*x_j] for flattened coordinates."""
+        columns = [np.ones_like(x[0])]
+        columns += x
+        columns += [xi * xi for xi in x]
+        columns += [x[i] * x[j] for i, j in cls._PAIRS]
+        return np.stack(columns, axis=-1)
+    
+    @classmethod
+    def fit(cls, rho_r_axis: np.ndarray, iodepth_axis: np.ndarray, numjobs_axis: np.ndarray,
+            bs_axis: np.ndarray, bandwidth_grid: np.ndarray) -> "ParametricEnvelope":
+        """
+        Fit the parametric surface to a measured envelope grid.
+        
+        Args:
+            rho_r_axis: Read ratio axis
+            iodepth_axis: Queue depth axis
+            numjobs_axis: Parallel jobs axis
+            bs_axis: Block size axis in KiB
+            bandwidth_grid: 4D array of bandwidth measurements in MiB/s
+            
+        Returns:
+            ParametricEnvelope instance with per-point fit errors
+        """
+        mesh = np.meshgrid(rho_r_axis, iodepth_axis, numjobs_axis, bs_axis, indexing='ij')
+        X = cls._design_matrix(cls._transform(*[m.ravel() for m in mesh]))
+        y = np.asarray(bandwidth_grid, dtype=float).ravel()
+        
+        valid = y > 0
+        if valid.sum() < X.shape[1]:
+            raise ValueError(f"Need at least {X.shape[1]} positive grid points to fit, got {valid.sum()}")
+        
+        coefficients, *_ = np.linalg.lstsq(X[valid], np.log(y[valid]), rcond=None)
+        fitted = cls(coefficients)
+        
+        # Relative error at every measured grid point (NaN where the cell was not fitted)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            errors = np.abs(np.exp(X @ coefficients) - y) / y
+        errors[~valid] = np.nan
+        fitted.point_errors = errors.reshape(np.shape(bandwidth_grid))
+        
+        return fitted
+    
+    def evaluate(self, rho_r, qd, numjobs, bs_k) -> np.ndarray:
+        """
+        Evaluate the fitted surface (scalars or broadcastable arrays).
+        
+        Returns:
+            Effective bandwidth in MiB/s
+        """
+        x = np.broadcast_arrays(*self._transform(rho_r, qd, numjobs, bs_k))
+        c = self.coefficients
+        
+        log_beff = c[0]
+        for i in range(4):
+            log_beff = log_beff + x[i] * (c[1 + i] + c[5 + i] * x[i])
+        for n, (i, j) in enumerate(self._PAIRS):
+            log_beff = log_beff + c[9 + n] * x[i] * x[j]
+        
+        return np.exp(log_beff)
+    
+    def get_fit_report(self) -> Dict:
+        """Get summary statistics of the per-point fit error."""
+        errors = self.point_errors
+        return {
+            'max_relative_error': float(np.nanmax(errors)),
+            'mean_relative_error': float(np.nanmean(errors)),
+            'p95_relative_error': float(np.nanpercentile(errors, 95)),
+            'unfitted_points': int(np.isnan(errors).sum()),
+            'point_errors': errors.tolist(),
+            'coefficients': self.coefficients.tolist()
+        }
+
+
 class EnvelopeModel:
     """
     Device Envelope Model for mixed I/O bandwidth prediction.
     
     This class implements a 4D interpolation model based on fio grid sweep results.
     It provides accurate bandwidth predictions for mixed read/write workloads.
+    
+    Two evaluation backends are available: 'grid' (linear interpolation of the
+    measured grid) and 'parametric' (closed-form ParametricEnvelope fit). The
+    parametric backend falls back to the grid inside every grid cell whose
+    corner points are fitted worse than fit_tolerance.
     """
     
-    def __init__(self, grid_data: Dict):
+    BACKENDS = ('grid', 'parametric')
+    
+    def __init__(self, grid_data: Dict, backend: str = 'grid', fit_tolerance: float = 0.05):
         """
         Initialize the envelope model from grid data.
         
@@ -37,7 +156,13 @@ class EnvelopeModel:
                 - numjobs_axis: List of parallel jobs [1, 2, 4]
                 - bs_axis: List of block sizes in KiB [4, 64, 1024]
                 - bandwidth_grid: 4D numpy array of bandwidth measurements
+            backend: Evaluation backend, 'grid' or 'parametric'
+            fit_tolerance: Maximum relative fit error of a grid cell for the
+                parametric backend to be used there (default: 5%)
         """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"backend must be one of {self.BACKENDS}, got {backend!r}")
+        
         self.rho_r_axis = np.array(grid_data['rho_r_axis'])
         self.iodepth_axis = np.array(grid_data['iodepth_axis'])
         self.numjobs_axis = np.array(grid_data['numjobs_axis'])
@@ -62,20 +187,91 @@ class EnvelopeModel:
         # Store metadata
         self.metadata = grid_data.get('metadata', {})
         
+        # Parametric backend
+        self.backend = backend
+        self.fit_tolerance = fit_tolerance
+        self.parametric = None
+        self._cell_fallback = None
+        if backend == 'parametric':
+            self._fit_parametric()
+        
     @classmethod
-    def from_json_path(cls, path: str) -> "EnvelopeModel":
+    def from_json_path(cls, path: str, backend: str = 'grid', fit_tolerance: float = 0.05) -> "EnvelopeModel":
         """
         Load envelope model from JSON file.
         
         Args:
             path: Path to JSON file containing grid data
+            backend: Evaluation backend, 'grid' or 'parametric'
+            fit_tolerance: Maximum relative cell fit error for the parametric backend
             
         Returns:
             EnvelopeModel instance
         """
         with open(path, 'r') as f:
             grid_data = json.load(f)
-        return cls(grid_data)
+        return cls(grid_data, backend=backend, fit_tolerance=fit_tolerance)
+    
+    def _fit_parametric(self):
+        """Fit the parametric surface and mark grid cells that need the grid fallback."""
+        self.parametric = ParametricEnvelope.fit(
+            self.rho_r_axis, self.iodepth_axis, self.numjobs_axis, self.bs_axis, self.bandwidth_grid
+        )
+        
+        # A cell falls back to the grid if any of its corner points is fitted poorly
+        bad = ~(self.parametric.point_errors <= self.fit_tolerance)
+        cell_bad = bad
+        for axis, length in enumerate(bad.shape):
+            if length > 1:
+                lo = np.take(cell_bad, np.arange(length - 1), axis=axis)
+                hi = np.take(cell_bad, np.arange(1, length), axis=axis)
+                cell_bad = lo | hi
+        
+        # None means the fit is good everywhere and no cell lookup is needed
+        self._cell_fallback = cell_bad if cell_bad.any() else None
+    
+    def _cell_index(self, axis: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """Locate the grid cell containing each value along one axis."""
+        if len(axis) == 1:
+            return np.zeros(np.shape(values), dtype=int)
+        return np.clip(np.searchsorted(axis, values, side='right') - 1, 0, len(axis) - 2)
+    
+    def query_batch(self, rho_r, qd, numjobs, bs_k) -> np.ndarray:
+        """
+        Vectorized envelope query without validation or clamping.
+        
+        Args:
+            rho_r: Read ratios (scalar or array)
+            qd: Queue depths (scalar or array)
+            numjobs: Numbers of parallel jobs (scalar or array)
+            bs_k: Block sizes in KiB (scalar or array)
+            
+        Returns:
+            Array of effective bandwidths in MiB/s (broadcast shape of the inputs)
+        """
+        rho_r, qd, numjobs, bs_k = np.broadcast_arrays(
+            *[np.asarray(v, dtype=float) for v in (rho_r, qd, numjobs, bs_k)]
+        )
+        
+        if self.backend == 'grid':
+            points = np.stack([rho_r, qd, numjobs, bs_k], axis=-1)
+            return self.interpolator(points).reshape(rho_r.shape)
+        
+        Beff = self.parametric.evaluate(rho_r, qd, numjobs, bs_k)
+        
+        if self._cell_fallback is not None:
+            fallback = self._cell_fallback[
+                self._cell_index(self.rho_r_axis, rho_r),
+                self._cell_index(self.iodepth_axis, qd),
+                self._cell_index(self.numjobs_axis, numjobs),
+                self._cell_index(self.bs_axis, bs_k)
+            ]
+            if fallback.any():
+                points = np.stack([rho_r[fallback], qd[fallback], numjobs[fallback], bs_k[fallback]], axis=-1)
+                Beff = np.array(Beff, copy=True)
+                Beff[fallback] = self.interpolator(points)
+        
+        return Beff
     
     def query(self, rho_r: float, qd: int, numjobs: int, bs_k: int,
               Br: Optional[float] = None, Bw: Optional[float] = None,
@@ -111,9 +307,8 @@ class EnvelopeModel:
         # Check for extrapolation
         self._check_extrapolation(rho_r, qd, numjobs, bs_k)
         
-        # Query interpolator
-        point = np.array([rho_r, qd, numjobs, bs_k])
-        Beff = float(self.interpolator(point))
+        # Query the selected backend
+        Beff = float(self.query_batch(rho_r, qd, numjobs, bs_k))
         
         # Apply physical clamping if requested
         if clamp_to_physical and Br is not None and Bw is not None:
@@ -153,9 +348,32 @@ class EnvelopeModel:
             'bs_range': [int(self.bs_axis.min()), int(self.bs_axis.max())],
             'grid_shape': self.bandwidth_grid.shape,
             'total_points': self.bandwidth_grid.size,
+            'backend': self.backend,
             'metadata': self.metadata
         }
     
+    def get_fit_report(self) -> Dict:
+        """
+        Get the parametric fit error report.
+        
+        Returns:
+            Dictionary with per-point relative errors, summary statistics and
+            the fraction of grid cells that fall back to grid interpolation
+        """
+        if self.parametric is None:
+            raise ValueError("No parametric fit; create the model with backend='parametric'")
+        
+        report = self.parametric.get_fit_report()
+        n_cells = int(np.prod([max(len(a) - 1, 1) for a in
+                               (self.rho_r_axis, self.iodepth_axis, self.numjobs_axis, self.bs_axis)]))
+        fallback_cells = 0 if self._cell_fallback is None else int(self._cell_fallback.sum())
+        report.update({
+            'fit_tolerance': self.fit_tolerance,
+            'fallback_cells': fallback_cells,
+            'fallback_fraction': fallback_cells / n_cells
+        })
+        return report
+    
     def validate_physical_constraints(self, Br: float, Bw: float) -> Dict:
         """
         Validate that the envelope model respects physical constraints.
@@ -264,6 +482,20 @@ if __name__ == "__main__":
         Beff = model.query(rho_r, qd, numjobs, bs_k)
         print(f"  ρr={rho_r}, qd={qd}, jobs={numjobs}, bs={bs_k}KiB → Beff={Beff:.1f} MiB/s")
     
+    print("\nParametric backend:")
+    parametric_model = EnvelopeModel(
+        {'rho_r_axis': model.rho_r_axis, 'iodepth_axis': model.iodepth_axis,
+         'numjobs_axis': model.numjobs_axis, 'bs_axis': model.bs_axis,
+         'bandwidth_grid': model.bandwidth_grid},
+        backend='parametric'
+    )
+    report = parametric_model.get_fit_report()
+    print(f"  Max fit error: {report['max_relative_error']:.2%}")
+    print(f"  Fallback cells: {report['fallback_cells']} ({report['fallback_fraction']:.1%})")
+    for rho_r, qd, numjobs, bs_k in test_cases:
+        Beff = parametric_model.query(rho_r, qd, numjobs, bs_k)
+        print(f"  ρr={rho_r}, qd={qd}, jobs={numjobs}, bs={bs_k}KiB → Beff={Beff:.1f} MiB/s")
+    
     print("\nTesting physical constraints:")
     validation = model.validate_physical_constraints(Br=1500, Bw=2000)
     print(f"  Valid: {validation['is_valid']}")
@@ -0,0 +1,356 @@
+"""
+PutModel v4: Device Envelope Registry
+
+This module implements a registry of device envelope models for mixed fleets.
+Envelopes are keyed by (device model, firmware, wear state) so that simulators,
+sweep tools and monitoring scripts share one lazily loaded copy of each grid.
+
+Key Features:
+- JSON manifest describing every measured envelope in the fleet
+- Lazy loading with an LRU cache of EnvelopeModel instances
+- Linear interpolation between measured wear states
+- Process-wide shared registries per manifest path
+"""
+
+import json
+import threading
+import warnings
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from .envelope import EnvelopeModel
+except ImportError:
+    # Fallback for direct execution
+    import sys
+    import os
+    sys.path.append(os.path.dirname(__file__))
+    from envelope import EnvelopeModel
+
+
+class EnvelopeRegistry:
+    """
+    Registry of device envelope models keyed by device model, firmware and wear.
+
+    Each entry points to an envelope JSON file produced by the fio grid sweep
+    (see tools/device_envelope/parse_envelope.py). Models are loaded on first
+    use and kept in a bounded LRU cache. Queries for a wear state between two
+    measured states return an envelope whose bandwidth grid is linearly
+    interpolated between the neighbouring measurements.
+    """
+
+    def __init__(self, entries: Optional[List[Dict]] = None, base_dir: Optional[str] = None,
+                 max_cached: int = 8, backend: str = 'grid', fit_tolerance: float = 0.05):
+        """
+        Initialize the envelope registry.
+
+        Args:
+            entries: List of entry dictionaries with keys
+                - device_model: Device model name (e.g. "Samsung PM9A3")
+                - firmware: Firmware revision string
+                - wear: Wear/aging state (e.g. NVMe percentage_used, 0-100)
+                - path: Path to the envelope JSON file
+            base_dir: Directory used to resolve relative entry paths
+            max_cached: Maximum number of EnvelopeModel instances kept in memory
+            backend: Evaluation backend of the loaded models ('grid' or 'parametric')
+            fit_tolerance: Cell fit tolerance for the parametric backend
+        """
+        if max_cached <= 0:
+            raise ValueError(f"max_cached must be positive, got {max_cached}")
+
+        self.base_dir = Path(base_dir) if base_dir else Path('.')
+        self.max_cached = max_cached
+        self.backend = backend
+        self.fit_tolerance = fit_tolerance
+        self.entries = []
+
+        self._cache = OrderedDict()
+        self._lock = threading.RLock()
+        self._stats = {'hits': 0, 'misses': 0, 'loads': 0, 'interpolations': 0}
+
+        for entry in entries or []:
+            self.register(**entry)
+
+    @classmethod
+    def from_manifest(cls, manifest_path: str, max_cached: int = 8, backend: str = 'grid',
+                      fit_tolerance: float = 0.05) -> "EnvelopeRegistry":
+        """
+        Load a registry from a JSON manifest.
+
+        Args:
+            manifest_path: Path to manifest JSON file ({"envelopes": [...]})
+            max_cached: Maximum number of cached EnvelopeModel instances
+            backend: Evaluation backend of the loaded models
+            fit_tolerance: Cell fit tolerance for the parametric backend
+
+        Returns:
+            EnvelopeRegistry instance
+        """
+        manifest_path = Path(manifest_path)
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+        return cls(manifest.get('envelopes', []), base_dir=str(manifest_path.parent),
+                   max_cached=max_cached, backend=backend, fit_tolerance=fit_tolerance)
+
+    def save_manifest(self, manifest_path: str):
+        """
+        Save the registry entries to a JSON manifest.
+
+        Args:
+            manifest_path: Output manifest JSON file path
+        """
+        with open(manifest_path, 'w') as f:
+            json.dump({'envelopes': self.entries}, f, indent=2)
+
+    def register(self, device_model: str, firmware: str, wear: float, path: str):
+        """
+        Register an envelope JSON file for a device model, firmware and wear state.
+
+        Args:
+            device_model: Device model name
+            firmware: Firmware revision string
+            wear: Wear/aging state of the measured device
+            path: Path to the envelope JSON file
+        """
+        entry = {
+            'device_model': device_model,
+            'firmware': firmware,
+            'wear': float(wear),
+            'path': str(path)
+        }
+        with self._lock:
+            # Replace an existing measurement of the same state
+            self.entries = [e for e in self.entries if self._entry_key(e) != self._entry_key(entry)]
+            self.entries.append(entry)
+            # Interpolated models of the device may bracket the new wear state,
+            # so drop every cached model of the device, not only this key
+            for key in [k for k in self._cache if k[:2] == (device_model, firmware)]:
+                del self._cache[key]
+
+    def get(self, device_model: str, firmware: Optional[str] = None,
+            wear: Optional[float] = None) -> EnvelopeModel:
+        """
+        Get the envelope model for a device.
+
+        Args:
+            device_model: Device model name
+            firmware: Firmware revision (optional if the model has a single firmware)
+            wear: Wear/aging state (optional, defaults to the least worn measurement)
+
+        Returns:
+            EnvelopeModel instance (shared; do not mutate)
+
+        Raises:
+            KeyError: If no envelope is registered for the device
+            ValueError: If the firmware is ambiguous or the grids are incompatible
+        """
+        candidates = self._candidates(device_model, firmware)
+        firmware = candidates[0]['firmware']
+
+        if wear is None:
+            return self._load_entry(candidates[0])
+
+        wear = float(wear)
+        key = (device_model, firmware, wear)
+
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self._stats['hits'] += 1
+                return self._cache[key]
+
+        lower, upper = self._bracket(candidates, wear)
+        if upper is None:
+            return self._load_entry(lower)
+
+        model = self._interpolate(self._load_entry(lower), self._load_entry(upper),
+                                  lower['wear'], upper['wear'], wear)
+        model.metadata = dict(model.metadata)
+        model.metadata.update({
+            'device_model': device_model,
+            'firmware': firmware,
+            'wear': wear,
+            'interpolated_from': [lower['path'], upper['path']]
+        })
+
+        with self._lock:
+            self._stats['interpolations'] += 1
+            self._store(key, model)
+        return model
+
+    def list_devices(self) -> List[Tuple[str, str, float]]:
+        """List registered (device_model, firmware, wear) keys."""
+        return sorted(self._entry_key(e) for e in self.entries)
+
+    def cache_info(self) -> Dict:
+        """Get cache statistics (hits, misses, loads, interpolations, size)."""
+        with self._lock:
+            info = dict(self._stats)
+            info['size'] = len(self._cache)
+            info['max_cached'] = self.max_cached
+        return info
+
+    def clear_cache(self):
+        """Drop all cached EnvelopeModel instances."""
+        with self._lock:
+            self._cache.clear()
+
+    @staticmethod
+    def _entry_key(entry: Dict) -> Tuple[str, str, float]:
+        """Build the cache key of a registry entry."""
+        return (entry['device_model'], entry['firmware'], float(entry['wear']))
+
+    def _candidates(self, device_model: str, firmware: Optional[str]) -> List[Dict]:
+        """Get the entries of a device sorted by wear."""
+        candidates = [e for e in self.entries
+                      if e['device_model'] == device_model
+                      and (firmware is None or e['firmware'] == firmware)]
+        if not candidates:
+            raise KeyError(f"No envelope registered for device_model={device_model!r}, "
+                           f"firmware={firmware!r}")
+
+        firmwares = {e['firmware'] for e in candidates}
+        if len(firmwares) > 1:
+            raise ValueError(f"Firmware must be given for {device_model!r}, "
+                             f"registered firmwares: {sorted(firmwares)}")
+
+        return sorted(candidates, key=lambda e: e['wear'])
+
+    def _bracket(self, candidates: List[Dict], wear: float) -> Tuple[Dict, Optional[Dict]]:
+        """
+        Find the measured wear states around a query wear.
+
+        Returns:
+            (lower, upper) entries; upper is None when no interpolation is needed
+        """
+        wears = [e['wear'] for e in candidates]
+
+        if wear <= wears[0] or wear >= wears[-1]:
+            nearest = candidates[0] if wear <= wears[0] else candidates[-1]
+            if wear != nearest['wear']:
+                warnings.warn(
+                    f"Wear state {wear} is outside the measured range "
+                    f"[{wears[0]}, {wears[-1]}] for {nearest['device_model']!r}; "
+                    f"using the nearest measurement (wear={nearest['wear']})",
+                    UserWarning
+                )
+            return nearest, None
+
+        idx = int(np.searchsorted(wears, wear))
+        if wears[idx] == wear:
+            return candidates[idx], None
+        return candidates[idx - 1], candidates[idx]
+
+    def _load_entry(self, entry: Dict) -> EnvelopeModel:
+        """Load (or fetch from cache) the envelope model of an entry."""
+        key = self._entry_key(entry)
+
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self._stats['hits'] += 1
+                return self._cache[key]
+            self._stats['misses'] += 1
+
+        path = Path(entry['path'])
+        if not path.is_absolute():
+            path = self.base_dir / path
+        model = EnvelopeModel.from_json_path(str(path), backend=self.backend,
+                                             fit_tolerance=self.fit_tolerance)
+
+        with self._lock:
+            self._stats['loads'] += 1
+            self._store(key, model)
+        return model
+
+    def _store(self, key: Tuple, model: EnvelopeModel):
+        """Insert a model into the LRU cache, evicting the oldest entries."""
+        self._cache[key] = model
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_cached:
+            self._cache.popitem(last=False)
+
+    def _interpolate(self, lower: EnvelopeModel, upper: EnvelopeModel,
+                     lower_wear: float, upper_wear: float, wear: float) -> EnvelopeModel:
+        """Blend two envelope grids measured at different wear states."""
+        for axis in ('rho_r_axis', 'iodepth_axis', 'numjobs_axis', 'bs_axis'):
+            if not np.array_equal(getattr(lower, axis), getattr(upper, axis)):
+                raise ValueError(f"Cannot interpolate envelopes with different {axis}")
+
+        weight = (wear - lower_wear) / (upper_wear - lower_wear)
+        bandwidth_grid = (1.0 - weight) * lower.bandwidth_grid + weight * upper.bandwidth_grid
+
+        grid_data = {
+            'rho_r_axis': lower.rho_r_axis,
+            'iodepth_axis': lower.iodepth_axis,
+            'numjobs_axis': lower.numjobs_axis,
+            'bs_axis': lower.bs_axis,
+            'bandwidth_grid': bandwidth_grid,
+            'metadata': lower.metadata
+        }
+        return EnvelopeModel(grid_data, backend=self.backend, fit_tolerance=self.fit_tolerance)
+
+
+_shared_registries = {}
+_shared_lock = threading.Lock()
+
+
+def get_registry(manifest_path: str, max_cached: int = 8, backend: str = 'grid',
+                 fit_tolerance: float = 0.05) -> EnvelopeRegistry:
+    """
+    Get the process-wide registry for a manifest.
+
+    Every caller that passes the same manifest path, backend and fit tolerance
+    shares one registry (and therefore one cache), so a fleet-wide forecast
+    loads each grid once. Callers asking for a different backend or tolerance
+    get their own registry, since the cached models are built with them.
+
+    Args:
+        manifest_path: Path to manifest JSON file
+        max_cached: Maximum number of cached models (used on first creation)
+        backend: Evaluation backend of the loaded models
+        fit_tolerance: Cell fit tolerance for the parametric backend
+
+    Returns:
+        Shared EnvelopeRegistry instance
+    """
+    key = (str(Path(manifest_path).resolve()), backend, float(fit_tolerance))
+    with _shared_lock:
+        if key not in _shared_registries:
+            _shared_registries[key] = EnvelopeRegistry.from_manifest(
+                manifest_path, max_cached=max_cached, backend=backend,
+                fit_tolerance=fit_tolerance)
+        return _shared_registries[key]
+
+
+def main():
+    """Command-line listing and lookup of registered envelopes."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Device envelope registry')
+    parser.add_argument('manifest', help='Path to envelope registry manifest JSON')
+    parser.add_argument('--device-model', help='Device model to look up')
+    parser.add_argument('--firmware', help='Firmware revision')
+    parser.add_argument('--wear', type=float, help='Wear/aging state')
+
+    args = parser.parse_args()
+
+    registry = EnvelopeRegistry.from_manifest(args.manifest)
+
+    print("Registered envelopes:")
+    for device_model, firmware, wear in registry.list_devices():
+        print(f"  {device_model} (fw {firmware}): wear={wear}")
+
+    if args.device_model:
+        model = registry.get(args.device_model, args.firmware, args.wear)
+        info = model.get_grid_info()
+        print(f"\nEnvelope for {args.device_model} (wear={args.wear}):")
+        for key, value in info.items():
+            print(f"  {key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""
+PutModel v4: Incremental Figure Build
+
+This module implements a small build layer for the report figures. Each
+figure declares its output file, the data files it reads and the function
+that renders it; a manifest next to the outputs records a content hash of
+every input and of the renderer code, so a rebuild only renders figures
+whose inputs or code changed. Stale figures render in a process pool on
+the non-interactive Agg backend.
+
+Key Features:
+- Figure declarations: output, inputs (files/directories) and renderer
+- Build key from input content hashes (size/mtime memo, like log_cache)
+  and the bytecode of the renderer and the module functions it calls
+- Manifest (.figure_build.json) per output directory
+- Parallel rendering of stale figures (Agg backend in every worker)
+- Failed figures are reported and rebuilt on the next run
+"""
+
+import hashlib
+import json
+import os
+import time
+import types
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+# Bump when the build key changes meaning
+BUILD_FORMAT = 1
+
+MANIFEST_NAME = '.figure_build.json'
+
+_HASH_BLOCK_BYTES = 8 * 1024 * 1024
+
+
+class Figure(NamedTuple):
+    """One figure of a report: render() writes output from the inputs."""
+    output: str
+    render: Callable[[], None]
+    inputs: Tuple[str, ...] = ()
+    label: str = ''
+
+
+def _use_agg():
+    """Switch matplotlib to the non-interactive Agg backend."""
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def code_hash(func: Callable) -> str:
+    """
+    Hash the code of a renderer and of the module functions it calls.
+
+    Bytecode, constants and referenced names are hashed, so formatting and
+    comment edits do not trigger a rebuild but any change to what the
+    renderer (or a helper in the same module, e.g. a data loader) does does.
+
+    Args:
+        func: Module-level rendering function
+
+    Returns:
+        Hex digest
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    module_globals = getattr(func, '__globals__', {})
+    seen = set()
+    pending = [func]
+    while pending:
+        current = pending.pop()
+        code = getattr(current, '__code__', None)
+        if code is None or code in seen:
+            continue
+        seen.add(code)
+        digest.update(current.__qualname__.encode())
+        for name in _update_code(digest, code):
+            target = module_globals.get(name)
+            if isinstance(target, types.FunctionType) and target.__module__ == func.__module__:
+                pending.append(target)
+    return digest.hexdigest()
+
+
+def _update_code(digest, code: types.CodeType) -> List[str]:
+    """Feed a code object (and nested ones) into a digest; return the global names it uses."""
+    names = list(code.co_names)
+    digest.update(code.co_code)
+    digest.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names.extend(_update_code(digest, const))
+        else:
+            digest.update(repr(const).encode())
+    return names
+
+
+class FigureBuilder:
+    """
+    Incremental builder of a set of figures.
+
+    A figure is stale when its output is missing, it has no manifest entry,
+    or its build key (inputs + renderer code) differs from the recorded one.
+    """
+
+    def __init__(self, figures: Sequence[Figure], manifest: Optional[str] = None):
+        """
+        Initialize the builder.
+
+        Args:
+            figures: Figure declarations (outputs must be unique)
+            manifest: Manifest path (default: .figure_build.json in the
+                directory of the first output)
+        """
+        outputs = [f.output for f in figures]
+        if len(set(outputs)) != len(outputs):
+            raise ValueError("Figure outputs must be unique")
+        self.figures = list(figures)
+        if manifest is None:
+            first = Path(outputs[0]).parent if outputs else Path('.')
+            manifest = first / MANIFEST_NAME
+        self.manifest_path = Path(manifest)
+        self._manifest = self._read_manifest()
+
+    def _read_manifest(self) -> Dict:
+        try:
+            with open(self.manifest_path, 'r') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {'files': {}, 'figures': {}}
+        manifest.setdefault('files', {})
+        manifest.setdefault('figures', {})
+        return manifest
+
+    def _write_manifest(self):
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        temp = self.manifest_path.with_suffix('.tmp')
+        with open(temp, 'w') as f:
+            json.dump(self._manifest, f, indent=1, sort_keys=True)
+        os.replace(temp, self.manifest_path)
+
+    def _file_hash(self, path: Path) -> str:
+        """Content hash of a file, memoized by size/mtime in the manifest."""
+        stat = path.stat()
+        signature = [stat.st_size, stat.st_mtime_ns]
+        memo = self._manifest['files'].get(str(path))
+        if memo and memo['signature'] == signature:
+            return memo['hash']
+        digest = hashlib.blake2b(digest_size=20)
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(_HASH_BLOCK_BYTES), b''):
+                digest.update(block)
+        self._manifest['files'][str(path)] = {'signature': signature, 'hash': digest.hexdigest()}
+        return digest.hexdigest()
+
+    def _input_paths(self, inputs: Iterable[str]) -> List[Path]:
+        """Expand directory inputs to the files below them (sorted)."""
+        paths = []
+        for name in inputs:
+            path = Path(name)
+            if path.is_dir():
+                paths.extend(sorted(p for p in path.rglob('*') if p.is_file()))
+            else:
+                paths.append(path)
+        return paths
+
+    def key(self, figure: Figure) -> str:
+        """
+        Compute the build key of a figure.
+
+        Missing inputs hash as missing, so a figure rebuilds once they appear.
+
+        Args:
+            figure: Figure declaration
+
+        Returns:
+            Hex digest
+        """
+        digest = hashlib.blake2b(f'format={BUILD_FORMAT}'.encode(), digest_size=20)
+        digest.update(code_hash(figure.render).encode())
+        for path in self._input_paths(figure.inputs):
+            digest.update(str(path).encode())
+            digest.update(self._file_hash(path).encode() if path.exists() else b'missing')
+        return digest.hexdigest()
+
+    def stale(self, force: bool = False) -> List[Tuple[Figure, str]]:
+        """
+        Figures that need rendering, with their build keys.
+
+        Args:
+            force: Treat every figure as stale
+
+        Returns:
+            List of (figure, key)
+        """
+        result = []
+        for figure in self.figures:
+            key = self.key(figure)
+            recorded = self._manifest['figures'].get(figure.output)
+            if force or recorded != key or not Path(figure.output).exists():
+                result.append((figure, key))
+        return result
+
+    def build(self, jobs: int = 0, force: bool = False,
+              progress: Optional[Callable[[Figure, Optional[BaseException]], None]] = None) -> Dict[str, List[str]]:
+        """
+        Render the stale figures.
+
+        Args:
+            jobs: Worker processes (0 = CPU count, 1 = render in this process)
+            force: Render every figure
+            progress: Called with (figure, error) as each figure finishes
+
+        Returns:
+            Dictionary with 'rendered', 'skipped' and 'failed' output lists
+        """
+        todo = self.stale(force)
+        todo_outputs = {figure.output for figure, _ in todo}
+        result = {'rendered': [], 'skipped': [f.output for f in self.figures if f.output not in todo_outputs],
+                  'failed': []}
+        for figure, _ in todo:
+            Path(figure.output).parent.mkdir(parents=True, exist_ok=True)
+
+        def finished(figure: Figure, key: str, error: Optional[BaseException]):
+            if error is None:
+                self._manifest['figures'][figure.output] = key
+                result['rendered'].append(figure.output)
+            else:
+                self._manifest['figures'].pop(figure.output, None)
+                result['failed'].append(figure.output)
+            if progress is not None:
+                progress(figure, error)
+
+        jobs = jobs or os.cpu_count() or 1
+        if jobs == 1 or len(todo) <= 1:
+            _use_agg()
+            for figure, key in todo:
+                finished(figure, key, _render(figure.render))
+        else:
+            with ProcessPoolExecutor(max_workers=min(jobs, len(todo)), initializer=_use_agg) as pool:
+                futures = {pool.submit(_render, figure.render): (figure, key) for figure, key in todo}
+                for future in as_completed(futures):
+                    figure, key = futures[future]
+                    try:
+                        error = future.result()
+                    except Exception as exc:        # Worker died or renderer not picklable
+                        error = exc
+                    finished(figure, key, error)
+
+        self._write_manifest()
+        return result
+
+
+def _render(render: Callable[[], None]) -> Optional[BaseException]:
+    """Run one renderer; return its exception instead of raising."""
+    import matplotlib.pyplot as plt
+    try:
+        render()
+        return None
+    except Exception as exc:
+        return exc
+    finally:
+        plt.close('all')
+
+
+def run_build(figures: Sequence[Figure], jobs: int = 0, force: bool = False,
+              manifest: Optional[str] = None) -> Dict[str, List[str]]:
+    """
+    Build figures and print one line per figure (the generate_*_figures front end).
+
+    Args:
+        figures: Figure declarations
+        jobs: Worker processes (0 = CPU count)
+        force: Render every figure
+        manifest: Manifest path (see FigureBuilder)
+
+    Returns:
+        Result of FigureBuilder.build
+    """
+    start = time.time()
+
+    def progress(figure: Figure, error: Optional[BaseException]):
+        name = figure.label or Path(figure.output).name
+        if error is None:
+            print(f"✓ {name} generated")
+        else:
+            print(f"❌ {name} failed: {error!r}")
+
+    result = FigureBuilder(figures, manifest).build(jobs=jobs, force=force, progress=progress)
+    print(f"{len(result['rendered'])} rendered, {len(result['skipped'])} up to date, "
+          f"{len(result['failed'])} failed ({time.time() - start:.1f}s)")
+    return result
+
+
+def add_build_arguments(parser):
+    """Add the --jobs/--force options of run_build to an argparse parser."""
+    parser.add_argument('--jobs', type=int, default=0, help='Worker processes (0 = CPU count)')
+    parser.add_argument('--force', action='store_true', help='Render every figure, even if up to date')
+    return parser
@@ -0,0 +1,240 @@
+"""
+PutModel v4: Database Growth Projection
+
+This module projects how the steady-state S_max of a leveled LSM tree
+drops as the database grows and new levels are created. Level targets
+follow max_bytes_for_level_base * multiplier^(n-1); each additional level
+raises WA by 1 + T/(T-1) (see model/smax.py). Many databases are
+projected at once for fleet planning.
+
+Key Features:
+- LSM depth from on-disk size, level base and multiplier
+- Timeline of depth transitions under a constant ingest rate
+- S_max (and binding constraint) per depth from the broadcast bounds
+- Time and date at which a target put rate stops being sustainable
+- Vectorized over database sizes, ingest rates and level settings
+"""
+
+import argparse
+import numpy as np
+from typing import Dict, Optional, Union
+
+try:
+    from .smax import ArrayLike, smax_bounds, binding_names
+except ImportError:
+    # Fallback for direct execution
+    import sys
+    import os
+    sys.path.append(os.path.dirname(__file__))
+    from smax import ArrayLike, smax_bounds, binding_names
+
+GIB = 1024 ** 3
+MIB = 1024 ** 2
+SECONDS_PER_DAY = 86400
+
+
+def level_capacity(depth: ArrayLike, level_base: ArrayLike, multiplier: ArrayLike) -> np.ndarray:
+    """
+    On-disk bytes held by L1..L{depth} at their targets.
+
+    Args:
+        depth: Number of levels below L0
+        level_base: max_bytes_for_level_base (bytes)
+        multiplier: max_bytes_for_level_multiplier (> 1)
+
+    Returns:
+        Cumulative level target in bytes (broadcast)
+    """
+    depth = np.asarray(depth, dtype=np.float64)
+    multiplier = np.asarray(multiplier, dtype=np.float64)
+    return np.asarray(level_base, dtype=np.float64) * (multiplier ** depth - 1.0) / (multiplier - 1.0)
+
+
+def depth_for_size(size: ArrayLike, level_base: ArrayLike, multiplier: ArrayLike) -> np.ndarray:
+    """
+    Number of levels below L0 needed to hold an on-disk size.
+
+    A new level is created once the levels above it are full, so the depth
+    is the smallest n >= 1 with level_capacity(n) >= size.
+
+    Args:
+        size: On-disk database size (bytes)
+        level_base: max_bytes_for_level_base (bytes)
+        multiplier: max_bytes_for_level_multiplier (> 1)
+
+    Returns:
+        Integer depth array (broadcast)
+    """
+    size = np.asarray(size, dtype=np.float64)
+    multiplier = np.asarray(multiplier, dtype=np.float64)
+    if np.any(multiplier <= 1.0):
+        raise ValueError("Level multiplier must be greater than 1")
+    n = np.ceil(np.log(size * (multiplier - 1.0) / np.asarray(level_base, dtype=np.float64) + 1.0)
+                / np.log(multiplier) - 1e-12)
+    return np.maximum(n, 1).astype(np.int64)
+
+
+def project_growth(initial_size: ArrayLike, ingest_rate: ArrayLike, *,
+                   level_base: ArrayLike, multiplier: ArrayLike, CR: ArrayLike,
+                   target_rate: ArrayLike, B_w: ArrayLike, B_r: ArrayLike,
+                   B_eff: Optional[ArrayLike] = None, eta: ArrayLike = 1.0,
+                   wal_factor: ArrayLike = 0.0, max_depth: int = 8,
+                   start: Optional[Union[str, np.datetime64]] = None) -> Dict[str, np.ndarray]:
+    """
+    Project depth transitions and S_max for growing databases.
+
+    The on-disk size grows linearly: size(t) = initial_size + CR *
+    ingest_rate * t. All database arguments broadcast to a common shape
+    (the database axis); results add a trailing depth axis 1..max_depth.
+
+    Args:
+        initial_size: Current on-disk size (bytes)
+        ingest_rate: User bytes ingested per day (after overwrites/deletes)
+        level_base: max_bytes_for_level_base (bytes)
+        multiplier: max_bytes_for_level_multiplier (also the size ratio T)
+        CR: Compression ratio (on-disk/user)
+        target_rate: Put rate that must stay sustainable (MiB/s user)
+        B_w: Write bandwidth (MiB/s)
+        B_r: Read bandwidth (MiB/s)
+        B_eff: Mixed bandwidth (MiB/s), optional
+        eta: Read weight of the mixed bound
+        wal_factor: WAL bytes per user byte
+        max_depth: Deepest level projected
+        start: Start date; adds datetime64 columns when given
+
+    Returns:
+        Dictionary with per-depth arrays (..., max_depth) 'depth',
+        'enter_days' (days until the depth is reached; 0 if already there,
+        inf if never), 's_max', 'drop_pct' (S_max loss on entering the
+        depth), 'binding', and per-database arrays 'current_depth',
+        'current_s_max', 'unsustainable_depth' (0: never within max_depth),
+        'unsustainable_days' (inf: never); with start also 'enter_date'
+        and 'unsustainable_date' (NaT: never)
+    """
+    if max_depth < 1:
+        raise ValueError("max_depth must be at least 1")
+    initial_size, ingest_rate, level_base, multiplier, CR, target_rate = np.broadcast_arrays(
+        *[np.asarray(v, dtype=np.float64)
+          for v in (initial_size, ingest_rate, level_base, multiplier, CR, target_rate)])
+
+    depth = np.arange(1, max_depth + 1)
+    db = (Ellipsis, None)                                     # database axis -> (..., 1)
+    growth = (CR * ingest_rate)[db]                           # on-disk bytes per day
+
+    # Depth d is entered when levels 1..d-1 are full
+    entry_size = level_capacity(depth - 1, level_base[db], multiplier[db])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        enter_days = np.where(growth > 0, (entry_size - initial_size[db]) / growth, np.inf)
+    current_depth = depth_for_size(initial_size, level_base, multiplier)
+    enter_days = np.where(depth <= current_depth[db], 0.0, enter_days)
+
+    bounds = smax_bounds(CR[db], T=multiplier[db], depth=depth, B_w=B_w, B_r=B_r,
+                         B_eff=B_eff, eta=eta, wal_factor=wal_factor)
+    s_max = np.broadcast_to(bounds['s_max'], enter_days.shape)
+    previous = np.concatenate([np.full(s_max.shape[:-1] + (1,), np.nan), s_max[..., :-1]], axis=-1)
+    drop_pct = (previous - s_max) / previous * 100.0
+
+    # First reachable depth at or beyond the current one that cannot carry the target
+    short = (s_max < target_rate[db]) & (depth >= current_depth[db]) & np.isfinite(enter_days)
+    first = np.argmax(short, axis=-1)
+    never = ~short.any(axis=-1)
+    unsustainable_depth = np.where(never, 0, depth[first])
+    unsustainable_days = np.where(never, np.inf,
+                                  np.take_along_axis(enter_days, first[db], axis=-1)[..., 0])
+    current_s_max = np.take_along_axis(
+        s_max, np.minimum(current_depth, max_depth)[db] - 1, axis=-1)[..., 0]
+
+    result = {
+        'depth': np.broadcast_to(depth, enter_days.shape),
+        'enter_days': enter_days,
+        's_max': s_max,
+        'drop_pct': drop_pct,
+        'binding': np.broadcast_to(bounds['binding'], enter_days.shape),
+        'current_depth': current_depth,
+        'current_s_max': current_s_max,
+        'unsustainable_depth': unsustainable_depth,
+        'unsustainable_days': unsustainable_days,
+    }
+    if start is not None:
+        result['enter_date'] = _days_to_dates(start, enter_days)
+        result['unsustainable_date'] = _days_to_dates(start, unsustainable_days)
+    return result
+
+
+def _days_to_dates(start: Union[str, np.datetime64], days: np.ndarray) -> np.ndarray:
+    """Offset a start date by fractional days (NaT where days is inf)."""
+    finite = np.isfinite(days)
+    offset = np.where(finite, days * SECONDS_PER_DAY, 0).astype('timedelta64[s]')
+    dates = np.datetime64(start, 's') + offset
+    return np.where(finite, dates, np.datetime64('NaT'))
+
+
+def main():
+    """Command-line interface for growth projection."""
+    parser = argparse.ArgumentParser(description='Project S_max as the LSM tree deepens')
+    parser.add_argument('--initial_gb', required=True,
+                        help='Current on-disk sizes in GiB (comma-separated, one per database)')
+    parser.add_argument('--ingest_gb_per_day', required=True,
+                        help='User GiB ingested per day (single value or one per database)')
+    parser.add_argument('--level_base_mb', type=float, default=256.0, help='max_bytes_for_level_base (MiB)')
+    parser.add_argument('--multiplier', type=float, default=10.0, help='max_bytes_for_level_multiplier')
+    parser.add_argument('--cr', type=float, default=0.5, help='Compression ratio (on-disk/user)')
+    parser.add_argument('--target', type=float, required=True, help='Target put rate (MiB/s)')
+    parser.add_argument('--bw', type=float, default=1000.0, help='Write bandwidth (MiB/s)')
+    parser.add_argument('--br', type=float, default=2000.0, help='Read bandwidth (MiB/s)')
+    parser.add_argument('--beff', type=float, default=2500.0, help='Mixed bandwidth (MiB/s)')
+    parser.add_argument('--eta', type=float, default=1.0, help='Read weight of the mixed bound')
+    parser.add_argument('--wal_factor', type=float, default=1.0, help='WAL factor')
+    parser.add_argument('--max_depth', type=int, default=8, help='Deepest level projected')
+    parser.add_argument('--start', help='Start date (YYYY-MM-DD) for calendar dates')
+    parser.add_argument('--output', help='Output CSV file (one row per database and depth)')
+
+    args = parser.parse_args()
+
+    sizes, rates = np.broadcast_arrays(np.array([float(v) for v in args.initial_gb.split(',')]) * GIB,
+                                       np.array([float(v) for v in args.ingest_gb_per_day.split(',')]) * GIB)
+    projection = project_growth(sizes, rates, level_base=args.level_base_mb * MIB,
+                                multiplier=args.multiplier, CR=args.cr, target_rate=args.target,
+                                B_w=args.bw, B_r=args.br, B_eff=args.beff, eta=args.eta,
+                                wal_factor=args.wal_factor, max_depth=args.max_depth, start=args.start)
+
+    def when(days, dates, index):
+        label = f"day {days[index]:.1f}"
+        return label if dates is None else f"{str(dates[index])[:10]} ({label})"
+
+    n_db = len(sizes)
+    for i in range(min(n_db, 10)):
+        current = projection['current_depth'][i]
+        print(f"DB {i}: {sizes[i] / GIB:.1f} GiB, depth {current}, "
+              f"S_max {projection['current_s_max'][i]:.1f} MiB/s")
+        enter_days, enter_dates = projection['enter_days'][i], projection.get('enter_date')
+        for d in range(current, args.max_depth):
+            if not np.isfinite(enter_days[d]):
+                break
+            print(f"  L{d + 1}: {when(enter_days, None if enter_dates is None else enter_dates[i], d):>24}  "
+                  f"S_max {projection['s_max'][i, d]:7.1f} MiB/s  (-{projection['drop_pct'][i, d]:.1f}%)")
+        if projection['unsustainable_depth'][i]:
+            dates = projection.get('unsustainable_date')
+            print(f"  ⚠️  {args.target:.0f} MiB/s unsustainable from "
+                  f"{when(projection['unsustainable_days'], dates, i)} (L{projection['unsustainable_depth'][i]})")
+        else:
+            print(f"  ✅ {args.target:.0f} MiB/s sustainable (projected through L{args.max_depth})")
+
+    if args.output:
+        import pandas as pd
+        rows = {
+            'db': np.repeat(np.arange(n_db), args.max_depth),
+            'depth': projection['depth'].ravel(),
+            'enter_days': projection['enter_days'].ravel(),
+            's_max': projection['s_max'].ravel(),
+            'drop_pct': projection['drop_pct'].ravel(),
+            'binding': binding_names(projection['binding']).ravel(),
+        }
+        if 'enter_date' in projection:
+            rows['enter_date'] = projection['enter_date'].ravel()
+        pd.DataFrame(rows).to_csv(args.output, index=False)
+        print(f"Saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+PutModel v4: Per-Level Flow Tables
+
+This module computes the steady-state read/write flow of every LSM level
+for a given put rate, generalizing the uniform-CR, single-multiplier
+tables of per_level_breakdown.py. Compression and size ratio are given
+per level, and the level layout can follow
+level_compaction_dynamic_level_bytes, where levels above the base level
+stay empty and L0 compacts straight into the base level.
+
+Key Features:
+- Per-level compression ratios (e.g. none/lz4 at the top, zstd at the bottom)
+- Per-level multipliers (max_bytes_for_level_multiplier[_additional])
+- Static and dynamic-level-bytes target layouts
+- Flow matrix for many put rates at once (rates x levels)
+- Per-level share of B_r / B_w and totals per user byte
+"""
+
+import numpy as np
+from typing import Dict, List, Optional, Sequence
+
+try:
+    from .smax import ArrayLike
+except ImportError:
+    # Fallback for direct execution
+    import sys
+    import os
+    sys.path.append(os.path.dirname(__file__))
+    from smax import ArrayLike
+
+
+def _per_level(values: ArrayLike, num_levels: int, name: str) -> np.ndarray:
+    """Broadcast a scalar or per-level sequence to num_levels entries."""
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 0:
+        return np.full(num_levels, float(values))
+    if values.shape[-1] != num_levels:
+        raise ValueError(f"{name} needs {num_levels} per-level values, got {values.shape[-1]}")
+    return values
+
+
+def level_targets(num_levels: int, level_base: float, multiplier: ArrayLike,
+                  db_size: Optional[ArrayLike] = None, dynamic: bool = False) -> Dict[str, np.ndarray]:
+    """
+    Target size and occupancy of L1..L{num_levels}.
+
+    Static layout: L1 = level_base, L(i+1) = Li * multiplier_i; levels below
+    the one that holds db_size are empty. Dynamic layout: the last level
+    holds the data and targets are derived upward from it, dividing by the
+    multiplier until the level fits in level_base (the base level); levels
+    above the base level are empty.
+
+    Args:
+        num_levels: Number of levels below L0
+        level_base: max_bytes_for_level_base (bytes)
+        multiplier: Scalar or per-level size ratio; entry i is the ratio of
+            L(i+1) to Li (the last entry is unused)
+        db_size: On-disk database size (bytes, broadcast); None means all
+            levels are populated
+        dynamic: Use the level_compaction_dynamic_level_bytes layout
+
+    Returns:
+        Dictionary with 'targets' (..., num_levels) in bytes and 'active'
+        boolean mask (..., num_levels) of levels that receive compactions
+    """
+    multiplier = _per_level(multiplier, num_levels, 'multiplier')
+    if np.any(multiplier[:-1] <= 1.0):
+        raise ValueError("Level multipliers must be greater than 1")
+
+    # Static targets: level_base * prod(multiplier[:i])
+    growth = np.concatenate([[1.0], np.cumprod(multiplier[:-1])])
+    static_targets = level_base * growth
+    if db_size is None:
+        return {'targets': static_targets, 'active': np.ones(num_levels, dtype=bool)}
+
+    db_size = np.asarray(db_size, dtype=np.float64)[..., None]
+    if not dynamic:
+        filled_above = np.concatenate([[0.0], np.cumsum(static_targets)[:-1]])
+        active = filled_above < np.maximum(db_size, 1.0)
+        return {'targets': np.broadcast_to(static_targets, active.shape), 'active': active}
+
+    # Dynamic: geometric targets relative to the last level, which holds
+    # db_size / (1 + 1/m_n-1 + 1/(m_n-1 m_n-2) + ...)
+    relative = growth / growth[-1]
+    last = db_size[..., 0] / relative.sum()
+    targets = last[..., None] * relative
+    # Base level: the deepest level whose target fits in level_base
+    # (RocksDB walks up from the last level while the size exceeds it)
+    fits = targets <= level_base
+    base = np.where(fits.any(axis=-1), num_levels - 1 - np.argmax(fits[..., ::-1], axis=-1), 0)
+    active = np.arange(num_levels) >= base[..., None]
+    return {'targets': np.where(active, targets, 0.0), 'active': active}
+
+
+def level_flows(S: ArrayLike, CR: ArrayLike, multiplier: ArrayLike, *,
+                l0_ratio: Optional[float] = None,
+                wal_factor: float = 0.0, active: Optional[np.ndarray] = None,
+                B_r: Optional[float] = None, B_w: Optional[float] = None,
+                num_levels: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    Per-level read/write flow for one or many put rates.
+
+    Compaction into level i reads its input from the level above (at that
+    level's CR) plus alpha_i of overlapping data at CR_i, and writes both:
+
+        R_i = S (CR_src + alpha_i CR_i),  W_i = S CR_i (1 + alpha_i),
+        alpha_i = T_i / (T_i - 1),  T_i = |Li| / |L(i-1)|
+
+    The multiplier vector has the level_targets convention (entry i is
+    |L(i+1)| / |Li|, the last entry is unused), so T_i is entry i-1 of it;
+    compactions out of L0 (into L1, or into the base level with dynamic
+    level bytes) use l0_ratio. L0 writes S CR_0 (flush) and the WAL writes
+    S wal_factor. Inactive levels carry nothing; the next active level
+    reads from the last active level above it (L0 for the base level).
+
+    Args:
+        S: Put rates (MiB/s user), any shape
+        CR: Per-level compression ratios for L0..Ln (length n + 1) or a scalar
+        multiplier: Size ratio per level L1..Ln (length n) or a scalar;
+            entry i is |L(i+1)| / |Li| as in level_targets
+        l0_ratio: Size ratio of the level L0 compacts into to L0
+            (default: the first multiplier)
+        wal_factor: WAL bytes per user byte
+        active: Boolean mask (..., n) of populated levels (see level_targets)
+        B_r: Read bandwidth for the share columns (MiB/s)
+        B_w: Write bandwidth for the share columns (MiB/s)
+        num_levels: Number of levels below L0 when CR and multiplier are scalars
+
+    Returns:
+        Dictionary with 'labels' (L0 (flush), L1..Ln, WAL), 'read' and
+        'write' flow matrices (S.shape + active batch shape + rows), their
+        totals, per-user-byte totals 'w_req'/'r_req', and 'read_share' /
+        'write_share' (fraction of B_r / B_w) when bandwidths are given
+    """
+    if num_levels is None:
+        if np.ndim(CR):
+            num_levels = np.shape(CR)[-1] - 1
+        elif np.ndim(multiplier):
+            num_levels = np.shape(multiplier)[-1]
+        elif active is not None:
+            num_levels = np.shape(active)[-1]
+        else:
+            raise ValueError("num_levels is required when CR and multiplier are scalars")
+
+    CR = _per_level(CR, num_levels + 1, 'CR')
+    multiplier = _per_level(multiplier, num_levels, 'multiplier')
+    if l0_ratio is None:
+        l0_ratio = multiplier[0]
+    if np.any(multiplier[:-1] <= 1.0) or l0_ratio <= 1.0:
+        raise ValueError("Level multipliers must be greater than 1")
+    if active is None:
+        active = np.ones(num_levels, dtype=bool)
+    active = np.asarray(active, dtype=bool)
+
+    # CR of the level each compaction reads its input from: the last
+    # active level above it, or L0
+    level_index = np.arange(1, num_levels + 1)
+    source = np.maximum.accumulate(np.where(active, level_index, 0), axis=-1)
+    source = np.concatenate([np.zeros(active.shape[:-1] + (1,), dtype=int), source[..., :-1]], axis=-1)
+    cr_source = CR[source]
+
+    # Size ratio of each level to the level above it: |Li| / |L(i-1)| is
+    # multiplier entry i-1 (0-based i-2); levels fed by L0 use l0_ratio
+    T = np.where(source > 0, multiplier[np.maximum(level_index - 2, 0)], l0_ratio)
+    alpha = T / (T - 1.0)
+
+    # Per user byte, then scaled by every put rate
+    read_coeff = np.where(active, cr_source + alpha * CR[1:], 0.0)
+    write_coeff = np.where(active, CR[1:] * (1.0 + alpha), 0.0)
+    batch = active.shape[:-1]
+    zero = np.zeros(batch + (1,))
+    read_coeff = np.concatenate([zero, read_coeff, zero], axis=-1)
+    write_coeff = np.concatenate([np.full(batch + (1,), CR[0]), write_coeff,
+                                  np.full(batch + (1,), float(wal_factor))], axis=-1)
+
+    S = np.asarray(S, dtype=np.float64)
+    rate = S.reshape(S.shape + (1,) * (len(batch) + 1))
+    read = rate * read_coeff
+    write = rate * write_coeff
+
+    result = {
+        'labels': ['L0 (flush)'] + [f"L{i}" for i in level_index] + ['WAL'],
+        'read': read,
+        'write': write,
+        'total_read': read.sum(axis=-1),
+        'total_write': write.sum(axis=-1),
+        'r_req': read_coeff.sum(axis=-1),
+        'w_req': write_coeff.sum(axis=-1),
+    }
+    if B_r is not None:
+        result['read_share'] = read / B_r if B_r else np.zeros_like(read)
+    if B_w is not None:
+        result['write_share'] = write / B_w if B_w else np.zeros_like(write)
+    return result
+
+
+def format_flow_table(flows: Dict[str, np.ndarray], index: Sequence[int] = ()) -> List[str]:
+    """
+    Format one put rate of a flow result as the per_level_breakdown table.
+
+    Args:
+        flows: Result of level_flows with B_r and B_w
+        index: Index into the leading (rate/batch) axes
+
+    Returns:
+        Table lines
+    """
+    index = tuple(index)
+    read, write = flows['read'][index], flows['write'][index]
+    read_share, write_share = flows['read_share'][index], flows['write_share'][index]
+
+    hdr = "Level                Read(MiB/s)   Write(MiB/s)   %ReadBW  %WriteBW"
+    lines = [hdr, "-" * len(hdr)]
+    for i, label in enumerate(flows['labels']):
+        lines.append(f"{label:16s}  {read[i]:11.2f}   {write[i]:12.2f}   "
+                     f"{100.0 * read_share[i]:6.1f}%   {100.0 * write_share[i]:7.1f}%")
+    lines.append("-" * len(hdr))
+    lines.append(f"TOTAL               {read.sum():11.2f}   {write.sum():12.2f}   "
+                 f"{100.0 * read_share.sum():6.1f}%   {100.0 * write_share.sum():7.1f}%")
+    return lines
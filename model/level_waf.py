@@ -0,0 +1,304 @@
+"""
+PutModel v4: Per-Level Write Amplification and Mass Balance
+
+This module derives per-level write amplification from the per-level
+columns of the Compaction Stats tables (Write, Rn, Rnp1, Moved, Size) and
+checks that bytes are conserved between levels: what is compacted or
+moved out of level N must show up as input of level N+1 (or of the base
+level, for L0 under dynamic level bytes). Every dump of a run is handled
+in one pass over the (dumps, levels) arrays of CompactionStatsSeries, and
+compaction events give an independent measurement of the bytes written
+into each level.
+
+RocksDB attributes a compaction to its output level: the Lk row has Rn
+(bytes read from the input level above), Rnp1 (bytes of Lk itself that
+were rewritten), Write (bytes written into Lk) and Moved (trivial moves
+into Lk). For every level and interval:
+
+    size change = Write + Moved - Rnp1 - (Rn + Moved of the level below)
+
+Key Features:
+- Per-level WAF against user ingest and RocksDB's W-Amp (Write / Rn)
+- Inflow, rewrite and outflow of every level with the conservation residual
+- Time evolution over all dumps and cumulative totals (counter-reset aware)
+- Event-based bytes written per level and interval for cross-checking
+- Streams week-long LOGs (stats tables and events are parsed line by line)
+"""
+
+import argparse
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+try:
+    from .compaction_stats import CompactionStatsSeries
+    from .compaction_store import CompactionStore
+    from .log_parser import timestamps_to_datetime64, timestamps_to_micros
+except ImportError:
+    # Fallback for direct execution
+    import sys
+    import os
+    sys.path.append(os.path.dirname(__file__))
+    from compaction_stats import CompactionStatsSeries
+    from compaction_store import CompactionStore
+    from log_parser import timestamps_to_datetime64, timestamps_to_micros
+
+GB = 1024 ** 3
+
+# (dumps, levels) arrays of level_balance, in GB per interval
+BALANCE_FIELDS = ('write', 'moved_in', 'inflow', 'rewritten', 'outflow',
+                  'size_delta', 'residual')
+
+
+def source_levels(active: np.ndarray) -> np.ndarray:
+    """
+    Level that feeds each level's compactions.
+
+    The input of Lk comes from the nearest active level above it; L0 is
+    always active (flushes), so under dynamic level bytes the base level
+    is fed by L0. The L0 row is fed by memtables and gets -1.
+
+    Args:
+        active: Boolean (..., levels) mask of levels that hold data or
+            received writes; position i is level i
+
+    Returns:
+        Integer (..., levels) array of source positions (-1 for L0)
+    """
+    active = np.asarray(active, dtype=bool).copy()
+    active[..., 0] = True
+    index = np.arange(active.shape[-1])
+    last_active = np.maximum.accumulate(np.where(active, index, 0), axis=-1)
+    source = np.empty_like(last_active)
+    source[..., 0] = -1
+    source[..., 1:] = last_active[..., :-1]
+    return source
+
+
+def _dense_levels(stats: CompactionStatsSeries, table: np.ndarray) -> np.ndarray:
+    """Place a (dumps, levels) table on a contiguous L0..Lmax level axis."""
+    dense = np.zeros((table.shape[0], max(stats.levels) + 1) + table.shape[2:])
+    dense[:, stats.levels] = table
+    return dense
+
+
+def level_balance(stats: CompactionStatsSeries) -> Dict[str, np.ndarray]:
+    """
+    Per-level mass balance of every stats interval.
+
+    Args:
+        stats: CompactionStatsSeries of the run
+
+    Returns:
+        Dictionary with 'levels' (L0..Lmax) and (dumps, levels) arrays in GB:
+        'write', 'moved_in', 'inflow' (write + moved_in), 'rewritten' (Rnp1),
+        'outflow' (Rn + Moved of the level fed by it), 'size_delta' and
+        'residual' (size_delta - inflow + rewritten + outflow; NaN for the
+        first interval after DB open, whose starting size is unknown), and
+        'source' (position of the level feeding each level)
+    """
+    if not len(stats):
+        raise ValueError("Compaction stats series is empty")
+    deltas = _dense_levels(stats, stats.deltas())
+    metric = {name: deltas[..., stats.metric_index(name)]
+              for name in ('write_gb', 'moved_gb', 'rn_gb', 'rnp1_gb', 'size_bytes')}
+    levels = np.arange(deltas.shape[1])
+
+    # Levels count as active once they hold data or were written
+    cumulative_write = _dense_levels(stats, stats.metric('write_gb'))
+    active = (metric['size_bytes'] > 0) | (cumulative_write > 0) | (metric['moved_gb'] > 0)
+    source = source_levels(active)
+
+    # Bytes that left each level for the level below: scatter Rn + Moved
+    # of every level onto its source level
+    leaving = metric['rn_gb'] + metric['moved_gb']
+    leaving[:, 0] = 0.0
+    feeds = source[..., None] == levels                         # (dumps, level, source)
+    outflow = np.einsum('tl,tls->ts', leaving, feeds)
+
+    size_gb = metric['size_bytes'] / GB
+    size_delta = np.full_like(size_gb, np.nan)
+    size_delta[1:] = size_gb[1:] - size_gb[:-1]
+    size_delta[stats.resets] = np.nan
+
+    inflow = metric['write_gb'] + metric['moved_gb']
+    return {
+        'levels': levels,
+        'write': metric['write_gb'],
+        'moved_in': metric['moved_gb'],
+        'inflow': inflow,
+        'rewritten': metric['rnp1_gb'],
+        'outflow': outflow,
+        'size_delta': size_delta,
+        'residual': size_delta - inflow + metric['rnp1_gb'] + outflow,
+        'source': source,
+    }
+
+
+def level_wa(stats: CompactionStatsSeries, interval: bool = True) -> Dict[str, np.ndarray]:
+    """
+    Per-level write amplification over every interval (or since DB open).
+
+    Args:
+        stats: CompactionStatsSeries of the run
+        interval: Per interval (True) or cumulative since DB open (False)
+
+    Returns:
+        Dictionary of (dumps, levels) arrays on the L0..Lmax axis:
+        'user_waf' (Write / user ingest; sums to the total WAF),
+        'w_amp' (Write / Rn, RocksDB's W-Amp column) and 'rewrite_ratio'
+        (Rnp1 / Rn, overlap read from the level per input byte)
+    """
+    source = stats.deltas() if interval else stats.values
+    write = _dense_levels(stats, source[..., stats.metric_index('write_gb')])
+    rn = _dense_levels(stats, source[..., stats.metric_index('rn_gb')])
+    rnp1 = _dense_levels(stats, source[..., stats.metric_index('rnp1_gb')])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {
+            'user_waf': _dense_levels(stats, stats.level_waf(interval)),
+            'w_amp': np.where(rn > 0, write / rn, np.nan),
+            'rewrite_ratio': np.where(rn > 0, rnp1 / rn, np.nan),
+        }
+
+
+def event_writes(store: CompactionStore, stats: CompactionStatsSeries) -> np.ndarray:
+    """
+    Bytes written into each level by flush/compaction events per stats interval.
+
+    Interval t is [dump t-1, dump t); the first interval after DB open
+    starts at the beginning of the LOG. Dump times are taken on the
+    store's clock (the UTC offset of the LOG), like its job times.
+
+    Args:
+        store: CompactionStore of the same LOG
+        stats: CompactionStatsSeries of the run
+
+    Returns:
+        (dumps, levels) array in GB on the L0..Lmax axis
+    """
+    ends = stats.times_us
+    if stats.utc_offset_us != store.utc_offset_us:
+        ends = timestamps_to_micros(stats.timestamps, store.utc_offset_us)
+    starts = np.zeros_like(ends)
+    starts[1:] = ends[:-1]
+    starts[stats.resets] = 0
+    written = np.zeros((len(stats), max(stats.levels) + 1))
+    for level in range(written.shape[1]):
+        written[:, level] = store.window(starts, ends, 'bytes_out', level, 'output_level')
+    return written / GB
+
+
+def balance_summary(balance: Dict[str, np.ndarray], events: Optional[np.ndarray] = None,
+                    user_gb: Optional[float] = None) -> pd.DataFrame:
+    """
+    Totals of the balance over the run, one row per level.
+
+    Args:
+        balance: Result of level_balance
+        events: Result of event_writes (adds 'event_write_gb' and 'event_gap_pct')
+        user_gb: User bytes for the 'user_waf' column
+
+    Returns:
+        DataFrame indexed by level with GB totals, 'residual_pct' (residual
+        over the level's throughput) and the optional columns
+    """
+    checked = ~np.isnan(balance['residual'])
+    totals = {name: balance[name].sum(axis=0) for name in BALANCE_FIELDS[:-2]}
+    totals['size_delta'] = np.where(checked, balance['size_delta'], 0.0).sum(axis=0)
+    totals['residual'] = np.where(checked, balance['residual'], 0.0).sum(axis=0)
+    throughput = np.where(checked, balance['inflow'] + balance['outflow'], 0.0).sum(axis=0)
+
+    frame = pd.DataFrame({f'{name}_gb': values for name, values in totals.items()},
+                         index=pd.Index(balance['levels'], name='level'))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        frame['residual_pct'] = np.where(throughput > 0, 100.0 * np.abs(totals['residual']) / throughput, 0.0)
+        if user_gb:
+            frame['user_waf'] = totals['write'] / user_gb
+        if events is not None:
+            event_total = events.sum(axis=0)
+            frame['event_write_gb'] = event_total
+            frame['event_gap_pct'] = np.where(totals['write'] > 0,
+                                              100.0 * (event_total - totals['write']) / totals['write'], np.nan)
+    return frame
+
+
+def balance_timeline(stats: CompactionStatsSeries, balance: Dict[str, np.ndarray],
+                     wa: Dict[str, np.ndarray], events: Optional[np.ndarray] = None) -> pd.DataFrame:
+    """
+    Long-format time evolution: one row per dump and level.
+
+    Args:
+        stats: CompactionStatsSeries of the run
+        balance: Result of level_balance
+        wa: Result of level_wa (interval values)
+        events: Result of event_writes
+
+    Returns:
+        DataFrame with dump_time, level, the balance fields (GB), interval
+        user ingest and the WA columns
+    """
+    dumps, levels = balance['write'].shape
+    columns = {
+        'dump_time': np.repeat(timestamps_to_datetime64(stats.timestamps), levels),
+        'level': np.tile(balance['levels'], dumps),
+        'ingest_gb': np.repeat(stats.ingest_deltas(), levels),
+    }
+    columns.update({f'{name}_gb': balance[name].ravel() for name in BALANCE_FIELDS})
+    columns.update({name: values.ravel() for name, values in wa.items()})
+    if events is not None:
+        columns['event_write_gb'] = events.ravel()
+    return pd.DataFrame(columns)
+
+
+def analyze_log(log_path: Union[str, Path], cf: str = 'default', events: bool = True,
+                workers: int = 1) -> Dict:
+    """
+    Stream a LOG and compute the per-level WA and mass balance of every dump.
+
+    Args:
+        log_path: LOG file, directory or glob
+        cf: Column family of the stats tables
+        events: Also measure bytes written from flush/compaction events
+        workers: Worker processes for the event parse
+
+    Returns:
+        Dictionary with 'stats', 'balance', 'wa', 'events' (None when
+        disabled or the LOG has no jobs)
+    """
+    stats = CompactionStatsSeries.from_log(log_path, cf)
+    if not len(stats):
+        raise ValueError(f"No compaction stats tables for column family {cf!r} in {log_path}")
+    written = None
+    if events:
+        store = CompactionStore.from_log(log_path, workers=workers)
+        if len(store):
+            written = event_writes(store, stats)
+    return {'stats': stats, 'balance': level_balance(stats), 'wa': level_wa(stats), 'events': written}
+
+
+def main():
+    """Command-line interface for the per-level WA and mass balance."""
+    parser = argparse.ArgumentParser(description='Per-level write amplification and mass balance')
+    parser.add_argument('log', help='RocksDB LOG file, directory or glob')
+    parser.add_argument('--cf', default='default', help='Column family')
+    parser.add_argument('--no-events', action='store_true', help='Skip the compaction event cross-check')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes for the event parse')
+    parser.add_argument('--output', help='Output CSV file (time evolution, one row per dump and level)')
+
+    args = parser.parse_args()
+
+    result = analyze_log(args.log, args.cf, events=not args.no_events, workers=args.workers)
+    stats = result['stats']
+    user_gb = float(np.nansum(stats.ingest_deltas()))
+    summary = balance_summary(result['balance'], result['events'], user_gb)
+    print(f"{len(stats)} dumps, {user_gb:.1f} GB ingested")
+    print(summary.round(3).to_string())
+
+    if args.output:
+        balance_timeline(stats, result['balance'], result['wa'], result['events']).to_csv(args.output, index=False)
+        print(f"Saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,454 @@
+"""
+PutModel v4: Parsed LOG Cache
+
+This module implements a persistent cache of parsed RocksDB LOGs. The event
+tables of a ParsedLog are stored column by column in a NumPy .npz file keyed
+by the LOG's size, mtime and content hash, so an analysis suite parses each
+LOG once and every later script only loads the tables.
+
+Key Features:
+- Columnar binary storage (one array per event field, offsets for tuple fields,
+  dictionary-encoded strings, int64 event times)
+- Cache key from the content hash and size of every LOG segment
+- size/mtime check to skip re-hashing unchanged LOGs
+- Automatic invalidation when a LOG or the cache format changes
+- Size-bounded cache directory with least-recently-used eviction
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import warnings
+import zipfile
+from itertools import chain
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union, get_type_hints
+
+import numpy as np
+
+try:
+    from .log_parser import ParsedLog, parse_log_file
+    from .log_source import LogSource
+except ImportError:
+    # Fallback for direct execution
+    import sys
+    sys.path.append(os.path.dirname(__file__))
+    from log_parser import ParsedLog, parse_log_file
+    from log_source import LogSource
+
+
+# Bump when the ParsedLog event layout or the parser output changes
+CACHE_FORMAT = 4
+
+# Cache directory (overridable with the PUTMODEL_LOG_CACHE environment variable)
+DEFAULT_CACHE_DIR = Path.home() / '.cache' / 'rocksdb-put-model' / 'parsed-logs'
+CACHE_DIR_ENV = 'PUTMODEL_LOG_CACHE'
+
+DEFAULT_MAX_BYTES = 4 * 1024**3
+
+_HASH_BLOCK_BYTES = 8 * 1024 * 1024
+_HASH_INDEX = 'hashes.json'
+_ENTRY_SUFFIX = '.npz'
+
+# Separator of dictionary-encoded strings (never part of a LOG line)
+_LABEL_SEP = '\x00'
+
+
+def _field_kind(hint) -> str:
+    """Map a NamedTuple field annotation to its column encoding."""
+    if hint is int:
+        return 'int'
+    if hint is float:
+        return 'float'
+    if hint in (str, Optional[str]):
+        return 'str'
+    if hint == Tuple[int, ...]:
+        return 'ints'
+    if hint == Tuple[Tuple[int, int], ...]:
+        return 'pairs'
+    raise TypeError(f"Unsupported event field type: {hint}")
+
+
+def _encode_events(name: str, record_type, events: List, arrays: Dict[str, np.ndarray]):
+    """Store an event list as one array per field (tuple fields as values + offsets)."""
+    columns = list(zip(*events)) if events else [()] * len(record_type._fields)
+    hints = get_type_hints(record_type)
+
+    for field, values in zip(record_type._fields, columns):
+        key = f'{name}.{field}'
+        kind = _field_kind(hints[field])
+        if kind == 'int':
+            arrays[key] = np.array(values, dtype=np.int64)
+        elif kind == 'float':
+            arrays[key] = np.array(values, dtype=np.float64)
+        elif kind == 'str':
+            # Dictionary encoding: distinct strings as one UTF-8 blob, codes per
+            # event (-1 for None)
+            labels = {}
+            codes = [-1 if v is None else labels.setdefault(v, len(labels)) for v in values]
+            arrays[key] = np.frombuffer(_LABEL_SEP.join(labels).encode(), dtype=np.uint8)
+            arrays[f'{key}.codes'] = np.array(codes, dtype=np.int32)
+        else:
+            offsets = np.zeros(len(values) + 1, dtype=np.int64)
+            np.cumsum([len(v) for v in values], out=offsets[1:])
+            flat = list(chain.from_iterable(values))
+            shape = (len(flat), 2) if kind == 'pairs' else (len(flat),)
+            arrays[key] = np.array(flat, dtype=np.int64).reshape(shape)
+            arrays[f'{key}.offsets'] = offsets
+
+
+def _decode_events(name: str, record_type, arrays) -> List:
+    """Rebuild an event list from its field arrays."""
+    hints = get_type_hints(record_type)
+    columns = []
+
+    for field in record_type._fields:
+        key = f'{name}.{field}'
+        kind = _field_kind(hints[field])
+        if kind == 'str':
+            codes = arrays[f'{key}.codes'].tolist()
+            labels = arrays[key].tobytes().decode().split(_LABEL_SEP) if codes else []
+            labels.append(None)
+            values = [labels[code] for code in codes]
+            columns.append(values)
+            continue
+
+        values = arrays[key].tolist()
+        if kind in ('ints', 'pairs'):
+            offsets = arrays[f'{key}.offsets'].tolist()
+            if kind == 'pairs':
+                values = [tuple(v) for v in values]
+            values = [tuple(values[a:b]) for a, b in zip(offsets[:-1], offsets[1:])]
+        columns.append(values)
+
+    return list(map(record_type._make, zip(*columns)))
+
+
+def encode_parsed_log(parsed: ParsedLog) -> Dict[str, np.ndarray]:
+    """
+    Convert a ParsedLog into named column arrays.
+
+    Args:
+        parsed: Parse result
+
+    Returns:
+        Dictionary of arrays suitable for np.savez
+    """
+    arrays = {}
+    parsed.index_times()
+    for name, record_type in ParsedLog.EVENT_LISTS:
+        _encode_events(name, record_type, getattr(parsed, name), arrays)
+        arrays[f'{name}.wall_us'] = parsed.wall_us[name]
+    arrays['counters.keys'] = np.array(list(parsed.counters), dtype=str)
+    arrays['counters.values'] = np.array(list(parsed.counters.values()), dtype=np.int64)
+    return arrays
+
+
+def decode_parsed_log(arrays) -> ParsedLog:
+    """
+    Rebuild a ParsedLog from arrays written by encode_parsed_log().
+
+    Args:
+        arrays: Mapping of column arrays (dict or loaded .npz file)
+
+    Returns:
+        ParsedLog equal to the encoded one
+    """
+    parsed = ParsedLog()
+    for name, record_type in ParsedLog.EVENT_LISTS:
+        setattr(parsed, name, _decode_events(name, record_type, arrays))
+        parsed.wall_us[name] = arrays[f'{name}.wall_us']
+    parsed.counters = dict(zip(arrays['counters.keys'].tolist(), arrays['counters.values'].tolist()))
+    return parsed
+
+
+class LogCache:
+    """
+    Persistent cache of ParsedLog results.
+
+    Entries are named after a digest of the cache format and the size and
+    content hash of every LOG segment, so renamed or copied LOGs still hit
+    and any change to a LOG produces a new key. Content hashes are memoized
+    per path together with size, mtime and inode; a LOG is only re-hashed
+    when one of these changes. Old entries are evicted least recently used
+    first once the directory grows past max_bytes.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Cache directory (default: $PUTMODEL_LOG_CACHE or
+                ~/.cache/rocksdb-put-model/parsed-logs)
+            max_bytes: Size bound of the cache directory
+        """
+        if max_bytes <= 0:
+            raise ValueError(f"max_bytes must be positive, got {max_bytes}")
+
+        self.cache_dir = Path(cache_dir or os.environ.get(CACHE_DIR_ENV) or DEFAULT_CACHE_DIR)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+    def get(self, log_path: Union[str, Path], workers: int = 1) -> ParsedLog:
+        """
+        Get the parse result of a LOG, parsing and storing it on a miss.
+
+        Args:
+            log_path: LOG file, directory or glob (see log_source.LogSource)
+            workers: Worker processes used on a miss (1 = serial)
+
+        Returns:
+            ParsedLog of the LOG
+        """
+        key = self.key(log_path)
+        parsed = self._load(key)
+        if parsed is not None:
+            return parsed
+
+        parsed = parse_log_file(log_path, workers=workers)
+        self._store(key, parsed)
+        return parsed
+
+    def key(self, log_path: Union[str, Path]) -> str:
+        """
+        Compute the cache key of a LOG.
+
+        Args:
+            log_path: LOG file, directory or glob
+
+        Returns:
+            Hex digest naming the cache entry
+        """
+        digest = hashlib.blake2b(f'format={CACHE_FORMAT}'.encode(), digest_size=20)
+        index = self._read_index()
+        changed = False
+
+        for segment in LogSource(log_path).segments:
+            path = os.path.realpath(segment.path)
+            stat = os.stat(path)
+            signature = [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+            memo = index.get(path)
+            if memo is None or memo['signature'] != signature:
+                memo = {'signature': signature, 'hash': self._content_hash(path)}
+                index[path] = memo
+                changed = True
+            digest.update(f"|{stat.st_size}:{memo['hash']}".encode())
+
+        if changed:
+            self._write_index(index)
+        return digest.hexdigest()
+
+    def contains(self, log_path: Union[str, Path]) -> bool:
+        """Check whether a LOG has a cache entry."""
+        return self._entry_path(self.key(log_path)).exists()
+
+    def invalidate(self, log_path: Union[str, Path]) -> bool:
+        """
+        Remove the cache entry of a LOG.
+
+        Returns:
+            True if an entry was removed
+        """
+        path = self._entry_path(self.key(log_path))
+        if path.exists():
+            path.unlink()
+            return True
+        return False
+
+    def clear(self):
+        """Remove every cache entry and the hash index."""
+        for path in self._entries():
+            path.unlink()
+        index_path = self.cache_dir / _HASH_INDEX
+        if index_path.exists():
+            index_path.unlink()
+
+    def cache_info(self) -> Dict:
+        """Get cache statistics (hits, misses, stores, evictions, entries, bytes)."""
+        entries = self._entries()
+        with self._lock:
+            info = dict(self._stats)
+        info['entries'] = len(entries)
+        info['bytes'] = sum(p.stat().st_size for p in entries)
+        info['max_bytes'] = self.max_bytes
+        info['cache_dir'] = str(self.cache_dir)
+        return info
+
+    def evict(self, keep: Optional[str] = None):
+        """
+        Delete least recently used entries until the directory fits max_bytes.
+
+        Args:
+            keep: Key of an entry that must not be evicted
+        """
+        entries = sorted(self._entries(), key=lambda p: p.stat().st_mtime)
+        total = sum(p.stat().st_size for p in entries)
+        for path in entries:
+            if total <= self.max_bytes:
+                break
+            if path.stem == keep:
+                continue
+            total -= path.stat().st_size
+            path.unlink()
+            with self._lock:
+                self._stats['evictions'] += 1
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f'{key}{_ENTRY_SUFFIX}'
+
+    def _entries(self) -> List[Path]:
+        if not self.cache_dir.is_dir():
+            return []
+        return [p for p in self.cache_dir.iterdir() if p.suffix == _ENTRY_SUFFIX]
+
+    def _load(self, key: str) -> Optional[ParsedLog]:
+        """Load an entry (None on a miss or an unreadable entry)."""
+        path = self._entry_path(key)
+        try:
+            with np.load(path, allow_pickle=False) as arrays:
+                parsed = decode_parsed_log(arrays)
+        except FileNotFoundError:
+            with self._lock:
+                self._stats['misses'] += 1
+            return None
+        except (OSError, ValueError, KeyError, TypeError, zipfile.BadZipFile) as e:
+            warnings.warn(f"Discarding unreadable LOG cache entry {path}: {e}", UserWarning)
+            path.unlink(missing_ok=True)
+            with self._lock:
+                self._stats['misses'] += 1
+            return None
+
+        # Touch the entry so that eviction sees it as recently used
+        os.utime(path)
+        with self._lock:
+            self._stats['hits'] += 1
+        return parsed
+
+    def _store(self, key: str, parsed: ParsedLog):
+        """Write an entry atomically and enforce the size bound."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, **encode_parsed_log(parsed))
+            os.replace(tmp_path, self._entry_path(key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        with self._lock:
+            self._stats['stores'] += 1
+        self.evict(keep=key)
+
+    @staticmethod
+    def _content_hash(path: str) -> str:
+        """BLAKE2 hash of a file's bytes (compressed segments are hashed as stored)."""
+        digest = hashlib.blake2b(digest_size=20)
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(_HASH_BLOCK_BYTES), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _read_index(self) -> Dict:
+        try:
+            with open(self.cache_dir / _HASH_INDEX, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self, index: Dict):
+        # Concurrent writers may drop each other's memo entries; those LOGs
+        # are simply hashed again next time
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.cache_dir / _HASH_INDEX)
+
+
+_shared_caches = {}
+_shared_lock = threading.Lock()
+
+
+def get_cache(cache_dir: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES) -> LogCache:
+    """
+    Get the process-wide cache for a directory.
+
+    Args:
+        cache_dir: Cache directory (default location if None)
+        max_bytes: Size bound (used on first creation)
+
+    Returns:
+        Shared LogCache instance
+    """
+    key = str(cache_dir or os.environ.get(CACHE_DIR_ENV) or DEFAULT_CACHE_DIR)
+    with _shared_lock:
+        if key not in _shared_caches:
+            _shared_caches[key] = LogCache(key, max_bytes=max_bytes)
+        return _shared_caches[key]
+
+
+def load_parsed_log(log_path: Union[str, Path], workers: int = 1,
+                    cache_dir: Optional[str] = None, use_cache: bool = True) -> ParsedLog:
+    """
+    Parse a LOG through the shared cache; a drop-in for log_parser.parse_log_file.
+
+    Args:
+        log_path: LOG file, directory or glob
+        workers: Worker processes used when the LOG has to be parsed
+        cache_dir: Cache directory (default location if None)
+        use_cache: Set to False to always parse
+
+    Returns:
+        ParsedLog of the LOG
+    """
+    if not use_cache:
+        return parse_log_file(log_path, workers=workers)
+    return get_cache(cache_dir).get(log_path, workers=workers)
+
+
+def main():
+    """Warm, inspect or clear the parsed LOG cache."""
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Persistent cache of parsed RocksDB LOGs')
+    parser.add_argument('log_paths', nargs='*', help='LOG files, directories or glob patterns to cache')
+    parser.add_argument('--cache-dir', help=f'Cache directory (default: ${CACHE_DIR_ENV} or {DEFAULT_CACHE_DIR})')
+    parser.add_argument('--max-gb', type=float, default=DEFAULT_MAX_BYTES / 1024**3,
+                        help='Size bound of the cache directory in GB')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Worker processes for parsing (0 = CPU count)')
+    parser.add_argument('--invalidate', action='store_true', help='Drop the entries of the given LOGs')
+    parser.add_argument('--clear', action='store_true', help='Remove every cache entry')
+
+    args = parser.parse_args()
+
+    cache = LogCache(args.cache_dir, max_bytes=int(args.max_gb * 1024**3))
+
+    if args.clear:
+        cache.clear()
+        print(f"Cleared {cache.cache_dir}")
+
+    for log_path in args.log_paths:
+        if args.invalidate:
+            removed = cache.invalidate(log_path)
+            print(f"{log_path}: {'invalidated' if removed else 'not cached'}")
+            continue
+        start = time.time()
+        hit = cache.contains(log_path)
+        parsed = cache.get(log_path, workers=args.workers or None)
+        print(f"{log_path}: {'hit' if hit else 'parsed'} in {time.time() - start:.2f}s, "
+              f"{parsed.summary()['lines']} lines")
+
+    info = cache.cache_info()
+    print(f"Cache {info['cache_dir']}: {info['entries']} entries, "
+          f"{info['bytes'] / 1024**2:.1f} MB of {info['max_bytes'] / 1024**2:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1300 @@
+"""
+PutModel v4: RocksDB LOG Parser
+
+This module implements a single-pass parser for RocksDB LOG files shared by the
+closed ledger and the analysis scripts. Every line is classified once by a
+precompiled keyword dispatch and only the matching extractor runs.
+
+Key Features:
+- Precompiled patterns for flush, compaction, stats dump and stall lines
+- One dispatch per line instead of several re.search calls
+- Typed event records (flush, compaction start/finish, trivial move, stats dump, stall)
+- EVENT_LOG_v1 JSON fast path with exact byte counts and durations
+- Parallel parsing of mmap'd chunks with results identical to a serial parse
+- Incremental tail-follow reading with LOG.old.* rotation handling
+- Additive ledger counters compatible with ClosedLedger
+"""
+
+import glob
+import json
+import mmap
+import os
+import re
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from .log_source import TIMESTAMP_WIDTH, LogSource, line_timestamp
+except ImportError:
+    # Fallback for direct execution
+    import sys
+    sys.path.append(os.path.dirname(__file__))
+    from log_source import TIMESTAMP_WIDTH, LogSource, line_timestamp
+
+
+class FlushEvent(NamedTuple):
+    """Level-0 table written by a memtable flush."""
+    timestamp: Optional[str]
+    job: int
+    cf: str
+    file_number: int
+    bytes: int
+
+
+class CompactionStartEvent(NamedTuple):
+    """Compaction picked by the scheduler ("Compacting N@L + M@L files to Lx")."""
+    timestamp: Optional[str]
+    job: int
+    cf: str
+    input_level: int
+    output_level: int
+    input_files: int
+    score: float
+
+
+class CompactionFinishEvent(NamedTuple):
+    """Compaction summary ("compacted to: files[...] ...")."""
+    timestamp: Optional[str]
+    job: int
+    cf: str
+    output_level: int
+    files_per_level: Tuple[int, ...]
+    read_mb_s: float
+    write_mb_s: float
+    input_mb: float
+    input_next_mb: float
+    output_mb: float
+    read_write_amp: float
+    write_amp: float
+    records_in: int
+    records_dropped: int
+
+
+class TrivialMoveEvent(NamedTuple):
+    """Files re-parented to another level without any I/O (trivial move)."""
+    timestamp: Optional[str]
+    time_micros: int
+    job: int
+    cf: str
+    output_level: int
+    files: int
+    bytes: int
+
+
+class StatsDumpEvent(NamedTuple):
+    """Cumulative/interval DB counters of one "DUMPING STATS" block."""
+    timestamp: Optional[str]
+    uptime_s: float
+    cumulative_writes: int
+    cumulative_keys: int
+    ingest_gb: float
+    ingest_mb_s: float
+    wal_written_gb: float
+    cumulative_stall_s: float
+    cumulative_stall_pct: float
+    interval_stall_s: float
+    interval_stall_pct: float
+    flush_cumulative_gb: float
+    flush_interval_gb: float
+    compaction_write_gb: float
+    compaction_read_gb: float
+    compaction_seconds: float
+
+
+class StallEvent(NamedTuple):
+    """Write slowdown ("Stalling writes") or stop ("Stopping writes")."""
+    timestamp: Optional[str]
+    cf: str
+    kind: str
+    reason: str
+    value: float
+    rate: int
+
+
+# EVENT_LOG_v1 records carry the exact values that the text lines round
+# (bytes instead of MB, microsecond timestamps and durations)
+
+class FlushStartedEvent(NamedTuple):
+    """EVENT_LOG_v1 "flush_started" record."""
+    timestamp: Optional[str]
+    time_micros: int
+    job: int
+    cf: str
+    num_entries: int
+    total_data_size: int
+    memory_usage: int
+    flush_reason: str
+
+
+class FlushFinishedEvent(NamedTuple):
+    """EVENT_LOG_v1 "flush_finished" record."""
+    timestamp: Optional[str]
+    time_micros: int
+    job: int
+    cf: str
+    lsm_state: Tuple[int, ...]
+    immutable_memtables: int
+
+
+class CompactionStartedEvent(NamedTuple):
+    """EVENT_LOG_v1 "compaction_started" record."""
+    timestamp: Optional[str]
+    time_micros: int
+    job: int
+    cf: str
+    compaction_reason: str
+    input_files: Tuple[Tuple[int, int], ...]
+    score: float
+    input_data_size: int
+
+    @property
+    def input_level(self) -> int:
+        """Lowest level with input files (-1 if the record lists none)."""
+        return self.input_files[0][0] if self.input_files else -1
+
+    @property
+    def num_input_files(self) -> int:
+        """Total number of input files over all levels."""
+        return sum(count for _, count in self.input_files)
+
+
+class CompactionFinishedEvent(NamedTuple):
+    """EVENT_LOG_v1 "compaction_finished" record."""
+    timestamp: Optional[str]
+    time_micros: int
+    job: int
+    cf: str
+    output_level: int
+    compaction_time_micros: int
+    compaction_time_cpu_micros: int
+    num_output_files: int
+    total_output_size: int
+    num_input_records: int
+    num_output_records: int
+    lsm_state: Tuple[int, ...]
+
+
+class TableFileCreationEvent(NamedTuple):
+    """EVENT_LOG_v1 "table_file_creation" record."""
+    timestamp: Optional[str]
+    time_micros: int
+    job: int
+    cf: str
+    file_number: int
+    file_size: int
+    data_size: int
+    num_entries: int
+
+
+# Extractor patterns (compiled once, shared by all parsers)
+_CF_JOB_RE = re.compile(r'\.cc:\d+\] \[([^\]\s]+)\](?: \[JOB (\d+)\])?')
+_FLUSH_RE = re.compile(r'flush table #(\d+): (\d+) bytes')
+_COMPACTING_RE = re.compile(r'Compacting ((?:\d+@\d+(?: \+ )?)+) files to L(\d+), score ([\d.]+)')
+_INPUT_RE = re.compile(r'(\d+)@(\d+)')
+_COMPACTED_RE = re.compile(
+    # level_compaction_dynamic_level_bytes (default since RocksDB 8.4) prefixes
+    # the files[] summary with "base level N level multiplier X max bytes base Y"
+    r'compacted to: (?:base level \d+ level multiplier [\d.]+ max bytes base \d+ )?'
+    r'files\[([\d ]+)\][^,]*, MB/sec: ([\d.]+) rd, ([\d.]+) wr, level (\d+), '
+    r'files in\(\d+, \d+\) out\(\d+[^)]*\) MB in\(([\d.]+), ([\d.]+)[^)]*\) out\(([\d.]+)[^)]*\), '
+    r'read-write-amplify\(([\d.]+)\) write-amplify\(([\d.]+)\)'
+)
+_MOVED_RE = re.compile(r'Moved #(\d+) files to level-(\d+) (\d+) bytes')
+_RECORDS_RE = re.compile(r'records in: (\d+), records dropped: (\d+)')
+_UPTIME_RE = re.compile(r'Uptime\(secs\): ([\d.]+) total')
+_CUM_WRITES_RE = re.compile(
+    r'Cumulative writes: (\d+[KMGT]?) writes, (\d+[KMGT]?) keys.*ingest: ([\d.]+) GB, ([\d.]+) MB/s'
+)
+_CUM_WAL_RE = re.compile(r'written: ([\d.]+) GB')
+_STALL_TIME_RE = re.compile(r'stall: (\d+):(\d+):([\d.]+) H:M:S, ([\d.]+) percent')
+_FLUSH_GB_RE = re.compile(r'Flush\(GB\): cumulative ([\d.]+), interval ([\d.]+)')
+_CUM_COMPACTION_RE = re.compile(
+    r'Cumulative compaction: ([\d.]+) GB write, [\d.]+ MB/s write, ([\d.]+) GB read, '
+    r'[\d.]+ MB/s read, ([\d.]+) seconds'
+)
+_STALL_L0_RE = re.compile(r'we have (\d+) level-0 files')
+_STALL_MEMTABLE_RE = re.compile(r'we have (\d+) immutable memtables')
+_STALL_PENDING_RE = re.compile(r'pending compaction bytes (\d+)')
+_STALL_RATE_RE = re.compile(r'rate (\d+)')
+
+# Legacy ClosedLedger patterns
+_BYTES_RE = re.compile(r'(\d+) bytes')
+_BYTES_READ_RE = re.compile(r'(\d+) bytes read')
+_BYTES_WRITTEN_RE = re.compile(r'(\d+) bytes written')
+
+EVENT_LOG_MARKER = 'EVENT_LOG_v1'
+_EVENT_NAME_KEY = '"event": "'
+_FILES_KEY_PREFIX = 'files_L'
+
+# Dispatch keywords; a single search classifies each line
+_DISPATCH_KEYWORDS = (
+    EVENT_LOG_MARKER,
+    'compacted to:',
+    'Compacting ',
+    'flush table #',
+    'Moved #',
+    'Stalling writes',
+    'Stopping writes',
+    'DUMPING STATS',
+    'Uptime(secs):',
+    'Cumulative writes:',
+    'Cumulative WAL:',
+    'Cumulative stall:',
+    'Interval stall:',
+    'Flush(GB):',
+    'Cumulative compaction:',
+)
+_DISPATCH_RE = re.compile('|'.join(re.escape(k) for k in _DISPATCH_KEYWORDS))
+
+# Stats dump field lines; in a chunk they may continue a dump opened by the previous chunk
+_DUMP_FIELD_KEYWORDS = (
+    'Uptime(secs):',
+    'Cumulative writes:',
+    'Cumulative WAL:',
+    'Cumulative stall:',
+    'Interval stall:',
+    'Flush(GB):',
+    'Cumulative compaction:',
+)
+
+# Default chunk size of parallel parsing
+DEFAULT_CHUNK_BYTES = 64 * 1024 * 1024
+
+_COUNT_SUFFIX = {'K': 10**3, 'M': 10**6, 'G': 10**9, 'T': 10**12}
+
+LEDGER_COUNTERS = (
+    'wal_bytes',
+    'flush_bytes',
+    'compaction_read_bytes',
+    'compaction_write_bytes',
+    'user_write_bytes',
+)
+
+
+def parse_count(text: str) -> int:
+    """Parse RocksDB counts with K/M/G/T suffixes ("1130K" -> 1130000)."""
+    scale = _COUNT_SUFFIX.get(text[-1])
+    if scale is None:
+        return int(text)
+    return int(text[:-1]) * scale
+
+
+# Epoch microseconds of events without a timestamp (same as numpy NaT)
+NO_TIMESTAMP = np.iinfo(np.int64).min
+
+# UTC offsets are whole multiples of 15 minutes
+UTC_OFFSET_STEP_US = 15 * 60 * 1_000_000
+
+# Digit columns of the fixed-width prefix "2025/09/12-10:00:00.123456"
+_DATE_COLUMNS = np.array([0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18])
+_SEPARATOR_COLUMNS = np.array([4, 7, 10, 13, 16])
+_SEPARATORS = np.frombuffer(b'//-::', dtype=np.uint8)
+_FRACTION_COLUMNS = np.arange(20, TIMESTAMP_WIDTH)
+
+
+def _wall_clock_micros(timestamps: Sequence[Optional[str]]) -> np.ndarray:
+    """
+    Convert LOG timestamps to wall-clock microseconds without a per-item parse.
+
+    The fixed-width prefixes are packed into one byte matrix and the date and
+    time fields are read from their column positions. The fraction is
+    optional, so db_bench "[2025/09/12-10:00:00]" stamps (19 chars) work too.
+
+    Args:
+        timestamps: LOG timestamps, None if missing
+
+    Returns:
+        int64 array of naive microseconds since 1970-01-01 (NO_TIMESTAMP where
+        missing or malformed)
+    """
+    n = len(timestamps)
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+
+    texts = [t if t else '' for t in timestamps]
+    try:
+        packed = np.array(texts, dtype=f'S{TIMESTAMP_WIDTH}')
+    except UnicodeEncodeError:
+        packed = np.array([t.encode('ascii', 'replace') for t in texts], dtype=f'S{TIMESTAMP_WIDTH}')
+    chars = packed.view(np.uint8).reshape(n, TIMESTAMP_WIDTH)
+
+    digits = chars[:, _DATE_COLUMNS].astype(np.int64) - ord('0')
+    valid = (np.all((digits >= 0) & (digits <= 9), axis=1)
+             & np.all(chars[:, _SEPARATOR_COLUMNS] == _SEPARATORS, axis=1))
+
+    year = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+    month = digits[:, 4] * 10 + digits[:, 5]
+    day = digits[:, 6] * 10 + digits[:, 7]
+    seconds = ((digits[:, 8] * 10 + digits[:, 9]) * 3600
+               + (digits[:, 10] * 10 + digits[:, 11]) * 60
+               + digits[:, 12] * 10 + digits[:, 13])
+    valid &= (month >= 1) & (month <= 12) & (day >= 1) & (day <= 31)
+
+    # Days since the epoch (proleptic Gregorian, days_from_civil)
+    y = year - (month <= 2)
+    era = np.floor_divide(y, 400)
+    yoe = y - era * 400
+    doy = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    days = era * 146097 + doe - 719468
+
+    # Fraction: padded with NULs when absent, read as a 6-digit number
+    fraction = chars[:, _FRACTION_COLUMNS].astype(np.int64) - ord('0')
+    has_fraction = (chars[:, 19] == ord('.')) & np.all((fraction >= 0) & (fraction <= 9), axis=1)
+    micros_of_second = np.where(has_fraction, fraction @ (10 ** np.arange(5, -1, -1, dtype=np.int64)), 0)
+
+    micros = (days * 86400 + seconds) * 1_000_000 + micros_of_second
+    micros[~valid] = NO_TIMESTAMP
+    return micros
+
+
+def timestamps_to_micros(timestamps: Sequence[Optional[str]],
+                         utc_offset_us: Optional[int] = None) -> np.ndarray:
+    """
+    Convert LOG timestamps to epoch microseconds.
+
+    LOG timestamps are the local time of the host that wrote the LOG. Pass
+    its UTC offset (see utc_offset_micros) to get the same clock as the
+    EVENT_LOG time_micros; without it, the offset of the analysis host's
+    time zone at the first timestamp is used. Either way one offset is
+    applied to all timestamps (a DST change inside one LOG is ignored).
+
+    Args:
+        timestamps: LOG timestamps ("2025/09/12-10:00:00.123456"), None if missing
+        utc_offset_us: UTC offset of the LOG's clock in microseconds
+
+    Returns:
+        int64 array of epoch microseconds (NO_TIMESTAMP where missing)
+    """
+    return _wall_clock_to_epoch(_wall_clock_micros(timestamps), utc_offset_us)
+
+
+def _wall_clock_to_epoch(micros: np.ndarray, utc_offset_us: Optional[int] = None) -> np.ndarray:
+    """Shift wall-clock microseconds (from _wall_clock_micros) to epoch microseconds."""
+    micros = micros.copy()
+    valid = micros != NO_TIMESTAMP
+    if valid.any():
+        if utc_offset_us is None:
+            naive = int(micros[np.argmax(valid)])
+            local = datetime(1970, 1, 1) + timedelta(microseconds=naive)
+            utc_offset_us = naive - round(local.timestamp() * 1e6)
+        micros[valid] -= utc_offset_us
+    return micros
+
+
+def utc_offset_micros(timestamps: Sequence[Optional[str]], time_micros: Sequence[int]) -> Optional[int]:
+    """
+    Derive the UTC offset of a LOG's clock from EVENT_LOG_v1 records.
+
+    Each record has the local LOG timestamp of its line and an epoch
+    time_micros taken a moment earlier; their difference, rounded to
+    UTC_OFFSET_STEP_US, is the offset of the host that wrote the LOG.
+
+    Args:
+        timestamps: LOG timestamps of the records
+        time_micros: time_micros fields of the same records
+
+    Returns:
+        UTC offset in microseconds, or None if no record has both
+    """
+    return _utc_offset(_wall_clock_micros(timestamps), time_micros)
+
+
+def _utc_offset(wall_us: np.ndarray, time_micros: Sequence[int]) -> Optional[int]:
+    """UTC offset from wall-clock microseconds (from _wall_clock_micros) and time_micros."""
+    epoch = np.asarray(time_micros, dtype=np.int64)
+    valid = (wall_us != NO_TIMESTAMP) & (epoch > 0)
+    if not valid.any():
+        return None
+    first = int(np.argmax(valid))
+    return round((int(wall_us[first]) - int(epoch[first])) / UTC_OFFSET_STEP_US) * UTC_OFFSET_STEP_US
+
+
+def timestamps_to_datetime64(timestamps: Sequence[Optional[str]]) -> np.ndarray:
+    """
+    Convert LOG timestamps to naive local datetime64[us] values in bulk.
+
+    Args:
+        timestamps: LOG timestamps, None if missing
+
+    Returns:
+        datetime64[us] array (NaT where missing); usable directly as a
+        pandas column
+    """
+    return _wall_clock_micros(timestamps).view('datetime64[us]')
+
+
+def _job_and_cf(line: str) -> Tuple[int, str]:
+    """Extract the [JOB n] number and [cf] name following the source location."""
+    match = _CF_JOB_RE.search(line)
+    if match is None:
+        return -1, ''
+    job = match.group(2)
+    return (int(job) if job else -1), match.group(1)
+
+
+def _hms_to_seconds(hours: str, minutes: str, seconds: str) -> float:
+    """Convert an H:M:S triple to seconds."""
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+class ParsedLog:
+    """
+    Result of parsing a RocksDB LOG.
+
+    Holds typed event lists and additive counters. Results of consecutive
+    parts of a LOG can be combined with merge(). The LOG timestamps of every
+    event list are converted once, when parsing finishes, into int64 arrays
+    (wall_us); event_times() gives them as epoch microseconds on the clock
+    of the EVENT_LOG time_micros (see utc_offset_us).
+    """
+
+    def __init__(self):
+        """Initialize an empty parse result."""
+        self.flushes: List[FlushEvent] = []
+        self.compaction_starts: List[CompactionStartEvent] = []
+        self.compaction_finishes: List[CompactionFinishEvent] = []
+        self.stats_dumps: List[StatsDumpEvent] = []
+        self.stalls: List[StallEvent] = []
+        self.moves: List[TrivialMoveEvent] = []
+        self.flushes_started: List[FlushStartedEvent] = []
+        self.flushes_finished: List[FlushFinishedEvent] = []
+        self.compactions_started: List[CompactionStartedEvent] = []
+        self.compactions_finished: List[CompactionFinishedEvent] = []
+        self.table_files: List[TableFileCreationEvent] = []
+        self.trivial_moves: List[TrivialMoveEvent] = []
+        self.counters: Dict[str, int] = {key: 0 for key in LEDGER_COUNTERS}
+        self.counters['lines'] = 0
+        # Wall-clock microseconds of the LOG timestamps of each event list
+        self.wall_us: Dict[str, np.ndarray] = {}
+
+        # Chunk parses only: stats dump still open at the end of the chunk and
+        # dump field lines seen before the chunk's first "DUMPING STATS"
+        self._open_dump: Optional[Dict] = None
+        self._head_lines: List[Tuple[str, str, Optional[str]]] = []
+
+    # Event list attributes and their record types
+    EVENT_LISTS = (
+        ('flushes', FlushEvent),
+        ('compaction_starts', CompactionStartEvent),
+        ('compaction_finishes', CompactionFinishEvent),
+        ('stats_dumps', StatsDumpEvent),
+        ('stalls', StallEvent),
+        ('moves', TrivialMoveEvent),
+        ('flushes_started', FlushStartedEvent),
+        ('flushes_finished', FlushFinishedEvent),
+        ('compactions_started', CompactionStartedEvent),
+        ('compactions_finished', CompactionFinishedEvent),
+        ('table_files', TableFileCreationEvent),
+        ('trivial_moves', TrivialMoveEvent),
+    )
+
+    # EVENT_LOG_v1 event lists (records with an epoch time_micros)
+    EVENT_LOG_LISTS = ('flushes_started', 'flushes_finished', 'compactions_started',
+                       'compactions_finished', 'table_files', 'trivial_moves')
+
+    def __getstate__(self) -> Dict:
+        # Plain tuples pickle several times faster than NamedTuples, which
+        # matters when chunk results are sent back from worker processes
+        state = dict(self.__dict__)
+        for name, _ in self.EVENT_LISTS:
+            state[name] = [tuple(event) for event in state[name]]
+        return state
+
+    def __setstate__(self, state: Dict):
+        for name, record_type in self.EVENT_LISTS:
+            state[name] = list(map(record_type._make, state[name]))
+        state.setdefault('wall_us', {})
+        self.__dict__.update(state)
+
+    def _wall_clock(self, name: str) -> np.ndarray:
+        """Wall-clock microseconds of an event list, converted on first use."""
+        events = getattr(self, name)
+        micros = self.wall_us.get(name)
+        if micros is None or len(micros) != len(events):
+            self.wall_us[name] = _wall_clock_micros([e.timestamp for e in events])
+        return self.wall_us[name]
+
+    def index_times(self) -> "ParsedLog":
+        """Convert the LOG timestamps of all event lists (done once when parsing finishes)."""
+        for name, _ in self.EVENT_LISTS:
+            self._wall_clock(name)
+        return self
+
+    def utc_offset_us(self) -> Optional[int]:
+        """
+        UTC offset of the LOG's clock, from its EVENT_LOG_v1 records.
+
+        Returns:
+            Offset in microseconds, or None if the LOG has no EVENT_LOG_v1
+            records (the analysis host's time zone is used then)
+        """
+        for name in self.EVENT_LOG_LISTS:
+            events = getattr(self, name)
+            if events:
+                offset = _utc_offset(self._wall_clock(name), [e.time_micros for e in events])
+                if offset is not None:
+                    return offset
+        return None
+
+    def event_times(self, name: str) -> np.ndarray:
+        """
+        Get the LOG timestamps of an event list as epoch microseconds.
+
+        The LOG's own UTC offset is used when it has EVENT_LOG_v1 records,
+        so the result matches their time_micros on any analysis host.
+
+        Args:
+            name: Event list attribute (see EVENT_LISTS)
+
+        Returns:
+            int64 array aligned with the list (NO_TIMESTAMP where missing)
+        """
+        return _wall_clock_to_epoch(self._wall_clock(name), self.utc_offset_us())
+
+    def merge(self, other: "ParsedLog") -> "ParsedLog":
+        """
+        Append the result of the following part of the LOG.
+
+        Args:
+            other: Parse result of the part that follows this one
+
+        Returns:
+            self (for chaining)
+        """
+        for name, _ in self.EVENT_LISTS:
+            events = getattr(self, name)
+            mine, theirs = self.wall_us.get(name), other.wall_us.get(name)
+            if theirs is not None and (not events or mine is not None):
+                self.wall_us[name] = theirs if not events else np.concatenate([mine, theirs])
+            else:
+                self.wall_us.pop(name, None)
+            events.extend(getattr(other, name))
+        for key, value in other.counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+        return self
+
+    def ledger_data(self) -> Dict:
+        """
+        Get the I/O counters in ClosedLedger.parse_rocksdb_log format.
+
+        Returns:
+            Dictionary with ledger byte counters
+        """
+        data = {key: self.counters[key] for key in LEDGER_COUNTERS}
+        data.update({
+            'device_read_bytes': 0,
+            'device_write_bytes': 0,
+            'per_level_stats': {}
+        })
+        return data
+
+    def summary(self) -> Dict[str, int]:
+        """Get the number of parsed events per type."""
+        return {
+            'lines': self.counters['lines'],
+            'flushes': len(self.flushes),
+            'compaction_starts': len(self.compaction_starts),
+            'compaction_finishes': len(self.compaction_finishes),
+            'stats_dumps': len(self.stats_dumps),
+            'stalls': len(self.stalls),
+            'moves': len(self.moves),
+            'flushes_started': len(self.flushes_started),
+            'flushes_finished': len(self.flushes_finished),
+            'compactions_started': len(self.compactions_started),
+            'compactions_finished': len(self.compactions_finished),
+            'table_files': len(self.table_files),
+            'trivial_moves': len(self.trivial_moves)
+        }
+
+    def time_span(self) -> Optional[Tuple[int, int]]:
+        """
+        Get the first and last event time of the LOG.
+
+        Returns:
+            (first, last) epoch microseconds over all timestamped events, or
+            None if no event has a timestamp
+        """
+        times = np.concatenate([self.event_times(name) for name, _ in self.EVENT_LISTS])
+        times = times[times != NO_TIMESTAMP]
+        if len(times) == 0:
+            return None
+        return int(times.min()), int(times.max())
+
+    def has_event_log(self) -> bool:
+        """Check whether the LOG contained EVENT_LOG_v1 flush/compaction records."""
+        return bool(self.flushes_finished or self.compactions_started
+                    or self.compactions_finished or self.table_files or self.trivial_moves)
+
+
+class LogParser:
+    """
+    Single-pass RocksDB LOG parser with keyword dispatch.
+
+    Continuation lines (multi-line stats dumps) inherit the timestamp of the
+    last timestamped line, as in the per-script parsers this replaces.
+    """
+
+    def __init__(self):
+        """Initialize the parser and its dispatch table."""
+        self._handlers = {
+            EVENT_LOG_MARKER: self._on_event_log,
+            'compacted to:': self._on_compaction_finish,
+            'Compacting ': self._on_compaction_start,
+            'flush table #': self._on_flush,
+            'Moved #': self._on_moved,
+            'Stalling writes': self._on_stall,
+            'Stopping writes': self._on_stall,
+            'DUMPING STATS': self._on_dump_start,
+            'Uptime(secs):': self._on_uptime,
+            'Cumulative writes:': self._on_cumulative_writes,
+            'Cumulative WAL:': self._on_cumulative_wal,
+            'Cumulative stall:': self._on_stall_time,
+            'Interval stall:': self._on_stall_time,
+            'Flush(GB):': self._on_flush_gb,
+            'Cumulative compaction:': self._on_cumulative_compaction,
+        }
+        self._event_handlers = {
+            'flush_started': self._on_flush_started,
+            'flush_finished': self._on_flush_finished,
+            'compaction_started': self._on_compaction_started,
+            'compaction_finished': self._on_compaction_finished,
+            'table_file_creation': self._on_table_file_creation,
+            'trivial_move': self._on_trivial_move,
+        }
+        self._pending_dump = None
+
+    def parse_file(self, log_path: str) -> ParsedLog:
+        """
+        Parse a RocksDB LOG file.
+
+        Args:
+            log_path: Path to RocksDB LOG file, or a directory/glob of rotated
+                and compressed LOG files (see log_source.LogSource)
+
+        Returns:
+            ParsedLog with events and counters
+        """
+        with LogSource(log_path) as source:
+            return self.parse_lines(source)
+
+    def parse_lines(self, lines: Iterable[str]) -> ParsedLog:
+        """
+        Parse an iterable of LOG lines.
+
+        Args:
+            lines: LOG lines (trailing newlines are allowed)
+
+        Returns:
+            ParsedLog with events and counters
+        """
+        self._pending_dump = None
+        result = self._parse(lines, self._handlers)
+        self._finish_dump(result)
+        return result.index_times()
+
+    def parse_chunk(self, lines: Iterable[str], first: bool = False) -> ParsedLog:
+        """
+        Parse one chunk of a LOG split at timestamped lines.
+
+        Unlike parse_lines(), the stats dump open at the end of the chunk is
+        kept open, and dump lines preceding the chunk's first "DUMPING STATS"
+        are deferred, so that merge_chunks() can stitch dumps that straddle a
+        chunk boundary exactly as a serial parse would.
+
+        Args:
+            lines: LOG lines of the chunk
+            first: Whether the chunk starts at the beginning of the LOG
+
+        Returns:
+            Partial ParsedLog for merge_chunks()
+        """
+        self._pending_dump = None
+        handlers = self._handlers
+        if not first:
+            handlers = dict(handlers)
+
+            def defer(keyword):
+                return lambda line, timestamp, result: result._head_lines.append((keyword, line, timestamp))
+
+            def dump_start(line, timestamp, result):
+                # Dump lines after this point belong to this chunk's dumps
+                handlers.update(self._handlers)
+                self._on_dump_start(line, timestamp, result)
+
+            for keyword in _DUMP_FIELD_KEYWORDS:
+                handlers[keyword] = defer(keyword)
+            handlers['DUMPING STATS'] = dump_start
+
+        result = self._parse(lines, handlers)
+        result._open_dump = self._pending_dump
+        self._pending_dump = None
+        return result
+
+    def merge_chunks(self, chunks: List[ParsedLog]) -> ParsedLog:
+        """
+        Merge partial results of consecutive chunks in LOG order.
+
+        Args:
+            chunks: Results of parse_chunk() in LOG order (first chunk first)
+
+        Returns:
+            ParsedLog identical to a serial parse of the whole LOG
+        """
+        result = ParsedLog()
+        self._pending_dump = None
+
+        for chunk in chunks:
+            for keyword, line, timestamp in chunk._head_lines:
+                self._handlers[keyword](line, timestamp, result)
+            if chunk._open_dump is not None:
+                # The chunk saw a "DUMPING STATS", which closes the dump carried so far
+                self._finish_dump(result)
+            result.merge(chunk)
+            if chunk._open_dump is not None:
+                self._pending_dump = chunk._open_dump
+
+        self._finish_dump(result)
+        return result.index_times()
+
+    def _parse(self, lines: Iterable[str], handlers: Dict) -> ParsedLog:
+        """Run the dispatch loop over lines (stats dump state is left to the caller)."""
+        result = ParsedLog()
+        counters = result.counters
+        dispatch = _DISPATCH_RE.search
+        account = self._account_ledger
+        timestamp = None
+        n_lines = 0
+
+        for line in lines:
+            n_lines += 1
+
+            if len(line) > TIMESTAMP_WIDTH and line[4] == '/' and line[10] == '-':
+                timestamp = line[:TIMESTAMP_WIDTH]
+
+            match = dispatch(line)
+            if match is not None:
+                handlers[match.group(0)](line, timestamp, result)
+
+            if 'bytes' in line:
+                account(line, counters)
+
+        counters['lines'] += n_lines
+        return result
+
+    @staticmethod
+    def _account_ledger(line: str, counters: Dict[str, int]):
+        """Apply the ClosedLedger byte-accounting rules to a line containing 'bytes'."""
+        # Trivial moves ("Moving #N to level-L ... bytes" from db_impl_compaction_flush.cc)
+        # re-parent files without I/O; the 'flush' in the source file name must not count them
+        if 'Moving #' in line or 'Moved #' in line:
+            return
+
+        if 'WAL write' in line:
+            match = _BYTES_RE.search(line)
+            if match:
+                counters['wal_bytes'] += int(match.group(1))
+            return
+
+        lower = line.lower()
+        if 'flush' in lower:
+            match = _BYTES_RE.search(line)
+            if match:
+                counters['flush_bytes'] += int(match.group(1))
+        elif 'compaction' in lower:
+            read_match = _BYTES_READ_RE.search(line)
+            if read_match:
+                counters['compaction_read_bytes'] += int(read_match.group(1))
+            write_match = _BYTES_WRITTEN_RE.search(line)
+            if write_match:
+                counters['compaction_write_bytes'] += int(write_match.group(1))
+        elif 'user write' in lower:
+            match = _BYTES_RE.search(line)
+            if match:
+                counters['user_write_bytes'] += int(match.group(1))
+
+    def _on_flush(self, line: str, timestamp: Optional[str], result: ParsedLog):
+        match = _FLUSH_RE.search(line)
+        if match:
+            job, cf = _job_and_cf(line)
+            result.flushes.append(FlushEvent(
+                timestamp, job, cf, int(match.group(1)), int(match.group(2))
+            ))
+
+    def _on_compaction_start(self, line: str, timestamp: Optional[str], result: ParsedLog):
+        match = _COMPACTING_RE.search(line)
+        if match:
+            inputs = [(int(count), int(level)) for count, level in _INPUT_RE.findall(match.group(1))]
+            job, cf = _job_and_cf(line)
+            result.compaction_starts.append(CompactionStartEvent(
+                timestamp, job, cf,
+                min(level for _, level in inputs),
+                int(match.group(2)),
+                sum(count for count, _ in inputs),
+                float(match.group(3))
+            ))
+
+    def _on_compaction_finish(self, line: str, timestamp: Optional[str], result: ParsedLog):
+        match = _COMPACTED_RE.search(line)
+        if match:
+            records = _RECORDS_RE.search(line)
+            job, cf = _job_and_cf(line)
+            result.compaction_finishes.append(CompactionFinishEvent(
+                timestamp, job, cf,
+                int(match.group(4)),
+                tuple(int(x) for x in match.group(1).split()),
+                float(match.group(2)),
+                float(match.group(3)),
+                float(match.group(5)),
+                float(match.group(6)),
+                float(match.group(7)),
+                float(match.group(8)),
+                float(match.group(9)),
+                int(records.group(1)) if records else 0,
+                int(records.group(2)) if records else 0
+            ))
+
+    def _on_moved(self, line: str, timestamp: Optional[str], result: ParsedLog):
+        match = _MOVED_RE.search(line)
+        if match:
+            job, cf = _job_and_cf(line)
+            result.moves.append(TrivialMoveEvent(
+                timestamp, 0, job, cf, int(match.group(2)), int(match.group(1)), int(match.group(3))
+            ))
+
+    def _on_stall(self, line: str, timestamp: Optional[str], result: ParsedLog):
+        kind = 'stop' if 'Stopping writes' in line else 'stall'
+        reason, value = 'other', 0.0
+
+        match = _STALL_L0_RE.search(line)
+        if match:
+            reason, value = 'level0_files', float(match.group(1))
+        else:
+            match = _STALL_MEMTABLE_RE.search(line)
+            if match:
+                reason, value = 'memtables', float(match.group(1))
+            else:
+                match = _STALL_PENDING_RE.search(line)
+                if match:
+                    reason, value = 'pending_compaction_bytes', float(match.group(1))
+
+        rate_match = _STALL_RATE_RE.search(line)
+        _, cf = _job_and_cf(line)
+        result.stalls.append(StallEvent(
+            timestamp, cf, kind, reason, value, int(rate_match.group(1)) if rate_match else 0
+        ))
+
+    # EVENT_LOG_v1 handling: the event name is read with a plain string scan
+    # so that JSON is only decoded for the record types we keep.
+
+    def _on_event_log(self, line: str, timestamp: Optional[str], result: ParsedLog):
+        name_start = line.find(_EVENT_NAME_KEY)
+        if name_start < 0:
+            return
+        name_start += len(_EVENT_NAME_KEY)
+        handler = self._event_handlers.get(line[name_start:line.find('"', name_start)])
+        if handler is None:
+            return
+
+        try:
+            payload = json.loads(line[line.index('{', line.index(EVENT_LOG_MARKER)):])
+        except ValueError:
+            # Truncated record (e.g. LOG cut while writing)
+            return
+        handler(payload, timestamp, result)
+
+    def _on_flush_started(self, event: Dict, timestamp: Optional[str], result: ParsedLog):
+        result.flushes_started.append(FlushStartedEvent(
+            timestamp,
+            event.get('time_micros', 0),
+            event.get('job', -1),
+            event.get('cf_name', ''),
+            event.get('num_entries', 0),
+            event.get('total_data_size', 0),
+            event.get('memory_usage', 0),
+            event.get('flush_reason', '')
+        ))
+
+    def _on_flush_finished(self, event: Dict, timestamp: Optional[str], result: ParsedLog):
+        result.flushes_finished.append(FlushFinishedEvent(
+            timestamp,
+            event.get('time_micros', 0),
+            event.get('job', -1),
+            event.get('cf_name', ''),
+            tuple(event.get('lsm_state', ())),
+            event.get('immutable_memtables', 0)
+        ))
+
+    def _on_compaction_started(self, event: Dict, timestamp: Optional[str], result: ParsedLog):
+        input_files = tuple(sorted(
+            (int(key[len(_FILES_KEY_PREFIX):]), len(files))
+            for key, files in event.items() if key.startswith(_FILES_KEY_PREFIX)
+        ))
+        result.compactions_started.append(CompactionStartedEvent(
+            timestamp,
+            event.get('time_micros', 0),
+            event.get('job', -1),
+            event.get('cf_name', ''),
+            event.get('compaction_reason', ''),
+            input_files,
+            float(event.get('score', 0.0)),
+            event.get('input_data_size', 0)
+        ))
+
+    def _on_compaction_finished(self, event: Dict, timestamp: Optional[str], result: ParsedLog):
+        result.compactions_finished.append(CompactionFinishedEvent(
+            timestamp,
+            event.get('time_micros', 0),
+            event.get('job', -1),
+            event.get('cf_name', ''),
+            event.get('output_level', -1),
+            event.get('compaction_time_micros', 0),
+            event.get('compaction_time_cpu_micros', 0),
+            event.get('num_output_files', 0),
+            event.get('total_output_size', 0),
+            event.get('num_input_records', 0),
+            event.get('num_output_records', 0),
+            tuple(event.get('lsm_state', ()))
+        ))
+
+    def _on_table_file_creation(self, event: Dict, timestamp: Optional[str], result: ParsedLog):
+        properties = event.get('table_properties', {})
+        result.table_files.append(TableFileCreationEvent(
+            timestamp,
+            event.get('time_micros', 0),
+            event.get('job', -1),
+            event.get('cf_name', ''),
+            event.get('file_number', 0),
+            event.get('file_size', 0),
+            properties.get('data_size', 0),
+            properties.get('num_entries', 0)
+        ))
+
+    def _on_trivial_move(self, event: Dict, timestamp: Optional[str], result: ParsedLog):
+        result.trivial_moves.append(TrivialMoveEvent(
+            timestamp,
+            event.get('time_micros', 0),
+            event.get('job', -1),
+            event.get('cf_name', ''),
+            event.get('destination_level', -1),
+            event.get('files', 0),
+            event.get('total_files_size', 0)
+        ))
+
+    # Stats dump handling: the fields of one dump are spread over several
+    # lines and collected into a pending record until the next dump starts.
+
+    def _dump(self, timestamp: Optional[str]) -> Dict:
+        """Get the pending stats dump, starting one if needed."""
+        if self._pending_dump is None:
+            self._pending_dump = {field: 0 for field in StatsDumpEvent._fields}
+            self._pending_dump['timestamp'] = timestamp
+        return self._pending_dump
+
+    def _finish_dump(self, result: ParsedLog):
+        """Emit the pending stats dump, if any."""
+        if self._pending_dump is not None:
+            result.stats_dumps.append(StatsDumpEvent(**self._pending_dump))
+            self._pending_dump = None
+
+    def _on_dump_start(self, line: str, timestamp: Optional[str], result: ParsedLog):
+        self._finish_dump(result)
+        self._dump(timestamp)
+
+    def _on_uptime(self, line: str, timestamp: Optional[str], result: ParsedLog):
+        match = _UPTIME_RE.search(line)
+        dump = self._dump(timestamp)
+        # DB stats come first; per-CF uptime lines repeat the same value
+        if match and not dump['uptime_s']:
+            dump['uptime_s'] = float(match.group(1))
+
+    def _on_cumulative_writes(self, line: str, timestamp: Optional[str], result: ParsedLog):
+        match = _CUM_WRITES_RE.search(line)
+        if match:
+            dump = self._dump(timestamp)
+            dump['cumulative_writes'] = parse_count(match.group(1))
+            dump['cumulative_keys'] = parse_count(match.group(2))
+            dump['ingest_gb'] = float(match.group(3))
+            dump['ingest_mb_s'] = float(match.group(4))
+
+    def _on_cumulative_wal(self, line: str, timestamp: Optional[str], result: ParsedLog):
+        match = _CUM_WAL_RE.search(line)
+        if match:
+            self._dump(timestamp)['wal_written_gb'] = float(match.group(1))
+
+    def _on_stall_time(self, line: str, timestamp: Optional[str], result: ParsedLog):
+        match = _STALL_TIME_RE.search(line)
+        if match:
+            prefix = 'cumulative' if 'Cumulative stall:' in line else 'interval'
+            dump = self._dump(timestamp)
+            dump[f'{prefix}_stall_s'] = _hms_to_seconds(match.group(1), match.group(2), match.group(3))
+            dump[f'{prefix}_stall_pct'] = float(match.group(4))
+
+    def _on_flush_gb(self, line: str, timestamp: Optional[str], result: ParsedLog):
+        match = _FLUSH_GB_RE.search(line)
+        if match:
+            # One line per column family; sum them for DB-wide totals
+            dump = self._dump(timestamp)
+            dump['flush_cumulative_gb'] += float(match.group(1))
+            dump['flush_interval_gb'] += float(match.group(2))
+
+    def _on_cumulative_compaction(self, line: str, timestamp: Optional[str], result: ParsedLog):
+        match = _CUM_COMPACTION_RE.search(line)
+        if match:
+            dump = self._dump(timestamp)
+            dump['compaction_write_gb'] += float(match.group(1))
+            dump['compaction_read_gb'] += float(match.group(2))
+            dump['compaction_seconds'] += float(match.group(3))
+
+
+def _is_timestamp_at(buffer, pos: int) -> bool:
+    """Check whether a line starting at pos of a byte buffer has a timestamp prefix."""
+    return (pos + TIMESTAMP_WIDTH < len(buffer)
+            and buffer[pos + 4] == ord('/') and buffer[pos + 10] == ord('-'))
+
+
+def chunk_boundaries(buffer, chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> List[Tuple[int, int]]:
+    """
+    Split a LOG buffer into byte ranges that start at timestamped lines.
+
+    Continuation lines therefore never start a chunk, and every chunk knows
+    the timestamp of its first line.
+
+    Args:
+        buffer: LOG contents (bytes or mmap)
+        chunk_bytes: Target chunk size in bytes
+
+    Returns:
+        List of (start, end) byte offsets covering the whole buffer
+    """
+    size = len(buffer)
+    boundaries = [0]
+
+    target = chunk_bytes
+    while target < size:
+        pos = buffer.find(b'\n', target)
+        while pos != -1 and not _is_timestamp_at(buffer, pos + 1):
+            pos = buffer.find(b'\n', pos + 1)
+        if pos == -1:
+            break
+        boundaries.append(pos + 1)
+        target = boundaries[-1] + chunk_bytes
+
+    boundaries.append(size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def _decode_lines(data: bytes) -> List[str]:
+    """Decode a chunk like text-mode file iteration (universal newlines)."""
+    text = data.decode('utf-8', errors='replace')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    lines = text.split('\n')
+    if lines[-1] == '':
+        lines.pop()
+    return lines
+
+
+def _parse_chunk(log_path: str, start: int, end: int) -> ParsedLog:
+    """Process-pool worker: parse the byte range [start, end) of a LOG."""
+    with open(log_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            lines = _decode_lines(buffer[start:end])
+    return LogParser().parse_chunk(lines, first=(start == 0))
+
+
+def parse_log_parallel(log_path: str, workers: Optional[int] = None,
+                       chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> ParsedLog:
+    """
+    Parse a large LOG file in chunks on a process pool.
+
+    The file is mmap'd and split at timestamped lines; chunk results are
+    merged in LOG order, so the result equals LogParser().parse_file().
+
+    Args:
+        log_path: Path to RocksDB LOG file (other sources fall back to a serial parse)
+        workers: Number of worker processes (default: CPU count)
+        chunk_bytes: Target chunk size in bytes
+
+    Returns:
+        ParsedLog with events and counters
+    """
+    # Rotated or compressed LOGs are streamed serially
+    if not LogSource(log_path).is_plain_file or os.path.getsize(log_path) == 0:
+        return LogParser().parse_file(log_path)
+
+    with open(log_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            ranges = chunk_boundaries(buffer, chunk_bytes)
+
+    if len(ranges) == 1 or workers == 1:
+        return LogParser().parse_file(log_path)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunks = list(pool.map(_parse_chunk, [log_path] * len(ranges),
+                               [start for start, _ in ranges], [end for _, end in ranges]))
+
+    return LogParser().merge_chunks(chunks)
+
+
+class LogFollower:
+    """
+    Incremental reader of a growing RocksDB LOG.
+
+    Remembers the inode and byte offset of the last complete line read, so
+    each call to read_new() parses only the bytes appended since. When
+    RocksDB rotates the LOG to LOG.old.<micros>, the rest of the rotated file
+    is read before the new LOG.
+    """
+
+    def __init__(self, log_path: str, inode: Optional[int] = None, offset: int = 0,
+                 block_bytes: int = DEFAULT_CHUNK_BYTES):
+        """
+        Initialize the follower.
+
+        Args:
+            log_path: Path to the live RocksDB LOG file
+            inode: Inode of the file the offset refers to (None = not read yet)
+            offset: Byte offset just after the last parsed line
+            block_bytes: Read block size in bytes
+        """
+        self.log_path = str(log_path)
+        self.inode = inode
+        self.offset = offset
+        self.block_bytes = block_bytes
+
+    @classmethod
+    def from_state(cls, state: Dict) -> "LogFollower":
+        """Restore a follower from state()."""
+        return cls(state['log_path'], inode=state.get('inode'), offset=state.get('offset', 0))
+
+    def state(self) -> Dict:
+        """Get the resumable position (JSON serializable)."""
+        return {'log_path': self.log_path, 'inode': self.inode, 'offset': self.offset}
+
+    def read_new(self) -> ParsedLog:
+        """
+        Parse the lines appended since the last call.
+
+        A trailing line without newline is left for the next call.
+
+        Returns:
+            ParsedLog of the new lines only
+        """
+        result = ParsedLog()
+
+        try:
+            f = open(self.log_path, 'rb')
+        except FileNotFoundError:
+            # Between the rename and the creation of the new LOG
+            return result
+
+        with f:
+            stat = os.fstat(f.fileno())
+
+            if self.inode is not None and stat.st_ino != self.inode:
+                for rotated_path, offset in self._rotated_files():
+                    with open(rotated_path, 'rb') as rotated:
+                        result.merge(self._read(rotated, offset, complete_only=False))
+                self.offset = 0
+            elif stat.st_size < self.offset:
+                warnings.warn(f"{self.log_path} was truncated; reading it from the start",
+                              UserWarning)
+                self.offset = 0
+
+            self.inode = stat.st_ino
+            result.merge(self._read(f, self.offset, complete_only=True))
+
+        return result
+
+    def _rotated_files(self) -> List[Tuple[str, int]]:
+        """
+        Find the unread parts of rotated LOG files.
+
+        Returns:
+            (path, start offset) of the file we were reading, followed by any
+            files rotated after it, oldest first
+        """
+        pattern = os.path.join(glob.escape(os.path.dirname(self.log_path) or '.'),
+                               glob.escape(os.path.basename(self.log_path)) + '.old.*')
+        rotated = sorted(glob.glob(pattern), key=os.path.getmtime)
+
+        for i, path in enumerate(rotated):
+            if os.stat(path).st_ino == self.inode:
+                return [(path, self.offset)] + [(newer, 0) for newer in rotated[i + 1:]]
+
+        warnings.warn(f"Rotated file of {self.log_path} (inode {self.inode}) not found; "
+                      f"lines after offset {self.offset} are lost", UserWarning)
+        return []
+
+    def _read(self, f, offset: int, complete_only: bool) -> ParsedLog:
+        """Parse an open file from offset, advancing self.offset for the live LOG."""
+        f.seek(offset)
+
+        def lines():
+            carry = b''
+            while True:
+                block = f.read(self.block_bytes)
+                if not block:
+                    break
+                data = carry + block
+                end = data.rfind(b'\n') + 1
+                carry = data[end:]
+                if end:
+                    if complete_only:
+                        self.offset += end
+                    yield from _decode_lines(data[:end])
+            if carry and not complete_only:
+                yield from _decode_lines(carry)
+
+        if complete_only:
+            self.offset = offset
+        return LogParser().parse_lines(lines())
+
+
+def parse_log_file(log_path: str, workers: int = 1) -> ParsedLog:
+    """
+    Parse a RocksDB LOG file with a fresh LogParser.
+
+    Args:
+        log_path: Path to RocksDB LOG file, or a directory/glob of LOG files
+        workers: Number of worker processes (1 = serial, None = CPU count)
+
+    Returns:
+        ParsedLog with events and counters
+    """
+    if workers == 1:
+        return LogParser().parse_file(log_path)
+    return parse_log_parallel(log_path, workers=workers)
+
+
+def main():
+    """Parse a LOG file and print event counts."""
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Parse a RocksDB LOG file')
+    parser.add_argument('log_path', help='Path to RocksDB LOG file')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Worker processes for chunked parsing (0 = CPU count)')
+
+    args = parser.parse_args()
+
+    start = time.time()
+    parsed = parse_log_file(args.log_path, workers=args.workers or None)
+    elapsed = time.time() - start
+
+    print(f"Parsed {args.log_path} in {elapsed:.2f}s")
+    for key, value in parsed.summary().items():
+        print(f"  {key}: {value}")
+    print("Ledger counters:")
+    for key in LEDGER_COUNTERS:
+        print(f"  {key}: {parsed.counters[key]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+PutModel v4: RocksDB LOG Source
+
+This module implements a single streaming view over the LOG files of a run.
+A directory, glob or file list is resolved to segments (LOG, LOG.old.<ts>,
+compressed archives), ordered by their first timestamp and read as one line
+iterator without decompressing anything to disk.
+
+Key Features:
+- gzip/xz/bz2 detection from magic bytes (standard library codecs)
+- Segment ordering by first timestamp
+- Lazy k-way merge of overlapping segments by timestamp
+- Continuation lines (stats dumps) stay attached to their timestamped line
+"""
+
+import bz2
+import glob
+import gzip
+import heapq
+import io
+import lzma
+import os
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple, Union
+
+
+# Timestamp prefix: 2025/09/12-10:00:00.123456
+TIMESTAMP_WIDTH = 26
+
+# Magic bytes of the supported compression formats
+_MAGIC = (
+    (b'\x1f\x8b', 'gzip'),
+    (b'\xfd7zXZ\x00', 'xz'),
+    (b'BZh', 'bz2'),
+)
+
+_OPENERS = {
+    'gzip': gzip.open,
+    'xz': lzma.open,
+    'bz2': bz2.open,
+}
+
+# Default file name pattern inside a run directory (LOG, LOG.old.*, <db>_LOG*)
+DEFAULT_PATTERN = '*LOG*'
+
+# Lines scanned for the first timestamp of a segment
+_PROBE_LINES = 1000
+
+# Merge key of segments without timestamps (sorts after every timestamp)
+_LAST_KEY = '~'
+
+
+def line_timestamp(line: str) -> Optional[str]:
+    """Get the timestamp prefix of a LOG line (None for continuation lines)."""
+    if len(line) > TIMESTAMP_WIDTH and line[4] == '/' and line[10] == '-':
+        return line[:TIMESTAMP_WIDTH]
+    return None
+
+
+def detect_compression(path: str) -> Optional[str]:
+    """
+    Detect the compression of a file from its magic bytes.
+
+    Args:
+        path: File path
+
+    Returns:
+        'gzip', 'xz', 'bz2' or None for plain text
+    """
+    with open(path, 'rb') as f:
+        head = f.read(6)
+    for magic, name in _MAGIC:
+        if head.startswith(magic):
+            return name
+    return None
+
+
+class LogSegment:
+    """One LOG file (plain or compressed) of a run."""
+
+    def __init__(self, path: str):
+        """
+        Initialize a segment.
+
+        Args:
+            path: Path to the LOG file
+        """
+        self.path = str(path)
+        self.compression = detect_compression(self.path)
+        self._first_timestamp = None
+        self._probed = False
+
+    def open(self) -> io.TextIOBase:
+        """Open the segment as a text stream (decompressing on the fly)."""
+        if self.compression is None:
+            return open(self.path, 'r', errors='replace')
+        return _OPENERS[self.compression](self.path, 'rt', errors='replace')
+
+    @property
+    def first_timestamp(self) -> Optional[str]:
+        """Timestamp of the first timestamped line (None if there is none near the start)."""
+        if not self._probed:
+            with self.open() as f:
+                for _, line in zip(range(_PROBE_LINES), f):
+                    self._first_timestamp = line_timestamp(line)
+                    if self._first_timestamp:
+                        break
+            self._probed = True
+        return self._first_timestamp
+
+    def __repr__(self) -> str:
+        return f"LogSegment({self.path!r}, compression={self.compression}, first={self.first_timestamp})"
+
+
+def _records(lines: Iterator[str], default_key: str) -> Iterator[Tuple[str, List[str]]]:
+    """Group each timestamped line with its continuation lines."""
+    key, record = default_key, []
+    for line in lines:
+        if len(line) > TIMESTAMP_WIDTH and line[4] == '/' and line[10] == '-':
+            if record:
+                yield key, record
+            key, record = line[:TIMESTAMP_WIDTH], [line]
+        else:
+            record.append(line)
+    if record:
+        yield key, record
+
+
+class LogSource:
+    """
+    Streaming line iterator over the LOG segments of a run.
+
+    Segments are ordered by first timestamp. A segment is opened only when
+    the merge reaches its first timestamp, so non-overlapping segments are
+    read one after the other, and overlapping ones are merged record by
+    record (ties keep segment order).
+    """
+
+    def __init__(self, paths: Union[str, Path, Sequence[Union[str, Path]]], pattern: str = DEFAULT_PATTERN):
+        """
+        Initialize the LOG source.
+
+        Args:
+            paths: LOG file, directory, glob pattern or a list of these
+            pattern: File name pattern used for directories
+
+        Raises:
+            FileNotFoundError: If no LOG file matches
+        """
+        if isinstance(paths, (str, Path)):
+            paths = [paths]
+
+        files = []
+        for path in paths:
+            path = str(path)
+            if os.path.isdir(path):
+                files.extend(p for p in glob.glob(os.path.join(glob.escape(path), pattern))
+                             if os.path.isfile(p))
+            elif glob.has_magic(path):
+                files.extend(p for p in glob.glob(path) if os.path.isfile(p))
+            elif os.path.isfile(path):
+                files.append(path)
+            else:
+                raise FileNotFoundError(f"LOG file not found: {path}")
+
+        files = sorted(set(files))
+        if not files:
+            raise FileNotFoundError(f"No LOG files found in {', '.join(map(str, paths))}")
+
+        self.segments = [LogSegment(f) for f in files]
+        if len(self.segments) > 1:
+            # Segments without any timestamp carry no events; keep them last
+            self.segments.sort(key=lambda s: (s.first_timestamp is None, s.first_timestamp or '', s.path))
+        self._open_files = []
+
+    @property
+    def is_plain_file(self) -> bool:
+        """Whether the source is a single uncompressed file (usable with mmap)."""
+        return len(self.segments) == 1 and self.segments[0].compression is None
+
+    def __iter__(self) -> Iterator[str]:
+        return self.lines()
+
+    def __enter__(self) -> "LogSource":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Close segments left open by an unfinished iteration."""
+        for f in self._open_files:
+            f.close()
+        self._open_files = []
+
+    def lines(self) -> Iterator[str]:
+        """
+        Iterate over all lines of the run in time order.
+
+        Yields:
+            LOG lines with trailing newline
+        """
+        if len(self.segments) == 1:
+            yield from self._read(self.segments[0])
+            return
+
+        pending = list(self.segments)
+        heap = []
+        order = 0
+
+        def push(segment, seq):
+            records = _records(self._read(segment), segment.first_timestamp or _LAST_KEY)
+            for key, record in records:
+                heapq.heappush(heap, (key, seq, record, records))
+                return
+
+        while pending or heap:
+            # Open every segment that starts before the oldest buffered record
+            while pending and (not heap or (pending[0].first_timestamp or _LAST_KEY) <= heap[0][0]):
+                push(pending.pop(0), order)
+                order += 1
+            if not heap:
+                continue
+
+            key, seq, record, records = heap[0]
+            yield from record
+            following = next(records, None)
+            if following is None:
+                heapq.heappop(heap)
+            else:
+                heapq.heapreplace(heap, (following[0], seq, following[1], records))
+
+    def _read(self, segment: LogSegment) -> Iterator[str]:
+        """Read one segment, tracking the open file for close()."""
+        f = segment.open()
+        self._open_files.append(f)
+        try:
+            yield from f
+        finally:
+            f.close()
+            if f in self._open_files:
+                self._open_files.remove(f)
+
+
+def open_log(paths: Union[str, Path, Sequence[Union[str, Path]]], pattern: str = DEFAULT_PATTERN) -> LogSource:
+    """
+    Open LOG files for line iteration; a drop-in for open(log_file, 'r').
+
+    Args:
+        paths: LOG file, directory, glob pattern or a list of these
+        pattern: File name pattern used for directories
+
+    Returns:
+        LogSource (iterable, usable as a context manager)
+    """
+    return LogSource(paths, pattern)
+
+
+def main():
+    """List the segments of a LOG source in read order."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='List RocksDB LOG segments in time order')
+    parser.add_argument('paths', nargs='+', help='LOG files, directories or glob patterns')
+    parser.add_argument('--pattern', default=DEFAULT_PATTERN, help='File name pattern for directories')
+    parser.add_argument('--count', action='store_true', help='Count lines of the merged stream')
+
+    args = parser.parse_args()
+
+    source = LogSource(args.paths, args.pattern)
+    for segment in source.segments:
+        print(f"{segment.first_timestamp or '-':26s}  {segment.compression or 'plain':5s}  {segment.path}")
+
+    if args.count:
+        print(f"Lines: {sum(1 for _ in source)}")
+
+
+if __name__ == "__main__":
+    main()
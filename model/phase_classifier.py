@@ -0,0 +1,342 @@
+"""
+PutModel v4: Live Phase Classifier
+
+This module labels a running workload with its put-model phase (initial,
+middle or final, the phases of the V5 predictors) from live samples.
+Rolling features over a fixed window are kept with running sums, and a
+left-to-right forward filter over the three phases turns them into a phase
+and a confidence, so every sample costs O(1) work and no history has to be
+re-analyzed.
+
+Each phase has a feature profile; a sample's evidence for a phase is the
+Gaussian log-likelihood of the current features under its profile, and
+the filter's transitions only advance (initial -> middle -> final), with
+an expected number of samples per phase. The filter's most likely phase
+can still move back on noisy evidence, so the reported phase is kept
+monotone with hysteresis: it advances only after the later phases have
+held most of the probability for several samples in a row, and never
+moves back.
+
+Key Features:
+- O(1) rolling mean, standard deviation and OLS slope (ring buffer, running sums)
+- Features: put-rate CV, relative put-rate slope, WA trend, mean L0 file count
+- Forward filter over initial/middle/final with phase probabilities
+- Monotone reported phase with a confidence threshold and a confirmation streak
+- Missing features (no WA or L0 samples) are left out of the evidence
+- Replay of recorded series (run) with the same per-sample updates
+"""
+
+import math
+import numpy as np
+import pandas as pd
+from typing import Dict, NamedTuple, Optional
+
+PHASES = ('initial', 'middle', 'final')
+
+# Feature profile of each phase: put-rate CV over the window, put-rate change
+# over the window relative to its mean, WA change over the window and mean
+# L0 file count. CVs follow the Phase-B segments (0.54 / 0.20 / 0.04).
+PHASE_PROFILES = {
+    'initial': {'cv': 0.5, 'throughput_slope': -0.3, 'wa_trend': 0.3, 'l0_files': 2.0},
+    'middle': {'cv': 0.2, 'throughput_slope': -0.05, 'wa_trend': 0.1, 'l0_files': 6.0},
+    'final': {'cv': 0.04, 'throughput_slope': 0.0, 'wa_trend': 0.0, 'l0_files': 4.0},
+}
+
+# Spread of each feature around a profile
+FEATURE_SCALES = {'cv': 0.1, 'throughput_slope': 0.1, 'wa_trend': 0.1, 'l0_files': 3.0}
+
+
+class RollingStats:
+    """
+    Mean, standard deviation and OLS slope of the last `window` values.
+
+    Values are kept in a ring buffer with running sums of y, y^2 and x*y
+    (x = position in the window), so push() and the statistics are O(1).
+    The sums are recomputed from the buffer once per window to bound
+    floating-point drift.
+    """
+
+    def __init__(self, window: int):
+        """
+        Initialize the window.
+
+        Args:
+            window: Number of values kept (>= 2)
+        """
+        if window < 2:
+            raise ValueError("window must be at least 2")
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        """Drop all values."""
+        self._values = [0.0] * self.window
+        self._head = 0
+        self.count = 0
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._sum_xy = 0.0
+        self._pushes = 0
+
+    def push(self, value: float):
+        """Append a value, dropping the oldest one when the window is full."""
+        value = float(value)
+        if self.count == self.window:
+            oldest = self._values[self._head]
+            self._sum -= oldest
+            self._sum_sq -= oldest * oldest
+            # The oldest value sat at x = 0; the others move one position left
+            self._sum_xy -= self._sum
+            self.count -= 1
+        self._sum_xy += self.count * value
+        self._sum += value
+        self._sum_sq += value * value
+        self._values[self._head] = value
+        self._head = (self._head + 1) % self.window
+        self.count += 1
+
+        self._pushes += 1
+        if self._pushes % self.window == 0:
+            self._resync()
+
+    def values(self) -> np.ndarray:
+        """Values in the window, oldest first."""
+        order = (self._head - self.count + np.arange(self.count)) % self.window
+        return np.asarray(self._values)[order]
+
+    def _resync(self):
+        values = self.values()
+        self._sum = float(values.sum())
+        self._sum_sq = float(values @ values)
+        self._sum_xy = float(np.arange(len(values)) @ values)
+
+    @property
+    def mean(self) -> float:
+        return self._sum / self.count if self.count else math.nan
+
+    @property
+    def std(self) -> float:
+        """Population standard deviation."""
+        if not self.count:
+            return math.nan
+        return math.sqrt(max(self._sum_sq / self.count - self.mean ** 2, 0.0))
+
+    @property
+    def slope(self) -> float:
+        """OLS slope per position (NaN with fewer than two values)."""
+        n = self.count
+        if n < 2:
+            return math.nan
+        sum_x = n * (n - 1) / 2
+        sum_xx = (n - 1) * n * (2 * n - 1) / 6
+        return (n * self._sum_xy - sum_x * self._sum) / (n * sum_xx - sum_x * sum_x)
+
+
+class PhaseEstimate(NamedTuple):
+    """Phase of the current sample with its confidence."""
+    phase: str
+    confidence: float
+    probabilities: Dict[str, float]
+    features: Dict[str, float]
+    samples: int
+
+
+class PhaseClassifier:
+    """
+    Incremental initial/middle/final phase classifier.
+
+    Feed one sample per stats interval with update(); the estimate uses the
+    last `window` samples and the filtered phase probabilities of all
+    earlier ones. The reported phase never moves back within a run; start
+    a new run (DB reopened or wiped) with reset().
+    """
+
+    def __init__(self, window: int = 60, expected_samples: float = 500.0,
+                 start_phase: Optional[str] = 'initial', evidence_weight: float = 0.2,
+                 min_samples: Optional[int] = None, profiles: Optional[Dict[str, Dict[str, float]]] = None,
+                 scales: Optional[Dict[str, float]] = None, advance_confidence: float = 0.8,
+                 confirm_samples: int = 10):
+        """
+        Initialize the classifier.
+
+        Args:
+            window: Samples in the rolling features
+            expected_samples: Expected length of the initial and middle
+                phases in samples (phase advance probability is 1 / this)
+            start_phase: Phase of the first sample (None = unknown, e.g.
+                when attaching to a DB that has been running for a while)
+            evidence_weight: Weight of one sample's log-likelihood; below 1
+                because consecutive windows overlap
+            min_samples: Samples before features are used (default: window // 2)
+            profiles: Feature profile per phase (default: PHASE_PROFILES)
+            scales: Spread per feature (default: FEATURE_SCALES)
+            advance_confidence: Probability of the phases after the reported
+                one needed to advance the reported phase
+            confirm_samples: Consecutive samples above advance_confidence
+                before the reported phase advances
+        """
+        if start_phase is not None and start_phase not in PHASES:
+            raise ValueError(f"Unknown phase {start_phase!r}; expected one of {PHASES}")
+        if expected_samples < 1:
+            raise ValueError("expected_samples must be at least 1")
+        if not 0.5 <= advance_confidence < 1:
+            raise ValueError("advance_confidence must be in [0.5, 1)")
+        if confirm_samples < 1:
+            raise ValueError("confirm_samples must be at least 1")
+        self.window = window
+        self.advance_probability = 1.0 / expected_samples
+        self.start_phase = start_phase
+        self.evidence_weight = evidence_weight
+        self.min_samples = max(2, window // 2 if min_samples is None else min_samples)
+        self.profiles = profiles or PHASE_PROFILES
+        self.scales = scales or FEATURE_SCALES
+        self.advance_confidence = advance_confidence
+        self.confirm_samples = confirm_samples
+        self.throughput = RollingStats(window)
+        self.wa = RollingStats(window)
+        self.l0_files = RollingStats(window)
+        self.reset()
+
+    def reset(self, start_phase: Optional[str] = None):
+        """
+        Forget all samples.
+
+        Args:
+            start_phase: Phase of the next sample (default: the constructor's)
+        """
+        start_phase = start_phase or self.start_phase
+        if start_phase is None:
+            self._probabilities = np.full(len(PHASES), 1.0 / len(PHASES))
+        else:
+            self._probabilities = np.asarray([float(p == start_phase) for p in PHASES])
+        # Reported phase (index into PHASES) and samples the later phases led in a row
+        self._reported = int(np.argmax(self._probabilities))
+        self._streak = 0
+        self.throughput.reset()
+        self.wa.reset()
+        self.l0_files.reset()
+        self.samples = 0
+
+    def features(self) -> Dict[str, float]:
+        """Current rolling features (features without samples are omitted)."""
+        features = {}
+        if self.throughput.count >= self.min_samples and self.throughput.mean > 0:
+            mean = self.throughput.mean
+            features['cv'] = self.throughput.std / mean
+            features['throughput_slope'] = self.throughput.slope * (self.throughput.count - 1) / mean
+        if self.wa.count >= self.min_samples:
+            features['wa_trend'] = self.wa.slope * (self.wa.count - 1)
+        if self.l0_files.count:
+            features['l0_files'] = self.l0_files.mean
+        return features
+
+    def _log_likelihood(self, features: Dict[str, float]) -> np.ndarray:
+        """Weighted Gaussian log-likelihood of the features under each phase profile."""
+        distance = np.zeros(len(PHASES))
+        for i, phase in enumerate(PHASES):
+            profile = self.profiles[phase]
+            for name, value in features.items():
+                if name in profile:
+                    distance[i] += ((value - profile[name]) / self.scales[name]) ** 2
+        return -0.5 * self.evidence_weight * distance
+
+    def update(self, throughput: float, wa: Optional[float] = None,
+               l0_files: Optional[float] = None) -> PhaseEstimate:
+        """
+        Add one sample and return the phase estimate.
+
+        Args:
+            throughput: Put rate of the interval (any unit; CV and slope are relative)
+            wa: Write amplification of the interval
+            l0_files: Number of L0 files at the end of the interval
+
+        Returns:
+            PhaseEstimate of this sample
+        """
+        if throughput is not None and math.isfinite(throughput):
+            self.throughput.push(throughput)
+        if wa is not None and math.isfinite(wa):
+            self.wa.push(wa)
+        if l0_files is not None and math.isfinite(l0_files):
+            self.l0_files.push(l0_files)
+        self.samples += 1
+
+        # Left-to-right transition: stay, or advance to the next phase
+        p = self._probabilities
+        advance = self.advance_probability
+        prior = np.array([p[0] * (1 - advance),
+                          p[0] * advance + p[1] * (1 - advance),
+                          p[1] * advance + p[2]])
+
+        features = self.features()
+        if 'cv' in features:
+            log_likelihood = self._log_likelihood(features)
+            posterior = prior * np.exp(log_likelihood - log_likelihood.max())
+            total = posterior.sum()
+            # Evidence incompatible with every reachable phase: keep the prior
+            self._probabilities = posterior / total if total > 0 else prior
+        else:
+            self._probabilities = prior
+        self._advance_reported()
+        return self.estimate(features)
+
+    def _advance_reported(self):
+        """Move the reported phase forward once the later phases are confirmed."""
+        later = self._probabilities[self._reported + 1:]
+        if later.sum() < self.advance_confidence:
+            self._streak = 0
+            return
+        self._streak += 1
+        if self._streak >= self.confirm_samples:
+            self._reported += 1 + int(np.argmax(later))
+            self._streak = 0
+
+    def estimate(self, features: Optional[Dict[str, float]] = None) -> PhaseEstimate:
+        """
+        Current phase estimate without adding a sample.
+
+        The phase is the reported (monotone) phase; its confidence is the
+        filter probability of that phase.
+        """
+        reported = self._reported
+        return PhaseEstimate(
+            phase=PHASES[reported],
+            confidence=float(self._probabilities[reported]),
+            probabilities=dict(zip(PHASES, self._probabilities.tolist())),
+            features=self.features() if features is None else features,
+            samples=self.samples,
+        )
+
+    def run(self, frame: pd.DataFrame, throughput_column: str = 'write_rate',
+            wa_column: Optional[str] = 'wa', l0_column: Optional[str] = None) -> pd.DataFrame:
+        """
+        Replay a recorded run sample by sample (as update() would see it live).
+
+        Args:
+            frame: One row per stats interval
+            throughput_column: Put-rate column
+            wa_column: WA column (None or missing = not used)
+            l0_column: L0 file count column (None or missing = not used)
+
+        Returns:
+            DataFrame on frame's index with 'phase', 'confidence' and one
+            probability column per phase
+        """
+        def column(name):
+            if name is None or name not in frame:
+                return np.full(len(frame), np.nan)
+            return frame[name].to_numpy(dtype=float)
+
+        throughput, wa, l0_files = column(throughput_column), column(wa_column), column(l0_column)
+        phases = []
+        confidence = np.empty(len(frame))
+        probabilities = np.empty((len(frame), len(PHASES)))
+        for i in range(len(frame)):
+            estimate = self.update(throughput[i], wa[i], l0_files[i])
+            phases.append(estimate.phase)
+            confidence[i] = estimate.confidence
+            probabilities[i] = self._probabilities
+        result = pd.DataFrame({'phase': phases, 'confidence': confidence}, index=frame.index)
+        for i, phase in enumerate(PHASES):
+            result[f'p_{phase}'] = probabilities[:, i]
+        return result
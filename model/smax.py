@@ -0,0 +1,239 @@
+"""
+PutModel v4: Steady-State S_max Bounds
+
+This module evaluates the steady-state put-rate bounds of the v1 model
+(write, read and mixed device bandwidth) over whole design spaces at once.
+Every input is broadcast with NumPy, so a grid of compression ratios,
+write amplifications, device bandwidths and LSM depths is a single call.
+
+Key Features:
+- Per-user device write/read requirements from CR, WA and WAL factor
+- Write, read and mixed (B_eff, eta) bounds with the binding constraint
+- Leveled-compaction WA from size ratio T and active depth
+- Open-grid helper for outer-product sweeps (million-point grids)
+- ops/s conversion for a given average KV size
+"""
+
+import argparse
+import time
+import numpy as np
+from typing import Dict, Optional, Union
+
+ArrayLike = Union[float, np.ndarray]
+
+MIB = 1048576.0
+
+# Binding constraint codes (BOUND_NONE: no finite bound)
+BOUND_NONE = -1
+BOUND_WRITE = 0
+BOUND_READ = 1
+BOUND_MIXED = 2
+BOUND_NAMES = ('write', 'read', 'mixed')
+
+
+def leveled_wa(T: ArrayLike, depth: ArrayLike) -> np.ndarray:
+    """
+    Write amplification of leveled compaction with `depth` levels built.
+
+    Each level below L0 rewrites its input plus alpha = T/(T-1) of its own
+    data, so WA = 1 + depth * (1 + alpha) with the L0 flush counted once.
+
+    Args:
+        T: Level size ratio (> 1)
+        depth: Number of levels below L0 that receive compactions
+
+    Returns:
+        Broadcast WA array
+    """
+    T = np.asarray(T, dtype=np.float64)
+    depth = np.asarray(depth, dtype=np.float64)
+    if np.any(T <= 1.0):
+        raise ValueError("Level size ratio T must be greater than 1")
+    if np.any(depth < 0):
+        raise ValueError("Depth must be non-negative")
+    return 1.0 + depth * (1.0 + T / (T - 1.0))
+
+
+def device_requirements(CR: ArrayLike, WA: ArrayLike,
+                        wal_factor: ArrayLike = 0.0) -> Dict[str, np.ndarray]:
+    """
+    Device bytes written and read per user byte.
+
+    Args:
+        CR: Compression ratio (on-disk/user)
+        WA: Write amplification
+        wal_factor: WAL bytes per user byte
+
+    Returns:
+        Dictionary with w_req and r_req arrays
+    """
+    CR = np.asarray(CR, dtype=np.float64)
+    WA = np.asarray(WA, dtype=np.float64)
+    return {
+        'w_req': CR * WA + wal_factor,
+        'r_req': CR * np.maximum(WA - 1.0, 0.0),
+    }
+
+
+def _bound(capacity: np.ndarray, demand: np.ndarray) -> np.ndarray:
+    """capacity / demand, infinite where there is no demand or no capacity limit."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(demand > 0, capacity / demand, np.inf)
+
+
+def smax_bounds(CR: ArrayLike, WA: Optional[ArrayLike] = None, *,
+                B_w: ArrayLike, B_r: ArrayLike, B_eff: Optional[ArrayLike] = None,
+                eta: ArrayLike = 1.0, wal_factor: ArrayLike = 0.0,
+                T: Optional[ArrayLike] = None, depth: Optional[ArrayLike] = None,
+                avg_kv_bytes: ArrayLike = 1024.0) -> Dict[str, np.ndarray]:
+    """
+    Evaluate the steady-state S_max bounds over broadcast inputs.
+
+    WA is either given directly or derived from (T, depth) with
+    leveled_wa. All arguments broadcast against each other; use grid() to
+    build an outer-product design space.
+
+    Args:
+        CR: Compression ratio (on-disk/user)
+        WA: Write amplification (exclusive with depth)
+        B_w: Write bandwidth (MiB/s)
+        B_r: Read bandwidth (MiB/s)
+        B_eff: Mixed bandwidth (MiB/s); None or <= 0 disables the mixed bound
+        eta: Read weight in the mixed bound
+        wal_factor: WAL bytes per user byte
+        T: Level size ratio, used with depth
+        depth: Active LSM depth (levels below L0)
+        avg_kv_bytes: Average KV size for the ops/s conversion
+
+    Returns:
+        Dictionary of broadcast arrays: s_write, s_read, s_mix, s_max (MiB/s
+        user), binding (BOUND_* code), ops_per_sec, w_req, r_req, WA
+    """
+    if depth is not None:
+        if WA is not None:
+            raise ValueError("Give either WA or (T, depth), not both")
+        if T is None:
+            raise ValueError("T is required when depth is given")
+        WA = leveled_wa(T, depth)
+    elif WA is None:
+        raise ValueError("Either WA or (T, depth) is required")
+
+    req = device_requirements(CR, WA, wal_factor)
+    w_req, r_req = req['w_req'], req['r_req']
+    eta = np.asarray(eta, dtype=np.float64)
+
+    s_write = _bound(np.asarray(B_w, dtype=np.float64), w_req)
+    s_read = _bound(np.asarray(B_r, dtype=np.float64), r_req)
+    if B_eff is None:
+        s_mix = np.full(np.broadcast_shapes(w_req.shape, r_req.shape, eta.shape), np.inf)
+    else:
+        B_eff = np.asarray(B_eff, dtype=np.float64)
+        s_mix = np.where(B_eff > 0, _bound(B_eff, w_req + eta * r_req), np.inf)
+
+    s_write, s_read, s_mix = np.broadcast_arrays(s_write, s_read, s_mix)
+    stacked = np.stack([s_write, s_read, s_mix])
+    s_max = stacked.min(axis=0)
+    binding = np.where(np.isinf(s_max), BOUND_NONE, np.argmin(stacked, axis=0)).astype(np.int8)
+
+    return {
+        's_write': s_write,
+        's_read': s_read,
+        's_mix': s_mix,
+        's_max': s_max,
+        'binding': binding,
+        'ops_per_sec': s_max * MIB / np.asarray(avg_kv_bytes, dtype=np.float64),
+        'w_req': w_req,
+        'r_req': r_req,
+        'WA': np.asarray(WA, dtype=np.float64),
+    }
+
+
+def grid(**axes: ArrayLike) -> Dict[str, np.ndarray]:
+    """
+    Reshape 1-D axes into an open grid for smax_bounds.
+
+    Axis i gets shape (1, ..., n_i, ..., 1) in keyword order, so the
+    result of smax_bounds(**grid(...)) has one dimension per axis.
+
+    Example:
+        smax_bounds(**grid(CR=[0.3, 0.5], WA=np.arange(2, 20)), B_w=1000, B_r=2000)
+    """
+    names = list(axes)
+    arrays = np.ix_(*[np.atleast_1d(np.asarray(axes[n], dtype=np.float64)) for n in names])
+    return dict(zip(names, arrays))
+
+
+def binding_names(binding: np.ndarray) -> np.ndarray:
+    """Map BOUND_* codes to constraint names ('none' for BOUND_NONE)."""
+    names = np.array(BOUND_NAMES + ('none',))
+    return names[np.asarray(binding)]
+
+
+def _parse_axis(text: str) -> np.ndarray:
+    """Parse 'a,b,c' or 'start:stop:step' (stop inclusive) into an array."""
+    if ':' in text:
+        start, stop, step = (float(v) for v in text.split(':'))
+        return np.arange(start, stop + step / 2, step)
+    return np.array([float(v) for v in text.split(',')])
+
+
+def main():
+    """Command-line interface for grid sweeps."""
+    parser = argparse.ArgumentParser(description='Steady-state S_max over a design grid')
+    parser.add_argument('--cr', required=True, help='CR values (a,b,c or start:stop:step)')
+    parser.add_argument('--wa', help='WA values (exclusive with --depth)')
+    parser.add_argument('--T', dest='T', default='10', help='Level size ratio values (with --depth)')
+    parser.add_argument('--depth', help='Active depth values (exclusive with --wa)')
+    parser.add_argument('--bw', required=True, help='Write bandwidth values (MiB/s)')
+    parser.add_argument('--br', required=True, help='Read bandwidth values (MiB/s)')
+    parser.add_argument('--beff', help='Mixed bandwidth values (MiB/s)')
+    parser.add_argument('--eta', default='1.0', help='Read weight values')
+    parser.add_argument('--wal_factor', default='0.0', help='WAL factor values')
+    parser.add_argument('--avg_kv_bytes', type=float, default=1024.0, help='Average KV size')
+    parser.add_argument('--output', help='Output CSV file (flattened grid)')
+
+    args = parser.parse_args()
+
+    axes = {'CR': _parse_axis(args.cr)}
+    if args.depth is not None:
+        axes['T'] = _parse_axis(args.T)
+        axes['depth'] = _parse_axis(args.depth)
+    elif args.wa is not None:
+        axes['WA'] = _parse_axis(args.wa)
+    else:
+        parser.error('one of --wa or --depth is required')
+    axes['B_w'] = _parse_axis(args.bw)
+    axes['B_r'] = _parse_axis(args.br)
+    if args.beff is not None:
+        axes['B_eff'] = _parse_axis(args.beff)
+    axes['eta'] = _parse_axis(args.eta)
+    axes['wal_factor'] = _parse_axis(args.wal_factor)
+
+    start = time.perf_counter()
+    result = smax_bounds(**grid(**axes), avg_kv_bytes=args.avg_kv_bytes)
+    elapsed = time.perf_counter() - start
+
+    s_max = result['s_max']
+    print(f"Grid: {' x '.join(f'{n}[{len(v)}]' for n, v in axes.items())} = {s_max.size:,} points "
+          f"({elapsed * 1000:.1f} ms)")
+    finite = np.isfinite(s_max)
+    if finite.any():
+        print(f"S_max: min {s_max[finite].min():.1f}, median {np.median(s_max[finite]):.1f}, "
+              f"max {s_max[finite].max():.1f} MiB/s")
+    codes, counts = np.unique(result['binding'], return_counts=True)
+    for code, count in zip(codes, counts):
+        print(f"  {binding_names(code)}: {count / s_max.size * 100:.1f}%")
+
+    if args.output:
+        import pandas as pd
+        shape = s_max.shape
+        columns = {name: np.broadcast_to(values, shape).ravel() for name, values in grid(**axes).items()}
+        for key in ('w_req', 'r_req', 's_write', 's_read', 's_mix', 's_max', 'ops_per_sec'):
+            columns[key] = np.broadcast_to(result[key], shape).ravel()
+        columns['binding'] = binding_names(result['binding']).ravel()
+        pd.DataFrame(columns).to_csv(args.output, index=False)
+        print(f"Saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,419 @@
+"""
+PutModel v4: Stall Time Series
+
+This module implements the extraction of write-stall conditions from a
+RocksDB LOG into one row per stats dump interval, and the calibration of the
+V4Simulator stall model (logistic p_stall over the L0 file count) from it.
+
+Key Features:
+- Interval stall time and percent from "Interval stall" (reset-aware)
+- "Stalling writes" / "Stopping writes" events counted per reason
+- Per-reason Stalls(count) counter deltas from the stats dump
+- L0 file count (lsm_state, compaction summaries, stall lines) and pending compaction bytes per interval
+- Logistic stall_threshold / stall_steepness fit by weighted maximum likelihood
+- In-place update of config/v4_simulator_config.yaml
+"""
+
+import re
+import warnings
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .compaction_stats import CompactionStatsSeries
+    from .log_parser import NO_TIMESTAMP, ParsedLog, timestamps_to_datetime64
+except ImportError:
+    # Fallback for direct execution
+    import sys
+    import os
+    sys.path.append(os.path.dirname(__file__))
+    from compaction_stats import CompactionStatsSeries
+    from log_parser import NO_TIMESTAMP, ParsedLog, timestamps_to_datetime64
+
+
+# Stall reasons assigned by LogParser._on_stall
+STALL_REASONS = ('level0_files', 'memtables', 'pending_compaction_bytes', 'other')
+
+# Clipping of stall fractions for the starting point of the stall curve fit
+_MIN_FRACTION = 0.005
+
+# Iteration limit of the stall curve fit
+_MAX_IRLS_ITERATIONS = 100
+
+# p_stall cap of the simulator stall model (V4Simulator._calculate_stall_probability)
+SIMULATOR_STALL_CAP = 0.9
+
+
+def _interval_positions(times_us: np.ndarray, start_us: np.ndarray, end_us: np.ndarray) -> np.ndarray:
+    """Interval of each time (start, end]; -1 for times outside every interval."""
+    position = np.searchsorted(end_us, times_us, side='left')
+    inside = position < len(end_us)
+    inside[inside] &= times_us[inside] > start_us[position[inside]]
+    return np.where(inside, position, -1)
+
+
+class StallSeries:
+    """
+    Stall conditions per stats dump interval.
+
+    Interval i ends at the i-th "DUMPING STATS" and covers the uptime since
+    the previous dump (since DB open for the first dump or after a reopen).
+    """
+
+    def __init__(self, timestamps: Sequence[str], columns: Dict[str, np.ndarray], event_counts: np.ndarray,
+                 counter_names: Sequence[str] = (), counters: Optional[np.ndarray] = None):
+        """
+        Initialize the series.
+
+        Args:
+            timestamps: LOG timestamp of each dump (interval end)
+            columns: Equal-length per-interval arrays (see from_parsed)
+            event_counts: (intervals, 2, reasons) stall/stop event counts
+            counter_names: Names of the Stalls(count) counters
+            counters: (intervals, counters) Stalls(count) deltas
+        """
+        self.timestamps = list(timestamps)
+        self.columns = columns
+        self.event_counts = event_counts
+        self.counter_names = list(counter_names)
+        self.counters = counters if counters is not None else np.zeros((len(event_counts), 0))
+
+    @classmethod
+    def from_parsed(cls, parsed: ParsedLog,
+                    stats: Optional[CompactionStatsSeries] = None) -> "StallSeries":
+        """
+        Build the series from a parsed LOG.
+
+        Args:
+            parsed: ParsedLog from log_parser/log_cache
+            stats: Compaction stats tables of the same LOG, for the
+                Stalls(count) counters and the L0 file count at each dump
+
+        Returns:
+            StallSeries (empty if the LOG has no stats dumps)
+        """
+        dumps = parsed.stats_dumps
+        end_us = parsed.event_times('stats_dumps')
+        keep = end_us != NO_TIMESTAMP
+        dumps = [d for d, k in zip(dumps, keep) if k]
+        end_us = end_us[keep]
+
+        uptime = np.array([d.uptime_s for d in dumps], dtype=np.float64)
+        reset = np.ones(len(dumps), dtype=bool)
+        reset[1:] = uptime[1:] < uptime[:-1]
+        previous = np.concatenate([[0.0], uptime[:-1]])
+        elapsed_s = np.where(reset, uptime, uptime - previous)
+        start_us = end_us - (elapsed_s * 1e6).astype(np.int64)
+
+        stall_s = np.array([d.interval_stall_s for d in dumps], dtype=np.float64)
+        stall_pct = np.array([d.interval_stall_pct for d in dumps], dtype=np.float64)
+
+        # Stall/stop events per reason
+        event_counts = np.zeros((len(dumps), 2, len(STALL_REASONS)))
+        pending = np.full(len(dumps), np.nan)
+        events = parsed.stalls
+        if events and len(dumps):
+            event_us = parsed.event_times('stalls')
+            position = _interval_positions(event_us, start_us, end_us)
+            kind = np.array([e.kind == 'stop' for e in events], dtype=np.int64)
+            reason_index = {reason: i for i, reason in enumerate(STALL_REASONS)}
+            reason = np.array([reason_index.get(e.reason, len(STALL_REASONS) - 1) for e in events])
+            inside = position >= 0
+            np.add.at(event_counts, (position[inside], kind[inside], reason[inside]), 1)
+
+            values = np.array([e.value for e in events])
+            is_pending = inside & (reason == reason_index['pending_compaction_bytes'])
+            np.fmax.at(pending, position[is_pending], values[is_pending])
+
+        l0_mean, l0_max = cls._l0_files(parsed, start_us, end_us)
+
+        columns = {
+            'start_us': start_us,
+            'end_us': end_us,
+            'elapsed_s': elapsed_s,
+            'stall_s': stall_s,
+            'stall_pct': stall_pct,
+            'l0_files_mean': l0_mean,
+            'l0_files_max': l0_max,
+            'pending_compaction_bytes_max': pending,
+        }
+
+        counter_names, counters = (), None
+        if stats is not None and len(stats):
+            row = {t: i for i, t in enumerate(stats.timestamps)}
+            matched = np.array([row.get(d.timestamp, -1) for d in dumps], dtype=np.int64)
+            found = matched >= 0
+            counter_names = stats.stall_names
+            counters = np.full((len(dumps), len(counter_names)), np.nan)
+            counters[found] = stats.stall_deltas()[matched[found]]
+            if 0 in stats.levels:
+                at_dump = np.full(len(dumps), np.nan)
+                at_dump[found] = stats.metric('files')[matched[found], stats.levels.index(0)]
+                columns['l0_files_at_dump'] = at_dump
+
+        return cls([d.timestamp for d in dumps], columns, event_counts, counter_names, counters)
+
+    @classmethod
+    def from_log(cls, log_path: Union[str, Path], workers: int = 1,
+                 with_counters: bool = True) -> "StallSeries":
+        """
+        Build the series from a LOG through the parsed-LOG cache.
+
+        Args:
+            log_path: LOG file, directory or glob
+            workers: Worker processes used when the LOG has to be parsed
+            with_counters: Also read the compaction stats tables (one more pass)
+
+        Returns:
+            StallSeries
+        """
+        try:
+            from .log_cache import load_parsed_log
+        except ImportError:
+            from log_cache import load_parsed_log
+        parsed = load_parsed_log(log_path, workers=workers)
+        stats = CompactionStatsSeries.from_log(log_path) if with_counters else None
+        return cls.from_parsed(parsed, stats)
+
+    @staticmethod
+    def _l0_files(parsed: ParsedLog, start_us: np.ndarray, end_us: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Mean and max L0 file count per interval from every event that reports it."""
+        times: List[np.ndarray] = []
+        counts: List[np.ndarray] = []
+
+        exact = [e for e in parsed.flushes_finished if e.lsm_state] + \
+                [e for e in parsed.compactions_finished if e.lsm_state]
+        if exact:
+            times.append(np.array([e.time_micros for e in exact], dtype=np.int64))
+            counts.append(np.array([e.lsm_state[0] for e in exact], dtype=np.float64))
+
+        summaries = np.array([bool(e.files_per_level) for e in parsed.compaction_finishes], dtype=bool)
+        if summaries.any():
+            times.append(parsed.event_times('compaction_finishes')[summaries])
+            counts.append(np.array([e.files_per_level[0] for e in parsed.compaction_finishes
+                                    if e.files_per_level], dtype=np.float64))
+
+        l0_stalls = np.array([e.reason == 'level0_files' for e in parsed.stalls], dtype=bool)
+        if l0_stalls.any():
+            times.append(parsed.event_times('stalls')[l0_stalls])
+            counts.append(np.array([e.value for e in parsed.stalls if e.reason == 'level0_files'],
+                                   dtype=np.float64))
+
+        mean = np.full(len(end_us), np.nan)
+        peak = np.full(len(end_us), np.nan)
+        if not times or not len(end_us):
+            return mean, peak
+
+        position = _interval_positions(np.concatenate(times), start_us, end_us)
+        values = np.concatenate(counts)
+        inside = position >= 0
+        samples = np.bincount(position[inside], minlength=len(end_us))
+        totals = np.bincount(position[inside], weights=values[inside], minlength=len(end_us))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(samples > 0, totals / samples, np.nan)
+        np.fmax.at(peak, position[inside], values[inside])
+        return mean, peak
+
+    def __len__(self) -> int:
+        return len(self.columns['end_us'])
+
+    def dominant_reason(self) -> np.ndarray:
+        """Reason with the most stall/stop events in each interval ('' if none)."""
+        per_reason = self.event_counts.sum(axis=1)
+        names = np.array(STALL_REASONS + ('',), dtype=object)
+        return names[np.where(per_reason.sum(axis=1) > 0, per_reason.argmax(axis=1), len(STALL_REASONS))]
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Get the series as a DataFrame indexed by interval end (local time).
+
+        Returns:
+            DataFrame with stall time/percent, event counts per kind and
+            reason, dominant reason, L0 files, pending bytes and counters
+        """
+        frame = pd.DataFrame({name: values for name, values in self.columns.items()
+                              if name not in ('start_us', 'end_us')})
+        for k, kind in enumerate(('stall', 'stop')):
+            for r, reason in enumerate(STALL_REASONS):
+                frame[f'{kind}_{reason}'] = self.event_counts[:, k, r].astype(np.int64)
+        frame['dominant_reason'] = self.dominant_reason()
+        for c, name in enumerate(self.counter_names):
+            frame[f'count_{name}'] = self.counters[:, c]
+
+        frame.index = pd.DatetimeIndex(timestamps_to_datetime64(self.timestamps), name='interval_end')
+        return frame
+
+
+def fit_stall_logistic(l0_files: np.ndarray, stall_fraction: np.ndarray,
+                       weights: Optional[np.ndarray] = None,
+                       cap: float = SIMULATOR_STALL_CAP) -> Dict[str, float]:
+    """
+    Fit p_stall = 1 / (1 + exp(-steepness * (N_L0 - threshold))).
+
+    Each interval is treated as its stall seconds out of its elapsed
+    seconds, and the curve is fitted by weighted maximum likelihood
+    (binomial quasi-likelihood, solved by iteratively reweighted least
+    squares). Unlike a regression on the logit of the fraction this needs
+    no clipping, so intervals without any stall pull the curve down by
+    their full weight instead of a clipped floor that flattens the slope.
+    Intervals at or above the simulator's cap are left out.
+
+    Args:
+        l0_files: L0 file count per interval
+        stall_fraction: Fraction of each interval spent stalled (0..1)
+        weights: Length of each interval (e.g. seconds); equal weights if omitted
+        cap: Upper cap of p_stall in the simulator
+
+    Returns:
+        Dictionary with stall_threshold, stall_steepness, r2 (deviance
+        explained) and intervals
+
+    Raises:
+        ValueError: If the data cannot determine a rising logistic curve
+    """
+    x = np.asarray(l0_files, dtype=np.float64)
+    p = np.asarray(stall_fraction, dtype=np.float64)
+    w = np.ones_like(x) if weights is None else np.asarray(weights, dtype=np.float64)
+    # Intervals at or above the cap are saturated in the simulator and say
+    # nothing about the shape of the curve
+    valid = np.isfinite(x) & np.isfinite(p) & np.isfinite(w) & (w > 0) & (p < cap)
+    x, p, w = x[valid], np.clip(p[valid], 0.0, 1.0), w[valid]
+    if len(x) < 3 or np.ptp(x) == 0:
+        raise ValueError("Need at least 3 intervals with different L0 file counts to fit the stall curve")
+    if np.ptp(p) == 0:
+        raise ValueError("Stall fraction is the same in every interval; nothing to fit")
+
+    design = np.column_stack([x, np.ones_like(x)])
+    # Start from the clipped-logit regression, then refine by IRLS
+    start = np.clip(p, _MIN_FRACTION, 1 - _MIN_FRACTION)
+    sqrt_w = np.sqrt(w * start * (1 - start))
+    beta, *_ = np.linalg.lstsq(design * sqrt_w[:, None], np.log(start / (1 - start)) * sqrt_w, rcond=None)
+    for _ in range(_MAX_IRLS_ITERATIONS):
+        eta = design @ beta
+        mu = np.clip(1.0 / (1.0 + np.exp(-eta)), 1e-12, 1 - 1e-12)
+        variance = mu * (1 - mu)
+        sqrt_w = np.sqrt(w * variance)
+        working = eta + (p - mu) / variance
+        updated, *_ = np.linalg.lstsq(design * sqrt_w[:, None], working * sqrt_w, rcond=None)
+        converged = np.all(np.abs(updated - beta) <= 1e-10 * (1 + np.abs(beta)))
+        beta = updated
+        if converged:
+            break
+    else:
+        warnings.warn("Stall curve fit did not converge; the steepness may be unreliable", UserWarning)
+
+    slope, intercept = beta
+    if slope <= 1e-9:
+        raise ValueError(f"Stall fraction does not rise with the L0 file count (slope {slope:.4f})")
+
+    mu = np.clip(1.0 / (1.0 + np.exp(-(design @ beta))), 1e-12, 1 - 1e-12)
+    null = np.average(p, weights=w)
+    deviance = _binomial_deviance(p, mu, w)
+    null_deviance = _binomial_deviance(p, np.full_like(p, null), w)
+    return {
+        'stall_threshold': float(-intercept / slope),
+        'stall_steepness': float(slope),
+        'r2': float(1 - deviance / null_deviance) if null_deviance > 0 else 0.0,
+        'intervals': int(len(x)),
+    }
+
+
+def _binomial_deviance(p: np.ndarray, mu: np.ndarray, w: np.ndarray) -> float:
+    """Weighted binomial deviance of fractions p under fitted probabilities mu."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        stalled = np.where(p > 0, p * np.log(p / mu), 0.0)
+        running = np.where(p < 1, (1 - p) * np.log((1 - p) / (1 - mu)), 0.0)
+    return float(2 * np.sum(w * (stalled + running)))
+
+
+def fit_stall_config(series: StallSeries, l0_column: str = 'l0_files_mean') -> Dict[str, float]:
+    """
+    Calibrate the simulator stall model from a stall series.
+
+    Args:
+        series: StallSeries of a run
+        l0_column: L0 file count column used as regressor
+
+    Returns:
+        See fit_stall_logistic
+    """
+    if l0_column not in series.columns:
+        raise ValueError(f"Unknown L0 column: {l0_column}")
+    x = series.columns[l0_column]
+    if 'l0_files_at_dump' in series.columns and l0_column == 'l0_files_mean':
+        # Intervals without L0 events fall back to the count printed at the dump
+        x = np.where(np.isnan(x), series.columns['l0_files_at_dump'], x)
+    return fit_stall_logistic(x, series.columns['stall_pct'] / 100.0,
+                              weights=series.columns['elapsed_s'])
+
+
+def write_stall_config(config_path: Union[str, Path], threshold: float, steepness: float):
+    """
+    Update stall_threshold / stall_steepness in a simulator YAML config.
+
+    Only the two values are rewritten; comments and layout are kept.
+
+    Args:
+        config_path: Path to v4_simulator_config.yaml
+        threshold: Fitted stall_threshold
+        steepness: Fitted stall_steepness
+    """
+    path = Path(config_path)
+    text = path.read_text()
+    for key, value in (('stall_threshold', threshold), ('stall_steepness', steepness)):
+        pattern = re.compile(rf'^({key}:\s*)([^\s#]+)', re.MULTILINE)
+        if pattern.search(text):
+            text = pattern.sub(lambda m: f'{m.group(1)}{value:.4g}', text, count=1)
+        else:
+            warnings.warn(f"{key} not found in {path}; appended", UserWarning)
+            text = text.rstrip('\n') + f'\n{key}: {value:.4g}\n'
+    path.write_text(text)
+
+
+def main():
+    """Extract the stall series of a LOG and fit the simulator stall model."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='RocksDB stall time series and stall model fit')
+    parser.add_argument('log_path', help='RocksDB LOG file, directory or glob')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes for parsing')
+    parser.add_argument('--output', help='CSV output path for the series')
+    parser.add_argument('--l0_column', default='l0_files_mean',
+                        choices=['l0_files_mean', 'l0_files_max', 'l0_files_at_dump'],
+                        help='L0 file count used for the fit')
+    parser.add_argument('--config_yaml', help='Simulator config to update with the fitted values')
+
+    args = parser.parse_args()
+
+    series = StallSeries.from_log(args.log_path, workers=args.workers)
+    frame = series.to_frame()
+    print(f"Intervals: {len(series)}")
+    if len(series):
+        print(f"Stalled: {frame['stall_s'].sum():.1f} s "
+              f"({frame['stall_s'].sum() / max(frame['elapsed_s'].sum(), 1e-9) * 100:.2f}% of uptime)")
+        print(frame['dominant_reason'].replace('', 'none').value_counts().to_string())
+
+    if args.output:
+        frame.to_csv(args.output)
+        print(f"Saved: {args.output}")
+
+    try:
+        fit = fit_stall_config(series, args.l0_column)
+    except ValueError as e:
+        print(f"Stall model not fitted: {e}")
+        return
+
+    print(f"stall_threshold: {fit['stall_threshold']:.3f}")
+    print(f"stall_steepness: {fit['stall_steepness']:.3f}")
+    print(f"R^2 (deviance): {fit['r2']:.3f} over {fit['intervals']} intervals")
+
+    if args.config_yaml:
+        write_stall_config(args.config_yaml, fit['stall_threshold'], fit['stall_steepness'])
+        print(f"Updated: {args.config_yaml}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ Key Features:
 - Dynamic simulation with time-varying parameters
 - Device envelope integration
 - Per-level capacity modeling
+- Per-level demand/capacity calibration from LOG device I/O
 - Backlog dynamics simulation
 - Comprehensive logging and analysis
 """
@@ -23,14 +24,20 @@ from datetime import datetime
 
 try:
     from .envelope import EnvelopeModel
+    from .envelope_registry import EnvelopeRegistry
     from .closed_ledger import ClosedLedger
+    from .compaction_store import KIND_FLUSH, CompactionStore
+    from .stall_series import SIMULATOR_STALL_CAP
 except ImportError:
     # Fallback for direct execution
     import sys
     import os
     sys.path.append(os.path.dirname(__file__))
     from envelope import EnvelopeModel
+    from envelope_registry import EnvelopeRegistry
     from closed_ledger import ClosedLedger
+    from compaction_store import KIND_FLUSH, CompactionStore
+    from stall_series import SIMULATOR_STALL_CAP
 
 
 class V4Simulator:
@@ -82,6 +89,32 @@ class V4Simulator:
         # Results storage
         self.results = []
         
+    @classmethod
+    def from_registry(cls, registry: EnvelopeRegistry, config: Dict) -> "V4Simulator":
+        """
+        Create a simulator whose envelope is looked up in an envelope registry.
+        
+        The device is selected by the 'model', 'firmware' and 'wear' keys of
+        the 'device' configuration section.
+        
+        Args:
+            registry: Envelope registry instance
+            config: Simulation configuration dictionary
+            
+        Returns:
+            V4Simulator instance
+        """
+        device_config = config.get('device', {})
+        if 'model' not in device_config:
+            raise ValueError("device.model must be set to use an envelope registry")
+        
+        envelope = registry.get(
+            device_model=device_config['model'],
+            firmware=device_config.get('firmware'),
+            wear=device_config.get('wear')
+        )
+        return cls(envelope, config)
+    
     def _initialize_level_parameters(self):
         """Initialize per-level parameters from configuration."""
         # Default parameters for each level
@@ -96,20 +129,25 @@ class V4Simulator:
             if level not in self.level_params:
                 self.level_params[level] = default_params.copy()
     
-    def _estimate_rho_r(self) -> float:
+    def _estimate_rho_r(self, n_l0: Optional[float] = None) -> float:
         """
         Estimate read ratio based on current system state.
         
         This is a heuristic implementation. In practice, this would be
         learned from LOG data or other sources.
         
+        Args:
+            n_l0: L0 file count (default: current simulation state)
+        
         Returns:
             Estimated read ratio (0.0 to 1.0)
         """
+        n_l0 = self.N_L0 if n_l0 is None else n_l0
+        
         # Simple heuristic: higher L0 file count increases read ratio
-        if self.N_L0 > 0:
+        if n_l0 > 0:
             # Logistic function for smooth transition
-            rho_r = 1.0 / (1.0 + np.exp(-0.1 * (self.N_L0 - 10)))
+            rho_r = 1.0 / (1.0 + np.exp(-0.1 * (n_l0 - 10)))
         else:
             rho_r = 0.0
         
@@ -127,7 +165,7 @@ class V4Simulator:
         steepness = self.config.get('stall_steepness', 0.5)
         
         p_stall = 1.0 / (1.0 + np.exp(-steepness * (self.N_L0 - threshold)))
-        return min(p_stall, 0.9)  # Cap at 90% for stability
+        return min(p_stall, SIMULATOR_STALL_CAP)  # Cap for stability
     
     def _calculate_level_capacity(self, level: int, rho_r: float) -> float:
         """
@@ -173,21 +211,92 @@ class V4Simulator:
         Returns:
             Dictionary mapping level to demand in MiB/s
         """
-        demands = {}
+        return {level: S_put * self.compression_ratio * self.demand_ratio(level)
+                for level in self.levels}
+    
+    def demand_ratio(self, level: int) -> float:
+        """
+        Device bytes per flushed byte at a level.
         
-        # L0: Flush demand
-        demands[0] = S_put * self.compression_ratio
+        L0 carries the flush (plus intra-L0 compaction when calibrated);
+        L1+ carry compaction. Uncalibrated levels use simplified defaults.
         
-        # L1+: Compaction demands (simplified)
-        for level in self.levels[1:]:
-            # Simplified compaction demand calculation
-            # In practice, this would be more sophisticated
-            if level == 1:
-                demands[level] = S_put * self.compression_ratio * 0.5
-            else:
-                demands[level] = S_put * self.compression_ratio * 0.1
+        Args:
+            level: LSM level
+            
+        Returns:
+            Demand ratio
+        """
+        ratio = self.level_params[level].get('demand_ratio')
+        if ratio is None:
+            # Simplified default until calibrated from a LOG
+            ratio = 1.0 if level == 0 else 0.5 if level == 1 else 0.1
+        return ratio
+    
+    def calibrate_levels(self, store: CompactionStore) -> Dict[int, Dict[str, float]]:
+        """
+        Calibrate per-level demand ratios and capacity factors from LOG jobs.
+        
+        Only I/O that reached the device is counted: trivial moves carry no
+        bytes or time, flush inputs come from memory, and intra-L0
+        compactions are charged to L0 where they write. Per output level:
+        
+            demand_ratio    = device bytes (read + write) / flushed bytes
+            capacity_factor = busy throughput / (mu * k * eta * Beff)
+        
+        where the busy throughput is device bytes over job time and Beff is
+        queried at the level's read share. Levels without jobs keep their
+        configured parameters.
+        
+        Args:
+            store: Compaction store built from the LOG of a run
+            
+        Returns:
+            Dictionary of level -> calibration details
+        """
+        flushed = store.totals('bytes_out', by='kind').get(KIND_FLUSH, 0.0)
+        if flushed <= 0:
+            raise ValueError("The LOG has no flushes to calibrate demand against")
         
-        return demands
+        calibration = {}
+        for level, io in store.level_io('output_level').items():
+            if level not in self.level_params:
+                continue
+            device_bytes = io['read_bytes'] + io['write_bytes']
+            if device_bytes <= 0 or io['busy_us'] <= 0:
+                continue
+            
+            params = self.level_params[level]
+            rho_r = io['read_bytes'] / device_bytes
+            observed = device_bytes / (1024 * 1024) / (io['busy_us'] / 1e6)  # MiB/s while busy
+            Beff = self.envelope.query(
+                rho_r=rho_r,
+                qd=self.qd,
+                numjobs=self.numjobs,
+                bs_k=self.bs_k,
+                Br=self.Br,
+                Bw=self.Bw,
+                clamp_to_physical=True
+            )
+            nominal = params['mu'] * params['k'] * params['eta'] * Beff
+            
+            params['demand_ratio'] = device_bytes / flushed
+            params['rho_r'] = rho_r
+            if nominal > 0:
+                params['capacity_factor'] = observed / nominal
+            
+            calibration[level] = {
+                'demand_ratio': params['demand_ratio'],
+                'capacity_factor': params['capacity_factor'],
+                'rho_r': rho_r,
+                'busy_throughput_mib_s': observed,
+                'jobs': io['jobs'],
+                'intra_l0_jobs': io['intra_l0_jobs'],
+                'trivial_moves': io['moves'],
+                'moved_bytes': io['moved_bytes']
+            }
+        
+        return calibration
     
     def _update_backlog(self, demands: Dict[int, float], capacities: Dict[int, float]):
         """
@@ -407,22 +516,39 @@ def load_config(config_path: str) -> Dict:
 def main():
     """Main function for command-line usage."""
     parser = argparse.ArgumentParser(description='v4 Dynamic Simulator')
-    parser.add_argument('--envelope_json', required=True, help='Path to envelope model JSON file')
+    envelope_source = parser.add_mutually_exclusive_group(required=True)
+    envelope_source.add_argument('--envelope_json', help='Path to envelope model JSON file')
+    envelope_source.add_argument('--envelope_registry',
+                                 help='Path to envelope registry manifest (device selected by config device.model/firmware/wear)')
     parser.add_argument('--config_yaml', required=True, help='Path to configuration YAML file')
+    parser.add_argument('--envelope_backend', choices=EnvelopeModel.BACKENDS, default='grid',
+                        help='Envelope evaluation backend (parametric falls back to the grid where the fit is poor)')
     parser.add_argument('--out_csv', default='sim_out.csv', help='Output CSV file path')
     parser.add_argument('--steps', type=int, default=1000, help='Number of simulation steps')
     parser.add_argument('--dt', type=float, default=1.0, help='Time step in seconds')
+    parser.add_argument('--calibration_log', help='RocksDB LOG used to calibrate per-level demand and capacity')
     
     args = parser.parse_args()
     
     # Load configuration
     config = load_config(args.config_yaml)
     
-    # Load envelope model
-    envelope = EnvelopeModel.from_json_path(args.envelope_json)
-    
     # Create simulator
-    simulator = V4Simulator(envelope, config)
+    if args.envelope_registry:
+        registry = EnvelopeRegistry.from_manifest(args.envelope_registry, backend=args.envelope_backend)
+        simulator = V4Simulator.from_registry(registry, config)
+    else:
+        envelope = EnvelopeModel.from_json_path(args.envelope_json, backend=args.envelope_backend)
+        simulator = V4Simulator(envelope, config)
+    
+    # Calibrate per-level parameters from device I/O of a real run
+    if args.calibration_log:
+        calibration = simulator.calibrate_levels(CompactionStore.from_log(args.calibration_log))
+        print("Level calibration (device I/O only):")
+        for level, values in sorted(calibration.items()):
+            print(f"  L{level}: demand_ratio={values['demand_ratio']:.3f}, "
+                  f"capacity_factor={values['capacity_factor']:.3f}, "
+                  f"trivial moves={int(values['trivial_moves'])}")
     
     # Run simulation
     results_df = simulator.simulate(steps=args.steps, dt=args.dt)
@@ -19,6 +19,23 @@ from datetime import datetime
 import os
 from typing import Dict, List, Optional, Tuple
 
+# 구간별 예측식 계수 (predict_s_max의 구간 모델과 predict_batch가 공유)
+# weight가 0인 제약은 해당 구간에서 사용하지 않음 (penalty/bonus = 1)
+PHASE_COEFFICIENTS = {
+    'initial': {'device_utilization': 0.019, 'wa_weight': 0.0, 'ra_weight': 0.0, 'cv_weight': 0.0},
+    'middle': {'device_utilization': 0.047, 'wa_weight': 0.4, 'ra_weight': 0.0, 'cv_weight': 0.0},
+    'final': {'device_utilization': 0.046, 'wa_weight': 0.3, 'ra_weight': 0.2, 'cv_weight': 0.3}
+}
+
+# 구간별 입력 기본값 (performance_data에 값이 없을 때)
+PHASE_DEFAULTS = {
+    'initial': {'device_write_bw': 4116.6},
+    'middle': {'device_write_bw': 1074.8, 'wa': 2.5},
+    'final': {'device_write_bw': 1074.8, 'wa': 3.2, 'ra': 1.1, 'cv': 0.041}
+}
+
+BATCH_INPUTS = ('device_write_bw', 'wa', 'ra', 'cv')
+
 class V5IndependenceOptimizedModel:
     """V5 독립성 최적화 모델 - 중복성 완전 제거"""
     
@@ -155,11 +172,11 @@ class V5IndependenceOptimizedModel:
         """독립성 최적화 Initial Phase 모델 (V4 완전 복제)"""
         def predict_independence_initial(performance_data):
             # V4 핵심 파라미터만 사용 (완전 독립)
-            device_write_bw = performance_data.get('device_write_bw', 4116.6)
+            device_write_bw = performance_data.get('device_write_bw', PHASE_DEFAULTS['initial']['device_write_bw'])
             
             # V4 Device Envelope 완전 복제 (중복 제거)
             base_s_max = (device_write_bw * 1024 * 1024) / 1040
-            device_utilization = 0.019  # V4 성공 요소
+            device_utilization = PHASE_COEFFICIENTS['initial']['device_utilization']  # V4 성공 요소
             
             # 독립성 최적화: V4와 동일한 계산
             predicted_s_max = base_s_max * device_utilization
@@ -188,17 +205,19 @@ class V5IndependenceOptimizedModel:
         """독립성 최적화 Middle Phase 모델 (최소 독립 추가)"""
         def predict_independence_middle(performance_data):
             # 진짜 독립적인 파라미터들만 사용
-            device_write_bw = performance_data.get('device_write_bw', 1074.8)  # 원본 측정값
-            wa = performance_data.get('wa', 2.5)  # 독립적 RocksDB 측정값
+            defaults = PHASE_DEFAULTS['middle']
+            coefficients = PHASE_COEFFICIENTS['middle']
+            device_write_bw = performance_data.get('device_write_bw', defaults['device_write_bw'])  # 원본 측정값
+            wa = performance_data.get('wa', defaults['wa'])  # 독립적 RocksDB 측정값
             
             # V4 기본 성능 (중복 제거: device_degradation 사용 안 함)
             base_s_max = (device_write_bw * 1024 * 1024) / 1040
-            device_utilization = 0.047  # Middle Phase 실제 관측값
+            device_utilization = coefficients['device_utilization']  # Middle Phase 실제 관측값
             device_baseline = base_s_max * device_utilization
             
             # WA 독립적 영향 (device와 구별되는 정보)
             # WA는 device 성능의 결과이지만, 추가적인 독립 정보 제공
-            wa_penalty = 1.0 / (1 + (wa - 1.0) * 0.4)  # 독립적 영향만
+            wa_penalty = 1.0 / (1 + (wa - 1.0) * coefficients['wa_weight'])  # 독립적 영향만
             
             # 최종 예측 (2개 독립 제약)
             predicted_s_max = device_baseline * wa_penalty
@@ -231,26 +250,28 @@ class V5IndependenceOptimizedModel:
         """독립성 최적화 Final Phase 모델 (진짜 독립 다중 제약)"""
         def predict_independence_final(performance_data):
             # 진짜 독립적인 파라미터들만 사용
-            device_write_bw = performance_data.get('device_write_bw', 1074.8)  # 원본 하드웨어 측정
-            wa = performance_data.get('wa', 3.2)        # 독립적 RocksDB 측정
-            ra = performance_data.get('ra', 1.1)        # 독립적 RocksDB 측정
-            cv = performance_data.get('cv', 0.041)      # 독립적 변동성 측정
+            defaults = PHASE_DEFAULTS['final']
+            coefficients = PHASE_COEFFICIENTS['final']
+            device_write_bw = performance_data.get('device_write_bw', defaults['device_write_bw'])  # 원본 하드웨어 측정
+            wa = performance_data.get('wa', defaults['wa'])        # 독립적 RocksDB 측정
+            ra = performance_data.get('ra', defaults['ra'])        # 독립적 RocksDB 측정
+            cv = performance_data.get('cv', defaults['cv'])        # 독립적 변동성 측정
             
             # V4 기본 성능
             base_s_max = (device_write_bw * 1024 * 1024) / 1040
-            device_utilization = 0.046  # Final Phase 실제 관측값
+            device_utilization = coefficients['device_utilization']  # Final Phase 실제 관측값
             device_baseline = base_s_max * device_utilization
             
             # 독립적 제약들의 영향
             
             # 1. WA 독립적 영향 (device와 구별되는 컴팩션 정보)
-            wa_penalty = 1.0 / (1 + (wa - 1.0) * 0.3)
+            wa_penalty = 1.0 / (1 + (wa - 1.0) * coefficients['wa_weight'])
             
             # 2. RA 독립적 영향 (wa와 구별되는 읽기 정보)
-            ra_penalty = 1.0 / (1 + (ra - 0.1) * 0.2)
+            ra_penalty = 1.0 / (1 + (ra - 0.1) * coefficients['ra_weight'])
             
             # 3. CV 독립적 영향 (시스템 안정성, 중복 제거: system_stability 사용 안 함)
-            cv_bonus = 1 + (1 - cv) * 0.3  # 낮은 CV → 높은 성능
+            cv_bonus = 1 + (1 - cv) * coefficients['cv_weight']  # 낮은 CV → 높은 성능
             
             # 최종 예측 (독립적 제약들의 곱)
             predicted_s_max = device_baseline * wa_penalty * ra_penalty * cv_bonus
@@ -300,6 +321,61 @@ class V5IndependenceOptimizedModel:
         
         return prediction_result
     
+    def predict_batch(self, frame: pd.DataFrame, phase_column: str = 'phase') -> Dict:
+        """
+        독립성 최적화 V5 모델 일괄 예측 (구간 혼합 샘플을 NumPy 연산 한 번으로 계산)
+        
+        predict_s_max와 같은 구간별 식을 행 단위로 적용하며, 메타데이터는 배치당 한 번만 붙인다.
+        입력 컬럼(device_write_bw, wa, ra, cv)이 없거나 NaN이면 해당 행 구간의 기본값을 사용한다.
+        
+        Args:
+            frame: 샘플당 한 행 (phase_column + 입력 컬럼)
+            phase_column: 구간 이름 컬럼 ('initial', 'middle', 'final')
+        
+        Returns:
+            frame 행 순서의 배열 'predicted_s_max', 'device_baseline', 'wa_penalty',
+            'ra_penalty', 'cv_bonus', 'phase'와 배치 메타데이터
+        """
+        phases = list(self.phase_models)
+        phase_values = frame[phase_column].to_numpy()
+        codes = pd.Categorical(phase_values, categories=phases).codes
+        if (codes < 0).any():
+            unknown = sorted(set(map(str, phase_values[codes < 0])))
+            raise ValueError(f"지원되지 않는 Phase: {unknown}")
+        
+        # 구간별 계수/기본값 표 → 행별 값 (사용하지 않는 입력의 기본값은 weight가 0이므로 무관)
+        def per_row(table, key, fill):
+            return np.array([table[phase].get(key, fill) for phase in phases], dtype=float)[codes]
+        
+        inputs = {}
+        for name in BATCH_INPUTS:
+            default = per_row(PHASE_DEFAULTS, name, 0.0)
+            if name in frame:
+                values = frame[name].to_numpy(dtype=float)
+                inputs[name] = np.where(np.isnan(values), default, values)
+            else:
+                inputs[name] = default
+        
+        base_s_max = (inputs['device_write_bw'] * 1024 * 1024) / 1040
+        device_baseline = base_s_max * per_row(PHASE_COEFFICIENTS, 'device_utilization', np.nan)
+        wa_penalty = 1.0 / (1 + (inputs['wa'] - 1.0) * per_row(PHASE_COEFFICIENTS, 'wa_weight', 0.0))
+        ra_penalty = 1.0 / (1 + (inputs['ra'] - 0.1) * per_row(PHASE_COEFFICIENTS, 'ra_weight', 0.0))
+        cv_bonus = 1 + (1 - inputs['cv']) * per_row(PHASE_COEFFICIENTS, 'cv_weight', 0.0)
+        
+        present = [phase for i, phase in enumerate(phases) if (codes == i).any()]
+        return {
+            'predicted_s_max': device_baseline * wa_penalty * ra_penalty * cv_bonus,
+            'device_baseline': device_baseline,
+            'wa_penalty': wa_penalty,
+            'ra_penalty': ra_penalty,
+            'cv_bonus': cv_bonus,
+            'phase': phase_values,
+            'sample_count': len(frame),
+            'model_version': self.model_version,
+            'prediction_time': datetime.now().isoformat(),
+            'independence_optimization': {phase: self.phase_models[phase]['independence_optimization'] for phase in present}
+        }
+    
     def evaluate_independence_optimized_v5(self):
         """독립성 최적화 V5 모델 종합 평가"""
         print("🚀 V5 Independence-Optimized Model 평가 시작")
@@ -7,6 +7,12 @@ import numpy as np
 import pandas as pd
 import seaborn as sns
 from pathlib import Path
+import argparse
+import sys
+
+# 저장소 루트의 model 패키지 사용 (입력/코드 해시 기반 증분 빌드, 병렬 렌더링)
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from model.figure_build import Figure, run_build, add_build_arguments
 
 # Set font size to 30pt for better readability
 plt.rcParams.update({
@@ -259,19 +265,26 @@ def create_optimization_recommendations():
                 dpi=300, bbox_inches='tight')
     plt.close()
 
+# 그림별 출력 파일, 입력 데이터, 렌더 함수 (입력/코드가 바뀐 그림만 다시 렌더링)
+OUTPUT_DIR = 'experiments/2025-09-05'
+FIGURES = [
+    Figure(f'{OUTPUT_DIR}/phase_e_sensitivity_analysis.png', create_parameter_sensitivity_analysis, (), 'Parameter sensitivity analysis'),
+    Figure(f'{OUTPUT_DIR}/phase_e_optimization_recommendations.png', create_optimization_recommendations, (), 'Optimization recommendations'),
+]
+
 def main():
     """Generate Phase-E figures based on real experimental data"""
+    parser = add_build_arguments(argparse.ArgumentParser(description=main.__doc__))
+    args = parser.parse_args()
+    
     print("Generating Phase-E (Sensitivity Analysis) figures based on REAL data...")
     
     # Create output directory
-    Path('experiments/2025-09-05').mkdir(parents=True, exist_ok=True)
-    
-    # Generate Phase-E figures
-    create_parameter_sensitivity_analysis()
-    print("✓ Parameter sensitivity analysis generated")
+    Path(OUTPUT_DIR).mkdir(parents=True, exist_ok=True)
     
-    create_optimization_recommendations()
-    print("✓ Optimization recommendations generated")
+    result = run_build(FIGURES, jobs=args.jobs, force=args.force)
+    if result['failed']:
+        sys.exit(1)
     
     print("\n🎯 Phase-E figures generated with REAL experimental data!")
     print("📊 Sensitivity analysis and optimization recommendations based on actual measurements")
@@ -8,8 +8,14 @@ import numpy as np
 import pandas as pd
 import seaborn as sns
 from pathlib import Path
+import argparse
+import sys
 import json
 
+# 저장소 루트의 model 패키지 사용 (입력/코드 해시 기반 증분 빌드, 병렬 렌더링)
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from model.figure_build import Figure, run_build, add_build_arguments
+
 # Set font size to 30pt for better readability
 plt.rcParams.update({
     'font.size': 30,
@@ -489,28 +495,29 @@ def create_comprehensive_dashboard():
                 dpi=300, bbox_inches='tight')
     plt.close()
 
+# 그림별 출력 파일, 입력 데이터, 렌더 함수 (입력/코드가 바뀐 그림만 다시 렌더링)
+OUTPUT_DIR = 'experiments/2025-09-05'
+FIGURES = [
+    Figure(f'{OUTPUT_DIR}/real_model_accuracy_comparison.png', create_model_accuracy_figure, (), 'Model accuracy figure'),
+    Figure(f'{OUTPUT_DIR}/real_phase_results.png', create_phase_results_figure, (), 'Phase results figure'),
+    Figure(f'{OUTPUT_DIR}/real_validation_accuracy.png', create_validation_accuracy_figure, (), 'Validation accuracy figure'),
+    Figure(f'{OUTPUT_DIR}/real_performance_analysis.png', create_performance_analysis_figure, (), 'Performance analysis figure'),
+    Figure(f'{OUTPUT_DIR}/real_comprehensive_dashboard.png', create_comprehensive_dashboard, (), 'Comprehensive dashboard'),
+]
+
 def main():
     """Generate all figures based on real experimental data"""
+    parser = add_build_arguments(argparse.ArgumentParser(description=main.__doc__))
+    args = parser.parse_args()
+    
     print("Generating figures based on REAL experimental data...")
     
     # Create output directory
-    Path('experiments/2025-09-05').mkdir(parents=True, exist_ok=True)
-    
-    # Generate all figures
-    create_model_accuracy_figure()
-    print("✓ Model accuracy figure generated")
-    
-    create_phase_results_figure()
-    print("✓ Phase results figure generated")
-    
-    create_validation_accuracy_figure()
-    print("✓ Validation accuracy figure generated")
-    
-    create_performance_analysis_figure()
-    print("✓ Performance analysis figure generated")
+    Path(OUTPUT_DIR).mkdir(parents=True, exist_ok=True)
     
-    create_comprehensive_dashboard()
-    print("✓ Comprehensive dashboard generated")
+    result = run_build(FIGURES, jobs=args.jobs, force=args.force)
+    if result['failed']:
+        sys.exit(1)
     
     print("\n🎯 All figures generated with REAL experimental data!")
     print("📊 No estimates or simulations - only actual measurements from Phase-A, B, C, D")
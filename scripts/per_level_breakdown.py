@@ -1,28 +1,49 @@
 #!/usr/bin/env python3
+import sys, argparse
+from pathlib import Path
+import numpy as np
+
+# 저장소 루트의 model 패키지 사용 (레벨별 CR/배수, dynamic level bytes 지원)
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from model.level_flows import level_flows, level_targets, format_flow_table
+
 S_user, T, L = 150.0, 10, 6
 wal_factor, CR_default = 1.0, 0.50
 CR = [CR_default]*(L+1)
 B_w, B_r = 1000.0, 2000.0
-alpha = T/(T-1.0)
-
-rows = []
-l0_w = S_user*CR[0]
-rows.append(("L0 (flush)", 0.0, l0_w))
-for i in range(1, L+1):
-    r_i = S_user*(CR[i-1] + CR[i]*alpha)
-    w_i = S_user*(CR[i]*(1.0+alpha))
-    rows.append((f"L{i}", r_i, w_i))
-rows.append(("WAL", 0.0, S_user*wal_factor))
-
-hdr = "Level                Read(MiB/s)   Write(MiB/s)   %ReadBW  %WriteBW"
-print(hdr) ; print("-"*len(hdr))
-rt, wt = 0.0, 0.0
-for lvl, r, w in rows:
-    rt += r; wt += w
-    pr = (100.0*r/B_r) if B_r else 0.0
-    pw = (100.0*w/B_w) if B_w else 0.0
-    print(f"{lvl:16s}  {r:11.2f}   {w:12.2f}   {pr:6.1f}%   {pw:7.1f}%")
-print("-"*len(hdr))
-pr = (100.0*rt/B_r) if B_r else 0.0
-pw = (100.0*wt/B_w) if B_w else 0.0
-print(f"TOTAL               {rt:11.2f}   {wt:12.2f}   {pr:6.1f}%   {pw:7.1f}%")
+
+def parse_list(text):
+    return [float(v) for v in text.split(',')]
+
+def main():
+    ap = argparse.ArgumentParser(description='Per-level read/write flow table')
+    ap.add_argument('--rates', help='Put rates MiB/s (쉼표로 여러 값, 기본 S_user)')
+    ap.add_argument('--cr', help='레벨별 CR L0..Ln (쉼표) 또는 단일 값')
+    ap.add_argument('--multiplier', help='레벨별 크기 배수 L1..Ln (쉼표, i번째 = L(i+1)/Li, 마지막 값 미사용) 또는 단일 값')
+    ap.add_argument('--levels', type=int, default=L, help='L0 아래 레벨 수')
+    ap.add_argument('--db_gb', type=float, help='DB on-disk 크기 GiB (비어 있는 레벨 제외)')
+    ap.add_argument('--level_base_mb', type=float, default=256.0, help='max_bytes_for_level_base (MiB)')
+    ap.add_argument('--dynamic', action='store_true', help='level_compaction_dynamic_level_bytes 레이아웃')
+    args = ap.parse_args()
+
+    rates = np.array(parse_list(args.rates)) if args.rates else np.array([S_user])
+    cr = parse_list(args.cr) if args.cr else (CR if args.levels == L else [CR_default])
+    cr = cr[0] if len(cr) == 1 else cr
+    mult = parse_list(args.multiplier) if args.multiplier else [float(T)]
+    mult = mult[0] if len(mult) == 1 else mult
+
+    active = None
+    if args.db_gb is not None:
+        layout = level_targets(args.levels, args.level_base_mb*1024**2, mult,
+                               db_size=args.db_gb*1024**3, dynamic=args.dynamic)
+        active = layout['active']
+
+    flows = level_flows(rates, cr, mult, wal_factor=wal_factor, active=active,
+                        B_r=B_r, B_w=B_w, num_levels=args.levels)
+    for i, S in enumerate(rates):
+        if len(rates) > 1:
+            print(f"\nS = {S:.1f} MiB/s")
+        print("\n".join(format_flow_table(flows, (i,))))
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,14 @@
 #!/usr/bin/env python3
-import os, argparse
+import os, sys, argparse
 from math import inf
+from pathlib import Path
 import matplotlib.pyplot as plt
 
+# 저장소 루트의 model 패키지 사용 (브로드캐스팅 S_max 바운드)
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from model.smax import smax_bounds, grid
+from model.level_flows import level_flows
+
 # Set font size to 30pt for better readability (similar to LaTeX caption size)
 plt.rcParams.update({
     'font.size': 30,
@@ -31,35 +37,20 @@ S_user = 150.0
 S_in, S_cap = 400.0, None
 
 def bounds_for(CR, WA):
-    w_req = CR*WA + wal_factor
-    r_req = CR*max(WA-1.0, 0.0)
-    s_w = (B_w / w_req) if w_req > 0 else float('inf')
-    s_r = (B_r / r_req) if r_req > 0 else float('inf')
-    s_m = (B_eff / (w_req + eta*r_req)) if (B_eff and (w_req + eta*r_req) > 0) else float('inf')
-    s_max = min(s_w, s_r, s_m)
-    return s_max
+    # 스칼라 또는 배열(브로드캐스트) 입력
+    return smax_bounds(CR, WA, B_w=B_w, B_r=B_r, B_eff=B_eff, eta=eta, wal_factor=wal_factor)['s_max']
 
 def alpha(): return T/(T-1.0)
 
 def per_level_flows(S):
-    a = alpha()
-    labels, reads, writes = [], [], []
-    labels.append("L0"); reads.append(0.0); writes.append(S*CR_levels[0])
-    for i in range(1, L+1):
-        r_i = S*(CR_levels[i-1] + CR_levels[i]*a)
-        w_i = S*(CR_levels[i]*(1.0+a))
-        labels.append(f"L{i}"); reads.append(r_i); writes.append(w_i)
-    labels.append("WAL"); reads.append(0.0); writes.append(S*wal_factor)
-    return labels, reads, writes
+    f = level_flows(S, CR_levels, T, wal_factor=wal_factor)
+    labels = ["L0"] + f['labels'][1:]
+    return labels, f['read'].tolist(), f['write'].tolist()
 
 def coeffs(depth):
-    a = alpha()
-    w = CR_levels[0] + wal_factor
-    r = 0.0
-    for i in range(1, depth+1):
-        r += (CR_levels[i-1] + CR_levels[i]*a)
-        w += (CR_levels[i]*(1.0+a))
-    return w, r
+    # depth 아래 레벨은 비어 있음 (레벨별 CR 유지)
+    f = level_flows(1.0, CR_levels, T, active=[i < depth for i in range(L)])
+    return float(f['w_req']) + wal_factor, float(f['r_req'])
 
 def smax_depth(depth):
     w, r = coeffs(depth)
@@ -70,9 +61,9 @@ def smax_depth(depth):
 
 def plot_smax_vs_WA(outdir):
     xs = list(range(WA_min, WA_max+1, WA_step))
+    curves = bounds_for(**grid(CR=CR_curve, WA=xs))
     plt.figure()
-    for CR in CR_curve:
-        ys = [bounds_for(CR, WA) for WA in xs]
+    for CR, ys in zip(CR_curve, curves):
         plt.plot(xs, ys, marker='o', label=f"CR={CR:.2f}")
     plt.xlabel("Write Amplification (WA)")
     plt.ylabel("S_max (MiB/s user)")
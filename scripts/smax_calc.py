@@ -6,7 +6,13 @@ RocksDB S_max Calculator
 최대 지속 가능한 put rate (S_max)를 계산합니다.
 """
 import argparse
+import sys
 from math import inf
+from pathlib import Path
+
+# 저장소 루트의 model 패키지 사용 (브로드캐스팅 S_max 바운드)
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from model.smax import smax_bounds, BOUND_NAMES
 
 def calculate_smax(cr, wa, bw, br, beff, eta=1.0, wwal=0.0):
     """
@@ -24,26 +30,16 @@ def calculate_smax(cr, wa, bw, br, beff, eta=1.0, wwal=0.0):
     Returns:
         dict: 계산 결과
     """
-    # per-user 디바이스 요구 바이트
-    w_req = cr * wa + wwal
-    r_req = cr * max(wa - 1.0, 0.0)
-    
-    # 세 가지 바운드 계산
-    s_write = (bw / w_req) if w_req > 0 else inf
-    s_read = (br / r_req) if r_req > 0 else inf
-    s_mix = (beff / (w_req + eta * r_req)) if (beff and (w_req + eta * r_req) > 0) else inf
+    # 세 가지 바운드 계산 (model.smax, 스칼라 입력)
+    bounds = smax_bounds(cr, wa, B_w=bw, B_r=br, B_eff=beff, eta=eta, wal_factor=wwal)
+    w_req, r_req = float(bounds['w_req']), float(bounds['r_req'])
+    s_write, s_read, s_mix = float(bounds['s_write']), float(bounds['s_read']), float(bounds['s_mix'])
     
     # S_max는 세 바운드의 최소값
-    s_max = min(s_write, s_read, s_mix)
-    
-    # 병목 지점 식별
-    bottlenecks = []
-    if s_write == s_max:
-        bottlenecks.append("write")
-    if s_read == s_max:
-        bottlenecks.append("read")
-    if s_mix == s_max:
-        bottlenecks.append("mixed")
+    s_max = float(bounds['s_max'])
+    
+    # 병목 지점 식별 (동률이면 모두 표시)
+    bottlenecks = [name for name, s in zip(BOUND_NAMES, (s_write, s_read, s_mix)) if s == s_max]
     
     return {
         's_max': s_max,
@@ -10,7 +10,15 @@ v2.1 모델을 사용하여 최대 지속 가능한 put rate (S_max)를 계산
 """
 import argparse
 import json
+import sys
 from math import inf
+from pathlib import Path
+
+import numpy as np
+
+# 저장소 루트의 model 패키지 사용 (브로드캐스팅 S_max 바운드)
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from model.smax import smax_bounds
 
 def calculate_harmonic_mean_bandwidth(B_r, B_w, rho_r, rho_w):
     """
@@ -75,43 +83,33 @@ def calculate_smax_v2(B_w, B_r, rho_r, rho_w, CR, WA, level_data, total_write_gb
     # 1. Harmonic mean을 사용한 혼합 I/O 대역폭 계산
     B_eff_harmonic = calculate_harmonic_mean_bandwidth(B_r, B_w, rho_r, rho_w)
     
-    # 2. per-user 디바이스 요구 바이트
-    w_req = CR * WA
-    r_req = CR * max(WA - 1.0, 0.0)
-    
-    # 3. 기본 바운드 계산 (v1과 동일)
-    s_write = (B_w / w_req) if w_req > 0 else inf
-    s_read = (B_r / r_req) if r_req > 0 else inf
-    
-    # 4. v2.1의 Harmonic mean 바운드
-    s_mix_harmonic = (B_eff_harmonic / (w_req + r_req)) if (B_eff_harmonic and (w_req + r_req) > 0) else inf
+    # 2-4. per-user 디바이스 요구 바이트와 write/read/harmonic 바운드 (WAL 제외, η = 1)
+    bounds = smax_bounds(CR, WA, B_w=B_w, B_r=B_r, B_eff=B_eff_harmonic, eta=1.0)
+    w_req, r_req = float(bounds['w_req']), float(bounds['r_req'])
+    s_write, s_read = float(bounds['s_write']), float(bounds['s_read'])
+    s_mix_harmonic = float(bounds['s_mix'])
     
     # 5. Per-level 제약사항 고려
-    # 각 레벨별로 I/O 제약을 확인
-    level_constraints = {}
-    min_level_s = inf
+    # 레벨별 용량(전체 대역폭의 share_l 비율)을 레벨별 I/O 요구량으로 나눔
+    levels = list(level_data)
+    share = np.array([level_data[l]['write_gb'] for l in levels]) / total_write_gb
+    read_to_write = np.array([level_data[l]['w_amp'] for l in levels], dtype=float)
+    level_w_req = share * w_req
+    level_total_req = level_w_req + read_to_write * level_w_req
+    level_capacity = B_eff_harmonic * share
+    with np.errstate(divide='ignore', invalid='ignore'):
+        level_s = np.where(level_total_req > 0, level_capacity / level_total_req, inf)
     
-    for level, data in level_data.items():
-        share_l = data['write_gb'] / total_write_gb
-        read_to_write = data['w_amp']
-        
-        # 레벨별 I/O 요구량
-        level_w_req = share_l * w_req
-        level_r_req = read_to_write * level_w_req
-        level_total_req = level_w_req + level_r_req
-        
-        # 레벨별 최대 처리량 (단순화: 전체 대역폭의 비율로 가정)
-        level_capacity = B_eff_harmonic * share_l
-        
-        if level_total_req > 0:
-            level_s = level_capacity / level_total_req
-            level_constraints[level] = {
-                'level_s': level_s,
-                'level_capacity': level_capacity,
-                'level_total_req': level_total_req,
-                'share_l': share_l
-            }
-            min_level_s = min(min_level_s, level_s)
+    level_constraints = {
+        level: {
+            'level_s': float(level_s[i]),
+            'level_capacity': float(level_capacity[i]),
+            'level_total_req': float(level_total_req[i]),
+            'share_l': float(share[i])
+        }
+        for i, level in enumerate(levels) if level_total_req[i] > 0
+    }
+    min_level_s = float(level_s.min()) if len(levels) else inf
     
     # 6. 최종 S_max 계산 (모든 제약사항 고려)
     s_max_feasible = min(s_write, s_read, s_mix_harmonic, min_level_s)
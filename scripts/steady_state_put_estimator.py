@@ -1,5 +1,11 @@
 #!/usr/bin/env python3
+import sys
 from math import inf
+from pathlib import Path
+
+# 저장소 루트의 model 패키지 사용 (브로드캐스팅 S_max 바운드)
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from model.smax import smax_bounds, grid
 
 B_w, B_r, B_eff, eta = 1000.0, 2000.0, 2500.0, 1.0
 avg_kv_bytes = 1024.0
@@ -8,18 +14,16 @@ WA_list = [4, 6, 8, 10]
 wal_factor = 1.0
 
 def bounds_for(CR, WA):
-    w_req = CR*WA + wal_factor
-    r_req = CR*max(WA-1.0, 0.0)
-    s_w = (B_w / w_req) if w_req > 0 else inf
-    s_r = (B_r / r_req) if r_req > 0 else inf
-    s_m = (B_eff / (w_req + eta*r_req)) if (B_eff and (w_req + eta*r_req) > 0) else inf
-    s_max = min(s_w, s_r, s_m)
-    return s_w, s_r, s_m, s_max, w_req, r_req
+    b = smax_bounds(CR, WA, B_w=B_w, B_r=B_r, B_eff=B_eff, eta=eta, wal_factor=wal_factor)
+    return b['s_write'], b['s_read'], b['s_mix'], b['s_max'], b['w_req'], b['r_req']
+
+# CR x WA 전체 격자를 한 번에 계산
+s_w, s_r, s_m, s_max, w_req, r_req = bounds_for(**grid(CR=CR_list, WA=WA_list))
+ops = (s_max*1048576.0)/avg_kv_bytes
+
+def f(x): return 'inf' if x == inf else f'{x:.1f}'
 
 print('CR\tWA\tReqWrite/u\tReqRead/u\tS_write\tS_read\tS_mix\tS_max\tops/s')
-for CR in CR_list:
-    for WA in WA_list:
-        s_w, s_r, s_m, s_max, w_req, r_req = bounds_for(CR, WA)
-        ops = (s_max*1048576.0)/avg_kv_bytes
-        def f(x): return 'inf' if x == inf else f'{x:.1f}'
-        print(f'{CR:.2f}\t{WA:.2f}\t{w_req:.2f}\t\t{r_req:.2f}\t\t{f(s_w)}\t{f(s_r)}\t{f(s_m)}\t{f(s_max)}\t{ops:.0f}')
+for i, CR in enumerate(CR_list):
+    for j, WA in enumerate(WA_list):
+        print(f'{CR:.2f}\t{WA:.2f}\t{w_req[i, j]:.2f}\t\t{r_req[i, j]:.2f}\t\t{f(s_w[i, j])}\t{f(s_r[i, j])}\t{f(s_m[i, j])}\t{f(s_max[i, j])}\t{ops[i, j]:.0f}')
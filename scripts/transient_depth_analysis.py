@@ -1,37 +1,70 @@
 #!/usr/bin/env python3
-from math import inf
+import sys, argparse
+from pathlib import Path
+import numpy as np
+
+# 저장소 루트의 model 패키지 사용 (브로드캐스팅 S_max 바운드, 성장 예측)
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from model.smax import smax_bounds
+from model.growth_projection import project_growth, GIB, MIB
+
 B_w, B_r, B_eff, eta = 1000.0, 2000.0, 2500.0, 1.0
 T, L = 10, 6
 CR_default, wal_factor = 0.50, 1.0
-CR = [CR_default]*(L+1)
 S_in, S_cap = 400.0, None
-alpha = T/(T-1.0)
-
-def coeffs(depth):
-    w = CR[0] + wal_factor
-    r = 0.0
-    for i in range(1, depth+1):
-        r += (CR[i-1] + CR[i]*alpha)
-        w += (CR[i]*(1.0+alpha))
-    return w, r
+bottleneck_names = ('write', 'read', 'mix')
 
 def smax(depth):
-    w, r = coeffs(depth)
-    s_w = (B_w/w) if w>0 else inf
-    s_r = (B_r/r) if r>0 else inf
-    s_m = (B_eff/(w + eta*r)) if (B_eff and (w+eta*r)>0) else inf
-    s = min(s_w, s_r, s_m)
-    return s, s_w, s_r, s_m, w, r
-
-Smax_full, *_ = smax(L)
-if S_cap is None: S_cap = Smax_full
-
-print("Depth  S_max  S_acc  TotRead  TotWrite  %R  %W  Bottleneck")
-for d in range(1, L+1):
-    S_d, S_w, S_r, S_m, w_c, r_c = smax(d)
-    S_acc = min(S_in, S_cap, S_d)
+    # depth: 스칼라 또는 배열 (레벨별 CR 균일, 크기 비율 T)
+    b = smax_bounds(CR_default, T=T, depth=depth, B_w=B_w, B_r=B_r, B_eff=B_eff, eta=eta, wal_factor=wal_factor)
+    return b['s_max'], b['s_write'], b['s_read'], b['s_mix'], b['w_req'], b['r_req'], b['binding']
+
+def depth_table():
+    depths = np.arange(1, L+1)
+    S_d, S_w, S_r, S_m, w_c, r_c, binding = smax(depths)
+    S_cap_eff = S_d[-1] if S_cap is None else S_cap
+    S_acc = np.minimum(np.minimum(S_in, S_cap_eff), S_d)
     R = S_acc * r_c
     W = S_acc * w_c
-    vals = [(S_w,'write'), (S_r,'read'), (S_m,'mix')]
-    bname = min(vals, key=lambda x: x[0])[1]
-    print(f"{d:5d}  {S_d:5.1f}  {S_acc:5.1f}  {R:7.1f}  {W:8.1f}  {100*R/B_r:4.1f}%  {100*W/B_w:4.1f}%  {bname}")
+
+    print("Depth  S_max  S_acc  TotRead  TotWrite  %R  %W  Bottleneck")
+    for i, d in enumerate(depths):
+        print(f"{d:5d}  {S_d[i]:5.1f}  {S_acc[i]:5.1f}  {R[i]:7.1f}  {W[i]:8.1f}  {100*R[i]/B_r:4.1f}%  {100*W[i]/B_w:4.1f}%  {bottleneck_names[binding[i]]}")
+
+def growth_timeline(args):
+    # 여러 DB 크기를 한 번에 예측 (레벨 전환 시점, S_max 감소, 목표 유지 불가 시점)
+    sizes = np.array([float(v) for v in args.initial_gb.split(',')]) * GIB
+    p = project_growth(sizes, args.ingest_gb_per_day * GIB, level_base=args.level_base_mb * MIB,
+                       multiplier=args.multiplier, CR=CR_default, target_rate=args.target,
+                       B_w=B_w, B_r=B_r, B_eff=B_eff, eta=eta, wal_factor=wal_factor,
+                       max_depth=args.max_depth, start=args.start)
+
+    print("\nSize(GiB)  Depth  S_max  NextDepth  Day(next)  S_max(next)  Drop  Unsustainable(day)")
+    for i, size in enumerate(sizes):
+        d = p['current_depth'][i]
+        nxt = min(d, args.max_depth - 1)
+        day_next = p['enter_days'][i, nxt] if d < args.max_depth else np.inf
+        s_next = p['s_max'][i, nxt] if d < args.max_depth else np.nan
+        drop = p['drop_pct'][i, nxt] if d < args.max_depth else np.nan
+        unsust = p['unsustainable_days'][i]
+        when = 'never' if not np.isfinite(unsust) else (f"{unsust:.1f}" if args.start is None else
+                                                         f"{unsust:.1f} ({str(p['unsustainable_date'][i])[:10]})")
+        print(f"{size/GIB:9.1f}  {d:5d}  {p['current_s_max'][i]:5.1f}  {d+1:9d}  {day_next:9.1f}  {s_next:11.1f}  {drop:4.1f}%  {when}")
+
+def main():
+    ap = argparse.ArgumentParser(description='Depth-wise S_max and database growth projection')
+    ap.add_argument('--initial_gb', help='현재 on-disk 크기 GiB (쉼표로 여러 DB)')
+    ap.add_argument('--ingest_gb_per_day', type=float, default=100.0, help='일일 유저 데이터 유입량 (GiB/day)')
+    ap.add_argument('--level_base_mb', type=float, default=256.0, help='max_bytes_for_level_base (MiB)')
+    ap.add_argument('--multiplier', type=float, default=float(T), help='max_bytes_for_level_multiplier')
+    ap.add_argument('--target', type=float, default=150.0, help='유지해야 할 put rate (MiB/s)')
+    ap.add_argument('--max_depth', type=int, default=8, help='예측할 최대 깊이')
+    ap.add_argument('--start', help='시작 날짜 (YYYY-MM-DD)')
+    args = ap.parse_args()
+
+    depth_table()
+    if args.initial_gb:
+        growth_timeline(args)
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,21 @@
 RocksDB WAF (Write Amplification Factor) Analyzer
 
 RocksDB LOG 파일에서 per-level WAF를 분석하고 mass balance를 검증합니다.
+레벨별 Write/Rn/Rnp1/Moved/Size 컬럼으로 레벨 간 바이트 보존을 모든 dump에 대해 확인하고,
+compaction 이벤트 바이트와 교차 검증합니다 (LOG는 스트리밍으로 읽음).
 """
 import argparse
-import re
 import csv
 import json
+import sys
 from pathlib import Path
 import matplotlib.pyplot as plt
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from model.compaction_stats import CompactionStatsSeries
+from model.compaction_store import CompactionStore
+from model.level_waf import level_balance, level_wa, event_writes, balance_summary, balance_timeline
 
 # Set font size to 30pt for better readability (similar to LaTeX caption size)
 plt.rcParams.update({
@@ -28,62 +36,24 @@ plt.rcParams.update({
     'figure.constrained_layout.use': False
 })
 
-def parse_compaction_stats(log_file):
-    """RocksDB LOG에서 compaction stats를 파싱합니다."""
-    stats = []
-    
-    with open(log_file, 'r') as f:
-        for line in f:
-            # Compaction Stats 패턴 찾기
-            if "Compaction Stats" in line:
-                # 다음 몇 줄에서 레벨별 정보 추출
-                level_data = {}
-                for _ in range(20):  # 최대 20줄까지 읽기
-                    try:
-                        next_line = next(f)
-                        if "Level" in next_line and "files" in next_line:
-                            # Level 0: 3 files, 2.5 MB
-                            match = re.search(r'Level (\d+): (\d+) files, ([\d.]+) MB', next_line)
-                            if match:
-                                level = int(match.group(1))
-                                files = int(match.group(2))
-                                size_mb = float(match.group(3))
-                                level_data[level] = {'files': files, 'size_mb': size_mb}
-                        elif "Compaction Stats" in next_line:
-                            # 다음 compaction stats 시작
-                            break
-                    except StopIteration:
-                        break
-                
-                if level_data:
-                    stats.append(level_data)
-    
-    return stats
+def parse_compaction_stats(log_file, cf='default'):
+    """RocksDB LOG의 DUMPING STATS에서 레벨별 Compaction Stats 테이블을 파싱합니다."""
+    return CompactionStatsSeries.from_log(log_file, cf)
 
 def calculate_waf_per_level(stats, user_mb):
-    """레벨별 WAF를 계산합니다."""
-    if not stats:
-        return {}
+    """레벨별 WAF를 계산합니다 (마지막 dump의 레벨별 누적 Write(GB) / 사용자 데이터)."""
+    if not len(stats):
+        return {}, 0, 0
     
-    # 가장 최근 stats 사용
-    latest_stats = stats[-1]
+    # 가장 최근 stats 사용 (레벨별 누적 쓰기량, GB -> MB)
+    write_mb = stats.metric('write_gb')[-1] * 1024
     
     waf_data = {}
-    total_write_mb = 0
-    
-    for level, data in latest_stats.items():
-        if level == 0:
-            # L0은 flush만, WAF = 1
-            waf_data[level] = 1.0
-            total_write_mb += data['size_mb']
-        else:
-            # L1+는 compaction으로 인한 추가 쓰기
-            # 간단한 근사: 레벨이 깊을수록 WAF 증가
-            waf = 1.0 + (level - 1) * 0.5  # 예시 계산
-            waf_data[level] = waf
-            total_write_mb += data['size_mb'] * waf
+    for level, level_write_mb in zip(stats.levels, write_mb):
+        waf_data[level] = float(level_write_mb / user_mb) if user_mb > 0 else 0.0
     
     # 전체 WAF 계산
+    total_write_mb = float(write_mb.sum())
     total_waf = total_write_mb / user_mb if user_mb > 0 else 0
     
     return waf_data, total_waf, total_write_mb
@@ -112,7 +82,10 @@ def plot_waf_analysis(waf_data, output_dir):
 def main():
     parser = argparse.ArgumentParser(description='RocksDB WAF Analyzer')
     parser.add_argument('--log', required=True, help='RocksDB LOG 파일 경로')
-    parser.add_argument('--user-mb', type=float, required=True, help='사용자 데이터 크기 (MB)')
+    parser.add_argument('--user-mb', type=float, help='사용자 데이터 크기 (MB, 기본: LOG의 ingest)')
+    parser.add_argument('--cf', default='default', help='Column family')
+    parser.add_argument('--tolerance', type=float, default=10.0, help='Mass balance 허용 오차 (%%)')
+    parser.add_argument('--no-events', action='store_true', help='Compaction 이벤트 교차 검증 생략')
     parser.add_argument('--out-dir', default='out', help='출력 디렉토리')
     parser.add_argument('--plot', action='store_true', help='그래프 생성')
     
@@ -122,63 +95,95 @@ def main():
     Path(args.out_dir).mkdir(exist_ok=True)
     
     print(f"RocksDB LOG 분석 중: {args.log}")
-    print(f"사용자 데이터 크기: {args.user_mb} MB")
     
     # Compaction stats 파싱
-    stats = parse_compaction_stats(args.log)
-    if not stats:
+    stats = parse_compaction_stats(args.log, args.cf)
+    if not len(stats):
         print("❌ Compaction stats를 찾을 수 없습니다.")
         return
     
-    print(f"✅ {len(stats)}개의 compaction stats 발견")
+    print(f"✅ {len(stats)}개의 compaction stats 발견 (레벨: {stats.levels})")
+    
+    user_mb = args.user_mb
+    if user_mb is None:
+        user_mb = float(np.nansum(stats.ingest_deltas())) * 1024
+    print(f"사용자 데이터 크기: {user_mb:.2f} MB")
     
     # WAF 계산
-    waf_data, total_waf, total_write_mb = calculate_waf_per_level(stats, args.user_mb)
+    waf_data, total_waf, total_write_mb = calculate_waf_per_level(stats, user_mb)
+    
+    # 레벨별 질량 보존 (모든 dump 구간을 한 번에 계산)
+    balance = level_balance(stats)
+    events = None
+    if not args.no_events:
+        store = CompactionStore.from_log(args.log)
+        if len(store):
+            events = event_writes(store, stats)
+    summary_table = balance_summary(balance, events, user_mb / 1024)
+    w_amp = level_wa(stats, interval=False)['w_amp'][-1]
     
     print("\n=== Per-Level WAF 분석 ===")
     for level in sorted(waf_data.keys()):
-        print(f"L{level}: WAF = {waf_data[level]:.2f}")
+        print(f"L{level}: WAF = {waf_data[level]:.2f}, W-Amp (Write/Rn) = {w_amp[level]:.2f}")
     
     print(f"\n전체 WAF: {total_waf:.2f}")
     print(f"총 쓰기: {total_write_mb:.2f} MB")
     
-    # Mass balance 검증
-    expected_write = total_waf * args.user_mb
-    mass_balance_error = abs(total_write_mb - expected_write) / expected_write * 100
-    
+    # Mass balance 검증: 레벨 N에서 나간 바이트 = 레벨 N+1 (또는 base level)의 입력
     print(f"\n=== Mass Balance 검증 ===")
-    print(f"예상 쓰기: {expected_write:.2f} MB")
-    print(f"실제 쓰기: {total_write_mb:.2f} MB")
-    print(f"오류율: {mass_balance_error:.2f}%")
-    
-    if mass_balance_error <= 10:
-        print("✅ Mass balance 검증 통과 (≤10%)")
+    print(f"{'Level':>5} {'In(GB)':>9} {'Rewrite':>9} {'Out(GB)':>9} {'ΔSize':>8} {'Resid':>8} {'Err%':>6}")
+    for level, row in summary_table.iterrows():
+        print(f"{'L' + str(level):>5} {row['inflow_gb']:9.2f} {row['rewritten_gb']:9.2f} {row['outflow_gb']:9.2f} "
+              f"{row['size_delta_gb']:8.2f} {row['residual_gb']:8.2f} {row['residual_pct']:6.2f}")
+    mass_balance_error = float(summary_table['residual_pct'].max())
+    print(f"최대 오류율: {mass_balance_error:.2f}%")
+    
+    if mass_balance_error <= args.tolerance:
+        print(f"✅ Mass balance 검증 통과 (≤{args.tolerance:g}%)")
     else:
-        print("❌ Mass balance 검증 실패 (>10%)")
+        print(f"❌ Mass balance 검증 실패 (>{args.tolerance:g}%)")
+    
+    if events is not None:
+        print(f"\n=== 이벤트 교차 검증 (이벤트 쓰기 / stats Write) ===")
+        for level, row in summary_table.iterrows():
+            if row['write_gb'] > 0:
+                print(f"L{level}: {row['event_write_gb']:.2f} GB vs {row['write_gb']:.2f} GB ({row['event_gap_pct']:+.1f}%)")
     
     # CSV 출력
     csv_file = Path(args.out_dir) / 'waf_per_level.csv'
     with open(csv_file, 'w', newline='') as f:
         writer = csv.writer(f)
-        writer.writerow(['Level', 'WAF', 'Files', 'Size_MB'])
+        writer.writerow(['Level', 'WAF', 'Files', 'Size_MB', 'W_Amp', 'Inflow_MB', 'Outflow_MB', 'Residual_MB'])
+        latest = stats.latest()
         for level in sorted(waf_data.keys()):
-            if level in stats[-1]:
+            if level in latest:
+                row = summary_table.loc[level]
                 writer.writerow([
                     level, 
                     waf_data[level], 
-                    stats[-1][level]['files'],
-                    stats[-1][level]['size_mb']
+                    int(latest[level]['files']),
+                    latest[level]['size_bytes'] / (1024 * 1024),
+                    w_amp[level],
+                    row['inflow_gb'] * 1024,
+                    row['outflow_gb'] * 1024,
+                    row['residual_gb'] * 1024
                 ])
     
     print(f"✅ CSV 파일 저장: {csv_file}")
     
+    # 시간에 따른 변화 (dump x 레벨)
+    timeline_file = Path(args.out_dir) / 'waf_timeline.csv'
+    balance_timeline(stats, balance, level_wa(stats), events).to_csv(timeline_file, index=False)
+    print(f"✅ 시계열 저장: {timeline_file}")
+    
     # JSON 요약
     summary = {
         'total_waf': total_waf,
         'total_write_mb': total_write_mb,
-        'user_mb': args.user_mb,
+        'user_mb': user_mb,
         'mass_balance_error_percent': mass_balance_error,
-        'per_level_waf': waf_data
+        'per_level_waf': waf_data,
+        'per_level_residual_percent': {int(level): float(v) for level, v in summary_table['residual_pct'].items()}
     }
     
     json_file = Path(args.out_dir) / 'summary.json'
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# 저장소 루트의 model 패키지 사용
+sys.path.append(str(Path(__file__).resolve().parents[1]))
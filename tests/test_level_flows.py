@@ -0,0 +1,34 @@
+import numpy as np
+
+from model.level_flows import level_flows, level_targets
+
+
+def test_flows_use_the_target_ratios_with_non_uniform_multipliers():
+    multiplier = [10.0, 10.0, 10.0, 4.0, 99.0]
+    targets = level_targets(5, 256.0, multiplier)['targets']
+    ratios = targets[1:] / targets[:-1]
+    np.testing.assert_allclose(ratios, [10.0, 10.0, 10.0, 4.0])
+
+    flows = level_flows(1.0, 1.0, multiplier, l0_ratio=2.0)
+    # W_i = 1 + alpha_i with CR = 1; L1 is fed by L0, L2..L5 by the level above
+    T = np.concatenate([[2.0], ratios])
+    np.testing.assert_allclose(flows['write'][1:-1], 1.0 + T / (T - 1.0))
+
+
+def test_level_fed_by_l0_uses_l0_ratio_in_dynamic_layout():
+    multiplier = [10.0, 10.0, 4.0, 8.0]
+    layout = level_targets(4, 256.0, multiplier, db_size=5e3, dynamic=True)
+    base = int(np.argmax(layout['active']))
+    assert base > 0
+
+    flows = level_flows(1.0, 1.0, multiplier, l0_ratio=3.0, active=layout['active'])
+    write = flows['write'][1:-1]
+    assert np.all(write[:base] == 0.0)
+    assert write[base] == 1.0 + 3.0 / 2.0
+    T = np.array(multiplier[base:-1])
+    np.testing.assert_allclose(write[base + 1:], 1.0 + T / (T - 1.0))
+
+
+def test_uniform_multiplier_is_unchanged():
+    flows = level_flows(1.0, 0.5, 10.0, num_levels=4)
+    np.testing.assert_allclose(flows['write'][1:-1], 0.5 * (1.0 + 10.0 / 9.0))
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+from model.phase_classifier import PHASES, PhaseClassifier
+
+
+def noisy_three_phase_stream(seed: int = 0, lengths=(300, 700, 600)) -> pd.DataFrame:
+    """Put rate, WA and L0 files of a run that passes through all three phases."""
+    rng = np.random.default_rng(seed)
+    segments = []
+    for (cv, drift, wa_start, wa_end, l0), n in zip(
+            [(0.5, -0.3, 2.0, 3.0, 2.0), (0.2, -0.05, 3.0, 3.5, 6.0), (0.04, 0.0, 3.5, 3.5, 4.0)], lengths):
+        mean = 100.0 * (1.0 + drift * np.linspace(0, 1, n))
+        segments.append(pd.DataFrame({
+            'write_rate': np.maximum(mean * (1.0 + cv * rng.standard_normal(n)), 1.0),
+            'wa': np.linspace(wa_start, wa_end, n) + 0.05 * rng.standard_normal(n),
+            'l0': np.maximum(l0 + 2.0 * rng.standard_normal(n), 0.0),
+        }))
+    return pd.concat(segments, ignore_index=True)
+
+
+def test_reported_phase_never_moves_back_on_a_noisy_stream():
+    for seed in range(5):
+        frame = noisy_three_phase_stream(seed)
+        result = PhaseClassifier().run(frame, l0_column='l0')
+        index = result['phase'].map(PHASES.index).to_numpy()
+        assert np.all(np.diff(index) >= 0)
+        assert index[-1] == PHASES.index('final')
+
+
+def test_reported_phase_stays_while_the_filter_wavers():
+    classifier = PhaseClassifier(confirm_samples=5)
+    classifier._probabilities = np.array([0.1, 0.85, 0.05])
+    for _ in range(4):
+        classifier._advance_reported()
+    assert classifier.estimate().phase == 'initial'
+    classifier._advance_reported()
+    assert classifier.estimate().phase == 'middle'
+
+    classifier._probabilities = np.array([0.9, 0.05, 0.05])
+    classifier._advance_reported()
+    assert classifier.estimate().phase == 'middle'
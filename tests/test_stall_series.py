@@ -0,0 +1,25 @@
+import numpy as np
+
+from model.stall_series import fit_stall_logistic
+
+
+def logistic(x, threshold, steepness):
+    return 1.0 / (1.0 + np.exp(-steepness * (x - threshold)))
+
+
+def test_fit_recovers_steepness_with_near_zero_fractions():
+    # Most intervals stall far below the old 0.005 clip floor
+    l0 = np.arange(0, 14, dtype=np.float64)
+    fit = fit_stall_logistic(l0, logistic(l0, 12.0, 0.7))
+    assert abs(fit['stall_steepness'] - 0.7) < 1e-6
+    assert abs(fit['stall_threshold'] - 12.0) < 1e-6
+
+
+def test_fit_recovers_curve_from_stalled_seconds():
+    rng = np.random.default_rng(0)
+    l0 = rng.uniform(0, 14, 2000)
+    elapsed = rng.uniform(30, 90, len(l0))
+    stalled = rng.binomial(np.round(elapsed).astype(int), logistic(l0, 10.0, 0.7))
+    fit = fit_stall_logistic(l0, stalled / np.round(elapsed), weights=np.round(elapsed))
+    assert abs(fit['stall_steepness'] - 0.7) < 0.03
+    assert abs(fit['stall_threshold'] - 10.0) < 0.2
@@ -14,6 +14,8 @@ from pathlib import Path
 from typing import Dict, List, Tuple
 import argparse
 
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
 
 def parse_fio_json(file_path: str) -> Dict:
     """
@@ -165,6 +167,40 @@ def create_csv_summary(grid_data: Dict, output_path: str):
     print(f"CSV summary saved to: {output_path}")
 
 
+def register_envelope_model(manifest_path: str, envelope_path: str, device_model: str,
+                            firmware: str, wear: float):
+    """
+    Register an envelope model JSON file in an envelope registry manifest.
+    
+    Args:
+        manifest_path: Registry manifest JSON path (created if missing)
+        envelope_path: Envelope model JSON path
+        device_model: Device model name
+        firmware: Firmware revision
+        wear: Wear/aging state of the measured device
+    """
+    # Imported here so parsing fio results does not require scipy
+    from model.envelope_registry import EnvelopeRegistry
+
+    manifest_path = Path(manifest_path)
+    if manifest_path.exists():
+        registry = EnvelopeRegistry.from_manifest(str(manifest_path))
+    else:
+        registry = EnvelopeRegistry(base_dir=str(manifest_path.parent))
+    
+    # Store paths relative to the manifest so the registry can be moved as a whole
+    envelope_path = Path(envelope_path).resolve()
+    try:
+        entry_path = envelope_path.relative_to(manifest_path.parent.resolve())
+    except ValueError:
+        entry_path = envelope_path
+    
+    registry.register(device_model, firmware, wear, str(entry_path))
+    registry.save_manifest(str(manifest_path))
+    
+    print(f"Envelope registered in {manifest_path}: {device_model} (fw {firmware}, wear={wear})")
+
+
 def main():
     parser = argparse.ArgumentParser(description='Parse fio grid sweep results')
     parser.add_argument('results_dir', help='Directory containing fio JSON result files')
@@ -172,20 +208,39 @@ def main():
                        help='Output JSON file path')
     parser.add_argument('--csv', '-c', default='device_envelope.csv',
                        help='Output CSV file path')
+    parser.add_argument('--registry', help='Envelope registry manifest to add this envelope to')
+    parser.add_argument('--device-model', help='Device model name (required with --registry)')
+    parser.add_argument('--firmware', help='Firmware revision (required with --registry)')
+    parser.add_argument('--wear', type=float, default=0.0,
+                       help='Wear state of the device, e.g. NVMe percentage_used (default: 0)')
     
     args = parser.parse_args()
+    if args.registry and not (args.device_model and args.firmware):
+        parser.error('--registry requires --device-model and --firmware')
     
     print(f"Parsing fio results from: {args.results_dir}")
     
     # Parse grid sweep results
     grid_data = parse_grid_sweep_results(args.results_dir)
     
+    if args.registry:
+        grid_data['metadata'].update({
+            'device_model': args.device_model,
+            'firmware': args.firmware,
+            'wear': args.wear
+        })
+    
     # Save envelope model
     save_envelope_model(grid_data, args.output)
     
     # Create CSV summary
     create_csv_summary(grid_data, args.csv)
     
+    # Register in the fleet envelope registry
+    if args.registry:
+        register_envelope_model(args.registry, args.output, args.device_model,
+                                args.firmware, args.wear)
+    
     # Print summary statistics
     bandwidth_grid = np.array(grid_data['bandwidth_grid'])
     print(f"\nSummary statistics:")